@@ -5,16 +5,20 @@ AI responses.  The RAG engine (09-03) may not be available yet; when it is
 missing the endpoint falls back to a plain Gemini text generation.
 """
 
+import asyncio
+import json
 import logging
 import uuid
+from collections.abc import AsyncIterator
 from datetime import datetime, timezone
 
-from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi import APIRouter, Depends, HTTPException, Query, Request
+from fastapi.responses import StreamingResponse
+from google.cloud.firestore import Increment
 
 import google.generativeai as genai
 
-from app.config import get_settings
-from app.dependencies.auth import get_current_user
+from app.dependencies.auth import get_current_user, require_ceo
 from app.models.agent import COLLECTION_NAME as AGENTS_COLLECTION
 from app.models.base import ErrorResponse
 from app.models.chat import (
@@ -25,14 +29,25 @@ from app.models.chat import (
     ConversationResponse,
     MessageRole,
     SendMessageBody,
+    messages_collection_path,
 )
 from app.models.user import CurrentUser
+from app.utils.context_sources import bounded
+from app.utils.conversation_memory import get_conversation_memory
 from app.utils.firebase_client import get_firestore_client
+from app.utils.llm_gateway import get_llm_gateway
 
 logger = logging.getLogger(__name__)
 
 router = APIRouter()
 
+# Firestore allows at most 500 writes per batch
+MESSAGE_WRITE_BATCH_SIZE = 400
+
+# Windows' worth of old messages folded into the summary when a conversation
+# created before rolling memory is first continued
+LEGACY_MEMORY_SEED_WINDOWS = 4
+
 # ---------------------------------------------------------------------------
 # Lazy RAG import — 09-03 may not be deployed yet
 # ---------------------------------------------------------------------------
@@ -81,16 +96,134 @@ def _now_iso() -> str:
     return datetime.now(timezone.utc).isoformat()
 
 
-def _get_gemini_model(system_prompt: str | None = None) -> genai.GenerativeModel:
-    """Return a Gemini GenerativeModel using the configured API key."""
-    settings = get_settings()
-    api_key = settings.GEMINI_API_KEY or settings.GOOGLE_AI_API_KEY
-    if not api_key:
-        raise HTTPException(status_code=500, detail="Gemini API key is not configured")
-    genai.configure(api_key=api_key)
-    if system_prompt:
-        return genai.GenerativeModel("gemini-2.5-flash", system_instruction=system_prompt)
-    return genai.GenerativeModel("gemini-2.5-flash")
+def _message_docs(
+    db,
+    conversation_id: str,
+    limit: int | None = None,
+    newest: bool = False,
+    migrated: bool = False,
+) -> list:
+    """Return a conversation's message snapshots, oldest first.
+
+    Reads the conversation's ``messages`` subcollection.  Until the
+    conversation is marked ``messages_migrated``, its older messages may
+    still sit in the legacy flat collection while new ones land in the
+    subcollection, so both are read and merged by document ID.
+
+    Args:
+        db: Firestore client.
+        conversation_id: Conversation to read.
+        limit: Maximum number of messages.
+        newest: Keep the newest ``limit`` messages instead of the oldest.
+        migrated: The conversation's ``messages_migrated`` flag.
+    """
+    query = db.collection(messages_collection_path(conversation_id)).order_by(
+        "created_at", direction="DESCENDING" if newest else "ASCENDING"
+    )
+    if limit:
+        query = query.limit(limit)
+    docs = list(query.stream())
+
+    if not migrated:
+        # A message copied but not yet deleted by the migration appears in both
+        seen = {d.id for d in docs}
+        docs.extend(d for d in _legacy_message_docs(db, conversation_id) if d.id not in seen)
+
+    docs.sort(key=lambda d: d.to_dict().get("created_at", ""))
+    if limit:
+        docs = docs[-limit:] if newest else docs[:limit]
+    return docs
+
+
+def _legacy_message_docs(db, conversation_id: str | None = None) -> list:
+    """Return messages still in the flat collection, optionally for one conversation."""
+    query = db.collection(MESSAGES_COLLECTION)
+    if conversation_id is None:
+        return list(query.stream())
+    return [
+        d for d in query.where("conversation_id", "==", conversation_id).stream()
+        if d.to_dict().get("conversation_id") == conversation_id
+    ]
+
+
+def _delete_legacy_messages(db, conversation_id: str) -> int:
+    """Batch-delete a conversation's messages from the flat collection."""
+    docs = _legacy_message_docs(db, conversation_id)
+    for start in range(0, len(docs), MESSAGE_WRITE_BATCH_SIZE):
+        batch = db.batch()
+        for doc in docs[start:start + MESSAGE_WRITE_BATCH_SIZE]:
+            batch.delete(doc.reference)
+        batch.commit()
+    return len(docs)
+
+
+def migrate_flat_messages(db) -> dict:
+    """Move every message from the flat collection into its conversation's subcollection.
+
+    Each message is copied and deleted in the same batch, keeping its
+    document ID, so a re-run after a partial failure is safe.  Once every
+    message is moved, conversations are marked ``messages_migrated`` so
+    reads stop consulting the flat collection.
+
+    Returns:
+        Dict with ``moved`` and ``skipped`` (messages with no conversation_id).
+    """
+    moved = 0
+    skipped = 0
+    batch = db.batch()
+    pending = 0
+    for doc in _legacy_message_docs(db):
+        data = doc.to_dict()
+        conversation_id = data.get("conversation_id")
+        if not conversation_id:
+            skipped += 1
+            continue
+        batch.set(db.collection(messages_collection_path(conversation_id)).document(doc.id), data)
+        batch.delete(doc.reference)
+        moved += 1
+        pending += 2
+        if pending >= MESSAGE_WRITE_BATCH_SIZE:
+            batch.commit()
+            batch = db.batch()
+            pending = 0
+    if pending:
+        batch.commit()
+
+    _mark_conversations_migrated(db)
+
+    logger.info("Migrated %d chat messages to subcollections (%d skipped)", moved, skipped)
+    return {"moved": moved, "skipped": skipped}
+
+
+def _mark_conversations_migrated(db) -> int:
+    """Set ``messages_migrated`` on every conversation that lacks it."""
+    unmarked = [
+        doc for doc in db.collection(COLLECTION_NAME).stream()
+        if not doc.to_dict().get("messages_migrated")
+    ]
+    for start in range(0, len(unmarked), MESSAGE_WRITE_BATCH_SIZE):
+        batch = db.batch()
+        for doc in unmarked[start:start + MESSAGE_WRITE_BATCH_SIZE]:
+            batch.set(db.collection(COLLECTION_NAME).document(doc.id), {"messages_migrated": True}, merge=True)
+        batch.commit()
+    return len(unmarked)
+
+
+@router.post("/messages/migrate", response_model=dict)
+async def migrate_messages(
+    user: CurrentUser = Depends(require_ceo),
+):
+    """Move chat messages from the flat collection into per-conversation subcollections. CEO only."""
+    try:
+        db = get_firestore_client()
+        stats = await asyncio.to_thread(migrate_flat_messages, db)
+        return {"success": True, "data": stats}
+    except Exception as e:
+        logger.exception("Failed to migrate chat messages")
+        raise HTTPException(
+            status_code=500,
+            detail=ErrorResponse(error="Failed to migrate chat messages", detail=str(e)).model_dump(),
+        )
 
 
 # ===================================================================
@@ -162,16 +295,16 @@ async def create_conversation(
             "last_message_at": None,
             "created_at": now,
             "created_by": user.uid,
+            # New conversations never had messages in the flat collection
+            "messages_migrated": True,
         }
 
         db.collection(COLLECTION_NAME).document(conv_id).set(doc_dict)
 
         # Increment conversation_count on the agent
         try:
-            agent_ref = db.collection(AGENTS_COLLECTION).document(body.agent_id)
-            existing = agent_ref.get().to_dict() or {}
-            agent_ref.update({
-                "conversation_count": (existing.get("conversation_count", 0) + 1),
+            db.collection(AGENTS_COLLECTION).document(body.agent_id).update({
+                "conversation_count": Increment(1),
             })
         except Exception:
             logger.warning("Failed to increment conversation_count on agent %s", body.agent_id)
@@ -245,16 +378,11 @@ async def delete_conversation(
         if doc_dict.get("created_by") != user.uid:
             raise HTTPException(status_code=403, detail="Not authorized to delete this conversation")
 
-        # Delete all messages in this conversation
-        msgs_query = (
-            db.collection(MESSAGES_COLLECTION)
-            .where("conversation_id", "==", conversation_id)
-        )
-        for msg_doc in msgs_query.stream():
-            msg_doc.reference.delete()
+        # Delete the conversation and its messages subcollection in bulk
+        db.recursive_delete(doc_ref)
 
-        # Delete the conversation itself
-        doc_ref.delete()
+        # Conversations not yet migrated still have messages in the flat collection
+        _delete_legacy_messages(db, conversation_id)
 
         return {"success": True, "message": "Conversation deleted"}
     except HTTPException:
@@ -286,19 +414,14 @@ async def list_messages(
         conv_doc = db.collection(COLLECTION_NAME).document(conversation_id).get()
         if not conv_doc.exists:
             raise HTTPException(status_code=404, detail="Conversation not found")
-        if conv_doc.to_dict().get("created_by") != user.uid:
+        conv_data = conv_doc.to_dict()
+        if conv_data.get("created_by") != user.uid:
             raise HTTPException(status_code=403, detail="Not authorized")
 
-        # Sort in Python to avoid Firestore composite index requirements
-        query = (
-            db.collection(MESSAGES_COLLECTION)
-            .where("conversation_id", "==", conversation_id)
+        docs = _message_docs(
+            db, conversation_id, limit=limit, migrated=conv_data.get("messages_migrated", False)
         )
 
-        docs = list(query.stream())
-        docs.sort(key=lambda d: d.to_dict().get("created_at", ""))
-        docs = docs[:limit]
-
         messages = []
         for doc in docs:
             doc_dict = doc.to_dict()
@@ -316,190 +439,303 @@ async def list_messages(
         )
 
 
-@router.post("/{conversation_id}/messages", response_model=dict)
-async def send_message(
-    conversation_id: str,
-    body: SendMessageBody,
-    user: CurrentUser = Depends(get_current_user),
-):
-    """Send a user message and receive an AI assistant response.
+async def _load_client_context(agent_data: dict) -> str | None:
+    """Load and render live client context for a client-bound agent."""
+    from app.utils.client_agent import ClientAgent
+
+    client_agent = ClientAgent(agent_data)
+    context_data = await client_agent.get_client_context()
+    context_str = client_agent._build_context_prompt(context_data)
+    if not context_str or context_str == "No client context available.":
+        return None
+    return context_str
+
+
+def _load_history(db, conversation_id: str, limit: int, migrated: bool = False) -> list[dict]:
+    """Return the last ``limit`` messages of a conversation, oldest first."""
+    return [
+        d.to_dict() | {"id": d.id}
+        for d in _message_docs(db, conversation_id, limit=limit, newest=True, migrated=migrated)
+    ]
+
 
-    Pipeline:
-    1. Save user message to Firestore.
-    2. Fetch agent config (model, system_prompt, document_ids).
-    3. Fetch conversation history (last 20 messages).
-    4. Attempt to use RAGEngine for response generation.
-    5. If RAG unavailable, fall back to direct Gemini generation.
-    6. Save assistant message to Firestore.
-    7. Update conversation metadata (message_count, last_message_at).
-    8. Return both user and assistant messages.
+async def _start_turn(db, conversation_id: str, content: str, user: CurrentUser) -> dict:
+    """Verify ownership, then save the user message, fetch the agent and history.
+
+    Raises:
+        HTTPException: 404/403 if the conversation or agent is missing or not
+            owned by ``user``.
+
+    Returns:
+        Turn state dict consumed by ``_prepare_generation`` and ``_finish_turn``.
     """
-    try:
-        db = get_firestore_client()
+    # --- Verify conversation ownership ---
+    conv_ref = db.collection(COLLECTION_NAME).document(conversation_id)
+    conv_doc = await asyncio.to_thread(conv_ref.get)
+    if not conv_doc.exists:
+        raise HTTPException(status_code=404, detail="Conversation not found")
+
+    conv_data = conv_doc.to_dict()
+    if conv_data.get("created_by") != user.uid:
+        raise HTTPException(status_code=403, detail="Not authorized")
+
+    agent_id = conv_data.get("agent_id")
+
+    # --- Save user message, fetch agent config (and legacy history) concurrently ---
+    memory = get_conversation_memory()
+    user_msg_id = str(uuid.uuid4())
+    user_msg_dict = {
+        "conversation_id": conversation_id,
+        "role": MessageRole.USER.value,
+        "content": content,
+        "sources": [],
+        "created_at": _now_iso(),
+    }
+    pending = [
+        asyncio.to_thread(
+            db.collection(messages_collection_path(conversation_id)).document(user_msg_id).set,
+            user_msg_dict,
+        ),
+        asyncio.to_thread(db.collection(AGENTS_COLLECTION).document(agent_id).get),
+    ]
+    has_memory = memory.has_memory(conv_data)
+    if not has_memory:
+        # Conversation predates rolling memory: seed it from the latest messages.
+        # Anything beyond the window overflows into the summary on this turn.
+        pending.append(asyncio.to_thread(
+            _load_history, db, conversation_id, LEGACY_MEMORY_SEED_WINDOWS * memory.window_size,
+            conv_data.get("messages_migrated", False),
+        ))
+    results = await asyncio.gather(*pending)
+    agent_doc = results[1]
+    if not agent_doc.exists:
+        raise HTTPException(status_code=404, detail="Agent not found")
+
+    if has_memory:
+        window = memory.unsummarized(conv_data)
+    else:
+        # The history read may race the user-message write
+        window = [m for m in results[2] if m.get("id") != user_msg_id]
+
+    agent_data = agent_doc.to_dict()
+    agent_data["id"] = agent_id
+
+    return {
+        "conv_ref": conv_ref,
+        "conv_data": conv_data,
+        "agent_id": agent_id,
+        "agent_data": agent_data,
+        "user_message": ChatMessage(id=user_msg_id, **user_msg_dict).model_dump(mode="json"),
+        "memory_summary": memory.summary(conv_data),
+        "memory_window": window,
+        "memory_seeded": not has_memory,
+        "history_messages": [
+            {"role": m["role"], "content": m["content"]}
+            for m in window[-memory.window_size:] + [user_msg_dict]
+        ],
+    }
+
+
+async def _prepare_generation(turn: dict, content: str) -> dict:
+    """Load client context and RAG passages concurrently and build the system prompt.
+
+    Returns:
+        Dict with ``system_prompt``, ``rag`` (engine or None) and
+        ``assembled`` (assembled RAG context, or None without hits).
+    """
+    agent_id = turn["agent_id"]
+    agent_data = turn["agent_data"]
+    base_system_prompt = agent_data.get("system_prompt") or "You are a helpful AI assistant."
+    document_ids = agent_data.get("document_ids", [])
+    data_sources = agent_data.get("data_sources", [])
+    client_id = agent_data.get("client_id")
+
+    async def _skip() -> None:
+        return None
 
-        # --- Verify conversation ownership ---
-        conv_ref = db.collection(COLLECTION_NAME).document(conversation_id)
-        conv_doc = conv_ref.get()
-        if not conv_doc.exists:
-            raise HTTPException(status_code=404, detail="Conversation not found")
+    if client_id:
+        # No outer timeout: ClientAgent bounds each integration itself, and an
+        # outer bound would discard the Firestore context along with a slow source
+        context_coro = bounded(
+            f"Client context for agent {agent_id}", _load_client_context(agent_data), None,
+            timeout=None,
+        )
+    else:
+        logger.info(
+            "Agent %s has no client_id — skipping client context loading (data_sources=%s)",
+            agent_id, data_sources,
+        )
+        context_coro = _skip()
+
+    rag = _get_rag_engine()
+    if rag is not None and document_ids:
+        retrieval_coro = bounded(
+            f"RAG retrieval for agent {agent_id}",
+            rag.retrieve(query=content, agent_id=agent_id),
+            [],
+        )
+    else:
+        retrieval_coro = _skip()
+
+    context_str, rag_results = await asyncio.gather(context_coro, retrieval_coro)
+
+    system_prompt = base_system_prompt
+    if context_str:
+        system_prompt = (
+            f"{base_system_prompt}\n\n"
+            "## Live Client Context (fetched now)\n"
+            f"{context_str}\n\n"
+            "IMPORTANT: Use the context above to answer questions. "
+            "When the user asks about documents, files, projects, emails, "
+            "or meetings, refer to the data provided above. "
+            "Do NOT say you are 'just an AI' without access — you have "
+            "real client data loaded."
+        )
+        logger.info(
+            "Loaded client context for agent %s (client=%s, sources=%s)",
+            agent_id, client_id, data_sources,
+        )
+    elif client_id:
+        logger.warning(
+            "Client context was empty for agent %s (client=%s, sources=%s)",
+            agent_id, client_id, data_sources,
+        )
 
-        conv_data = conv_doc.to_dict()
-        if conv_data.get("created_by") != user.uid:
-            raise HTTPException(status_code=403, detail="Not authorized")
+    assembled = None
+    if rag_results:
+        try:
+            assembled = rag.assemble(rag_results)
+        except Exception:
+            logger.warning("RAG context assembly failed — using direct Gemini", exc_info=True)
 
-        agent_id = conv_data.get("agent_id")
+    return {"system_prompt": system_prompt, "rag": rag, "assembled": assembled}
 
-        # --- 1. Save user message ---
-        now = _now_iso()
-        user_msg_id = str(uuid.uuid4())
-        user_msg_dict = {
-            "conversation_id": conversation_id,
-            "role": MessageRole.USER.value,
-            "content": body.content,
-            "sources": [],
-            "created_at": now,
+
+def _rag_sources(assembled: dict) -> list[dict]:
+    """Return the source references stored with an assistant message."""
+    return [
+        {
+            "chunk_id": r["chunk_id"],
+            "document_id": r["document_id"],
+            "content": r["content"],
+            "score": r["score"],
         }
-        db.collection(MESSAGES_COLLECTION).document(user_msg_id).set(user_msg_dict)
+        for r in assembled["sources"]
+    ]
 
-        # --- 2. Fetch agent config ---
-        agent_doc = db.collection(AGENTS_COLLECTION).document(agent_id).get()
-        if not agent_doc.exists:
-            raise HTTPException(status_code=404, detail="Agent not found")
 
-        agent_data = agent_doc.to_dict()
-        agent_data["id"] = agent_id
-        base_system_prompt = agent_data.get("system_prompt") or "You are a helpful AI assistant."
-        document_ids = agent_data.get("document_ids", [])
-        data_sources = agent_data.get("data_sources", [])
+def _history_prompt(turn: dict, content: str) -> str:
+    """Render the conversation memory (summary + recent messages) as the direct-Gemini prompt."""
+    history_text_parts = []
+    if turn.get("memory_summary"):
+        history_text_parts.append(f"**summary of earlier conversation**: {turn['memory_summary']}")
+    for msg in turn["history_messages"]:
+        role = msg.get("role", "user")
+        text = msg.get("content", "")
+        history_text_parts.append(f"**{role}**: {text}")
+    return "\n\n".join(history_text_parts) if history_text_parts else content
 
-        # --- 2b. Load client context (Firestore + integrations) ---
-        system_prompt = base_system_prompt
-        client_id = agent_data.get("client_id")
 
-        if client_id:
-            try:
-                from app.utils.client_agent import ClientAgent
-                client_agent = ClientAgent(agent_data)
-                context_data = await client_agent.get_client_context()
-                context_str = client_agent._build_context_prompt(context_data)
-                if context_str and context_str != "No client context available.":
-                    system_prompt = (
-                        f"{base_system_prompt}\n\n"
-                        "## Live Client Context (fetched now)\n"
-                        f"{context_str}\n\n"
-                        "IMPORTANT: Use the context above to answer questions. "
-                        "When the user asks about documents, files, projects, emails, "
-                        "or meetings, refer to the data provided above. "
-                        "Do NOT say you are 'just an AI' without access — you have "
-                        "real client data loaded."
-                    )
-                    logger.info(
-                        "Loaded client context for agent %s (client=%s, sources=%s)",
-                        agent_id, client_id, data_sources,
-                    )
-                else:
-                    logger.warning(
-                        "Client context was empty for agent %s (client=%s, sources=%s)",
-                        agent_id, client_id, data_sources,
-                    )
-            except Exception:
-                logger.warning(
-                    "Failed to load client context for agent %s (client=%s) — using base prompt",
-                    agent_id, client_id, exc_info=True,
-                )
-        else:
-            logger.info(
-                "Agent %s has no client_id — skipping client context loading (data_sources=%s)",
-                agent_id, data_sources,
-            )
+_DIRECT_GENERATION_CONFIG = genai.GenerationConfig(temperature=0.7, max_output_tokens=4000)
 
-        # --- 3. Fetch conversation history (last 20) ---
-        # Sort in Python to avoid Firestore composite index requirements
-        history_query = (
-            db.collection(MESSAGES_COLLECTION)
-            .where("conversation_id", "==", conversation_id)
-        )
-        history_docs = list(history_query.stream())
-        history_docs.sort(key=lambda d: d.to_dict().get("created_at", ""))
-        history_docs = history_docs[:20]
-
-        history_messages = []
-        for msg_doc in history_docs:
-            msg = msg_doc.to_dict()
-            history_messages.append({
-                "role": msg["role"],
-                "content": msg["content"],
-            })
 
-        # --- 4 & 5. Generate AI response (RAG or direct Gemini) ---
+async def _finish_turn(db, conversation_id: str, turn: dict, content: str, sources: list[dict]) -> dict:
+    """Save the assistant message and update conversation metadata.
+
+    Returns:
+        The saved assistant message as a JSON-ready dict.
+    """
+    asst_now = _now_iso()
+    asst_msg_id = str(uuid.uuid4())
+    asst_msg_dict = {
+        "conversation_id": conversation_id,
+        "role": MessageRole.ASSISTANT.value,
+        "content": content,
+        "sources": sources,
+        "created_at": asst_now,
+    }
+    memory = get_conversation_memory()
+    memory_update, overflowed = memory.record_turn(
+        turn["memory_window"],
+        [turn["user_message"], asst_msg_dict],
+        seed=turn.get("memory_seeded", False),
+    )
+    await asyncio.gather(
+        asyncio.to_thread(
+            db.collection(messages_collection_path(conversation_id)).document(asst_msg_id).set,
+            asst_msg_dict,
+        ),
+        asyncio.to_thread(turn["conv_ref"].update, {
+            "message_count": Increment(2),  # user + assistant
+            "last_message_at": asst_now,
+            **memory_update,
+        }),
+    )
+    if overflowed:
+        memory.schedule_summary(conversation_id)
+    return ChatMessage(id=asst_msg_id, **asst_msg_dict).model_dump(mode="json")
+
+
+@router.post("/{conversation_id}/messages", response_model=dict)
+async def send_message(
+    conversation_id: str,
+    body: SendMessageBody,
+    user: CurrentUser = Depends(get_current_user),
+):
+    """Send a user message and receive an AI assistant response.
+
+    Independent steps run concurrently, so latency is roughly that of the
+    slowest dependency chain rather than the sum of every round trip:
+
+    1. Load the conversation (ownership check).
+    2. Concurrently: save the user message and fetch the agent.  History
+       comes from the conversation's rolling memory (summary + last N
+       messages) rather than a scan of every message.
+    3. Concurrently: load live client context (each integration bounded
+       by ``CONTEXT_SOURCE_TIMEOUT_SECONDS`` inside ``ClientAgent``) and run
+       RAG retrieval (bounded by the same timeout).
+    4. Generate the answer — grounded on the retrieved documents when there
+       are any, otherwise a direct Gemini call over the history.
+    5. Save the assistant message and update conversation metadata.
+    6. Return both user and assistant messages.
+    """
+    try:
+        db = get_firestore_client()
+        turn = await _start_turn(db, conversation_id, body.content, user)
+        generation = await _prepare_generation(turn, body.content)
+
         assistant_content = ""
         sources: list[dict] = []
 
-        rag = _get_rag_engine()
-
-        if rag is not None and document_ids:
-            # --- 4. RAG path ---
+        assembled = generation["assembled"]
+        if assembled:
             try:
-                rag_result = await rag.query(
+                assistant_content = await generation["rag"].generate_response(
                     query=body.content,
-                    agent_id=agent_id,
-                    system_prompt=system_prompt,
+                    context=assembled["context"],
+                    system_prompt=generation["system_prompt"],
                     model="gemini-2.5-flash",
                 )
-                assistant_content = rag_result.get("answer", "")
-                sources = rag_result.get("sources", [])
+                sources = _rag_sources(assembled)
             except Exception:
-                logger.warning("RAG query failed — falling back to direct Gemini", exc_info=True)
-                rag = None  # fall through to direct path
+                logger.warning("RAG generation failed — falling back to direct Gemini", exc_info=True)
+                sources = []
 
         if not assistant_content:
-            # --- 5. Direct Gemini fallback ---
-            # Build the prompt from conversation history
-            history_text_parts = []
-            for msg in history_messages:
-                role = msg.get("role", "user")
-                content = msg.get("content", "")
-                history_text_parts.append(f"**{role}**: {content}")
-
-            full_prompt = "\n\n".join(history_text_parts) if history_text_parts else body.content
-
-            model = _get_gemini_model(system_prompt=system_prompt)
-            response = await model.generate_content_async(
-                full_prompt,
-                generation_config=genai.GenerationConfig(
-                    temperature=0.7,
-                    max_output_tokens=4000,
-                ),
+            response = await get_llm_gateway().generate(
+                "chat",
+                _history_prompt(turn, body.content),
+                system_instruction=generation["system_prompt"],
+                generation_config=_DIRECT_GENERATION_CONFIG,
             )
             assistant_content = response.text or ""
 
-        # --- 6. Save assistant message ---
-        asst_now = _now_iso()
-        asst_msg_id = str(uuid.uuid4())
-        asst_msg_dict = {
-            "conversation_id": conversation_id,
-            "role": MessageRole.ASSISTANT.value,
-            "content": assistant_content,
-            "sources": sources,
-            "created_at": asst_now,
-        }
-        db.collection(MESSAGES_COLLECTION).document(asst_msg_id).set(asst_msg_dict)
-
-        # --- 7. Update conversation metadata ---
-        current_count = conv_data.get("message_count", 0)
-        conv_ref.update({
-            "message_count": current_count + 2,  # user + assistant
-            "last_message_at": asst_now,
-        })
-
-        # --- 8. Return both messages ---
-        user_message = ChatMessage(id=user_msg_id, **user_msg_dict).model_dump(mode="json")
-        assistant_message = ChatMessage(id=asst_msg_id, **asst_msg_dict).model_dump(mode="json")
+        assistant_message = await _finish_turn(db, conversation_id, turn, assistant_content, sources)
 
         return {
             "success": True,
             "data": {
-                "user_message": user_message,
+                "user_message": turn["user_message"],
                 "assistant_message": assistant_message,
             },
         }
@@ -511,3 +747,122 @@ async def send_message(
             status_code=500,
             detail=ErrorResponse(error="Failed to send message", detail=str(e)).model_dump(),
         )
+
+
+# ===================================================================
+# Streaming (Server-Sent Events)
+# ===================================================================
+
+
+def _sse(event: str, data) -> str:
+    """Format one Server-Sent Events frame."""
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+
+async def _stream_turn(
+    request: Request,
+    db,
+    conversation_id: str,
+    turn: dict,
+    content: str,
+) -> AsyncIterator[str]:
+    """Emit ``user_message``, ``token``*, ``sources`` and ``done`` events.
+
+    The assistant message is persisted once generation finishes.  If the
+    client disconnects mid-stream, generation stops and whatever was
+    produced so far is saved so the conversation stays consistent.
+    """
+    yield _sse("user_message", turn["user_message"])
+
+    parts: list[str] = []
+    sources: list[dict] = []
+    finished = False
+    try:
+        generation = await _prepare_generation(turn, content)
+
+        assembled = generation["assembled"]
+        if assembled:
+            try:
+                stream = generation["rag"].generate_response_stream(
+                    query=content,
+                    context=assembled["context"],
+                    system_prompt=generation["system_prompt"],
+                    model="gemini-2.5-flash",
+                )
+                async for text in stream:
+                    parts.append(text)
+                    yield _sse("token", {"text": text})
+                    if await request.is_disconnected():
+                        return
+                sources = _rag_sources(assembled)
+            except Exception:
+                if parts:
+                    raise
+                logger.warning("RAG generation failed — falling back to direct Gemini", exc_info=True)
+
+        if not parts:
+            stream = get_llm_gateway().stream(
+                "chat_stream",
+                _history_prompt(turn, content),
+                system_instruction=generation["system_prompt"],
+                generation_config=_DIRECT_GENERATION_CONFIG,
+            )
+            async for text in stream:
+                parts.append(text)
+                yield _sse("token", {"text": text})
+                if await request.is_disconnected():
+                    return
+
+        yield _sse("sources", sources)
+        assistant_message = await _finish_turn(db, conversation_id, turn, "".join(parts), sources)
+        finished = True
+        yield _sse("done", {"assistant_message": assistant_message})
+    except Exception as e:
+        logger.exception("Streaming reply failed in conversation %s", conversation_id)
+        detail = e.detail if isinstance(e, HTTPException) else str(e)
+        yield _sse("error", ErrorResponse(error="Failed to send message", detail=str(detail)).model_dump())
+    finally:
+        if not finished and parts:
+            # Client went away (or generation broke) mid-stream: keep the partial reply
+            logger.info("Saving partial reply in conversation %s after interrupted stream", conversation_id)
+            try:
+                await asyncio.shield(
+                    _finish_turn(db, conversation_id, turn, "".join(parts), sources)
+                )
+            except BaseException:
+                logger.warning("Failed to save partial reply in conversation %s", conversation_id)
+
+
+@router.post("/{conversation_id}/messages/stream")
+async def stream_message(
+    conversation_id: str,
+    body: SendMessageBody,
+    request: Request,
+    user: CurrentUser = Depends(get_current_user),
+):
+    """Send a user message and stream the assistant reply as Server-Sent Events.
+
+    Events, in order:
+    - ``user_message``: the saved user message (sent immediately).
+    - ``token``: ``{"text": ...}`` fragments of the reply as they arrive.
+    - ``sources``: RAG sources used for the reply (may be empty).
+    - ``done``: ``{"assistant_message": ...}`` once the reply is saved.
+    - ``error``: an ``ErrorResponse`` if generation fails mid-stream.
+    """
+    try:
+        db = get_firestore_client()
+        turn = await _start_turn(db, conversation_id, body.content, user)
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.exception("Failed to send message in conversation %s", conversation_id)
+        raise HTTPException(
+            status_code=500,
+            detail=ErrorResponse(error="Failed to send message", detail=str(e)).model_dump(),
+        )
+
+    return StreamingResponse(
+        _stream_turn(request, db, conversation_id, turn, body.content),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
@@ -19,7 +19,9 @@ from app.models.client import (
     PartnerGroup,
 )
 from app.models.user import CurrentUser
+from app.utils.client_context_cache import invalidate_client_context
 from app.utils.firebase_client import get_firestore_client
+from app.utils.transcript_processor import invalidate_name_indexes
 
 logger = logging.getLogger(__name__)
 
@@ -43,6 +45,7 @@ async def create_client(
 
         # Firestore generates the document ID
         _, doc_ref = db.collection(COLLECTION_NAME).add(doc_dict)
+        invalidate_name_indexes(COLLECTION_NAME)
 
         return {
             "success": True,
@@ -172,6 +175,9 @@ async def bulk_create_clients(
         except Exception as e:
             errors.append({"index": i, "name": item.name, "error": str(e)})
 
+    if created:
+        invalidate_name_indexes(COLLECTION_NAME)
+
     return {
         "success": True,
         "data": {
@@ -232,6 +238,8 @@ async def update_client(
         update_dict["updated_at"] = datetime.utcnow()
 
         doc_ref.update(update_dict)
+        invalidate_client_context(client_id)
+        invalidate_name_indexes(COLLECTION_NAME)
 
         # Fetch updated document to return full response
         updated_doc = doc_ref.get()
@@ -274,6 +282,8 @@ async def delete_client(
             "is_active": False,
             "updated_at": datetime.utcnow(),
         })
+        invalidate_client_context(client_id)
+        invalidate_name_indexes(COLLECTION_NAME)
 
         return {"success": True, "message": "Client deactivated"}
     except HTTPException:
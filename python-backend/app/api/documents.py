@@ -1,9 +1,9 @@
 """Document upload, processing, and retrieval API endpoints."""
 
 import logging
-from datetime import datetime
+from datetime import datetime, timezone
 
-from fastapi import APIRouter, Depends, HTTPException, Query, UploadFile
+from fastapi import APIRouter, BackgroundTasks, Depends, HTTPException, Query, UploadFile
 
 from app.dependencies.auth import get_current_user, require_ceo
 from app.models.base import ErrorResponse
@@ -13,42 +13,54 @@ from app.models.document import (
     DocumentChunk,
     DocumentResponse,
     DocumentStatus,
+    IngestionStage,
 )
 from app.models.user import CurrentUser
-from app.utils.document_processor import DocumentProcessor
+from app.utils.document_ingestion import get_ingestion_worker
 from app.utils.firebase_client import get_firestore_client
+from app.utils.vector_store import get_vector_store
 
 logger = logging.getLogger(__name__)
 
 router = APIRouter()
 
 
-@router.post("/", response_model=dict)
+@router.post("/", response_model=dict, status_code=202)
 async def upload_document(
     file: UploadFile,
+    background_tasks: BackgroundTasks,
     agent_id: str | None = None,
     client_id: str | None = None,
     user: CurrentUser = Depends(get_current_user),
 ):
-    """Upload a file, extract text, chunk it, and store in Firestore.
+    """Upload a file and queue it for background ingestion.
 
-    Processing is performed synchronously before returning.
+    Returns 202 immediately with the document in ``processing`` status.
+    Extraction, chunking, embedding and indexing run in the background;
+    poll ``GET /documents/{id}`` for ``ingestion_stage`` and
+    ``chunks_done``/``chunks_total`` progress.
     """
     try:
         db = get_firestore_client()
+        worker = get_ingestion_worker()
         file_content = await file.read()
         now = datetime.utcnow()
 
         # Create the document record
         doc_dict = {
-            "filename": file.filename,
+            "filename": file.filename or "unknown.txt",
             "file_type": file.content_type,
             "file_size": len(file_content),
             "status": DocumentStatus.PROCESSING.value,
             "agent_id": agent_id,
             "client_id": client_id,
             "chunk_count": 0,
+            "ingestion_stage": IngestionStage.QUEUED.value,
+            "chunks_done": 0,
+            "chunks_total": 0,
             "error_message": None,
+            # Marks the upload as live so other workers do not resume it
+            "ingestion_updated_at": datetime.now(timezone.utc).isoformat(),
             "uploaded_at": now,
             "uploaded_by": user.uid,
         }
@@ -56,19 +68,12 @@ async def upload_document(
         _, doc_ref = db.collection(COLLECTION_NAME).add(doc_dict)
         doc_id = doc_ref.id
 
-        # Process synchronously
-        result = await DocumentProcessor.process_document(
-            doc_id, file_content, file.filename or "unknown.txt"
-        )
-
-        # Fetch the updated document
-        updated = doc_ref.get().to_dict()
-        updated["id"] = doc_id
+        worker.stage_upload(doc_id, file_content)
+        background_tasks.add_task(worker.run, doc_id, doc_dict["ingestion_updated_at"])
 
         return {
             "success": True,
-            "data": DocumentResponse(**updated).model_dump(mode="json"),
-            "processing": result,
+            "data": DocumentResponse(id=doc_id, **doc_dict).model_dump(mode="json"),
         }
     except Exception as e:
         logger.exception("Failed to upload document")
@@ -78,6 +83,22 @@ async def upload_document(
         )
 
 
+@router.post("/embeddings/migrate", response_model=dict)
+async def migrate_embeddings(
+    user: CurrentUser = Depends(require_ceo),
+):
+    """Convert legacy float-array embeddings to the packed storage format. CEO only."""
+    try:
+        stats = await get_vector_store().migrate_embeddings()
+        return {"success": True, "data": stats}
+    except Exception as e:
+        logger.exception("Failed to migrate embeddings")
+        raise HTTPException(
+            status_code=500,
+            detail=ErrorResponse(error="Failed to migrate embeddings", detail=str(e)).model_dump(),
+        )
+
+
 @router.get("/", response_model=dict)
 async def list_documents(
     agent_id: str | None = None,
@@ -192,7 +213,7 @@ async def delete_document(
     document_id: str,
     user: CurrentUser = Depends(require_ceo),
 ):
-    """Delete a document and all its chunks. CEO only."""
+    """Delete a document, its chunks and its embeddings. CEO only."""
     try:
         db = get_firestore_client()
         doc_ref = db.collection(COLLECTION_NAME).document(document_id)
@@ -208,6 +229,11 @@ async def delete_document(
             batch.delete(chunk_doc.reference)
         batch.commit()
 
+        # Delete indexed embeddings so the document stops appearing in search
+        await get_vector_store().delete_document_embeddings(document_id)
+
+        get_ingestion_worker().discard_upload(document_id)
+
         # Delete the document itself
         doc_ref.delete()
 
@@ -4,17 +4,19 @@ Provides CRUD operations for meetings, sync from external sources,
 and AI-powered transcript processing.
 """
 
+import asyncio
 import logging
-from datetime import datetime
+from datetime import datetime, timedelta
 
-from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi import APIRouter, BackgroundTasks, Depends, HTTPException, Query
 
 from app.dependencies.auth import get_current_user, require_ceo
 from app.models.base import ErrorResponse
 from app.models.meeting import (
     BRIEFING_COLLECTION,
     COLLECTION_NAME,
-    TRANSCRIPT_COLLECTION,
+    PROCESSING_JOB_COLLECTION,
+    BatchProcessRequest,
     BriefingRequest,
     MeetingBriefing,
     MeetingCreate,
@@ -24,15 +26,25 @@ from app.models.meeting import (
 )
 from app.models.user import CurrentUser
 from app.utils.briefing_generator import get_briefing_generator
+from app.utils.client_context_cache import invalidate_client_context
 from app.utils.firebase_client import get_firestore_client
-from app.utils.meeting_sync import get_meeting_sync_service
+from app.utils.meeting_sync import get_meeting_sync_service, parse_meeting_date
+from app.utils.speaker_analytics import aggregate_talk_time
+from app.utils.transcript_batch import get_batch_worker
 from app.utils.transcript_processor import get_transcript_processor
+from app.utils.transcript_store import delete_transcript, read_header, read_segments, read_text
 
 logger = logging.getLogger(__name__)
 
 router = APIRouter()
 
 
+def _load_transcript_text(db, meeting_id: str) -> str | None:
+    """Return a meeting's full transcript text, or ``None`` if it has none."""
+    header = read_header(db, meeting_id)
+    return read_text(db, header) if header else None
+
+
 # ---------------------------------------------------------------------------
 # Fixed-path routes FIRST (before /{meeting_id} param routes)
 # ---------------------------------------------------------------------------
@@ -52,11 +64,14 @@ async def integration_status(
 
         # Check for last sync timestamp in Firestore
         last_sync: str | None = None
+        watermarks: dict = {}
         try:
             db = get_firestore_client()
             meta_doc = db.collection("_meta").document("meeting_sync").get()
             if meta_doc.exists:
-                last_sync = meta_doc.to_dict().get("last_sync")
+                meta = meta_doc.to_dict()
+                last_sync = meta.get("last_sync")
+                watermarks = meta.get("watermarks") or {}
         except Exception:
             logger.debug("Could not read sync metadata")
 
@@ -66,6 +81,7 @@ async def integration_status(
                 "readai_configured": readai.is_configured(),
                 "fireflies_configured": fireflies.is_configured(),
                 "last_sync": last_sync,
+                "watermarks": watermarks,
             },
         }
     except Exception as e:
@@ -80,12 +96,17 @@ async def integration_status(
 
 @router.post("/sync", response_model=dict)
 async def trigger_sync(
+    full: bool = Query(False, description="Ignore sync watermarks and re-list all meetings"),
     user: CurrentUser = Depends(require_ceo),
 ):
-    """Trigger a full meeting sync from all configured sources (CEO only)."""
+    """Trigger a meeting sync from all configured sources (CEO only).
+
+    Routine syncs are incremental from each source's watermark; pass
+    ``full=true`` to re-list everything (unchanged meetings are still skipped).
+    """
     try:
         service = get_meeting_sync_service()
-        result = await service.sync_all()
+        result = await service.sync_all(full=full)
 
         # Record last sync timestamp
         try:
@@ -95,9 +116,10 @@ async def trigger_sync(
                 "last_sync_by": user.uid,
                 "last_result": {
                     "total_synced": result["total_synced"],
+                    "total_skipped": result.get("total_skipped", 0),
                     "total_errors": result["total_errors"],
                 },
-            })
+            }, merge=True)  # keep per-source watermarks written by the service
         except Exception:
             logger.debug("Could not write sync metadata")
 
@@ -112,6 +134,116 @@ async def trigger_sync(
         )
 
 
+@router.post("/process/batch", response_model=dict, status_code=202)
+async def batch_process_transcripts(
+    background_tasks: BackgroundTasks,
+    body: BatchProcessRequest | None = None,
+    user: CurrentUser = Depends(require_ceo),
+):
+    """Queue AI processing for every meeting with an unprocessed transcript (CEO only).
+
+    A meeting is pending when it has a transcript whose hash differs from
+    the ``processed_transcript_hash`` recorded by its last processing run
+    (``force`` includes unchanged ones too).  Pending meetings are selected
+    by the background job, so this returns 202 with the queued job record
+    at once; poll ``GET /meetings/process/batch/{job_id}`` for progress.
+    """
+    body = body or BatchProcessRequest()
+    try:
+        worker = get_batch_worker()
+        job = await worker.create_job(user.uid, force=body.force, limit=body.limit)
+        background_tasks.add_task(worker.run_job, job["id"], body.force, body.limit)
+        return {"success": True, "data": job}
+    except Exception as e:
+        logger.exception("Failed to queue batch transcript processing")
+        raise HTTPException(
+            status_code=500,
+            detail=ErrorResponse(
+                error="Failed to queue batch transcript processing", detail=str(e)
+            ).model_dump(),
+        )
+
+
+@router.get("/process/batch/{job_id}", response_model=dict)
+async def get_batch_process_job(
+    job_id: str,
+    user: CurrentUser = Depends(require_ceo),
+):
+    """Return progress of a batch transcript processing job (CEO only)."""
+    db = get_firestore_client()
+    doc = db.collection(PROCESSING_JOB_COLLECTION).document(job_id).get()
+    if not doc.exists:
+        raise HTTPException(status_code=404, detail="Processing job not found")
+    return {"success": True, "data": {"id": doc.id, **doc.to_dict()}}
+
+
+@router.get("/analytics/talk-time", response_model=dict)
+async def talk_time_analytics(
+    date_from: str | None = Query(None, description="Include meetings from this date (ISO 8601)"),
+    date_to: str | None = Query(None, description="Include meetings up to this date (ISO 8601)"),
+    interval: str = Query("week", pattern="^(day|week|month)$", description="Trend bucket size"),
+    client_id: str | None = Query(None, description="Filter by client ID"),
+    user: CurrentUser = Depends(get_current_user),
+):
+    """Team talk-time, turn and interruption trends over a date range.
+
+    Served entirely from the ``speaker_stats`` stored on each meeting at
+    transcript sync time; no transcripts are read.
+    """
+    try:
+        start = parse_meeting_date(date_from)
+        end = parse_meeting_date(date_to)
+        if end is not None and date_to and len(date_to) <= 10:
+            # A bare date includes the whole day
+            end += timedelta(days=1) - timedelta(microseconds=1)
+
+        # One server-side filter only, to avoid Firestore composite index
+        # requirements; the exact range is applied in Python below
+        db = get_firestore_client()
+        query = db.collection(COLLECTION_NAME)
+        if client_id:
+            query = query.where("client_id", "==", client_id)
+        elif start is not None:
+            # Stored dates are ISO strings in mixed offsets; a day of slack
+            # keeps the string comparison from dropping in-range meetings
+            query = query.where("date", ">=", (start - timedelta(days=1)).date().isoformat())
+        docs = await asyncio.to_thread(lambda: list(query.stream()))
+
+        selected: list[tuple[datetime, list[dict]]] = []
+        without_stats = 0
+        for doc in docs:
+            data = doc.to_dict()
+            if client_id and data.get("client_id") != client_id:
+                continue
+            moment = parse_meeting_date(data.get("date"))
+            if moment is None or (start and moment < start) or (end and moment > end):
+                continue
+            if "speaker_stats" not in data:
+                if data.get("has_transcript"):
+                    without_stats += 1
+                continue
+            selected.append((moment, data["speaker_stats"]))
+
+        result = aggregate_talk_time(selected, interval=interval)
+        return {
+            "success": True,
+            "data": {
+                **result,
+                "interval": interval,
+                "meetings": len(selected),
+                "meetings_without_stats": without_stats,
+            },
+        }
+    except Exception as e:
+        logger.exception("Failed to compute talk-time analytics")
+        raise HTTPException(
+            status_code=500,
+            detail=ErrorResponse(
+                error="Failed to compute talk-time analytics", detail=str(e)
+            ).model_dump(),
+        )
+
+
 # ---------------------------------------------------------------------------
 # Collection routes
 # ---------------------------------------------------------------------------
@@ -195,6 +327,7 @@ async def create_meeting(
                 pass
 
         _, doc_ref = db.collection(COLLECTION_NAME).add(doc_dict)
+        invalidate_client_context(body.client_id)
 
         doc_dict["id"] = doc_ref.id
         return {
@@ -243,15 +376,7 @@ async def generate_briefing(
         # Resolve transcript text
         transcript_text: str | None = None
         try:
-            transcript_query = (
-                db.collection(TRANSCRIPT_COLLECTION)
-                .where("meeting_id", "==", meeting_id)
-                .limit(1)
-            )
-            for t_doc in transcript_query.stream():
-                t_data = t_doc.to_dict()
-                transcript_text = t_data.get("full_text", "")
-                break
+            transcript_text = await asyncio.to_thread(_load_transcript_text, db, meeting_id)
         except Exception:
             logger.debug(
                 "Could not query transcripts collection for meeting %s",
@@ -268,6 +393,7 @@ async def generate_briefing(
             meeting=meeting_data,
             transcript_text=transcript_text,
             format=body.format,
+            refresh=body.refresh,
         )
 
         # Save the briefing
@@ -411,6 +537,7 @@ async def update_meeting(
                 pass
 
         doc_ref.update(update_dict)
+        invalidate_client_context(doc.to_dict().get("client_id"), body.client_id)
 
         updated_doc = doc_ref.get()
         updated_dict = updated_doc.to_dict()
@@ -445,13 +572,11 @@ async def delete_meeting(
         if not doc.exists:
             raise HTTPException(status_code=404, detail="Meeting not found")
 
-        # Also remove associated transcript
-        transcript_id = f"transcript_{meeting_id}"
-        transcript_ref = db.collection(TRANSCRIPT_COLLECTION).document(transcript_id)
-        if transcript_ref.get().exists:
-            transcript_ref.delete()
+        # Also remove associated transcript (header and compressed blocks)
+        delete_transcript(db, meeting_id)
 
         doc_ref.delete()
+        invalidate_client_context(doc.to_dict().get("client_id"))
 
         return {"success": True, "message": "Meeting deleted"}
     except HTTPException:
@@ -469,9 +594,22 @@ async def delete_meeting(
 @router.get("/{meeting_id}/transcript", response_model=dict)
 async def get_transcript(
     meeting_id: str,
+    start: int | None = Query(None, ge=0, description="First segment index (inclusive)"),
+    end: int | None = Query(None, ge=0, description="Last segment index (exclusive)"),
+    start_time: float | None = Query(None, ge=0, description="Window start in seconds"),
+    end_time: float | None = Query(None, ge=0, description="Window end in seconds"),
+    include_text: bool | None = Query(
+        None, description="Include full_text (default: only for unranged reads)"
+    ),
     user: CurrentUser = Depends(get_current_user),
 ):
-    """Get the transcript for a specific meeting."""
+    """Get the transcript for a specific meeting.
+
+    With no range parameters the whole transcript is returned.  With a
+    segment (``start``/``end``) or time (``start_time``/``end_time``)
+    range, only the compressed blocks covering that range are read and
+    ``full_text`` is omitted unless ``include_text`` is set.
+    """
     try:
         db = get_firestore_client()
 
@@ -480,19 +618,38 @@ async def get_transcript(
         if not meeting_doc.exists:
             raise HTTPException(status_code=404, detail="Meeting not found")
 
-        transcript_id = f"transcript_{meeting_id}"
-        transcript_doc = db.collection(TRANSCRIPT_COLLECTION).document(transcript_id).get()
-
-        if not transcript_doc.exists:
+        header = await asyncio.to_thread(read_header, db, meeting_id)
+        if header is None:
             raise HTTPException(
                 status_code=404, detail="Transcript not found for this meeting"
             )
 
-        doc_dict = transcript_doc.to_dict()
-        doc_dict["id"] = transcript_doc.id
+        ranged = any(v is not None for v in (start, end, start_time, end_time))
+        segments, first, last = await asyncio.to_thread(
+            read_segments, db, header, start, end, start_time, end_time
+        )
+        full_text = ""
+        if include_text or (include_text is None and not ranged):
+            full_text = await asyncio.to_thread(read_text, db, header)
+
+        segment_count = header.get("segment_count")
+        if segment_count is None:
+            segment_count = len(header.get("segments") or [])
+        transcript = MeetingTranscript(
+            id=header["id"],
+            meeting_id=header.get("meeting_id", meeting_id),
+            segments=segments,
+            full_text=full_text,
+            word_count=header.get("word_count", 0),
+            created_at=header.get("created_at", ""),
+            segment_count=segment_count,
+            speakers=header.get("speakers") or list(dict.fromkeys(s["speaker"] for s in segments)),
+            duration_seconds=header.get("duration_seconds"),
+            segment_range=[first, last],
+        )
         return {
             "success": True,
-            "data": MeetingTranscript(**doc_dict).model_dump(mode="json"),
+            "data": transcript.model_dump(mode="json"),
         }
     except HTTPException:
         raise
@@ -514,6 +671,7 @@ async def get_transcript(
 @router.post("/{meeting_id}/process", response_model=dict)
 async def process_meeting_transcript(
     meeting_id: str,
+    refresh: bool = Query(False, description="Regenerate the summary instead of using the cached one"),
     user: CurrentUser = Depends(require_ceo),
 ):
     """Trigger AI processing of a meeting transcript (CEO only).
@@ -542,15 +700,7 @@ async def process_meeting_transcript(
 
         # Try top-level transcripts collection
         try:
-            transcript_query = (
-                db.collection(TRANSCRIPT_COLLECTION)
-                .where("meeting_id", "==", meeting_id)
-                .limit(1)
-            )
-            for t_doc in transcript_query.stream():
-                t_data = t_doc.to_dict()
-                transcript_text = t_data.get("full_text", "")
-                break
+            transcript_text = await asyncio.to_thread(_load_transcript_text, db, meeting_id)
         except Exception:
             logger.debug(
                 "Could not query transcripts collection for meeting %s",
@@ -568,7 +718,7 @@ async def process_meeting_transcript(
 
         # Process -----------------------------------------------------------
         processor = get_transcript_processor()
-        result = await processor.process_transcript(meeting_id, transcript_text)
+        result = await processor.process_transcript(meeting_id, transcript_text, refresh=refresh)
 
         return {
             "success": True,
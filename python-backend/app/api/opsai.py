@@ -5,13 +5,14 @@ Includes proactive intelligence alert endpoints (plan 10-02).
 
 import logging
 
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Query
 from pydantic import BaseModel
 
 from app.dependencies.auth import get_current_user, require_ceo
 from app.models.base import ErrorResponse
 from app.models.user import CurrentUser
 from app.utils.firebase_client import get_firestore_client
+from app.utils.llm_gateway import get_llm_gateway
 from app.utils.opsai_engine import get_opsai_engine
 from app.utils.proactive_engine import ProactiveEngine
 
@@ -171,6 +172,14 @@ async def opsai_status(
         )
 
 
+@router.get("/llm-usage", response_model=dict)
+async def llm_usage(
+    user: CurrentUser = Depends(require_ceo),
+):
+    """Return per-call-site Gemini latency, retry and token usage since startup."""
+    return {"success": True, "data": get_llm_gateway().stats()}
+
+
 # ---------------------------------------------------------------------------
 # Proactive intelligence alert schemas (plan 10-02)
 # ---------------------------------------------------------------------------
@@ -248,6 +257,7 @@ async def get_alerts(
 
 @router.get("/alerts/summary", response_model=dict)
 async def get_alerts_summary(
+    refresh: bool = Query(False, description="Regenerate the summary instead of using the cached one"),
     user: CurrentUser = Depends(get_current_user),
 ):
     """Run all proactive checks and generate an AI-powered executive summary.
@@ -258,7 +268,7 @@ async def get_alerts_summary(
     try:
         engine = _get_proactive_engine()
         result = await engine.run_all_checks()
-        insight = await engine.generate_insight_summary(result["alerts"])
+        insight = await engine.generate_insight_summary(result["alerts"], refresh=refresh)
         return {
             "success": True,
             "data": {
@@ -171,6 +171,7 @@ async def export_report(
     period_start: date = Query(..., description="Start of reporting period"),
     period_end: date = Query(..., description="End of reporting period"),
     format: str = Query("text", description="Export format: text or summary"),
+    refresh: bool = Query(False, description="Regenerate the AI summary instead of using the cached one"),
     user: CurrentUser = Depends(get_current_user),
 ):
     """Export report as structured text or AI-generated executive summary."""
@@ -183,7 +184,7 @@ async def export_report(
 
         exporter = _get_exporter()
         if format == "summary":
-            content = await exporter.generate_ai_summary(report_data)
+            content = await exporter.generate_ai_summary(report_data, refresh=refresh)
         else:
             content = await exporter.generate_text_report(report_data)
 
@@ -1,7 +1,6 @@
 """Sage Business Cloud Accounting connection management and data sync endpoints."""
 
 import logging
-from datetime import date, timedelta
 
 from fastapi import APIRouter, Depends, HTTPException, Query
 from fastapi.responses import HTMLResponse
@@ -112,6 +111,7 @@ async def sage_disconnect(user: CurrentUser = Depends(require_ceo)):
         from app.models.financial import SAGE_CREDENTIALS_COLLECTION
 
         db.collection(SAGE_CREDENTIALS_COLLECTION).document("current").delete()
+        get_sage_client().clear_cached_credentials()
         logger.info("Sage credentials removed by user %s", user.uid)
     except Exception:
         logger.exception("Failed to delete Sage credentials")
@@ -125,14 +125,15 @@ async def sage_disconnect(user: CurrentUser = Depends(require_ceo)):
 
 @router.post("/sync")
 async def sage_sync(
-    full: bool = Query(False, description="Run a full sync (True) or incremental last-7-days sync (False)"),
+    full: bool = Query(False, description="Run a full sync (True) or incremental watermark sync (False)"),
     user: CurrentUser = Depends(require_ceo),
 ):
     """Trigger a manual sync of financial data from Sage.
 
     CEO-only endpoint.
 
-    - ``full=False`` (default): incremental sync of the last 7 days.
+    - ``full=False`` (default): incremental sync of invoices and payments
+      changed since the last successful sync.
     - ``full=True``: full sync of all invoices, payments, and creates a snapshot.
     """
     client = get_sage_client()
@@ -143,15 +144,9 @@ async def sage_sync(
 
     try:
         if full:
-            result = await sync_service.full_sync()
+            result = await sync_service.full_sync(full=True)
         else:
-            since = date.today() - timedelta(days=7)
-            invoice_result = await sync_service.sync_invoices(since=since)
-            payment_result = await sync_service.sync_payments(since=since)
-            result = {
-                "invoices": invoice_result,
-                "payments": payment_result,
-            }
+            result = await sync_service.sync_changes()
     except Exception as exc:
         logger.exception("Sage sync failed")
         raise HTTPException(status_code=500, detail=f"Sync failed: {exc}")
@@ -25,7 +25,9 @@ from app.models.task import (
     TaskUpdate,
 )
 from app.models.user import CurrentUser
+from app.utils.client_context_cache import invalidate_client_context
 from app.utils.firebase_client import get_firestore_client
+from app.utils.transcript_processor import invalidate_name_indexes
 
 logger = logging.getLogger(__name__)
 
@@ -101,6 +103,8 @@ async def create_task(
         doc_dict["attachments"] = []
 
         _, doc_ref = db.collection(COLLECTION_NAME).add(doc_dict)
+        invalidate_client_context(doc_dict.get("client_id"))
+        invalidate_name_indexes(COLLECTION_NAME)
 
         # Build response with the generated ID
         doc_dict["id"] = doc_ref.id
@@ -241,6 +245,8 @@ async def bulk_create_tasks(
             doc_dict["attachments"] = []
 
             _, doc_ref = db.collection(COLLECTION_NAME).add(doc_dict)
+            invalidate_client_context(doc_dict.get("client_id"))
+            invalidate_name_indexes(COLLECTION_NAME)
             created.append({"id": doc_ref.id, "title": item.title})
         except Exception as e:
             errors.append({"index": i, "title": item.title, "error": str(e)})
@@ -305,6 +311,8 @@ async def update_task(
         update_dict["updated_at"] = datetime.utcnow()
 
         doc_ref.update(update_dict)
+        invalidate_client_context(doc.to_dict().get("client_id"), update_dict.get("client_id"))
+        invalidate_name_indexes(COLLECTION_NAME)
 
         # Re-fetch and return updated task
         updated_doc = doc_ref.get()
@@ -332,6 +340,8 @@ async def delete_task(
             raise HTTPException(status_code=404, detail="Task not found")
 
         doc_ref.delete()
+        invalidate_client_context(doc.to_dict().get("client_id"))
+        invalidate_name_indexes(COLLECTION_NAME)
         return BaseResponse(success=True, message="Task deleted")
     except HTTPException:
         raise
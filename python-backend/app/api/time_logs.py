@@ -18,6 +18,7 @@ from app.models.time_log import (
     calculate_duration_minutes,
 )
 from app.models.user import CurrentUser
+from app.utils.client_context_cache import invalidate_client_context
 from app.utils.firebase_client import get_firestore_client
 
 logger = logging.getLogger(__name__)
@@ -92,6 +93,7 @@ async def create_time_log(
     except Exception:
         logger.exception("Failed to create time log")
         return ErrorResponse(error="Failed to create time log").model_dump()
+    invalidate_client_context(body.client_id)
 
     # Build response with the generated ID
     response_data = {**doc_dict, "id": doc_ref.id}
@@ -458,6 +460,7 @@ async def update_time_log(
     except Exception:
         logger.exception("Failed to update time log %s", time_log_id)
         return ErrorResponse(error="Failed to update time log").model_dump()
+    invalidate_client_context(doc.to_dict().get("client_id"), update_dict.get("client_id"))
 
     # Re-fetch and return updated document
     try:
@@ -491,5 +494,6 @@ async def delete_time_log(
     except Exception:
         logger.exception("Failed to delete time log %s", time_log_id)
         return ErrorResponse(error="Failed to delete time log").model_dump()
+    invalidate_client_context(doc.to_dict().get("client_id"))
 
     return BaseResponse(success=True, message="Time log deleted").model_dump()
@@ -23,6 +23,13 @@ class Settings(BaseSettings):
     SAGE_CLIENT_SECRET: str = ""
     SAGE_API_BASE_URL: str = "https://api.accounting.sage.com/v3.1"
     SAGE_REDIRECT_URI: str = "http://localhost:8000/sage/callback"
+    SAGE_TOKEN_REFRESH_MARGIN_SECONDS: float = 60.0
+    SAGE_REFRESH_LEASE_SECONDS: float = 30.0
+    SAGE_REFRESH_LEASE_POLL_SECONDS: float = 0.5
+    SAGE_SYNC_LOOKBACK_HOURS: int = 1
+    SAGE_ITEMS_PER_PAGE: int = 200  # Sage's maximum
+    SAGE_MAX_CONCURRENT_REQUESTS: int = 4
+    SAGE_MAX_RETRIES: int = 4
 
     # Google Drive Integration
     GOOGLE_DRIVE_CREDENTIALS_PATH: str = ""
@@ -38,11 +45,67 @@ class Settings(BaseSettings):
     # Fireflies.ai Meeting Transcription API
     FIREFLIES_API_KEY: str = ""
     FIREFLIES_API_BASE_URL: str = "https://api.fireflies.ai/graphql"
+    FIREFLIES_PAGE_SIZE: int = 50
+    FIREFLIES_MAX_PAGES: int = 40
+    FIREFLIES_TRANSCRIPT_BATCH_SIZE: int = 10
+    FIREFLIES_MAX_CONCURRENT_REQUESTS: int = 3
 
     # Composio MCP (Gmail, Drive, Docs, Sheets, Calendar)
     COMPOSIO_MCP_URL: str = ""
     COMPOSIO_API_KEY: str = ""
 
+    # MCP transport (Read.AI, Composio)
+    MCP_MAX_PAYLOAD_BYTES: int = 10_000_000
+
+    # RAG / embeddings
+    EMBEDDING_CACHE_MAX_ENTRIES: int = 2048
+    EMBEDDING_STORAGE_ENCODING: str = "int8"  # "int8" or "float16"
+    VECTOR_INDEX_DIR: str = "/tmp/fabledash-vector-index"  # empty disables snapshots
+    VECTOR_INDEX_REFRESH_SECONDS: float = 30.0
+    VECTOR_INDEX_LOOKBACK_SECONDS: float = 300.0  # delta re-read window for late commits
+    VECTOR_INDEX_COMPACT_THRESHOLD: int = 500
+    RAG_HYBRID_SEARCH: bool = True
+    RAG_CANDIDATE_POOL: int = 50
+    RAG_LEXICAL_PREFILTER_MIN_CHUNKS: int = 2000
+    RAG_CONTEXT_TOKEN_BUDGET: int = 3000
+    CHUNK_MAX_TOKENS: int = 400
+    CHUNK_OVERLAP_TOKENS: int = 50
+
+    # Background document ingestion
+    INGESTION_STAGING_DIR: str = "/tmp/fabledash-ingestion"
+    INGESTION_CONCURRENCY: int = 2
+    INGESTION_STALE_SECONDS: int = 300
+
+    # Chat context loading
+    CONTEXT_SOURCE_TIMEOUT_SECONDS: float = 8.0
+    CLIENT_CONTEXT_CACHE_TTL_SECONDS: float = 120.0
+    CHAT_MEMORY_WINDOW_MESSAGES: int = 12
+    CHAT_MEMORY_SUMMARY_MAX_WORDS: int = 300
+    CHAT_MEMORY_MAX_UNSUMMARIZED: int = 36  # overflow kept while summaries fail
+    CHAT_MEMORY_MAX_WINDOW_BYTES: int = 256_000  # well under Firestore's 1 MiB document limit
+
+    # Meeting sync
+    MEETING_SYNC_LOOKBACK_HOURS: int = 24
+    READAI_SYNC_CONCURRENCY: int = 4
+    FIREFLIES_SYNC_CONCURRENCY: int = 3
+
+    # Transcript processing
+    TRANSCRIPT_MAP_REDUCE_THRESHOLD_TOKENS: int = 30000
+    TRANSCRIPT_CHUNK_TOKENS: int = 12000
+    TRANSCRIPT_NAME_INDEX_TTL_SECONDS: float = 300.0
+    TRANSCRIPT_BATCH_CONCURRENCY: int = 3
+    TRANSCRIPT_BLOCK_BYTES: int = 256_000
+    TRANSCRIPT_SEGMENTS_PER_BLOCK: int = 200
+
+    # LLM gateway
+    LLM_MAX_CONCURRENCY: int = 8
+    LLM_MAX_RETRIES: int = 3
+    LLM_DEFAULT_TIMEOUT_SECONDS: float = 60.0
+    LLM_MODEL_CACHE_SIZE: int = 64
+    LLM_CACHE_ENABLED: bool = True
+    LLM_CACHE_MEMORY_MAX_ENTRIES: int = 256
+    LLM_CACHE_DEFAULT_TTL_SECONDS: float = 86400.0
+
     @property
     def cors_origins_list(self) -> list[str]:
         """Split CORS_ORIGINS string into a list of origins."""
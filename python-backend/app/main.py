@@ -1,5 +1,6 @@
 """FableDash API - CEO Operations Intelligence Hub."""
 
+import asyncio
 import logging
 import time
 from contextlib import asynccontextmanager
@@ -43,6 +44,12 @@ async def lifespan(app: FastAPI):
         logger.info("Firebase initialized successfully")
     except Exception:
         logger.exception("Firebase initialization failed - continuing without Firebase")
+
+    # Pick up document ingestion abandoned by a crashed or recycled worker.
+    # Every worker scans; each abandoned document is claimed by exactly one.
+    from app.utils.document_ingestion import get_ingestion_worker
+
+    app.state.ingestion_resume = asyncio.create_task(get_ingestion_worker().resume_pending())
     yield
     logger.info("Shutting down FableDash API...")
 
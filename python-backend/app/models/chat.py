@@ -5,9 +5,16 @@ from enum import Enum
 from pydantic import BaseModel
 
 COLLECTION_NAME = "conversations"
+# Subcollection under each conversation; before the subcollection migration
+# this was also the name of a flat top-level collection keyed by conversation_id
 MESSAGES_COLLECTION = "messages"
 
 
+def messages_collection_path(conversation_id: str) -> str:
+    """Return the slash-delimited path of a conversation's messages subcollection."""
+    return f"{COLLECTION_NAME}/{conversation_id}/{MESSAGES_COLLECTION}"
+
+
 class MessageRole(str, Enum):
     """Role of the message sender."""
 
@@ -17,6 +17,15 @@ class DocumentStatus(str, Enum):
     ERROR = "error"
 
 
+class IngestionStage(str, Enum):
+    """Stage of the background ingestion pipeline a document has reached."""
+
+    QUEUED = "queued"
+    CHUNKING = "chunking"
+    EMBEDDING = "embedding"
+    DONE = "done"
+
+
 class DocumentResponse(BaseModel):
     """Full document representation returned from API."""
 
@@ -28,6 +37,9 @@ class DocumentResponse(BaseModel):
     agent_id: str | None = None
     client_id: str | None = None
     chunk_count: int = 0
+    ingestion_stage: IngestionStage | None = None
+    chunks_done: int = 0
+    chunks_total: int = 0
     error_message: str | None = None
     uploaded_at: datetime
     uploaded_by: str
@@ -9,6 +9,19 @@ from pydantic import BaseModel
 COLLECTION_NAME = "meetings"
 TRANSCRIPT_COLLECTION = "transcripts"
 BRIEFING_COLLECTION = "meeting_briefings"
+PROCESSING_JOB_COLLECTION = "transcript_processing_jobs"
+# Subcollection under each transcript header holding compressed blocks
+TRANSCRIPT_BLOCKS_COLLECTION = "blocks"
+
+
+def transcript_id_for(meeting_id: str) -> str:
+    """Return the transcript header document ID for a meeting."""
+    return f"transcript_{meeting_id}"
+
+
+def transcript_blocks_collection_path(transcript_id: str) -> str:
+    """Return the slash-delimited path of a transcript's blocks subcollection."""
+    return f"{TRANSCRIPT_COLLECTION}/{transcript_id}/{TRANSCRIPT_BLOCKS_COLLECTION}"
 
 
 # --- Enums ---
@@ -22,6 +35,15 @@ class MeetingSource(str, Enum):
     MANUAL = "manual"
 
 
+class ProcessingJobStatus(str, Enum):
+    """Lifecycle of a batch transcript processing job."""
+
+    QUEUED = "queued"
+    RUNNING = "running"
+    COMPLETED = "completed"
+    FAILED = "failed"
+
+
 # --- Transcript models ---
 
 
@@ -43,6 +65,11 @@ class MeetingTranscript(BaseModel):
     full_text: str = ""
     word_count: int = 0
     created_at: str = ""
+    # Present on block-stored transcripts and ranged reads
+    segment_count: int | None = None
+    speakers: list[str] = []
+    duration_seconds: float | None = None
+    segment_range: list[int] | None = None
 
 
 # --- Meeting CRUD models ---
@@ -92,6 +119,7 @@ class BriefingRequest(BaseModel):
     meeting_id: str
     format: str = "formal"
     include_action_items: bool = True
+    refresh: bool = False  # regenerate instead of using a cached briefing
 
 
 class MeetingBriefing(BaseModel):
@@ -103,3 +131,13 @@ class MeetingBriefing(BaseModel):
     format: str = "formal"
     generated_at: str = ""
     generated_by: str = ""
+
+
+# --- Batch processing models ---
+
+
+class BatchProcessRequest(BaseModel):
+    """Request payload for batch transcript processing."""
+
+    force: bool = False  # reprocess meetings whose transcript is unchanged
+    limit: int | None = None
@@ -9,9 +9,9 @@ from datetime import datetime
 
 import google.generativeai as genai
 
-from app.config import get_settings
 from app.models.meeting import BRIEFING_COLLECTION, MeetingBriefing
 from app.utils.firebase_client import get_firestore_client
+from app.utils.llm_gateway import get_llm_gateway
 
 logger = logging.getLogger(__name__)
 
@@ -20,20 +20,9 @@ class BriefingGenerator:
     """Generates formal meeting briefs from transcripts and meeting metadata."""
 
     def __init__(self) -> None:
-        settings = get_settings()
-        api_key = settings.GEMINI_API_KEY or settings.GOOGLE_AI_API_KEY
-        self._configured = False
-
-        if api_key:
-            try:
-                genai.configure(api_key=api_key)
-                self._configured = True
-            except Exception:
-                logger.exception("Failed to initialise Gemini client")
-        else:
-            logger.warning(
-                "Gemini API key not set — briefing generation will be unavailable"
-            )
+        self._configured = get_llm_gateway().is_configured()
+        if not self._configured:
+            logger.warning("Gemini API key not set — briefing generation will be unavailable")
 
     # ------------------------------------------------------------------
     # Internal helpers
@@ -46,20 +35,22 @@ class BriefingGenerator:
                 "Gemini client is not configured. Set the GEMINI_API_KEY environment variable."
             )
 
-    async def _chat(self, system: str, user: str) -> str:
-        """Send a chat request to Gemini and return the response text."""
-        self._ensure_client()
+    async def _chat(self, system: str, user: str, cache: bool = False, refresh: bool = False) -> str:
+        """Send a chat request to Gemini and return the response text.
 
-        model = genai.GenerativeModel(
-            "gemini-2.5-flash",
-            system_instruction=system,
-        )
+        With ``cache=True`` identical requests are answered from the LLM
+        response cache unless ``refresh`` is set.
+        """
+        self._ensure_client()
 
-        response = await model.generate_content_async(
+        return await get_llm_gateway().generate_text(
+            "briefing",
             user,
+            system_instruction=system,
             generation_config=genai.GenerationConfig(temperature=0.3),
+            cache=cache,
+            bypass_cache=refresh,
         )
-        return response.text or ""
 
     async def _fetch_client_context(self, client_id: str) -> dict | None:
         """Fetch client details from Firestore for context injection."""
@@ -201,13 +192,18 @@ class BriefingGenerator:
         meeting: dict,
         transcript_text: str | None,
         format: str = "formal",
+        refresh: bool = False,
     ) -> str:
         """Generate a meeting briefing from meeting data and optional transcript.
 
+        Briefings are cached by prompt, so regenerating an unchanged meeting
+        in the same format is instant.
+
         Args:
             meeting: Meeting document dict from Firestore.
             transcript_text: Full transcript text, or None.
             format: One of "formal", "summary", or "dispatch".
+            refresh: Regenerate instead of using a cached briefing.
 
         Returns:
             The generated briefing content as a string.
@@ -223,7 +219,7 @@ class BriefingGenerator:
         system_prompt = self._build_system_prompt(format)
         user_prompt = self._build_user_prompt(meeting, transcript_text, client_context)
 
-        content = await self._chat(system_prompt, user_prompt)
+        content = await self._chat(system_prompt, user_prompt, cache=True, refresh=refresh)
         return content
 
     async def save_briefing(
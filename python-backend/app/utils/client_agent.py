@@ -1,9 +1,7 @@
 """Tier 2 Client-Based Agent with context loading, task execution, and reporting."""
 
+import asyncio
 import logging
-from datetime import datetime
-
-import google.generativeai as genai
 
 from app.config import get_settings
 from app.models.client import COLLECTION_NAME as CLIENTS_COLLECTION
@@ -11,11 +9,23 @@ from app.models.task import COLLECTION_NAME as TASKS_COLLECTION
 from app.models.time_log import COLLECTION_NAME as TIME_LOGS_COLLECTION
 from app.models.meeting import COLLECTION_NAME as MEETINGS_COLLECTION
 from app.models.financial import INVOICES_COLLECTION
+from app.utils.client_context_cache import get_client_context_cache
+from app.utils.context_sources import bounded
 from app.utils.firebase_client import get_firestore_client
+from app.utils.llm_gateway import get_llm_gateway
 from app.utils.rag_engine import get_rag_engine
 
 logger = logging.getLogger(__name__)
 
+# Drive MIME types whose content is worth inlining into the prompt
+DRIVE_READABLE_TYPES = {
+    "application/vnd.google-apps.document",
+    "application/vnd.google-apps.spreadsheet",
+    "text/plain",
+    "text/csv",
+    "application/pdf",
+}
+
 
 class ClientAgent:
     """A per-client agent that combines Firestore context with RAG-powered LLM generation.
@@ -43,13 +53,8 @@ class ClientAgent:
         self.document_ids: list[str] = agent_config.get("document_ids", [])
         self.data_sources: list[str] = agent_config.get("data_sources", ["firestore"])
 
-        settings = get_settings()
-        api_key = settings.GEMINI_API_KEY or settings.GOOGLE_AI_API_KEY
-        if api_key:
-            genai.configure(api_key=api_key)
-            self._gemini_configured = True
-        else:
-            self._gemini_configured = False
+        self._gemini_configured = get_llm_gateway().is_configured()
+        if not self._gemini_configured:
             logger.warning("Gemini API key not set — ClientAgent LLM calls will fail")
 
         self._rag = get_rag_engine()
@@ -59,171 +64,167 @@ class ClientAgent:
     # ------------------------------------------------------------------
 
     async def get_client_context(self) -> dict:
-        """Fetch rich context for this agent's client from Firestore.
+        """Fetch rich context for this agent's client from Firestore and integrations.
+
+        The Firestore half is served from the per-client context cache when
+        fresh.  Independent sources are loaded concurrently: the five
+        Firestore reads and Calendar start together, then Gmail and Drive
+        (which need the client's email/name) run side by side.  Each
+        integration is bounded by
+        ``CONTEXT_SOURCE_TIMEOUT_SECONDS``; a slow or failing source is
+        logged and left empty rather than failing the whole context.
 
         Returns:
             Dict with keys: ``client``, ``tasks``, ``time_logs``,
-            ``meetings``, ``invoices``.
+            ``meetings``, ``invoices``, plus ``calendar_meetings``,
+            ``client_emails``, ``drive_files`` and ``drive_file_contents``
+            when the matching data source is enabled.
         """
-        db = get_firestore_client()
-
-        # --- Client details ---
-        client_doc = db.collection(CLIENTS_COLLECTION).document(self.client_id).get()
-        client_data: dict | None = None
-        if client_doc.exists:
-            client_data = client_doc.to_dict()
-            client_data["id"] = client_doc.id
+        calendar_task = None
+        if "calendar" in self.data_sources:
+            calendar_task = asyncio.create_task(
+                bounded(f"Calendar context for agent {self.agent_id}", self._load_calendar(), [])
+            )
 
-        # --- Recent tasks (limit 10) ---
-        # Sort in Python to avoid Firestore composite index requirements
-        tasks_query = (
-            db.collection(TASKS_COLLECTION)
-            .where("client_id", "==", self.client_id)
-        )
-        tasks = []
-        for doc in tasks_query.stream():
-            d = doc.to_dict()
-            d["id"] = doc.id
-            tasks.append(d)
-        tasks.sort(key=lambda x: x.get("created_at", ""), reverse=True)
-        tasks = tasks[:10]
-
-        # --- Recent time logs (limit 10) ---
-        logs_query = (
-            db.collection(TIME_LOGS_COLLECTION)
-            .where("client_id", "==", self.client_id)
-        )
-        time_logs = []
-        for doc in logs_query.stream():
-            d = doc.to_dict()
-            d["id"] = doc.id
-            time_logs.append(d)
-        time_logs.sort(key=lambda x: x.get("created_at", ""), reverse=True)
-        time_logs = time_logs[:10]
-
-        # --- Recent meetings (limit 5) ---
-        meetings_query = (
-            db.collection(MEETINGS_COLLECTION)
-            .where("client_id", "==", self.client_id)
+        context = await get_client_context_cache().get_or_load(
+            self.client_id, self._load_firestore_context
         )
-        meetings = []
-        for doc in meetings_query.stream():
-            d = doc.to_dict()
-            d["id"] = doc.id
-            meetings.append(d)
-        meetings.sort(key=lambda x: x.get("created_at", ""), reverse=True)
-        meetings = meetings[:5]
-
-        # --- Recent invoices (limit 5) ---
-        invoices_query = (
-            db.collection(INVOICES_COLLECTION)
-            .where("client_id", "==", self.client_id)
-        )
-        invoices = []
-        for doc in invoices_query.stream():
-            d = doc.to_dict()
-            d["id"] = doc.id
-            invoices.append(d)
-        invoices.sort(key=lambda x: x.get("created_at", ""), reverse=True)
-        invoices = invoices[:5]
-
-        context = {
-            "client": client_data,
-            "tasks": tasks,
-            "time_logs": time_logs,
-            "meetings": meetings,
-            "invoices": invoices,
-        }
 
-        # Conditionally fetch integration data based on data_sources
+        client_data = context["client"]
         client_email = client_data.get("contact_email") if client_data else None
         client_name = client_data.get("name") if client_data else None
 
-        if "calendar" in self.data_sources:
-            try:
-                from app.utils.calendar_client import get_calendar_client
-                cal = get_calendar_client()
-                if cal.is_configured():
-                    cal_meetings = await cal.get_meetings(days_ahead=7, days_back=7)
-                    context["calendar_meetings"] = cal_meetings[:10] if cal_meetings else []
-                    logger.info("Calendar: loaded %d meetings for agent %s", len(context["calendar_meetings"]), self.agent_id)
-                else:
-                    logger.warning("Calendar not configured (missing Composio credentials) for agent %s", self.agent_id)
-                    context["calendar_meetings"] = []
-            except Exception as exc:
-                logger.warning("Calendar data failed for agent %s: %s", self.agent_id, exc)
-                context["calendar_meetings"] = []
-
+        integrations: dict[str, asyncio.Task] = {}
         if "gmail" in self.data_sources:
             if client_email:
-                try:
-                    from app.utils.gmail_client import get_gmail_client
-                    gmail = get_gmail_client()
-                    if gmail.is_configured():
-                        emails = await gmail.get_client_emails(client_email, days=14)
-                        context["client_emails"] = emails[:10] if emails else []
-                        logger.info("Gmail: loaded %d emails for agent %s (client: %s)", len(context["client_emails"]), self.agent_id, client_email)
-                    else:
-                        logger.warning("Gmail not configured (missing Composio credentials) for agent %s", self.agent_id)
-                        context["client_emails"] = []
-                except Exception as exc:
-                    logger.warning("Gmail data failed for agent %s: %s", self.agent_id, exc)
-                    context["client_emails"] = []
+                integrations["client_emails"] = asyncio.create_task(
+                    bounded(f"Gmail context for agent {self.agent_id}", self._load_gmail(client_email), [])
+                )
             else:
                 logger.warning("Gmail source configured but client has no contact_email for agent %s", self.agent_id)
-
         if "drive" in self.data_sources:
             if client_name:
-                try:
-                    from app.utils.gdrive_client import get_gdrive_client
-                    drive = get_gdrive_client()
-                    if drive.is_configured():
-                        files = await drive.search_files(client_name)
-                        files = files[:10] if files else []
-                        context["drive_files"] = files
-                        logger.info("Drive: loaded %d files for agent %s (search: %s)", len(files), self.agent_id, client_name)
-
-                        # Load content for top 5 text-readable files
-                        READABLE_TYPES = {
-                            "application/vnd.google-apps.document",
-                            "application/vnd.google-apps.spreadsheet",
-                            "text/plain",
-                            "text/csv",
-                            "application/pdf",
-                        }
-                        drive_contents = []
-                        for f in files[:5]:
-                            fid = f.get("id")
-                            fname = f.get("name", "Untitled")
-                            fmime = f.get("mimeType", "")
-                            if not fid:
-                                continue
-                            # Only attempt readable types
-                            if fmime not in READABLE_TYPES and "google-apps" not in fmime:
-                                continue
-                            try:
-                                content = await drive.get_file_content(fid, fmime)
-                                if content and len(content) > 20:
-                                    # Truncate very large files
-                                    if len(content) > 3000:
-                                        content = content[:3000] + "\n... [truncated]"
-                                    drive_contents.append({"name": fname, "content": content})
-                            except Exception:
-                                logger.debug("Could not read content for Drive file %s", fname)
-                        context["drive_file_contents"] = drive_contents
-                        if drive_contents:
-                            logger.info("Drive: loaded content for %d files for agent %s", len(drive_contents), self.agent_id)
-                    else:
-                        logger.warning("Drive not configured (missing Composio credentials) for agent %s", self.agent_id)
-                        context["drive_files"] = []
-                except Exception as exc:
-                    logger.warning("Drive data failed for agent %s: %s", self.agent_id, exc)
-                    context["drive_files"] = []
+                integrations["drive"] = asyncio.create_task(
+                    bounded(
+                        f"Drive context for agent {self.agent_id}",
+                        self._load_drive(client_name),
+                        {"drive_files": []},
+                    )
+                )
             else:
                 logger.warning("Drive source configured but client has no name for agent %s", self.agent_id)
 
+        if calendar_task is not None:
+            context["calendar_meetings"] = await calendar_task
+        if "client_emails" in integrations:
+            context["client_emails"] = await integrations["client_emails"]
+        if "drive" in integrations:
+            context.update(await integrations["drive"])
+
         return context
 
+    async def _load_firestore_context(self) -> dict:
+        """Load the client record and its recent tasks, time logs, meetings and invoices."""
+        db = get_firestore_client()
+
+        def _client() -> dict | None:
+            client_doc = db.collection(CLIENTS_COLLECTION).document(self.client_id).get()
+            if not client_doc.exists:
+                return None
+            client_data = client_doc.to_dict()
+            client_data["id"] = client_doc.id
+            return client_data
+
+        def _recent(collection: str, limit: int) -> list[dict]:
+            # Sort in Python to avoid Firestore composite index requirements
+            query = db.collection(collection).where("client_id", "==", self.client_id)
+            rows = []
+            for doc in query.stream():
+                d = doc.to_dict()
+                d["id"] = doc.id
+                rows.append(d)
+            rows.sort(key=lambda x: x.get("created_at", ""), reverse=True)
+            return rows[:limit]
+
+        client_data, tasks, time_logs, meetings, invoices = await asyncio.gather(
+            asyncio.to_thread(_client),
+            asyncio.to_thread(_recent, TASKS_COLLECTION, 10),
+            asyncio.to_thread(_recent, TIME_LOGS_COLLECTION, 10),
+            asyncio.to_thread(_recent, MEETINGS_COLLECTION, 5),
+            asyncio.to_thread(_recent, INVOICES_COLLECTION, 5),
+        )
+
+        return {
+            "client": client_data,
+            "tasks": tasks,
+            "time_logs": time_logs,
+            "meetings": meetings,
+            "invoices": invoices,
+        }
+
+    async def _load_calendar(self) -> list[dict]:
+        from app.utils.calendar_client import get_calendar_client
+        cal = get_calendar_client()
+        if not cal.is_configured():
+            logger.warning("Calendar not configured (missing Composio credentials) for agent %s", self.agent_id)
+            return []
+        cal_meetings = await cal.get_meetings(days_ahead=7, days_back=7)
+        cal_meetings = cal_meetings[:10] if cal_meetings else []
+        logger.info("Calendar: loaded %d meetings for agent %s", len(cal_meetings), self.agent_id)
+        return cal_meetings
+
+    async def _load_gmail(self, client_email: str) -> list[dict]:
+        from app.utils.gmail_client import get_gmail_client
+        gmail = get_gmail_client()
+        if not gmail.is_configured():
+            logger.warning("Gmail not configured (missing Composio credentials) for agent %s", self.agent_id)
+            return []
+        emails = await gmail.get_client_emails(client_email, days=14)
+        emails = emails[:10] if emails else []
+        logger.info("Gmail: loaded %d emails for agent %s (client: %s)", len(emails), self.agent_id, client_email)
+        return emails
+
+    async def _load_drive(self, client_name: str) -> dict:
+        """Search Drive for the client and read the top files concurrently."""
+        from app.utils.gdrive_client import get_gdrive_client
+        drive = get_gdrive_client()
+        if not drive.is_configured():
+            logger.warning("Drive not configured (missing Composio credentials) for agent %s", self.agent_id)
+            return {"drive_files": []}
+
+        files = await drive.search_files(client_name)
+        files = files[:10] if files else []
+        logger.info("Drive: loaded %d files for agent %s (search: %s)", len(files), self.agent_id, client_name)
+
+        # Load content for top 5 text-readable files
+        readable = [
+            f for f in files[:5]
+            if f.get("id")
+            and (f.get("mimeType", "") in DRIVE_READABLE_TYPES or "google-apps" in f.get("mimeType", ""))
+        ]
+
+        async def _read(f: dict) -> dict | None:
+            fname = f.get("name", "Untitled")
+            try:
+                content = await asyncio.wait_for(
+                    drive.get_file_content(f["id"], f.get("mimeType", "")),
+                    timeout=get_settings().CONTEXT_SOURCE_TIMEOUT_SECONDS,
+                )
+            except Exception:
+                logger.debug("Could not read content for Drive file %s", fname)
+                return None
+            if not content or len(content) <= 20:
+                return None
+            # Truncate very large files
+            if len(content) > 3000:
+                content = content[:3000] + "\n... [truncated]"
+            return {"name": fname, "content": content}
+
+        drive_contents = [c for c in await asyncio.gather(*(_read(f) for f in readable)) if c]
+        if drive_contents:
+            logger.info("Drive: loaded content for %d files for agent %s", len(drive_contents), self.agent_id)
+        return {"drive_files": files, "drive_file_contents": drive_contents}
+
     # ------------------------------------------------------------------
     # Internal helpers
     # ------------------------------------------------------------------
@@ -379,12 +380,9 @@ class ClientAgent:
             f"---\n\n# Task\n{task_description}"
         )
 
-        model = genai.GenerativeModel(
-            "gemini-2.5-flash",
-            system_instruction=system,
+        response = await get_llm_gateway().generate(
+            "client_agent", user_content, system_instruction=system
         )
-
-        response = await model.generate_content_async(user_content)
         return response.text or ""
 
     # ------------------------------------------------------------------
@@ -410,12 +408,13 @@ class ClientAgent:
         context_prompt = self._build_context_prompt(context)
 
         # RAG retrieval
-        rag_results = await self._rag._vector_store.search(
+        rag_results = await self._rag.retrieve(
             query=query,
             agent_id=self.agent_id,
             client_id=self.client_id,
         )
-        rag_context = "\n\n".join(r["content"] for r in rag_results) if rag_results else ""
+        assembled = self._rag.assemble(rag_results)
+        rag_context = assembled["context"]
 
         system = (
             self.system_prompt
@@ -444,12 +443,9 @@ class ClientAgent:
 
         full_prompt_parts.append(f"# Current Question\n{query}")
 
-        model = genai.GenerativeModel(
-            "gemini-2.5-flash",
-            system_instruction=system,
+        response = await get_llm_gateway().generate(
+            "client_agent", "".join(full_prompt_parts), system_instruction=system
         )
-
-        response = await model.generate_content_async("".join(full_prompt_parts))
         answer = response.text or ""
 
         sources = [
@@ -459,7 +455,7 @@ class ClientAgent:
                 "content": r["content"],
                 "score": r["score"],
             }
-            for r in rag_results
+            for r in assembled["sources"]
         ]
 
         return {"answer": answer, "sources": sources}
@@ -520,10 +516,7 @@ class ClientAgent:
             f"Type: {report_type}\n\n{instruction}"
         )
 
-        model = genai.GenerativeModel(
-            "gemini-2.5-flash",
-            system_instruction=system,
+        response = await get_llm_gateway().generate(
+            "client_agent", user_content, system_instruction=system
         )
-
-        response = await model.generate_content_async(user_content)
         return response.text or ""
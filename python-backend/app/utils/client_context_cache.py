@@ -0,0 +1,119 @@
+"""Per-client cache of the Firestore context loaded by ``ClientAgent``.
+
+Every message to a client agent needs the same client record plus its recent
+tasks, time logs, meetings and invoices.  ``ClientContextCache`` keeps that
+context per ``client_id`` for ``CLIENT_CONTEXT_CACHE_TTL_SECONDS`` and
+collapses concurrent loads for the same client into one.
+
+Endpoints that write tasks, time logs, meetings, invoices or client records
+call ``invalidate_client_context`` so the next read sees the change.  The
+cache is per process; the TTL bounds staleness for writes made by other
+workers.
+"""
+
+import asyncio
+import logging
+import time
+from collections.abc import Awaitable, Callable
+
+from app.config import get_settings
+
+logger = logging.getLogger(__name__)
+
+_client_context_cache = None
+
+
+class ClientContextCache:
+    """TTL cache of client context dicts with single-flight loading.
+
+    Args:
+        ttl_seconds: Lifetime of an entry; defaults to
+            ``CLIENT_CONTEXT_CACHE_TTL_SECONDS``.  ``0`` disables caching.
+    """
+
+    def __init__(self, ttl_seconds: float | None = None) -> None:
+        if ttl_seconds is None:
+            ttl_seconds = get_settings().CLIENT_CONTEXT_CACHE_TTL_SECONDS
+        self._ttl = ttl_seconds
+        self._entries: dict[str, tuple[float, dict]] = {}
+        self._locks: dict[str, asyncio.Lock] = {}
+        # Bumped on invalidation so a load that started before a write
+        # cannot repopulate the cache with pre-write data
+        self._generations: dict[str, int] = {}
+        self._global_generation = 0
+
+    def _generation(self, client_id: str) -> tuple[int, int]:
+        return self._global_generation, self._generations.get(client_id, 0)
+
+    def _fresh(self, client_id: str) -> dict | None:
+        entry = self._entries.get(client_id)
+        if entry is None:
+            return None
+        expires_at, context = entry
+        if time.monotonic() >= expires_at:
+            self._entries.pop(client_id, None)
+            return None
+        return dict(context)
+
+    async def get_or_load(
+        self,
+        client_id: str,
+        loader: Callable[[], Awaitable[dict]],
+    ) -> dict:
+        """Return the cached context for ``client_id``, loading it on a miss.
+
+        Args:
+            client_id: Client the context belongs to.
+            loader: Coroutine factory that builds the context from Firestore.
+
+        Returns:
+            A shallow copy of the context dict (callers may add keys).
+        """
+        if self._ttl <= 0:
+            return await loader()
+
+        cached = self._fresh(client_id)
+        if cached is not None:
+            return cached
+
+        lock = self._locks.setdefault(client_id, asyncio.Lock())
+        async with lock:
+            # Another request may have loaded it while we waited
+            cached = self._fresh(client_id)
+            if cached is not None:
+                return cached
+
+            generation = self._generation(client_id)
+            context = await loader()
+            if self._generation(client_id) == generation:
+                self._entries[client_id] = (time.monotonic() + self._ttl, context)
+            return dict(context)
+
+    def invalidate(self, client_id: str | None = None) -> None:
+        """Drop the cached context for one client, or for every client."""
+        if client_id is None:
+            self._entries.clear()
+            self._global_generation += 1
+            return
+        self._entries.pop(client_id, None)
+        self._generations[client_id] = self._generations.get(client_id, 0) + 1
+
+
+# ------------------------------------------------------------------
+# Singleton accessor
+# ------------------------------------------------------------------
+
+
+def get_client_context_cache() -> ClientContextCache:
+    """Return the module-level ClientContextCache singleton."""
+    global _client_context_cache
+    if _client_context_cache is None:
+        _client_context_cache = ClientContextCache()
+    return _client_context_cache
+
+
+def invalidate_client_context(*client_ids: str | None) -> None:
+    """Invalidate cached context for each non-empty client ID given."""
+    cache = get_client_context_cache()
+    for client_id in {c for c in client_ids if c}:
+        cache.invalidate(client_id)
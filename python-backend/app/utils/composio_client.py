@@ -1,16 +1,16 @@
 """Composio MCP client for Gmail, Google Drive, Docs, Sheets, and Calendar.
 
 Composio exposes 181 tools via a single MCP endpoint using Streamable HTTP
-transport.  This client handles session initialization, tool invocation,
-and SSE response parsing.
+transport.  Session handling and SSE parsing live in the shared
+``MCPTransport``; this client adds configuration and error reporting.
 """
 
-import json
 import logging
 
 import httpx
 
 from app.config import get_settings
+from app.utils.mcp_transport import MCPError, MCPTransport
 
 logger = logging.getLogger(__name__)
 
@@ -25,38 +25,12 @@ class ComposioClient:
         self.mcp_url = settings.COMPOSIO_MCP_URL
         self.api_key = settings.COMPOSIO_API_KEY
         self.http = httpx.AsyncClient(timeout=60.0)
-        self._session_initialized = False
-        self._headers: dict | None = None
+        self._mcp = MCPTransport(self.mcp_url, self.http, headers={"x-api-key": self.api_key})
 
     def is_configured(self) -> bool:
         """Return True if Composio MCP URL and API key are set."""
         return bool(self.mcp_url and self.api_key)
 
-    async def _ensure_session(self) -> dict:
-        """Initialize MCP session once and return cached headers."""
-        if self._headers and self._session_initialized:
-            return self._headers
-
-        self._headers = {
-            "Content-Type": "application/json",
-            "Accept": "application/json, text/event-stream",
-            "x-api-key": self.api_key,
-        }
-
-        init_msg = {
-            "jsonrpc": "2.0",
-            "method": "initialize",
-            "id": 1,
-            "params": {
-                "protocolVersion": "2024-11-05",
-                "capabilities": {},
-                "clientInfo": {"name": "fable-dashboard", "version": "1.0"},
-            },
-        }
-        await self.http.post(self.mcp_url, headers=self._headers, json=init_msg)
-        self._session_initialized = True
-        return self._headers
-
     async def call_tool(self, tool_name: str, arguments: dict | None = None) -> dict | list | str:
         """Call a Composio MCP tool and return the parsed result.
 
@@ -70,42 +44,10 @@ class ComposioClient:
         if not self.is_configured():
             raise RuntimeError("Composio MCP not configured")
 
-        headers = await self._ensure_session()
-
-        # Call the tool
-        tool_msg = {
-            "jsonrpc": "2.0",
-            "method": "tools/call",
-            "id": 2,
-            "params": {
-                "name": tool_name,
-                "arguments": arguments or {},
-            },
-        }
-        resp = await self.http.post(self.mcp_url, headers=headers, json=tool_msg)
-        resp.raise_for_status()
-
-        # Parse SSE response
-        for line in resp.text.split("\n"):
-            if line.startswith("data: "):
-                data = json.loads(line[6:])
-
-                # Check for errors
-                if "error" in data:
-                    error = data["error"]
-                    raise RuntimeError(f"Composio tool error: {error.get('message', error)}")
-
-                if "result" in data:
-                    for content in data["result"].get("content", []):
-                        if content.get("type") == "text":
-                            text = content["text"]
-                            # Try to parse as JSON
-                            try:
-                                return json.loads(text)
-                            except (json.JSONDecodeError, TypeError):
-                                return text
-
-        return {}
+        try:
+            return await self._mcp.call_tool(tool_name, arguments)
+        except MCPError as exc:
+            raise RuntimeError(f"Composio tool error: {exc}") from exc
 
 
 def get_composio_client() -> ComposioClient:
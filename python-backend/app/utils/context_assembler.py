@@ -0,0 +1,143 @@
+"""Token-budgeted prompt context assembly for RAG.
+
+Retrieved chunks overlap (the chunker carries text across boundaries) and
+often repeat each other, so pasting the top-k verbatim wastes prompt tokens.
+``assemble_context``:
+
+1. Drops near-duplicate passages with a greedy MMR pass (relevance vs.
+   word-shingle similarity to passages already chosen).
+2. Admits passages in MMR order until the token budget is spent.
+3. Groups the survivors by document, orders them by ``chunk_index`` and
+   stitches adjacent chunks together, removing the overlapping text.
+"""
+
+import re
+
+# Rough characters-per-token ratio for Gemini on English prose
+CHARS_PER_TOKEN = 4
+
+_WORD_RE = re.compile(r"\w+")
+
+
+def estimate_tokens(text: str) -> int:
+    """Approximate the token count of ``text``."""
+    return (len(text) + CHARS_PER_TOKEN - 1) // CHARS_PER_TOKEN
+
+
+def _shingles(text: str, size: int = 3) -> set[tuple[str, ...]]:
+    words = _WORD_RE.findall(text.lower())
+    if len(words) < size:
+        return {tuple(words)} if words else set()
+    return {tuple(words[i:i + size]) for i in range(len(words) - size + 1)}
+
+
+def _similarity(a: set, b: set) -> float:
+    if not a or not b:
+        return 0.0
+    return len(a & b) / len(a | b)
+
+
+def merge_overlap(
+    first: str,
+    second: str,
+    max_overlap: int = 1000,
+    min_overlap: int = 20,
+) -> str:
+    """Join two consecutive chunks, dropping text repeated across the boundary.
+
+    Overlaps shorter than ``min_overlap`` characters are treated as
+    coincidence and the chunks are joined with a newline instead.
+    """
+    limit = min(len(first), len(second), max_overlap)
+    for size in range(limit, min_overlap - 1, -1):
+        if first.endswith(second[:size]):
+            return first + second[size:]
+    return f"{first}\n{second}"
+
+
+def _chunk_index(result: dict) -> int | None:
+    index = (result.get("metadata") or {}).get("chunk_index")
+    return index if isinstance(index, int) else None
+
+
+def assemble_context(
+    results: list[dict],
+    token_budget: int = 3000,
+    mmr_lambda: float = 0.7,
+    duplicate_threshold: float = 0.8,
+) -> dict:
+    """Build a de-duplicated, position-ordered context string within a token budget.
+
+    Args:
+        results: Retrieval results, best first, each with ``content``,
+            ``chunk_id``, ``document_id`` and optional ``metadata.chunk_index``.
+        token_budget: Maximum approximate tokens of passage text.
+        mmr_lambda: Weight of relevance vs. novelty when ordering passages.
+        duplicate_threshold: Shingle similarity above which a passage is
+            treated as a duplicate of one already chosen.
+
+    Returns:
+        Dict with ``context`` (str), ``sources`` (the results that made the
+        cut, in relevance order) and ``tokens`` (estimated tokens used).
+    """
+    candidates = [r for r in results if (r.get("content") or "").strip()]
+    if not candidates:
+        return {"context": "", "sources": [], "tokens": 0}
+
+    relevance = {id(r): 1.0 - rank / len(candidates) for rank, r in enumerate(candidates)}
+    shingles = {id(r): _shingles(r["content"]) for r in candidates}
+
+    # --- Greedy MMR with a hard duplicate cut-off ---
+    selected: list[dict] = []
+    remaining = list(candidates)
+    tokens = 0
+    while remaining:
+        best, best_score, best_sim = None, float("-inf"), 0.0
+        for r in remaining:
+            max_sim = max((_similarity(shingles[id(r)], shingles[id(s)]) for s in selected), default=0.0)
+            score = mmr_lambda * relevance[id(r)] - (1 - mmr_lambda) * max_sim
+            if score > best_score:
+                best, best_score, best_sim = r, score, max_sim
+        remaining.remove(best)
+        if best_sim >= duplicate_threshold:
+            continue
+        cost = estimate_tokens(best["content"])
+        if tokens + cost > token_budget:
+            continue
+        selected.append(best)
+        tokens += cost
+
+    if not selected:
+        return {"context": "", "sources": [], "tokens": 0}
+
+    # --- Group by document in order of each document's best passage ---
+    doc_order: list[str] = []
+    by_doc: dict[str, list[dict]] = {}
+    for r in selected:
+        doc_id = r.get("document_id", "")
+        if doc_id not in by_doc:
+            doc_order.append(doc_id)
+            by_doc[doc_id] = []
+        by_doc[doc_id].append(r)
+
+    sections: list[str] = []
+    for doc_id in doc_order:
+        passages = sorted(
+            by_doc[doc_id],
+            key=lambda r: (_chunk_index(r) is None, _chunk_index(r) or 0),
+        )
+        merged: list[str] = []
+        prev_index: int | None = None
+        for r in passages:
+            index = _chunk_index(r)
+            if merged and index is not None and prev_index is not None and index == prev_index + 1:
+                merged[-1] = merge_overlap(merged[-1], r["content"].strip())
+            else:
+                merged.append(r["content"].strip())
+            prev_index = index
+        sections.append("\n...\n".join(merged))
+
+    context = "\n\n".join(sections)
+    selected_ids = {id(r) for r in selected}
+    sources = [r for r in candidates if id(r) in selected_ids]
+    return {"context": context, "sources": sources, "tokens": estimate_tokens(context)}
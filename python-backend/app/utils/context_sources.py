@@ -0,0 +1,43 @@
+"""Failure isolation for the independent sources that feed chat context.
+
+Chat replies draw on several sources — client records, Calendar, Gmail,
+Drive, RAG retrieval — and none of them should be able to fail or stall a
+reply on its own.  ``bounded`` awaits one source and turns a timeout or
+error into a logged default.
+"""
+
+import asyncio
+import logging
+from collections.abc import Awaitable
+from typing import TypeVar
+
+from app.config import get_settings
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+# Sentinel: use ``CONTEXT_SOURCE_TIMEOUT_SECONDS``
+_DEFAULT_TIMEOUT = object()
+
+
+async def bounded(source: str, coro: Awaitable[T], default: T, timeout=_DEFAULT_TIMEOUT) -> T:
+    """Await ``coro``, returning ``default`` if it fails or times out.
+
+    Args:
+        source: Description used in log messages.
+        coro: The source's loader.
+        default: Value returned on failure.
+        timeout: Seconds to wait; defaults to ``CONTEXT_SOURCE_TIMEOUT_SECONDS``.
+            ``None`` waits without a bound (for loaders that bound their own
+            sources) while still isolating failures.
+    """
+    if timeout is _DEFAULT_TIMEOUT:
+        timeout = get_settings().CONTEXT_SOURCE_TIMEOUT_SECONDS
+    try:
+        return await asyncio.wait_for(coro, timeout=timeout)
+    except asyncio.TimeoutError:
+        logger.warning("%s timed out after %.1fs — continuing without it", source, timeout)
+    except Exception:
+        logger.warning("%s failed — continuing without it", source, exc_info=True)
+    return default
@@ -0,0 +1,251 @@
+"""Rolling conversation memory: a persisted summary plus the most recent messages.
+
+Instead of re-reading and replaying a conversation's entire message history on
+every turn, the conversation document carries its own memory:
+
+- ``memory_window``: every message not yet folded into the summary; prompts
+  use the newest ``CHAT_MEMORY_WINDOW_MESSAGES`` of them.
+- ``memory_summary``: a running LLM summary of everything older.
+
+Each turn therefore reads one document and sends a bounded prompt.  Turns
+only ever append to the window with ``ArrayUnion``, so concurrent turns in one
+conversation cannot overwrite each other.  When the window outgrows its size,
+the overflow is summarised in the background and removed with
+``ArrayRemove``, which leaves messages appended meanwhile in place.  If
+summarising keeps failing, the oldest overflow is dropped so that at most
+``CHAT_MEMORY_MAX_UNSUMMARIZED`` messages overflow and the window stays under
+``CHAT_MEMORY_MAX_WINDOW_BYTES``, keeping the conversation document well
+inside Firestore's size limit.
+
+Conversations written before this scheme may still carry a
+``memory_pending`` list; it is folded into the summary on the next pass.
+"""
+
+import asyncio
+import json
+import logging
+from datetime import datetime, timezone
+
+import google.generativeai as genai
+from google.cloud.firestore import ArrayRemove, ArrayUnion
+
+from app.config import get_settings
+from app.models.chat import COLLECTION_NAME
+from app.utils.firebase_client import get_firestore_client
+from app.utils.llm_gateway import get_llm_gateway
+
+logger = logging.getLogger(__name__)
+
+_conversation_memory = None
+
+SUMMARY_PROMPT = (
+    "You maintain the running memory of a conversation between a user and an "
+    "AI assistant. Update the summary below with the new messages. Keep facts, "
+    "names, numbers, decisions and open questions; drop pleasantries. Write "
+    "concise prose, at most {max_words} words.\n\n"
+    "## Current summary\n{summary}\n\n## New messages\n{messages}\n\n"
+    "## Updated summary"
+)
+
+
+def memory_entry(message: dict) -> dict:
+    """Reduce a stored chat message to the fields kept in memory."""
+    return {
+        "role": message.get("role", "user"),
+        "content": message.get("content", ""),
+        "created_at": message.get("created_at", ""),
+    }
+
+
+class ConversationMemory:
+    """Builds prompt history from conversation memory and keeps it up to date.
+
+    Args:
+        window_size: Messages kept verbatim; defaults to
+            ``CHAT_MEMORY_WINDOW_MESSAGES``.
+    """
+
+    def __init__(self, window_size: int | None = None) -> None:
+        settings = get_settings()
+        self._window_size = window_size or settings.CHAT_MEMORY_WINDOW_MESSAGES
+        self._summary_max_words = settings.CHAT_MEMORY_SUMMARY_MAX_WORDS
+        self._max_unsummarized = settings.CHAT_MEMORY_MAX_UNSUMMARIZED
+        self._max_window_bytes = settings.CHAT_MEMORY_MAX_WINDOW_BYTES
+        self._in_flight: set[str] = set()
+        self._tasks: set[asyncio.Task] = set()
+
+    @property
+    def window_size(self) -> int:
+        return self._window_size
+
+    # ------------------------------------------------------------------
+    # Reading
+    # ------------------------------------------------------------------
+
+    @staticmethod
+    def has_memory(conv_data: dict) -> bool:
+        """Whether the conversation already carries a memory window."""
+        return "memory_window" in conv_data
+
+    @staticmethod
+    def summary(conv_data: dict) -> str:
+        """Return the running summary of messages older than the window."""
+        return conv_data.get("memory_summary") or ""
+
+    @staticmethod
+    def unsummarized(conv_data: dict) -> list[dict]:
+        """Return every message not yet folded into the summary, oldest first."""
+        window = [m for m in (conv_data.get("memory_window") or []) if isinstance(m, dict)]
+        return sorted(window, key=lambda m: m.get("created_at", ""))
+
+    def recent(self, conv_data: dict) -> list[dict]:
+        """Return the windowed messages, oldest first."""
+        return self.unsummarized(conv_data)[-self._window_size:]
+
+    # ------------------------------------------------------------------
+    # Writing
+    # ------------------------------------------------------------------
+
+    def record_turn(
+        self,
+        window: list[dict],
+        new_messages: list[dict],
+        seed: bool = False,
+    ) -> tuple[dict, bool]:
+        """Compute the conversation update that appends ``new_messages`` to memory.
+
+        The update is an ``ArrayUnion``, so it composes with concurrent turns
+        and with a summary pass removing older messages.
+
+        Args:
+            window: The unsummarised messages the turn was generated from.
+            new_messages: Messages saved by this turn, oldest first.
+            seed: The conversation has no memory yet and ``window`` was read
+                from its message history, so it is written too.
+
+        Returns:
+            ``(update, overflowed)`` — fields to merge into the conversation
+            update, and whether the window now exceeds its size and needs
+            summarising.
+        """
+        entries = [memory_entry(m) for m in new_messages]
+        if seed:
+            entries = [memory_entry(m) for m in window] + entries
+        overflowed = len(window) + len(new_messages) > self._window_size
+        return {"memory_window": ArrayUnion(entries)}, overflowed
+
+    def schedule_summary(self, conversation_id: str) -> None:
+        """Fold the window's overflow into the summary in the background."""
+        if conversation_id in self._in_flight:
+            return
+        task = asyncio.create_task(self.summarize_pending(conversation_id))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    async def summarize_pending(self, conversation_id: str) -> bool:
+        """Fold messages older than the window into ``memory_summary``.
+
+        Returns:
+            True if the summary was updated.
+        """
+        if conversation_id in self._in_flight:
+            return False
+        self._in_flight.add(conversation_id)
+        try:
+            db = get_firestore_client()
+            conv_ref = db.collection(COLLECTION_NAME).document(conversation_id)
+            conv_doc = await asyncio.to_thread(conv_ref.get)
+            if not conv_doc.exists:
+                return False
+            conv_data = conv_doc.to_dict()
+            window = self.unsummarized(conv_data)
+            overflow = window[:-self._window_size] if len(window) > self._window_size else []
+            # Left by conversations recorded before the window became append-only
+            legacy = [m for m in (conv_data.get("memory_pending") or []) if isinstance(m, dict)]
+            if not overflow and not legacy:
+                return False
+
+            try:
+                summary = await self._summarize(self.summary(conv_data), legacy + overflow)
+            except Exception:
+                logger.warning("Failed to summarise conversation %s", conversation_id, exc_info=True)
+                summary = None
+            if summary is None:
+                await self._cap_overflow(conv_ref, conversation_id, window, overflow)
+                return False
+
+            update: dict = {
+                "memory_summary": summary,
+                "memory_summarized_at": datetime.now(timezone.utc).isoformat(),
+            }
+            if overflow:
+                update["memory_window"] = ArrayRemove(overflow)
+            if legacy:
+                update["memory_pending"] = ArrayRemove(legacy)
+            await asyncio.to_thread(conv_ref.update, update)
+            logger.info(
+                "Folded %d messages into the summary of conversation %s",
+                len(legacy) + len(overflow), conversation_id,
+            )
+            return True
+        except Exception:
+            logger.warning("Failed to summarise conversation %s", conversation_id, exc_info=True)
+            return False
+        finally:
+            self._in_flight.discard(conversation_id)
+
+    async def _cap_overflow(
+        self, conv_ref, conversation_id: str, window: list[dict], overflow: list[dict]
+    ) -> None:
+        """Drop the oldest overflow beyond the message-count and byte-size caps.
+
+        Only overflow is dropped; the newest ``window_size`` messages are kept.
+        """
+        sizes = [len(json.dumps(m).encode("utf-8")) for m in window]
+        total = sum(sizes)
+        excess = max(0, len(overflow) - self._max_unsummarized)
+        total -= sum(sizes[:excess])
+        while excess < len(overflow) and total > self._max_window_bytes:
+            total -= sizes[excess]
+            excess += 1
+        if excess == 0:
+            return
+        await asyncio.to_thread(conv_ref.update, {"memory_window": ArrayRemove(overflow[:excess])})
+        logger.warning(
+            "Summary of conversation %s keeps failing — dropped its %d oldest unsummarised messages",
+            conversation_id, excess,
+        )
+
+    async def _summarize(self, summary: str, messages: list[dict]) -> str | None:
+        """Ask Gemini for an updated summary; None if Gemini is unavailable."""
+        gateway = get_llm_gateway()
+        if not gateway.is_configured():
+            logger.warning("Gemini API key not set — conversation summary not updated")
+            return None
+
+        rendered = "\n\n".join(f"**{m.get('role', 'user')}**: {m.get('content', '')}" for m in messages)
+        prompt = SUMMARY_PROMPT.format(
+            max_words=self._summary_max_words,
+            summary=summary or "(none yet)",
+            messages=rendered,
+        )
+        response = await gateway.generate(
+            "memory_summary",
+            prompt,
+            generation_config=genai.GenerationConfig(temperature=0.2, max_output_tokens=1024),
+        )
+        # An empty reply must not count as a summary, or the overflow is lost
+        return (response.text or "").strip() or None
+
+
+# ------------------------------------------------------------------
+# Singleton accessor
+# ------------------------------------------------------------------
+
+
+def get_conversation_memory() -> ConversationMemory:
+    """Return the module-level ConversationMemory singleton."""
+    global _conversation_memory
+    if _conversation_memory is None:
+        _conversation_memory = ConversationMemory()
+    return _conversation_memory
@@ -0,0 +1,393 @@
+"""Background document ingestion pipeline: extract -> chunk -> embed -> index.
+
+Uploads are staged to disk and acknowledged immediately; this worker then runs
+the stages outside the request.  Progress is written to the document record
+(``ingestion_stage``, ``chunks_done``/``chunks_total``) so the UI can poll it,
+and every stage is resumable:
+
+- Extract/chunk re-run from the staged upload.  Chunk IDs are deterministic,
+  so a re-run overwrites partial output instead of duplicating it.
+- Embed/index resumes from ``chunks_done``; chunks below that watermark are
+  already in the vector store.  A batch only advances the watermark once
+  every chunk in it is indexed.
+
+Uploads are written with a fresh ``ingestion_updated_at``.  Both the upload's
+own run and the startup scan for abandoned documents claim a document with a
+transactional compare-and-set on that field before working on it, so only
+one worker picks it up.  Uploads are staged on
+local disk, so a document whose staged file is not on the claiming host is
+failed with a request to re-upload.
+"""
+
+import asyncio
+import contextlib
+import logging
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+
+from google.cloud.firestore import ArrayUnion, transactional
+
+from app.config import get_settings
+from app.models.agent import COLLECTION_NAME as AGENTS_COLLECTION
+from app.models.document import (
+    CHUNKS_COLLECTION,
+    COLLECTION_NAME,
+    DocumentStatus,
+    IngestionStage,
+)
+from app.utils.document_processor import DocumentProcessor
+from app.utils.firebase_client import get_firestore_client
+from app.utils.vector_store import VectorStore, get_vector_store
+
+logger = logging.getLogger(__name__)
+
+# Chunks embedded between progress writes to the document record
+EMBED_BATCH_SIZE = 10
+
+_ingestion_worker = None
+
+
+def _now_iso() -> str:
+    """Return the current UTC time as an ISO-8601 string."""
+    return datetime.now(timezone.utc).isoformat()
+
+
+class DocumentIngestionWorker:
+    """Runs the ingestion stages for uploaded documents with bounded concurrency."""
+
+    def __init__(
+        self,
+        vector_store: VectorStore | None = None,
+        staging_dir: str | None = None,
+        concurrency: int | None = None,
+    ) -> None:
+        settings = get_settings()
+        self._vector_store = vector_store
+        self._staging_dir = Path(staging_dir or settings.INGESTION_STAGING_DIR)
+        self._semaphore = asyncio.Semaphore(concurrency or settings.INGESTION_CONCURRENCY)
+        self._stale_after = timedelta(seconds=settings.INGESTION_STALE_SECONDS)
+        # Bump the claim well inside the stale window while a long stage runs
+        self._heartbeat_interval = max(1.0, settings.INGESTION_STALE_SECONDS / 3)
+        self._in_flight: set[str] = set()
+
+    @property
+    def vector_store(self) -> VectorStore:
+        if self._vector_store is None:
+            self._vector_store = get_vector_store()
+        return self._vector_store
+
+    # ------------------------------------------------------------------
+    # Staging
+    # ------------------------------------------------------------------
+
+    def _staged_path(self, doc_id: str) -> Path:
+        return self._staging_dir / doc_id
+
+    def stage_upload(self, doc_id: str, file_content: bytes) -> None:
+        """Write the raw upload to the staging directory so extraction can resume."""
+        self._staging_dir.mkdir(parents=True, exist_ok=True)
+        self._staged_path(doc_id).write_bytes(file_content)
+
+    def discard_upload(self, doc_id: str) -> None:
+        """Remove a staged upload, if present."""
+        self._staged_path(doc_id).unlink(missing_ok=True)
+
+    # ------------------------------------------------------------------
+    # Pipeline
+    # ------------------------------------------------------------------
+
+    async def run(self, doc_id: str, observed_at: str | None = None) -> None:
+        """Claim and run (or resume) ingestion for a single document.
+
+        Safe to call more than once for the same document; concurrent calls
+        within this process are collapsed, and the claim stops another
+        worker's ``resume_pending`` from running it at the same time.
+
+        Args:
+            doc_id: The document to ingest.
+            observed_at: ``ingestion_updated_at`` as written at upload; read
+                from the document when omitted.
+        """
+        if doc_id in self._in_flight:
+            logger.info("Ingestion already running for document %s", doc_id)
+            return
+        self._in_flight.add(doc_id)
+        try:
+            async with self._semaphore:
+                if observed_at is None:
+                    db = get_firestore_client()
+                    snapshot = await asyncio.to_thread(db.collection(COLLECTION_NAME).document(doc_id).get)
+                    observed_at = snapshot.to_dict().get("ingestion_updated_at") if snapshot.exists else None
+                if not await asyncio.to_thread(self._claim, doc_id, observed_at):
+                    logger.info("Ingestion for document %s was claimed by another worker", doc_id)
+                    return
+                await self._run(doc_id)
+        finally:
+            self._in_flight.discard(doc_id)
+
+    async def _run(self, doc_id: str) -> None:
+        db = get_firestore_client()
+        doc_ref = db.collection(COLLECTION_NAME).document(doc_id)
+
+        try:
+            snapshot = await asyncio.to_thread(doc_ref.get)
+            if not snapshot.exists:
+                logger.warning("Ingestion: document %s no longer exists", doc_id)
+                self.discard_upload(doc_id)
+                return
+            doc = snapshot.to_dict()
+            stage = doc.get("ingestion_stage") or IngestionStage.QUEUED.value
+
+            if stage == IngestionStage.DONE.value:
+                return
+
+            if stage != IngestionStage.EMBEDDING.value:
+                if not self._staged_path(doc_id).is_file():
+                    # Staged on another host, or lost when this one restarted
+                    logger.warning("Ingestion: staged upload for document %s is not on this host", doc_id)
+                    await asyncio.to_thread(doc_ref.update, {
+                        "status": DocumentStatus.ERROR.value,
+                        "error_message": "Staged upload is no longer available; please re-upload the file",
+                        "ingestion_updated_at": _now_iso(),
+                    })
+                    return
+                doc = await self._extract_and_chunk(doc_ref, doc_id, doc)
+
+            await self._embed_and_index(doc_ref, doc_id, doc)
+        except Exception as e:
+            logger.exception("Ingestion failed for document %s", doc_id)
+            await asyncio.to_thread(doc_ref.update, {
+                "status": DocumentStatus.ERROR.value,
+                "error_message": str(e),
+                "ingestion_updated_at": _now_iso(),
+            })
+
+    @contextlib.asynccontextmanager
+    async def _heartbeat(self, doc_ref):
+        """Keep ``ingestion_updated_at`` fresh while a long-running stage runs.
+
+        Without it, extracting and chunking a large upload can outlast
+        ``INGESTION_STALE_SECONDS`` and another worker's ``resume_pending``
+        would claim the document while this one is still working on it.
+        """
+        async def _beat() -> None:
+            while True:
+                await asyncio.sleep(self._heartbeat_interval)
+                try:
+                    await asyncio.to_thread(doc_ref.update, {"ingestion_updated_at": _now_iso()})
+                except Exception:
+                    logger.warning("Ingestion heartbeat failed for document %s", doc_ref.id, exc_info=True)
+
+        task = asyncio.create_task(_beat())
+        try:
+            yield
+        finally:
+            task.cancel()
+            with contextlib.suppress(asyncio.CancelledError):
+                await task
+
+    async def _extract_and_chunk(self, doc_ref, doc_id: str, doc: dict) -> dict:
+        """Stream the staged upload through extraction and chunking into Firestore."""
+        staged = self._staged_path(doc_id)
+        if not staged.is_file():
+            raise RuntimeError("Staged upload is no longer available; please re-upload the file")
+
+        # Extraction is lazy (page by page) and interleaved with chunking
+        await asyncio.to_thread(doc_ref.update, {
+            "ingestion_stage": IngestionStage.CHUNKING.value,
+            "ingestion_updated_at": _now_iso(),
+        })
+        filename = doc.get("filename") or "unknown.txt"
+        async with self._heartbeat(doc_ref):
+            file_content = await asyncio.to_thread(staged.read_bytes)
+            stats = await asyncio.to_thread(
+                DocumentProcessor.chunk_document, doc_id, file_content, filename
+            )
+
+        update = {
+            "ingestion_stage": IngestionStage.EMBEDDING.value,
+            "chunk_count": stats["chunk_count"],
+            "chunks_total": stats["chunk_count"],
+            "chunks_done": 0,
+            "word_count": stats["word_count"],
+            "ingestion_updated_at": _now_iso(),
+        }
+        await asyncio.to_thread(doc_ref.update, update)
+        self.discard_upload(doc_id)
+        logger.info("Ingestion: chunked document %s into %d chunks", doc_id, stats["chunk_count"])
+        return {**doc, **update}
+
+    async def _embed_and_index(self, doc_ref, doc_id: str, doc: dict) -> None:
+        """Embed every chunk at or above the ``chunks_done`` watermark."""
+        db = get_firestore_client()
+        chunks_done = doc.get("chunks_done", 0)
+
+        chunk_docs = await asyncio.to_thread(
+            lambda: list(
+                db.collection(CHUNKS_COLLECTION)
+                .where("document_id", "==", doc_id)
+                .stream()
+            )
+        )
+        chunks = [c.to_dict() | {"id": c.id} for c in chunk_docs]
+        chunks = [c for c in chunks if c.get("document_id") == doc_id]
+        chunks.sort(key=lambda c: c.get("chunk_index", 0))
+        pending = [c for c in chunks if c.get("chunk_index", 0) >= chunks_done]
+
+        scope = {
+            "agent_id": doc.get("agent_id"),
+            "client_id": doc.get("client_id"),
+            "filename": doc.get("filename"),
+        }
+
+        for start in range(0, len(pending), EMBED_BATCH_SIZE):
+            batch = [
+                {
+                    "id": c["id"],
+                    "content": c.get("content", ""),
+                    "metadata": {
+                        **(c.get("metadata") or {}),
+                        **scope,
+                        "chunk_index": c.get("chunk_index", 0),
+                    },
+                }
+                for c in pending[start:start + EMBED_BATCH_SIZE]
+            ]
+            indexed = await self.vector_store.index_document_chunks(doc_id, batch)
+            if indexed < len(batch):
+                # Keep the watermark before this batch so a retry re-embeds it
+                raise RuntimeError(
+                    f"Embedding failed for {len(batch) - indexed} of {len(batch)} chunks"
+                )
+            chunks_done = batch[-1]["metadata"]["chunk_index"] + 1
+            await asyncio.to_thread(doc_ref.update, {
+                "chunks_done": chunks_done,
+                "ingestion_updated_at": _now_iso(),
+            })
+
+        await asyncio.to_thread(doc_ref.update, {
+            "status": DocumentStatus.READY.value,
+            "ingestion_stage": IngestionStage.DONE.value,
+            "chunks_done": len(chunks),
+            "chunks_total": len(chunks),
+            "chunk_count": len(chunks),
+            "error_message": None,
+            "ingestion_updated_at": _now_iso(),
+        })
+
+        agent_id = doc.get("agent_id")
+        if agent_id:
+            # Agents only take the RAG path once they have document_ids
+            try:
+                await asyncio.to_thread(
+                    db.collection(AGENTS_COLLECTION).document(agent_id).update,
+                    {"document_ids": ArrayUnion([doc_id])},
+                )
+            except Exception:
+                logger.warning("Failed to link document %s to agent %s", doc_id, agent_id)
+
+        logger.info("Ingestion complete for document %s (%d chunks)", doc_id, len(chunks))
+
+    # ------------------------------------------------------------------
+    # Crash recovery
+    # ------------------------------------------------------------------
+
+    async def resume_pending(self) -> int:
+        """Resume ingestion for documents left in ``processing`` by a dead worker.
+
+        A document is considered abandoned when its progress has not moved
+        for ``INGESTION_STALE_SECONDS``.  Each one is claimed before it is
+        resumed, and at most ``INGESTION_CONCURRENCY`` run at once.
+
+        Returns:
+            Number of documents this worker claimed and resumed.
+        """
+        cutoff = (datetime.now(timezone.utc) - self._stale_after).isoformat()
+
+        try:
+            db = get_firestore_client()
+            docs = await asyncio.to_thread(
+                lambda: list(
+                    db.collection(COLLECTION_NAME)
+                    .where("status", "==", DocumentStatus.PROCESSING.value)
+                    .stream()
+                )
+            )
+        except Exception:
+            logger.warning("Could not scan for abandoned document ingestion", exc_info=True)
+            return 0
+        stale = {}
+        for doc in docs:
+            data = doc.to_dict()
+            if data.get("status") != DocumentStatus.PROCESSING.value:
+                continue
+            updated_at = data.get("ingestion_updated_at")
+            if (updated_at or "") < cutoff:
+                stale[doc.id] = updated_at
+
+        results = await asyncio.gather(
+            *(self._resume(doc_id, updated_at) for doc_id, updated_at in stale.items())
+        )
+        resumed = sum(1 for claimed in results if claimed)
+
+        if resumed:
+            logger.info("Resumed ingestion for %d documents", resumed)
+        return resumed
+
+    async def _resume(self, doc_id: str, observed_at: str | None) -> bool:
+        """Claim and run one abandoned document; ``False`` if another worker has it."""
+        if doc_id in self._in_flight:
+            return False
+        self._in_flight.add(doc_id)
+        try:
+            # Claim only once a slot is free, so the claim is fresh when work starts
+            async with self._semaphore:
+                if not await asyncio.to_thread(self._claim, doc_id, observed_at):
+                    return False
+                await self._run(doc_id)
+                return True
+        finally:
+            self._in_flight.discard(doc_id)
+
+    @staticmethod
+    def _claim(doc_id: str, observed_at: str | None) -> bool:
+        """Claim a document by bumping ``ingestion_updated_at``.
+
+        The transaction only succeeds if the document is still processing
+        and its ``ingestion_updated_at`` is the value this worker observed,
+        so concurrent workers and instances cannot both claim it.
+        """
+        try:
+            db = get_firestore_client()
+            ref = db.collection(COLLECTION_NAME).document(doc_id)
+
+            @transactional
+            def _take(transaction) -> bool:
+                snapshot = ref.get(transaction=transaction)
+                if not snapshot.exists:
+                    return False
+                data = snapshot.to_dict()
+                if data.get("status") != DocumentStatus.PROCESSING.value:
+                    return False
+                if data.get("ingestion_updated_at") != observed_at:
+                    return False
+                transaction.update(ref, {"ingestion_updated_at": _now_iso()})
+                return True
+
+            return _take(db.transaction())
+        except Exception:
+            logger.warning("Could not claim document %s for ingestion resume", doc_id, exc_info=True)
+            return False
+
+
+# ------------------------------------------------------------------
+# Singleton accessor
+# ------------------------------------------------------------------
+
+
+def get_ingestion_worker() -> DocumentIngestionWorker:
+    """Return the module-level DocumentIngestionWorker singleton."""
+    global _ingestion_worker
+    if _ingestion_worker is None:
+        _ingestion_worker = DocumentIngestionWorker()
+    return _ingestion_worker
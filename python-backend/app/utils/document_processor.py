@@ -1,13 +1,21 @@
 """Document text extraction and chunking processor."""
 
 import logging
+import re
+from collections.abc import Iterable, Iterator
 from io import BytesIO
+from typing import NamedTuple
 
-from app.models.document import CHUNKS_COLLECTION, COLLECTION_NAME, DocumentStatus
+from app.config import get_settings
+from app.models.document import CHUNKS_COLLECTION
+from app.utils.context_assembler import CHARS_PER_TOKEN, estimate_tokens
 from app.utils.firebase_client import get_firestore_client
 
 logger = logging.getLogger(__name__)
 
+# Firestore allows at most 500 writes per batch
+CHUNK_WRITE_BATCH_SIZE = 400
+
 
 class DocumentProcessor:
     """Extract text from uploaded files and split into searchable chunks."""
@@ -17,43 +25,61 @@ class DocumentProcessor:
         """Extract plain text from a file based on its extension.
 
         Supports PDF (via PyPDF2), DOCX (via python-docx), and plain text files.
+        Materialises the whole text; the ingestion pipeline streams
+        ``iter_pages`` instead.
+        """
+        return "\n\n".join(
+            text for _, text in DocumentProcessor.iter_pages(file_content, filename)
+        )
+
+    @staticmethod
+    def iter_pages(file_content: bytes, filename: str) -> Iterator[tuple[int, str]]:
+        """Yield ``(page_number, text)`` pairs lazily, one page at a time.
+
+        PDF pages are extracted only as they are consumed.  DOCX files have no
+        page model, so each non-empty paragraph is yielded as part of page 1.
+        Plain text is split into pages on form feeds.
         """
         lower = filename.lower()
 
         if lower.endswith(".pdf"):
-            return DocumentProcessor._extract_pdf(file_content)
+            yield from DocumentProcessor._iter_pdf_pages(file_content)
         elif lower.endswith(".docx"):
-            return DocumentProcessor._extract_docx(file_content)
-        elif lower.endswith(".txt"):
-            return file_content.decode("utf-8", errors="replace")
+            yield from DocumentProcessor._iter_docx_paragraphs(file_content)
         else:
-            # Fallback: attempt to decode as text
-            return file_content.decode("utf-8", errors="replace")
+            # .txt and fallback: attempt to decode as text
+            text = file_content.decode("utf-8", errors="replace")
+            for page_number, page in enumerate(text.split("\f"), start=1):
+                if page.strip():
+                    yield page_number, page
 
     @staticmethod
-    def _extract_pdf(file_content: bytes) -> str:
-        """Extract text from all pages of a PDF."""
+    def _iter_pdf_pages(file_content: bytes) -> Iterator[tuple[int, str]]:
+        """Yield the text of each PDF page that has any."""
         from PyPDF2 import PdfReader
 
         reader = PdfReader(BytesIO(file_content))
-        pages: list[str] = []
-        for page in reader.pages:
+        for page_number, page in enumerate(reader.pages, start=1):
             text = page.extract_text()
             if text:
-                pages.append(text)
-        return "\n\n".join(pages)
+                yield page_number, text
 
     @staticmethod
-    def _extract_docx(file_content: bytes) -> str:
-        """Extract text from all paragraphs of a DOCX file."""
+    def _iter_docx_paragraphs(file_content: bytes) -> Iterator[tuple[int, str]]:
+        """Yield each non-empty DOCX paragraph as page 1 text."""
         from docx import Document
 
         doc = Document(BytesIO(file_content))
-        return "\n\n".join(p.text for p in doc.paragraphs if p.text.strip())
+        for p in doc.paragraphs:
+            if p.text.strip():
+                yield 1, p.text
 
     @staticmethod
     def chunk_text(text: str, chunk_size: int = 1000, overlap: int = 200) -> list[str]:
-        """Split text into overlapping chunks for downstream retrieval.
+        """Split text into overlapping fixed-size character chunks.
+
+        The ingestion pipeline uses the token-sized, structure-aware
+        ``iter_chunks``; this is the simple whole-text splitter.
 
         Args:
             text: The full extracted text.
@@ -78,70 +104,235 @@ class DocumentProcessor:
         return chunks
 
     @staticmethod
-    async def process_document(
+    def chunk_id(doc_id: str, chunk_index: int) -> str:
+        """Return the deterministic Firestore ID for a document chunk.
+
+        Deterministic IDs make re-running the chunk stage after a crash
+        overwrite partial output instead of duplicating it.
+        """
+        return f"{doc_id}_{chunk_index:05d}"
+
+    @staticmethod
+    def iter_chunks(
+        pages: Iterable[tuple[int, str]],
+        max_tokens: int | None = None,
+        overlap_tokens: int | None = None,
+    ) -> Iterator[dict]:
+        """Group page text into structure-aware chunks, lazily.
+
+        Chunks break at headings and otherwise fill up with whole paragraphs;
+        paragraphs over the limit fall back to sentence boundaries, and only a
+        single over-long sentence is split mid-way (on whitespace).  Each new
+        chunk within a section starts with the trailing sentences/paragraphs of
+        the previous one, up to ``overlap_tokens``.
+
+        Args:
+            pages: ``(page_number, text)`` pairs, e.g. from ``iter_pages``.
+            max_tokens: Approximate token ceiling per chunk.
+            overlap_tokens: Approximate tokens carried into the next chunk.
+
+        Yields:
+            Dicts with ``content`` and ``metadata`` (``page_start``,
+            ``page_end`` and ``heading`` of the enclosing section, if any).
+        """
+        settings = get_settings()
+        max_tokens = max_tokens or settings.CHUNK_MAX_TOKENS
+        if overlap_tokens is None:
+            overlap_tokens = settings.CHUNK_OVERLAP_TOKENS
+        overlap_tokens = min(overlap_tokens, max_tokens // 2)
+
+        current: list[_Unit] = []
+        current_tokens = 0
+        fresh = 0  # units added since the last emitted chunk
+        heading: str | None = None
+
+        def emit() -> dict:
+            parts: list[str] = []
+            for unit in current:
+                if parts:
+                    parts.append("\n\n" if unit.new_paragraph else " ")
+                parts.append(unit.text)
+            return {
+                "content": "".join(parts),
+                "metadata": {
+                    "page_start": current[0].page,
+                    "page_end": current[-1].page,
+                    "heading": heading,
+                },
+            }
+
+        for unit in _iter_units(pages, max_tokens):
+            if unit.is_heading:
+                if fresh:
+                    yield emit()
+                current, current_tokens, fresh = [], 0, 0
+                heading = unit.text.lstrip("#").strip()
+            elif fresh and current_tokens + unit.tokens > max_tokens:
+                yield emit()
+                tail: list[_Unit] = []
+                tail_tokens = 0
+                for prev in reversed(current):
+                    if prev.is_heading or tail_tokens + prev.tokens > overlap_tokens:
+                        break
+                    tail.insert(0, prev)
+                    tail_tokens += prev.tokens
+                current, current_tokens, fresh = tail, tail_tokens, 0
+
+            current.append(unit)
+            current_tokens += unit.tokens
+            if not unit.is_heading:
+                fresh += 1
+
+        if fresh:
+            yield emit()
+
+    @staticmethod
+    def write_chunks(
         doc_id: str,
-        file_content: bytes,
-        filename: str,
-    ) -> dict:
-        """Extract text, chunk it, store chunks in Firestore, and update the document.
+        chunks: Iterable[str | dict],
+        metadata: dict | None = None,
+    ) -> int:
+        """Store chunks in Firestore, committing in batches under the 500-write limit.
+
+        ``chunks`` may be a generator; at most one batch is held in memory.
 
         Args:
             doc_id: Firestore document ID of the parent document.
-            file_content: Raw bytes of the uploaded file.
-            filename: Original filename (used to determine extraction method).
+            chunks: Chunk texts, or ``iter_chunks`` dicts, in document order.
+            metadata: Metadata copied onto every chunk.
 
         Returns:
-            dict with chunk_count and word_count.
+            Number of chunks written.
         """
         db = get_firestore_client()
-        doc_ref = db.collection(COLLECTION_NAME).document(doc_id)
-
-        try:
-            # Extract text
-            text = DocumentProcessor.extract_text(file_content, filename)
-            if not text.strip():
-                doc_ref.update({
-                    "status": DocumentStatus.READY.value,
-                    "chunk_count": 0,
-                    "error_message": None,
-                })
-                return {"chunk_count": 0, "word_count": 0}
-
-            # Chunk text
-            chunks = DocumentProcessor.chunk_text(text)
-            word_count = len(text.split())
-
-            # Store chunks in Firestore
-            batch = db.batch()
-            for idx, content in enumerate(chunks):
-                chunk_ref = db.collection(CHUNKS_COLLECTION).document()
-                batch.set(chunk_ref, {
-                    "document_id": doc_id,
-                    "content": content,
-                    "chunk_index": idx,
-                    "metadata": {},
-                })
+        batch = db.batch()
+        pending = 0
+        written = 0
+        for idx, chunk in enumerate(chunks):
+            if isinstance(chunk, dict):
+                content = chunk["content"]
+                chunk_metadata = {**(metadata or {}), **chunk.get("metadata", {})}
+            else:
+                content = chunk
+                chunk_metadata = dict(metadata or {})
+            chunk_ref = db.collection(CHUNKS_COLLECTION).document(
+                DocumentProcessor.chunk_id(doc_id, idx)
+            )
+            batch.set(chunk_ref, {
+                "document_id": doc_id,
+                "content": content,
+                "chunk_index": idx,
+                "metadata": chunk_metadata,
+            })
+            pending += 1
+            written += 1
+            if pending >= CHUNK_WRITE_BATCH_SIZE:
+                batch.commit()
+                batch = db.batch()
+                pending = 0
+        if pending:
             batch.commit()
+        return written
 
-            # Update document status
-            doc_ref.update({
-                "status": DocumentStatus.READY.value,
-                "chunk_count": len(chunks),
-                "error_message": None,
-            })
+    @staticmethod
+    def chunk_document(doc_id: str, file_content: bytes, filename: str) -> dict:
+        """Extract, chunk and store a file as one streaming pass.
 
-            logger.info(
-                "Processed document %s: %d chunks, %d words",
-                doc_id,
-                len(chunks),
-                word_count,
-            )
-            return {"chunk_count": len(chunks), "word_count": word_count}
+        Pages flow through ``iter_chunks`` into ``write_chunks`` without the
+        full text or chunk list ever being materialised.
 
-        except Exception as e:
-            logger.exception("Failed to process document %s", doc_id)
-            doc_ref.update({
-                "status": DocumentStatus.ERROR.value,
-                "error_message": str(e),
-            })
-            raise
+        Returns:
+            Dict with ``chunk_count`` and ``word_count``.
+        """
+        stats = {"word_count": 0}
+
+        def counted_pages() -> Iterator[tuple[int, str]]:
+            for page_number, text in DocumentProcessor.iter_pages(file_content, filename):
+                stats["word_count"] += len(text.split())
+                yield page_number, text
+
+        chunk_count = DocumentProcessor.write_chunks(
+            doc_id, DocumentProcessor.iter_chunks(counted_pages())
+        )
+        return {"chunk_count": chunk_count, "word_count": stats["word_count"]}
+
+
+# ---------------------------------------------------------------------------
+# Structure detection
+# ---------------------------------------------------------------------------
+
+
+class _Unit(NamedTuple):
+    """Smallest piece of text the chunker will not split further."""
+
+    text: str
+    page: int
+    tokens: int
+    new_paragraph: bool
+    is_heading: bool = False
+
+
+_PARAGRAPH_SPLIT_RE = re.compile(r"\n\s*\n")
+_SENTENCE_SPLIT_RE = re.compile(r"(?<=[.!?])[\"')\]]*\s+")
+_HEADING_RE = re.compile(
+    r"^(?:#{1,6}\s+\S.*"                         # markdown heading
+    r"|\d+(?:\.\d+)*\.?\s+[A-Z][^.!?]*"          # numbered section: "2.1 Scope"
+    r"|[A-Z][A-Z0-9 &/,()'-]*[A-Z0-9)])$"         # ALL CAPS line
+)
+
+
+def _is_heading(line: str) -> bool:
+    line = line.strip()
+    if not line or len(line) > 100 or line[-1] in ".,;!?":
+        return False
+    return bool(_HEADING_RE.match(line))
+
+
+def _split_long(text: str, page: int, max_tokens: int) -> Iterator[_Unit]:
+    """Split an over-long paragraph into sentence (or word-window) units."""
+    first = True
+    for sentence in _SENTENCE_SPLIT_RE.split(text):
+        sentence = sentence.strip()
+        if not sentence:
+            continue
+        tokens = estimate_tokens(sentence)
+        if tokens <= max_tokens:
+            yield _Unit(sentence, page, tokens, new_paragraph=first)
+            first = False
+            continue
+        # A single sentence longer than a chunk: fall back to word windows
+        max_chars = max_tokens * CHARS_PER_TOKEN
+        piece: list[str] = []
+        piece_chars = 0
+        for word in sentence.split():
+            if piece and piece_chars + len(word) > max_chars:
+                joined = " ".join(piece)
+                yield _Unit(joined, page, estimate_tokens(joined), new_paragraph=first)
+                first = False
+                piece, piece_chars = [], 0
+            piece.append(word)
+            piece_chars += len(word) + 1
+        if piece:
+            joined = " ".join(piece)
+            yield _Unit(joined, page, estimate_tokens(joined), new_paragraph=first)
+            first = False
+
+
+def _iter_units(pages: Iterable[tuple[int, str]], max_tokens: int) -> Iterator[_Unit]:
+    """Break page text into heading, paragraph and sentence units."""
+    for page, text in pages:
+        for block in _PARAGRAPH_SPLIT_RE.split(text):
+            lines = [line.rstrip() for line in block.strip().splitlines()]
+            if not lines:
+                continue
+            if _is_heading(lines[0]):
+                yield _Unit(lines[0].strip(), page, estimate_tokens(lines[0]), True, is_heading=True)
+                lines = lines[1:]
+                if not lines:
+                    continue
+            paragraph = "\n".join(lines).strip()
+            tokens = estimate_tokens(paragraph)
+            if tokens <= max_tokens:
+                yield _Unit(paragraph, page, tokens, new_paragraph=True)
+            else:
+                yield from _split_long(paragraph, page, max_tokens)
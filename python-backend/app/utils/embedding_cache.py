@@ -0,0 +1,176 @@
+"""Content-hash embedding cache with an in-process LRU tier and a Firestore tier.
+
+Embeddings are pure functions of ``(model, text)``, so identical query phrasings
+and boilerplate chunks never need to be sent to Gemini twice.  Keys are
+``sha256(model + normalised text)``:
+
+- The in-process LRU tier serves repeat queries without a network round trip.
+- The persistent Firestore tier (``embedding_cache`` collection) is shared by
+  every worker and lets re-indexing only pay for text that actually changed.
+  Entries use the same packed format as the ``embeddings`` collection
+  (``EMBEDDING_STORAGE_ENCODING``); legacy array entries are still read.
+"""
+
+import asyncio
+import hashlib
+import logging
+import re
+from collections import OrderedDict
+from datetime import datetime, timezone
+
+from app.config import get_settings
+from app.utils.firebase_client import get_firestore_client
+
+logger = logging.getLogger(__name__)
+
+EMBEDDING_CACHE_COLLECTION = "embedding_cache"
+
+_WHITESPACE_RE = re.compile(r"\s+")
+
+_embedding_cache = None
+
+
+def normalize_text(text: str) -> str:
+    """Collapse whitespace runs and trim so trivially different strings share a key."""
+    return _WHITESPACE_RE.sub(" ", text or "").strip()
+
+
+def embedding_cache_key(model: str, text: str) -> str:
+    """Return the cache key for ``text`` embedded with ``model``."""
+    payload = f"{model}\x00{normalize_text(text)}".encode("utf-8")
+    return hashlib.sha256(payload).hexdigest()
+
+
+class EmbeddingCache:
+    """Two-tier embedding cache keyed by (model, sha256(normalised text)).
+
+    ``get``/``put`` only touch the in-process LRU.  Passing ``persistent=True``
+    additionally reads through to / writes through to Firestore, which is
+    what chunk indexing uses.
+    """
+
+    def __init__(self, max_entries: int | None = None) -> None:
+        settings = get_settings()
+        self._max_entries = max_entries or settings.EMBEDDING_CACHE_MAX_ENTRIES
+        self._encoding = settings.EMBEDDING_STORAGE_ENCODING
+        self._entries: OrderedDict[str, list[float]] = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    # ------------------------------------------------------------------
+    # In-process LRU tier
+    # ------------------------------------------------------------------
+
+    def _get_local(self, key: str) -> list[float] | None:
+        embedding = self._entries.get(key)
+        if embedding is not None:
+            self._entries.move_to_end(key)
+        return embedding
+
+    def _put_local(self, key: str, embedding: list[float]) -> None:
+        self._entries[key] = embedding
+        self._entries.move_to_end(key)
+        while len(self._entries) > self._max_entries:
+            self._entries.popitem(last=False)
+
+    # ------------------------------------------------------------------
+    # Persistent Firestore tier
+    # ------------------------------------------------------------------
+
+    @staticmethod
+    def _get_persistent(key: str) -> list[float] | None:
+        # Imported here: vector_store depends on this module
+        from app.utils.vector_store import decode_embedding
+
+        db = get_firestore_client()
+        doc = db.collection(EMBEDDING_CACHE_COLLECTION).document(key).get()
+        if not doc.exists:
+            return None
+        embedding = decode_embedding(doc.to_dict())
+        return embedding.tolist() if embedding is not None else None
+
+    def _put_persistent(self, key: str, model: str, embedding: list[float]) -> None:
+        from app.utils.vector_store import encode_embedding
+
+        db = get_firestore_client()
+        db.collection(EMBEDDING_CACHE_COLLECTION).document(key).set(
+            {
+                "model": model,
+                **encode_embedding(embedding, self._encoding),
+                "created_at": datetime.now(timezone.utc).isoformat(),
+            }
+        )
+
+    # ------------------------------------------------------------------
+    # Public API
+    # ------------------------------------------------------------------
+
+    async def get(
+        self, model: str, text: str, persistent: bool = False
+    ) -> list[float] | None:
+        """Look up a cached embedding.
+
+        Args:
+            model: Embedding model identifier.
+            text: The text that was embedded.
+            persistent: Also consult the Firestore tier on a local miss.
+
+        Returns:
+            The cached embedding, or None on a miss.
+        """
+        key = embedding_cache_key(model, text)
+        embedding = self._get_local(key)
+
+        if embedding is None and persistent:
+            try:
+                embedding = await asyncio.to_thread(self._get_persistent, key)
+            except Exception:
+                logger.warning("Embedding cache: Firestore lookup failed", exc_info=True)
+                embedding = None
+            if embedding is not None:
+                self._put_local(key, embedding)
+
+        if embedding is None:
+            self.misses += 1
+        else:
+            self.hits += 1
+        return embedding
+
+    async def put(
+        self,
+        model: str,
+        text: str,
+        embedding: list[float],
+        persistent: bool = False,
+    ) -> None:
+        """Store an embedding in the LRU tier (and Firestore if ``persistent``)."""
+        key = embedding_cache_key(model, text)
+        self._put_local(key, embedding)
+
+        if persistent:
+            try:
+                await asyncio.to_thread(self._put_persistent, key, model, embedding)
+            except Exception:
+                logger.warning("Embedding cache: Firestore write failed", exc_info=True)
+
+    def clear(self) -> None:
+        """Drop every entry from the in-process tier."""
+        self._entries.clear()
+        self.hits = 0
+        self.misses = 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+# ------------------------------------------------------------------
+# Singleton accessor
+# ------------------------------------------------------------------
+
+
+def get_embedding_cache() -> EmbeddingCache:
+    """Return the module-level EmbeddingCache singleton."""
+    global _embedding_cache
+    if _embedding_cache is None:
+        _embedding_cache = EmbeddingCache()
+    return _embedding_cache
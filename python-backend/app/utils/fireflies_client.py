@@ -1,5 +1,17 @@
-"""Fireflies.ai GraphQL API client for fetching meeting transcripts and summaries."""
-
+"""Fireflies.ai GraphQL API client for fetching meeting transcripts and summaries.
+
+Listings are paginated with ``skip``/``limit`` (Fireflies caps ``limit`` at
+50) and pages are fetched in concurrent waves until a short page arrives.
+A listing that reaches ``FIREFLIES_MAX_PAGES`` first raises
+``FirefliesListingTruncated`` with the pages fetched so far, so callers can
+sync them without treating the listing as complete.
+Full transcripts are fetched several per request using GraphQL field aliases
+(``t0: transcript(id: $id0) {...}``).  Every request goes through one
+client-wide semaphore (``FIREFLIES_MAX_CONCURRENT_REQUESTS``) so fan-out
+stays under the account's rate limit.
+"""
+
+import asyncio
 import logging
 from datetime import datetime
 
@@ -11,6 +23,39 @@ logger = logging.getLogger(__name__)
 
 _fireflies_client: "FirefliesClient | None" = None
 
+# Fields requested for each full transcript (single and batched queries)
+_TRANSCRIPT_FIELDS = """
+                id
+                title
+                date
+                duration
+                participants
+                sentences {
+                    speaker_name
+                    text
+                    start_time
+                    end_time
+                }
+                summary {
+                    overview
+                    action_items
+                    keywords
+                }
+"""
+
+
+class FirefliesListingTruncated(RuntimeError):
+    """The transcript listing hit ``FIREFLIES_MAX_PAGES`` before its last page.
+
+    ``transcripts`` holds what was fetched; older transcripts are missing.
+    """
+
+    def __init__(self, transcripts: list[dict], max_pages: int) -> None:
+        super().__init__(
+            f"Fireflies listing stopped at {max_pages} pages; older transcripts were not fetched"
+        )
+        self.transcripts = transcripts
+
 
 class FirefliesClient:
     """Async client for the Fireflies.ai GraphQL API.
@@ -23,6 +68,7 @@ class FirefliesClient:
         self.settings = get_settings()
         self.base_url = self.settings.FIREFLIES_API_BASE_URL
         self.http = httpx.AsyncClient(timeout=30.0)
+        self._semaphore = asyncio.Semaphore(self.settings.FIREFLIES_MAX_CONCURRENT_REQUESTS)
 
     def _headers(self) -> dict[str, str]:
         """Return authorization headers for Fireflies API requests."""
@@ -35,12 +81,19 @@ class FirefliesClient:
         """Check whether a Fireflies API key has been provided."""
         return bool(self.settings.FIREFLIES_API_KEY)
 
-    async def _graphql_request(self, query: str, variables: dict | None = None) -> dict:
+    async def _graphql_request(
+        self,
+        query: str,
+        variables: dict | None = None,
+        allow_partial: bool = False,
+    ) -> dict:
         """Execute a GraphQL request against the Fireflies API.
 
         Args:
             query: GraphQL query string.
             variables: Optional variables for the query.
+            allow_partial: Return whatever data came back alongside errors
+                (used by batched queries where one alias may fail).
 
         Returns:
             The 'data' portion of the GraphQL response.
@@ -54,15 +107,18 @@ class FirefliesClient:
             payload["variables"] = variables
 
         try:
-            response = await self.http.post(
-                self.base_url,
-                headers=self._headers(),
-                json=payload,
-            )
+            async with self._semaphore:
+                response = await self.http.post(
+                    self.base_url,
+                    headers=self._headers(),
+                    json=payload,
+                )
             response.raise_for_status()
             result = response.json()
 
-            if "errors" in result:
+            if "errors" in result and allow_partial and result.get("data"):
+                logger.warning("Fireflies GraphQL partial errors: %s", result["errors"])
+            elif "errors" in result:
                 errors = result["errors"]
                 logger.error("Fireflies GraphQL errors: %s", errors)
                 raise RuntimeError(f"Fireflies GraphQL errors: {errors}")
@@ -82,19 +138,62 @@ class FirefliesClient:
     async def get_transcripts(self, since: datetime | None = None) -> list[dict]:
         """Fetch transcripts from Fireflies, optionally filtered by date.
 
+        Pages of ``FIREFLIES_PAGE_SIZE`` are requested in concurrent waves
+        until a short page is returned or ``FIREFLIES_MAX_PAGES`` is reached.
+
         Args:
             since: Only return transcripts after this datetime.
 
         Returns:
             List of transcript dicts from the Fireflies API.
+
+        Raises:
+            FirefliesListingTruncated: ``FIREFLIES_MAX_PAGES`` full pages were
+                fetched without reaching the end of the listing.
         """
         if not self.is_configured():
             logger.warning("Fireflies API key not configured")
             return []
 
+        page_size = self.settings.FIREFLIES_PAGE_SIZE
+        max_pages = self.settings.FIREFLIES_MAX_PAGES
+        wave_size = max(1, self.settings.FIREFLIES_MAX_CONCURRENT_REQUESTS)
+
+        transcripts: list[dict] = []
+        seen: set[str] = set()
+        fetched = 0
+        exhausted = False
+
+        while not exhausted and fetched < max_pages:
+            wave = range(fetched, min(fetched + wave_size, max_pages))
+            pages = await asyncio.gather(
+                *(self._get_transcripts_page(since, page * page_size, page_size) for page in wave)
+            )
+            fetched += len(wave)
+
+            for page in pages:
+                for transcript in page:
+                    # Skip-based pages can overlap if meetings arrive mid-fetch
+                    transcript_id = transcript.get("id")
+                    if transcript_id and transcript_id in seen:
+                        continue
+                    seen.add(transcript_id)
+                    transcripts.append(transcript)
+                if len(page) < page_size:
+                    exhausted = True
+                    break
+
+        if not exhausted:
+            raise FirefliesListingTruncated(transcripts, max_pages)
+        return transcripts
+
+    async def _get_transcripts_page(
+        self, since: datetime | None, skip: int, limit: int
+    ) -> list[dict]:
+        """Fetch one page of the transcript listing."""
         query = """
-        query GetTranscripts($fromDate: DateTime, $limit: Int) {
-            transcripts(fromDate: $fromDate, limit: $limit) {
+        query GetTranscripts($fromDate: DateTime, $limit: Int, $skip: Int) {
+            transcripts(fromDate: $fromDate, limit: $limit, skip: $skip) {
                 id
                 title
                 date
@@ -109,12 +208,12 @@ class FirefliesClient:
             }
         }
         """
-        variables: dict = {"limit": 50}
+        variables: dict = {"limit": limit, "skip": skip}
         if since:
             variables["fromDate"] = since.isoformat()
 
         data = await self._graphql_request(query, variables)
-        return data.get("transcripts", [])
+        return data.get("transcripts") or []
 
     async def get_transcript(self, transcript_id: str) -> dict:
         """Fetch a specific transcript by ID.
@@ -129,31 +228,62 @@ class FirefliesClient:
             logger.warning("Fireflies API key not configured")
             return {}
 
-        query = """
-        query GetTranscript($id: String!) {
-            transcript(id: $id) {
-                id
-                title
-                date
-                duration
-                participants
-                sentences {
-                    speaker_name
-                    text
-                    start_time
-                    end_time
-                }
-                summary {
-                    overview
-                    action_items
-                    keywords
-                }
-            }
-        }
+        query = f"""
+        query GetTranscript($id: String!) {{
+            transcript(id: $id) {{{_TRANSCRIPT_FIELDS}            }}
+        }}
         """
         data = await self._graphql_request(query, {"id": transcript_id})
         return data.get("transcript", {})
 
+    async def get_transcripts_batch(self, transcript_ids: list[str]) -> dict[str, dict]:
+        """Fetch several full transcripts, ``FIREFLIES_TRANSCRIPT_BATCH_SIZE`` per request.
+
+        Args:
+            transcript_ids: Fireflies transcript identifiers.
+
+        Returns:
+            Mapping of transcript ID to transcript data.  IDs that could not
+            be fetched are absent.
+        """
+        if not self.is_configured():
+            logger.warning("Fireflies API key not configured")
+            return {}
+
+        ids = list(dict.fromkeys(i for i in transcript_ids if i))
+        size = max(1, self.settings.FIREFLIES_TRANSCRIPT_BATCH_SIZE)
+        batches = [ids[i:i + size] for i in range(0, len(ids), size)]
+
+        results: dict[str, dict] = {}
+        for batch, data in zip(batches, await asyncio.gather(
+            *(self._get_transcript_batch(batch) for batch in batches), return_exceptions=True
+        )):
+            if isinstance(data, Exception):
+                logger.warning("Fireflies transcript batch of %d failed: %s", len(batch), data)
+                continue
+            results.update(data)
+        return results
+
+    async def _get_transcript_batch(self, transcript_ids: list[str]) -> dict[str, dict]:
+        """Fetch one batch of transcripts with a single aliased query."""
+        params = ", ".join(f"$id{i}: String!" for i in range(len(transcript_ids)))
+        fields = "".join(
+            f"""
+            t{i}: transcript(id: $id{i}) {{{_TRANSCRIPT_FIELDS}            }}"""
+            for i in range(len(transcript_ids))
+        )
+        query = f"""
+        query GetTranscriptBatch({params}) {{{fields}
+        }}
+        """
+        variables = {f"id{i}": transcript_id for i, transcript_id in enumerate(transcript_ids)}
+        data = await self._graphql_request(query, variables, allow_partial=True)
+        return {
+            transcript_id: data[f"t{i}"]
+            for i, transcript_id in enumerate(transcript_ids)
+            if data.get(f"t{i}")
+        }
+
     async def get_summary(self, transcript_id: str) -> dict:
         """Fetch the summary for a specific transcript.
 
@@ -0,0 +1,105 @@
+"""BM25 inverted index for exact-term retrieval over document chunks.
+
+Vector search is weak on identifiers — client names, invoice numbers, project
+codes — so ``RAGEngine`` fuses BM25 hits with vector hits.  Compound tokens
+such as ``INV-0042`` are indexed both whole and split into their parts, so
+either form of the term matches.
+"""
+
+import math
+import re
+from collections import Counter, defaultdict
+
+_TOKEN_RE = re.compile(r"\w+(?:[-/.]\w+)*")
+_PART_RE = re.compile(r"[-/.]")
+
+STOPWORDS = frozenset(
+    "a an and are as at be but by for from has have in is it its of on or "
+    "that the this to was were what when where which who will with".split()
+)
+
+
+def tokenize(text: str) -> list[str]:
+    """Lowercase ``text`` and split it into index terms."""
+    terms: list[str] = []
+    for token in _TOKEN_RE.findall((text or "").lower()):
+        if token in STOPWORDS:
+            continue
+        terms.append(token)
+        parts = _PART_RE.split(token)
+        if len(parts) > 1:
+            terms.extend(p for p in parts if p and p not in STOPWORDS)
+    return terms
+
+
+class BM25Index:
+    """Okapi BM25 over a fixed set of passages.
+
+    Args:
+        passages: ``(passage_id, text)`` pairs.
+        k1: Term-frequency saturation.
+        b: Length normalisation strength.
+    """
+
+    def __init__(self, passages: list[tuple[str, str]], k1: float = 1.5, b: float = 0.75) -> None:
+        self._k1 = k1
+        self._b = b
+        self._ids: list[str] = []
+        self._lengths: list[int] = []
+        self._postings: dict[str, list[tuple[int, int]]] = defaultdict(list)
+
+        for passage_id, text in passages:
+            terms = tokenize(text)
+            doc_idx = len(self._ids)
+            self._ids.append(passage_id)
+            self._lengths.append(len(terms))
+            for term, tf in Counter(terms).items():
+                self._postings[term].append((doc_idx, tf))
+
+        self._avg_length = (sum(self._lengths) / len(self._lengths)) if self._lengths else 0.0
+
+    def __len__(self) -> int:
+        return len(self._ids)
+
+    def _idf(self, term: str) -> float:
+        df = len(self._postings.get(term, ()))
+        n = len(self._ids)
+        return math.log(1 + (n - df + 0.5) / (df + 0.5))
+
+    def search(self, query: str, top_k: int = 10) -> list[tuple[str, float]]:
+        """Return up to ``top_k`` ``(passage_id, score)`` pairs, best first."""
+        if not self._ids or top_k <= 0:
+            return []
+
+        scores: dict[int, float] = defaultdict(float)
+        for term in set(tokenize(query)):
+            postings = self._postings.get(term)
+            if not postings:
+                continue
+            idf = self._idf(term)
+            for doc_idx, tf in postings:
+                length_norm = 1 - self._b + self._b * (self._lengths[doc_idx] / (self._avg_length or 1.0))
+                scores[doc_idx] += idf * (tf * (self._k1 + 1)) / (tf + self._k1 * length_norm)
+
+        ranked = sorted(scores.items(), key=lambda s: s[1], reverse=True)[:top_k]
+        return [(self._ids[doc_idx], score) for doc_idx, score in ranked]
+
+
+def reciprocal_rank_fusion(
+    rankings: list[list[dict]],
+    k: int = 60,
+    key: str = "chunk_id",
+) -> list[dict]:
+    """Fuse ranked result lists with reciprocal rank fusion.
+
+    Each result's fused ``score`` is ``sum(1 / (k + rank))`` over the lists it
+    appears in.  The first occurrence of a result supplies its other fields.
+    """
+    fused: dict[str, dict] = {}
+    for ranking in rankings:
+        for rank, result in enumerate(ranking, start=1):
+            result_id = result[key]
+            if result_id not in fused:
+                fused[result_id] = {**result, "score": 0.0}
+            fused[result_id]["score"] += 1.0 / (k + rank)
+    return sorted(fused.values(), key=lambda r: r["score"], reverse=True)
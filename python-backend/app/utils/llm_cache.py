@@ -0,0 +1,208 @@
+"""Exact-match LLM response cache with an in-process tier and a Firestore tier.
+
+Some generations are pure functions of their inputs: the summary of a closed
+quarter's report, the briefing for a meeting in a given format, the summary
+of a transcript.  Call sites opt in through ``LLMGateway.generate_text(...,
+cache=True)`` and repeat requests are answered without calling Gemini.
+
+Keys are ``sha256(model, system instruction, prompt, generation config)``:
+
+- The in-process tier is a TTL-bounded LRU.
+- The persistent Firestore tier (``llm_cache`` collection) is shared by every
+  worker.  Documents carry an ``expires_at`` timestamp, which reads honour
+  and which a Firestore TTL policy can use to purge old entries.
+
+TTLs are per call site (``CACHE_TTLS``).
+"""
+
+import asyncio
+import dataclasses
+import hashlib
+import json
+import logging
+import time
+from collections import OrderedDict
+from datetime import datetime, timedelta, timezone
+
+from app.config import get_settings
+from app.utils.firebase_client import get_firestore_client
+
+logger = logging.getLogger(__name__)
+
+LLM_CACHE_COLLECTION = "llm_cache"
+
+_HOUR = 3600.0
+_DAY = 24 * _HOUR
+
+# Per-call-site TTLs in seconds; unlisted sites use LLM_CACHE_DEFAULT_TTL_SECONDS
+CACHE_TTLS: dict[str, float] = {
+    "report_summary": 7 * _DAY,
+    "proactive_summary": 1 * _HOUR,
+    "transcript": 30 * _DAY,
+    "briefing": 30 * _DAY,
+}
+
+_llm_cache = None
+
+
+def _config_payload(generation_config):
+    if generation_config is None:
+        return None
+    if dataclasses.is_dataclass(generation_config):
+        return dataclasses.asdict(generation_config)
+    if isinstance(generation_config, dict):
+        return generation_config
+    return repr(generation_config)
+
+
+def llm_cache_key(
+    model_name: str,
+    system_instruction: str | None,
+    contents,
+    generation_config=None,
+) -> str:
+    """Return the cache key for a generation request."""
+    payload = json.dumps(
+        {
+            "model": model_name,
+            "system": system_instruction or "",
+            "contents": contents,
+            "config": _config_payload(generation_config),
+        },
+        sort_keys=True,
+        default=str,
+    ).encode("utf-8")
+    return hashlib.sha256(payload).hexdigest()
+
+
+class LLMResponseCache:
+    """Two-tier cache of generated text keyed by ``llm_cache_key``.
+
+    Args:
+        max_entries: Size of the in-process tier; defaults to
+            ``LLM_CACHE_MEMORY_MAX_ENTRIES``.
+    """
+
+    def __init__(self, max_entries: int | None = None) -> None:
+        settings = get_settings()
+        self.enabled = settings.LLM_CACHE_ENABLED
+        self._max_entries = max_entries or settings.LLM_CACHE_MEMORY_MAX_ENTRIES
+        self._default_ttl = settings.LLM_CACHE_DEFAULT_TTL_SECONDS
+        self._entries: OrderedDict[str, tuple[float, str]] = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def ttl_for(self, site: str) -> float:
+        """Return the TTL, in seconds, for entries written by ``site``."""
+        return CACHE_TTLS.get(site, self._default_ttl)
+
+    # ------------------------------------------------------------------
+    # In-process tier
+    # ------------------------------------------------------------------
+
+    def _get_local(self, key: str) -> str | None:
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        expires_at, text = entry
+        if time.monotonic() >= expires_at:
+            self._entries.pop(key, None)
+            return None
+        self._entries.move_to_end(key)
+        return text
+
+    def _put_local(self, key: str, text: str, ttl: float) -> None:
+        self._entries[key] = (time.monotonic() + ttl, text)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self._max_entries:
+            self._entries.popitem(last=False)
+
+    # ------------------------------------------------------------------
+    # Persistent Firestore tier
+    # ------------------------------------------------------------------
+
+    @staticmethod
+    def _get_persistent(key: str) -> tuple[str, float] | None:
+        """Return ``(text, seconds_left)`` for a live entry, else None."""
+        db = get_firestore_client()
+        doc = db.collection(LLM_CACHE_COLLECTION).document(key).get()
+        if not doc.exists:
+            return None
+        data = doc.to_dict()
+        expires_at = data.get("expires_at")
+        if isinstance(expires_at, str):
+            expires_at = datetime.fromisoformat(expires_at)
+        if not isinstance(expires_at, datetime):
+            return None
+        seconds_left = (expires_at - datetime.now(timezone.utc)).total_seconds()
+        text = data.get("text")
+        if seconds_left <= 0 or not text:
+            return None
+        return text, seconds_left
+
+    @staticmethod
+    def _put_persistent(key: str, site: str, text: str, ttl: float) -> None:
+        db = get_firestore_client()
+        now = datetime.now(timezone.utc)
+        db.collection(LLM_CACHE_COLLECTION).document(key).set(
+            {
+                "site": site,
+                "text": text,
+                "created_at": now.isoformat(),
+                "expires_at": now + timedelta(seconds=ttl),
+            }
+        )
+
+    # ------------------------------------------------------------------
+    # Public API
+    # ------------------------------------------------------------------
+
+    async def get(self, key: str) -> str | None:
+        """Look up cached text, reading through to Firestore on a local miss."""
+        text = self._get_local(key)
+        if text is None:
+            try:
+                found = await asyncio.to_thread(self._get_persistent, key)
+            except Exception:
+                logger.warning("LLM cache: Firestore lookup failed", exc_info=True)
+                found = None
+            if found is not None:
+                text, seconds_left = found
+                self._put_local(key, text, seconds_left)
+
+        if text is None:
+            self.misses += 1
+        else:
+            self.hits += 1
+        return text
+
+    async def put(self, key: str, site: str, text: str) -> None:
+        """Store generated text in both tiers with the TTL for ``site``."""
+        ttl = self.ttl_for(site)
+        self._put_local(key, text, ttl)
+        try:
+            await asyncio.to_thread(self._put_persistent, key, site, text, ttl)
+        except Exception:
+            logger.warning("LLM cache: Firestore write failed", exc_info=True)
+
+    def clear(self) -> None:
+        """Drop every entry from the in-process tier."""
+        self._entries.clear()
+        self.hits = 0
+        self.misses = 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+# ------------------------------------------------------------------
+# Singleton accessor
+# ------------------------------------------------------------------
+
+
+def get_llm_cache() -> LLMResponseCache:
+    """Return the module-level LLMResponseCache singleton."""
+    global _llm_cache
+    if _llm_cache is None:
+        _llm_cache = LLMResponseCache()
+    return _llm_cache
@@ -0,0 +1,426 @@
+"""Central gateway for Gemini text generation.
+
+Every Gemini ``generate_content`` call in the backend goes through
+``LLMGateway`` so that:
+
+- ``genai.configure`` runs once and ``GenerativeModel`` instances are reused
+  (LRU keyed by model name, system instruction and tools) instead of being
+  rebuilt on every request.
+- A process-wide semaphore (``LLM_MAX_CONCURRENCY``) caps in-flight calls,
+  so a burst of chats, syncs and report exports cannot trip the Gemini
+  rate limit all at once.
+- Each call site gets its own timeout (``SITE_TIMEOUTS``); time spent
+  waiting for the semaphore does not count against it.
+- Rate-limit and server errors (429/5xx) are retried with full-jitter
+  exponential backoff; the semaphore is released while backing off.
+- Latency, retries, errors and token usage are recorded per call site and
+  exposed through ``stats()``.
+- Deterministic call sites can opt into the exact-match response cache
+  (``generate_text(..., cache=True)``, see ``llm_cache``).
+"""
+
+import asyncio
+import logging
+import random
+import time
+from collections import OrderedDict
+from collections.abc import AsyncIterator, Awaitable, Callable
+from dataclasses import asdict, dataclass
+
+import google.generativeai as genai
+from google.api_core.exceptions import GoogleAPICallError
+
+from app.config import get_settings
+from app.utils.llm_cache import get_llm_cache, llm_cache_key
+
+logger = logging.getLogger(__name__)
+
+_llm_gateway = None
+
+DEFAULT_MODEL = "gemini-2.5-flash"
+
+# Per-call-site timeouts in seconds; unlisted sites use LLM_DEFAULT_TIMEOUT_SECONDS.
+# For streamed calls the timeout bounds the wait for each chunk.
+SITE_TIMEOUTS: dict[str, float] = {
+    "chat": 60.0,
+    "chat_stream": 60.0,
+    "rag": 60.0,
+    "rag_stream": 60.0,
+    "memory_summary": 45.0,
+    "opsai_plan": 30.0,
+    "opsai_answer": 60.0,
+    "ops_agent": 60.0,
+    "client_agent": 60.0,
+    "transcript": 120.0,
+    "briefing": 120.0,
+    "report_summary": 60.0,
+    "proactive_summary": 60.0,
+}
+
+RETRYABLE_STATUS_CODES = frozenset({429, 500, 502, 503, 504})
+
+_BACKOFF_BASE_SECONDS = 0.5
+_BACKOFF_MAX_SECONDS = 8.0
+
+
+@dataclass
+class _SiteStats:
+    calls: int = 0
+    errors: int = 0
+    timeouts: int = 0
+    retries: int = 0
+    cache_hits: int = 0
+    total_latency_ms: float = 0.0
+    max_latency_ms: float = 0.0
+    prompt_tokens: int = 0
+    output_tokens: int = 0
+
+
+def _is_retryable(exc: BaseException) -> bool:
+    """Whether ``exc`` is a rate-limit or transient server error."""
+    return isinstance(exc, GoogleAPICallError) and exc.code in RETRYABLE_STATUS_CODES
+
+
+def _token_count(usage, field: str) -> int:
+    value = getattr(usage, field, None) if usage is not None else None
+    return value if isinstance(value, int) else 0
+
+
+class LLMGateway:
+    """Shared Gemini model pool with concurrency limits, timeouts and retries.
+
+    Args:
+        max_concurrency: Maximum in-flight calls; defaults to
+            ``LLM_MAX_CONCURRENCY``.
+        max_retries: Retries after the first attempt for retryable errors;
+            defaults to ``LLM_MAX_RETRIES``.
+    """
+
+    def __init__(
+        self,
+        max_concurrency: int | None = None,
+        max_retries: int | None = None,
+    ) -> None:
+        settings = get_settings()
+        self._max_concurrency = max_concurrency or settings.LLM_MAX_CONCURRENCY
+        self._max_retries = settings.LLM_MAX_RETRIES if max_retries is None else max_retries
+        self._default_timeout = settings.LLM_DEFAULT_TIMEOUT_SECONDS
+        self._model_cache_size = settings.LLM_MODEL_CACHE_SIZE
+        self._semaphore = asyncio.Semaphore(self._max_concurrency)
+        self._models: OrderedDict[tuple, genai.GenerativeModel] = OrderedDict()
+        self._stats: dict[str, _SiteStats] = {}
+        self._in_flight = 0
+
+        api_key = settings.GEMINI_API_KEY or settings.GOOGLE_AI_API_KEY
+        self._configured = bool(api_key)
+        if api_key:
+            genai.configure(api_key=api_key)
+        else:
+            logger.warning("Gemini API key not set — LLM calls will fail")
+
+    def is_configured(self) -> bool:
+        """Whether a Gemini API key is available."""
+        return self._configured
+
+    # ------------------------------------------------------------------
+    # Model pool
+    # ------------------------------------------------------------------
+
+    def model(
+        self,
+        system_instruction: str | None = None,
+        *,
+        model_name: str = DEFAULT_MODEL,
+        tools=None,
+    ) -> genai.GenerativeModel:
+        """Return a cached ``GenerativeModel`` for the given configuration.
+
+        ``tools`` are keyed by identity, so pass a module-level constant.
+        """
+        key = (model_name, system_instruction, id(tools) if tools is not None else None)
+        cached = self._models.get(key)
+        if cached is not None:
+            self._models.move_to_end(key)
+            return cached
+
+        kwargs: dict = {}
+        if system_instruction:
+            kwargs["system_instruction"] = system_instruction
+        if tools is not None:
+            kwargs["tools"] = tools
+        model = genai.GenerativeModel(model_name, **kwargs)
+        self._models[key] = model
+        while len(self._models) > self._model_cache_size:
+            self._models.popitem(last=False)
+        return model
+
+    # ------------------------------------------------------------------
+    # Generation
+    # ------------------------------------------------------------------
+
+    async def generate(
+        self,
+        site: str,
+        contents,
+        *,
+        system_instruction: str | None = None,
+        generation_config=None,
+        tools=None,
+        model_name: str = DEFAULT_MODEL,
+        timeout: float | None = None,
+    ):
+        """Generate content and return the raw Gemini response.
+
+        Args:
+            site: Call-site name used for timeouts and stats.
+            contents: Prompt passed to ``generate_content_async``.
+            system_instruction: Optional system instruction for the model.
+            generation_config: Optional ``GenerationConfig`` (or dict).
+            tools: Optional function-calling tools (module-level constant).
+            model_name: Gemini model identifier.
+            timeout: Override for the call-site timeout, in seconds.
+
+        Returns:
+            The ``GenerateContentResponse``.
+
+        Raises:
+            TimeoutError: If an attempt exceeds the timeout.
+            GoogleAPICallError: If Gemini keeps failing after retries.
+        """
+        model = self.model(system_instruction, model_name=model_name, tools=tools)
+        stats = self._site_stats(site)
+        kwargs = {"generation_config": generation_config} if generation_config is not None else {}
+
+        start = time.monotonic()
+        try:
+            response = await self._call(
+                site,
+                lambda: model.generate_content_async(contents, **kwargs),
+                self._timeout(site, timeout),
+            )
+        except BaseException:
+            stats.errors += 1
+            raise
+        finally:
+            self._record_latency(stats, start)
+        self._record_usage(stats, getattr(response, "usage_metadata", None))
+        return response
+
+    async def generate_text(
+        self,
+        site: str,
+        contents,
+        *,
+        system_instruction: str | None = None,
+        generation_config=None,
+        model_name: str = DEFAULT_MODEL,
+        timeout: float | None = None,
+        cache: bool = False,
+        bypass_cache: bool = False,
+        validate: Callable[[str], bool] | None = None,
+    ) -> str:
+        """Generate content and return its text, optionally via the response cache.
+
+        Args:
+            site: Call-site name used for timeouts, stats and cache TTLs.
+            contents: Prompt passed to ``generate_content_async``.
+            system_instruction: Optional system instruction for the model.
+            generation_config: Optional ``GenerationConfig`` (or dict).
+            model_name: Gemini model identifier.
+            timeout: Override for the call-site timeout, in seconds.
+            cache: Serve identical requests from ``LLMResponseCache``.
+            bypass_cache: Skip the cache lookup and regenerate; the fresh
+                result still replaces the cached one.
+            validate: Only cache text that passes this check (e.g. parses
+                as the expected JSON); cached text that fails it is treated
+                as a miss.
+
+        Returns:
+            The response text ("" if Gemini returned none).
+        """
+        llm_cache = get_llm_cache() if cache else None
+        key = None
+        if llm_cache is not None and llm_cache.enabled:
+            key = llm_cache_key(model_name, system_instruction, contents, generation_config)
+            if not bypass_cache:
+                cached = await llm_cache.get(key)
+                if cached is not None and (validate is None or validate(cached)):
+                    self._site_stats(site).cache_hits += 1
+                    return cached
+
+        response = await self.generate(
+            site,
+            contents,
+            system_instruction=system_instruction,
+            generation_config=generation_config,
+            model_name=model_name,
+            timeout=timeout,
+        )
+        text = response.text or ""
+        if key is not None and text and (validate is None or validate(text)):
+            await llm_cache.put(key, site, text)
+        return text
+
+    async def stream(
+        self,
+        site: str,
+        contents,
+        *,
+        system_instruction: str | None = None,
+        generation_config=None,
+        model_name: str = DEFAULT_MODEL,
+        timeout: float | None = None,
+    ) -> AsyncIterator[str]:
+        """Stream generated text fragments.
+
+        Retries apply only until the first chunk arrives; after that a
+        failure propagates to the caller.  The concurrency slot is held for
+        the whole stream and the timeout bounds the wait for each chunk.
+
+        Yields:
+            Non-empty text fragments, skipping chunks without text parts.
+        """
+        model = self.model(system_instruction, model_name=model_name)
+        stats = self._site_stats(site)
+        timeout = self._timeout(site, timeout)
+        kwargs = {"generation_config": generation_config} if generation_config is not None else {}
+
+        start = time.monotonic()
+        usage = None
+        try:
+            response = await self._call(
+                site,
+                lambda: model.generate_content_async(contents, stream=True, **kwargs),
+                timeout,
+                hold=True,
+            )
+        except BaseException:
+            stats.errors += 1
+            self._record_latency(stats, start)
+            raise
+
+        try:
+            chunks = response.__aiter__()
+            while True:
+                try:
+                    chunk = await asyncio.wait_for(chunks.__anext__(), timeout)
+                except StopAsyncIteration:
+                    break
+                usage = getattr(chunk, "usage_metadata", None) or usage
+                try:
+                    text = chunk.text
+                except ValueError:
+                    # Chunk carried no text parts (e.g. a safety/finish-only chunk)
+                    continue
+                if text:
+                    yield text
+        except GeneratorExit:
+            # Consumer stopped early (e.g. client disconnected) — not an error
+            raise
+        except BaseException as exc:
+            stats.errors += 1
+            if isinstance(exc, TimeoutError):
+                stats.timeouts += 1
+            raise
+        finally:
+            self._release()
+            self._record_latency(stats, start)
+            self._record_usage(stats, usage)
+
+    # ------------------------------------------------------------------
+    # Internal helpers
+    # ------------------------------------------------------------------
+
+    async def _call(
+        self,
+        site: str,
+        factory: Callable[[], Awaitable],
+        timeout: float,
+        hold: bool = False,
+    ):
+        """Run ``factory()`` under the semaphore with a timeout and retries.
+
+        With ``hold=True`` the semaphore stays acquired after success and the
+        caller must ``_release`` it.
+        """
+        stats = self._site_stats(site)
+        for attempt in range(self._max_retries + 1):
+            await self._semaphore.acquire()
+            self._in_flight += 1
+            try:
+                result = await asyncio.wait_for(factory(), timeout)
+            except BaseException as exc:
+                self._release()
+                if isinstance(exc, TimeoutError):
+                    stats.timeouts += 1
+                    logger.warning("LLM call %s timed out after %.0fs", site, timeout)
+                if attempt >= self._max_retries or not _is_retryable(exc):
+                    raise
+                stats.retries += 1
+                delay = random.uniform(0, min(_BACKOFF_MAX_SECONDS, _BACKOFF_BASE_SECONDS * 2 ** attempt))
+                logger.warning(
+                    "LLM call %s failed (%s) — retry %d/%d in %.2fs",
+                    site, exc, attempt + 1, self._max_retries, delay,
+                )
+                await asyncio.sleep(delay)
+                continue
+            if not hold:
+                self._release()
+            return result
+
+    def _release(self) -> None:
+        self._in_flight -= 1
+        self._semaphore.release()
+
+    def _timeout(self, site: str, override: float | None) -> float:
+        if override is not None:
+            return override
+        return SITE_TIMEOUTS.get(site, self._default_timeout)
+
+    def _site_stats(self, site: str) -> _SiteStats:
+        return self._stats.setdefault(site, _SiteStats())
+
+    @staticmethod
+    def _record_latency(stats: _SiteStats, start: float) -> None:
+        latency_ms = (time.monotonic() - start) * 1000
+        stats.calls += 1
+        stats.total_latency_ms += latency_ms
+        stats.max_latency_ms = max(stats.max_latency_ms, latency_ms)
+
+    @staticmethod
+    def _record_usage(stats: _SiteStats, usage) -> None:
+        stats.prompt_tokens += _token_count(usage, "prompt_token_count")
+        stats.output_tokens += _token_count(usage, "candidates_token_count")
+
+    # ------------------------------------------------------------------
+    # Stats
+    # ------------------------------------------------------------------
+
+    def stats(self) -> dict:
+        """Return per-site call counts, latency and token usage."""
+        sites = {}
+        for site, stats in sorted(self._stats.items()):
+            entry = asdict(stats)
+            entry["avg_latency_ms"] = round(stats.total_latency_ms / stats.calls, 1) if stats.calls else 0.0
+            entry["total_latency_ms"] = round(stats.total_latency_ms, 1)
+            entry["max_latency_ms"] = round(stats.max_latency_ms, 1)
+            sites[site] = entry
+        return {
+            "max_concurrency": self._max_concurrency,
+            "in_flight": self._in_flight,
+            "cached_models": len(self._models),
+            "sites": sites,
+        }
+
+
+# ------------------------------------------------------------------
+# Singleton accessor
+# ------------------------------------------------------------------
+
+
+def get_llm_gateway() -> LLMGateway:
+    """Return the module-level LLMGateway singleton."""
+    global _llm_gateway
+    if _llm_gateway is None:
+        _llm_gateway = LLMGateway()
+    return _llm_gateway
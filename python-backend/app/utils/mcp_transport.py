@@ -0,0 +1,278 @@
+"""Shared MCP (Model Context Protocol) client transport.
+
+Read.AI and Composio both expose tools over MCP's Streamable HTTP
+transport: JSON-RPC messages are POSTed to a single endpoint and answered
+either with a JSON body or with a ``text/event-stream`` of SSE events.
+
+``MCPTransport`` negotiates a session once (``initialize`` followed by the
+``notifications/initialized`` notification), keeps the ``Mcp-Session-Id``
+the server assigns and sends it on every later request.  When the server
+reports the session has expired (HTTP 404), the transport re-initializes and
+retries the call once.  Every request gets a unique JSON-RPC id.  SSE
+responses are read as raw bytes and split into lines here, so a call returns
+as soon as its result event arrives.  A response larger than
+``MCP_MAX_PAYLOAD_BYTES`` is aborted instead of being buffered, including a
+single unterminated line.
+"""
+
+import asyncio
+import itertools
+import json
+import logging
+import re
+from collections.abc import AsyncIterator, Awaitable, Callable
+
+import httpx
+
+from app.config import get_settings
+
+logger = logging.getLogger(__name__)
+
+PROTOCOL_VERSION = "2024-11-05"
+CLIENT_INFO = {"name": "fable-dashboard", "version": "1.0"}
+SESSION_HEADER = "Mcp-Session-Id"
+
+# SSE lines end in CRLF, LF or a lone CR
+_LINE_BREAK = re.compile(rb"\r\n|\r|\n")
+
+
+class MCPError(RuntimeError):
+    """Raised when an MCP server returns a JSON-RPC error or an unusable response."""
+
+
+class _SessionExpired(Exception):
+    """The server no longer recognises the session id in ``args[0]``."""
+
+
+class MCPTransport:
+    """Session-aware JSON-RPC client for one MCP Streamable HTTP endpoint.
+
+    Args:
+        url: The MCP endpoint URL.
+        http: Shared ``httpx.AsyncClient`` (connections are kept alive).
+        headers: Static headers sent with every request (e.g. an API key).
+        auth_headers: Async callable returning per-request headers, for
+            bearer tokens that are refreshed between calls.
+        max_payload_bytes: Largest response accepted; defaults to
+            ``MCP_MAX_PAYLOAD_BYTES``.
+    """
+
+    def __init__(
+        self,
+        url: str,
+        http: httpx.AsyncClient,
+        *,
+        headers: dict[str, str] | None = None,
+        auth_headers: Callable[[], Awaitable[dict[str, str]]] | None = None,
+        max_payload_bytes: int | None = None,
+    ) -> None:
+        self.url = url
+        self.http = http
+        self._static_headers = dict(headers or {})
+        self._auth_headers = auth_headers
+        self._max_payload = max_payload_bytes or get_settings().MCP_MAX_PAYLOAD_BYTES
+        self._ids = itertools.count(1)
+        self._session_id: str | None = None
+        self._initialized = False
+        self._init_lock = asyncio.Lock()
+
+    # ------------------------------------------------------------------
+    # Public API
+    # ------------------------------------------------------------------
+
+    async def call_tool(self, name: str, arguments: dict | None = None) -> dict | list | str:
+        """Call an MCP tool and return its first text content.
+
+        Text content that is valid JSON is returned parsed; otherwise the
+        raw string is returned.  ``{}`` is returned when the result has no
+        text content.
+
+        Raises:
+            MCPError: The server answered with a JSON-RPC error.
+        """
+        result = await self.request("tools/call", {"name": name, "arguments": arguments or {}})
+        for content in result.get("content", []):
+            if content.get("type") == "text":
+                text = content["text"]
+                try:
+                    return json.loads(text)
+                except (json.JSONDecodeError, TypeError):
+                    return text
+        return {}
+
+    async def request(self, method: str, params: dict | None = None) -> dict:
+        """Send a JSON-RPC request within the session and return its ``result``.
+
+        Re-initializes the session and retries once if it has expired.
+        """
+        await self._ensure_session()
+        try:
+            return await self._send(method, params)
+        except _SessionExpired as expired:
+            logger.info("MCP session for %s expired; re-initializing", self.url)
+            await self._ensure_session(expired=expired.args[0])
+            try:
+                return await self._send(method, params)
+            except _SessionExpired as exc:
+                raise MCPError(f"MCP session rejected by {self.url}") from exc
+
+    def reset(self) -> None:
+        """Forget the current session so the next call re-initializes."""
+        self._session_id = None
+        self._initialized = False
+
+    # ------------------------------------------------------------------
+    # Session management
+    # ------------------------------------------------------------------
+
+    async def _ensure_session(self, expired: str | None = None) -> None:
+        """Initialize the session once; ``expired`` forces a new one.
+
+        ``expired`` is the session id the caller saw rejected, so concurrent
+        callers that hit the same expiry only re-initialize once.
+        """
+        async with self._init_lock:
+            if self._initialized and (expired is None or self._session_id != expired):
+                return
+
+            self.reset()
+            headers = await self._headers()
+            message = {
+                "jsonrpc": "2.0",
+                "method": "initialize",
+                "id": next(self._ids),
+                "params": {
+                    "protocolVersion": PROTOCOL_VERSION,
+                    "capabilities": {},
+                    "clientInfo": CLIENT_INFO,
+                },
+            }
+            async with self.http.stream("POST", self.url, headers=headers, json=message) as resp:
+                resp.raise_for_status()
+                self._session_id = resp.headers.get(SESSION_HEADER)
+                await self._read_response(resp, message["id"])
+
+            # Tell the server we are ready; notifications get no JSON-RPC reply
+            notify = {"jsonrpc": "2.0", "method": "notifications/initialized"}
+            resp = await self.http.post(self.url, headers=await self._headers(), json=notify)
+            if resp.status_code >= 400:
+                logger.debug("MCP initialized notification rejected: %s", resp.status_code)
+
+            self._initialized = True
+
+    async def _headers(self) -> dict[str, str]:
+        headers = {
+            **self._static_headers,
+            "Content-Type": "application/json",
+            "Accept": "application/json, text/event-stream",
+        }
+        if self._auth_headers is not None:
+            headers.update(await self._auth_headers())
+        if self._session_id:
+            headers[SESSION_HEADER] = self._session_id
+        return headers
+
+    # ------------------------------------------------------------------
+    # Request / response
+    # ------------------------------------------------------------------
+
+    async def _send(self, method: str, params: dict | None) -> dict:
+        message = {"jsonrpc": "2.0", "method": method, "id": next(self._ids)}
+        if params is not None:
+            message["params"] = params
+
+        session_id = self._session_id
+        headers = await self._headers()
+        async with self.http.stream("POST", self.url, headers=headers, json=message) as resp:
+            if resp.status_code == 404 and session_id:
+                raise _SessionExpired(session_id)
+            resp.raise_for_status()
+            return await self._read_response(resp, message["id"])
+
+    async def _read_response(self, resp: httpx.Response, request_id: int) -> dict:
+        """Return the ``result`` for ``request_id`` from a JSON or SSE response."""
+        content_type = resp.headers.get("content-type", "")
+        if "text/event-stream" in content_type:
+            message = await self._read_sse(resp, request_id)
+        else:
+            body = bytearray()
+            async for chunk in resp.aiter_bytes():
+                body.extend(chunk)
+                self._check_size(len(body))
+            if not body:
+                return {}
+            message = json.loads(body)
+
+        if message is None:
+            return {}
+        if "error" in message:
+            error = message["error"]
+            detail = error.get("message", error) if isinstance(error, dict) else error
+            raise MCPError(str(detail))
+        return message.get("result") or {}
+
+    async def _read_sse(self, resp: httpx.Response, request_id: int) -> dict | None:
+        """Read SSE events until the response to ``request_id`` arrives."""
+        data_lines: list[str] = []
+        size = 0
+
+        async for line in self._iter_lines(resp):
+            if line.startswith("data:"):
+                data = line[5:]
+                if data.startswith(" "):
+                    data = data[1:]
+                self._check_size(size + len(data))
+                data_lines.append(data)
+                size += len(data)
+                continue
+            if line or not data_lines:
+                # Other fields (event:, id:, comments) carry nothing we need
+                continue
+
+            # A blank line dispatches the event
+            payload = "\n".join(data_lines)
+            data_lines = []
+            size = 0
+            message = self._match(payload, request_id)
+            if message is not None:
+                return message
+
+        # Stream ended without a trailing blank line
+        if data_lines:
+            return self._match("\n".join(data_lines), request_id)
+        return None
+
+    async def _iter_lines(self, resp: httpx.Response) -> AsyncIterator[str]:
+        """Yield the lines of ``resp``, checking the unfinished line's size before it grows."""
+        pending = b""
+        async for chunk in resp.aiter_bytes():
+            self._check_size(len(pending) + len(chunk))
+            pending += chunk
+            # A trailing CR may be the first half of a CRLF split across chunks
+            held = pending.endswith(b"\r")
+            *lines, pending = _LINE_BREAK.split(pending[:-1] if held else pending)
+            if held:
+                pending += b"\r"
+            for line in lines:
+                yield line.decode("utf-8", errors="replace")
+        if pending:
+            yield pending.rstrip(b"\r").decode("utf-8", errors="replace")
+
+    @staticmethod
+    def _match(payload: str, request_id: int) -> dict | None:
+        """Parse an SSE event and return it if it answers ``request_id``."""
+        try:
+            message = json.loads(payload)
+        except json.JSONDecodeError:
+            logger.debug("Skipping non-JSON MCP event")
+            return None
+        if not isinstance(message, dict) or ("result" not in message and "error" not in message):
+            # Server notifications and requests interleaved with the response
+            return None
+        if message.get("id") not in (request_id, None):
+            return None
+        return message
+
+    def _check_size(self, size: int) -> None:
+        if size > self._max_payload:
+            raise MCPError(f"MCP response exceeds {self._max_payload} bytes")
@@ -1,22 +1,91 @@
-"""Meeting sync service for pulling data from Read.AI and Fireflies into Firestore."""
-
+"""Meeting sync service for pulling data from Read.AI and Fireflies into Firestore.
+
+Syncs are incremental.  After a source syncs without errors, the latest
+meeting date seen is stored as that source's watermark in
+``_meta/meeting_sync``.  The next run only asks the provider for meetings
+since ``watermark - MEETING_SYNC_LOOKBACK_HOURS``; the lookback picks up
+recordings that finish processing late.  Each meeting document records a
+hash of the provider listing (``source_hash``) and of the stored transcript
+(``source_transcript_hash``), so meetings that are listed again but have not
+changed are skipped without a detail fetch, write or transcript download.
+
+Both sources sync concurrently.  Within a source, per-meeting work (detail
+fetch, upsert, transcript download) fans out under a per-source semaphore
+(``READAI_SYNC_CONCURRENCY`` / ``FIREFLIES_SYNC_CONCURRENCY``) sized to the
+provider's rate limits.  Fireflies transcripts for new or changed meetings
+are fetched afterwards in aliased batches rather than one request each.
+
+A transcript that cannot be fetched or stored counts as an error for its
+source, so the watermark holds and the meeting — still without
+``source_transcript_hash`` — is fetched again on the next run.
+"""
+
+import asyncio
+import hashlib
+import json
 import logging
-from datetime import datetime
+from datetime import datetime, timedelta, timezone
 
+from app.config import get_settings
 from app.models.meeting import (
     COLLECTION_NAME,
-    TRANSCRIPT_COLLECTION,
     MeetingResponse,
     MeetingSource,
     MeetingTranscript,
     TranscriptSegment,
 )
+from app.utils.client_context_cache import get_client_context_cache
 from app.utils.firebase_client import get_firestore_client
-from app.utils.fireflies_client import FirefliesClient, get_fireflies_client
+from app.utils.fireflies_client import (
+    FirefliesClient,
+    FirefliesListingTruncated,
+    get_fireflies_client,
+)
 from app.utils.readai_client import ReadAIClient, get_readai_client
+from app.utils.speaker_analytics import SPEAKER_STATS_VERSION, compute_speaker_stats
+from app.utils.transcript_processor import transcript_hash
+from app.utils.transcript_store import write_transcript
 
 logger = logging.getLogger(__name__)
 
+SYNC_META_COLLECTION = "_meta"
+SYNC_META_DOC = "meeting_sync"
+
+# Outcomes of syncing a single meeting
+SYNCED = "synced"
+SKIPPED = "skipped"
+
+
+def _content_hash(raw: dict) -> str:
+    """Return a stable hash of a provider's listing record."""
+    payload = json.dumps(raw, sort_keys=True, default=str)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+def parse_meeting_date(value) -> datetime | None:
+    """Parse a meeting date (ISO string or epoch milliseconds) as aware UTC."""
+    if value in (None, ""):
+        return None
+    try:
+        if isinstance(value, (int, float)):
+            return datetime.fromtimestamp(value / 1000, tz=timezone.utc)
+        parsed = datetime.fromisoformat(str(value).replace("Z", "+00:00"))
+    except (TypeError, ValueError, OverflowError):
+        return None
+    if parsed.tzinfo is None:
+        parsed = parsed.replace(tzinfo=timezone.utc)
+    return parsed.astimezone(timezone.utc)
+
+
+def _later(current: str | None, candidate: datetime | None) -> str | None:
+    """Return whichever of an ISO watermark and ``candidate`` is later, as ISO."""
+    if candidate is None:
+        return current
+    existing = parse_meeting_date(current)
+    if existing is not None and existing >= candidate:
+        return current
+    return candidate.isoformat()
+
 
 class MeetingSyncService:
     """Orchestrates syncing meeting data from external sources into Firestore.
@@ -39,116 +108,280 @@ class MeetingSyncService:
     # ------------------------------------------------------------------
 
     async def sync_readai(self, since: datetime | None = None) -> dict:
-        """Fetch meetings from Read.AI and upsert into Firestore.
+        """Fetch meetings from Read.AI and upsert new or changed ones into Firestore.
 
         Args:
             since: Only sync meetings after this datetime.
 
         Returns:
-            ``{"synced": int, "errors": list[str]}``
+            ``{"synced": int, "skipped": int, "errors": list[str], "watermark": str | None}``
         """
-        synced = 0
-        errors: list[str] = []
-
         if not self.readai.is_configured():
-            return {"synced": 0, "errors": ["Read.AI OAuth not configured"]}
+            return {"synced": 0, "skipped": 0, "errors": ["Read.AI OAuth not configured"], "watermark": None}
 
         try:
             raw_meetings = await self.readai.get_meetings(since=since)
         except Exception as exc:
             logger.exception("Read.AI sync: failed to fetch meetings")
-            return {"synced": 0, "errors": [f"Failed to fetch Read.AI meetings: {exc}"]}
-
-        for raw in raw_meetings:
-            try:
-                # Fetch rich detail (summary, action items, topics) via MCP
-                source_id = raw.get("id", "")
-                if source_id:
-                    try:
-                        detail = await self.readai.get_meeting_detail(
-                            source_id,
-                            expand=["summary", "action_items", "topics"],
-                        )
-                        if detail:
-                            raw["_detail"] = detail
-                    except Exception:
-                        logger.debug("Could not fetch Read.AI detail for %s", source_id)
-
-                meeting = self._map_readai_meeting(raw)
-                await self._upsert_meeting(meeting)
-
-                # Attempt to pull transcript
-                if source_id:
-                    await self._sync_readai_transcript(meeting.id, source_id)
-
-                synced += 1
-            except Exception as exc:
-                title = raw.get("title", "unknown")
-                logger.exception("Read.AI sync: error processing meeting '%s'", title)
-                errors.append(f"Error syncing Read.AI meeting '{title}': {exc}")
-
-        logger.info("Read.AI sync complete: synced=%d errors=%d", synced, len(errors))
-        return {"synced": synced, "errors": errors}
+            return {
+                "synced": 0,
+                "skipped": 0,
+                "errors": [f"Failed to fetch Read.AI meetings: {exc}"],
+                "watermark": None,
+            }
+
+        result = await self._sync_each(
+            raw_meetings,
+            self._sync_readai_meeting,
+            "Error syncing Read.AI meeting",
+            get_settings().READAI_SYNC_CONCURRENCY,
+        )
+        logger.info(
+            "Read.AI sync complete: synced=%d skipped=%d errors=%d",
+            result["synced"], result["skipped"], len(result["errors"]),
+        )
+        return result
 
     async def sync_fireflies(self, since: datetime | None = None) -> dict:
-        """Fetch transcripts from Fireflies and upsert into Firestore.
+        """Fetch transcripts from Fireflies and upsert new or changed ones into Firestore.
 
         Args:
             since: Only sync transcripts after this datetime.
 
         Returns:
-            ``{"synced": int, "errors": list[str]}``
+            ``{"synced": int, "skipped": int, "errors": list[str], "watermark": str | None}``
         """
-        synced = 0
-        errors: list[str] = []
-
         if not self.fireflies.is_configured():
-            return {"synced": 0, "errors": ["Fireflies API key not configured"]}
+            return {"synced": 0, "skipped": 0, "errors": ["Fireflies API key not configured"], "watermark": None}
 
+        listing_errors: list[str] = []
         try:
             raw_transcripts = await self.fireflies.get_transcripts(since=since)
+        except FirefliesListingTruncated as exc:
+            # Sync what was listed, but report the gap so the watermark holds
+            logger.warning("Fireflies sync: %s", exc)
+            raw_transcripts = exc.transcripts
+            listing_errors.append(str(exc))
         except Exception as exc:
             logger.exception("Fireflies sync: failed to fetch transcripts")
-            return {"synced": 0, "errors": [f"Failed to fetch Fireflies transcripts: {exc}"]}
-
-        for raw in raw_transcripts:
-            try:
-                meeting = self._map_fireflies_meeting(raw)
-                await self._upsert_meeting(meeting)
-
-                # Attempt to pull detailed transcript
-                source_id = raw.get("id", "")
-                if source_id:
-                    await self._sync_fireflies_transcript(meeting.id, source_id)
-
-                synced += 1
-            except Exception as exc:
-                title = raw.get("title", "unknown")
-                logger.exception("Fireflies sync: error processing transcript '%s'", title)
-                errors.append(f"Error syncing Fireflies transcript '{title}': {exc}")
-
-        logger.info("Fireflies sync complete: synced=%d errors=%d", synced, len(errors))
-        return {"synced": synced, "errors": errors}
+            return {
+                "synced": 0,
+                "skipped": 0,
+                "errors": [f"Failed to fetch Fireflies transcripts: {exc}"],
+                "watermark": None,
+            }
+
+        # Transcripts are collected per meeting, then fetched in batches
+        pending_transcripts: list[tuple[str, str, str | None]] = []
+
+        async def sync_one(raw: dict) -> str:
+            return await self._sync_fireflies_meeting(raw, pending_transcripts)
+
+        result = await self._sync_each(
+            raw_transcripts,
+            sync_one,
+            "Error syncing Fireflies transcript",
+            get_settings().FIREFLIES_SYNC_CONCURRENCY,
+        )
+        result["errors"].extend(await self._sync_fireflies_transcripts(pending_transcripts))
+        result["errors"].extend(listing_errors)
+        logger.info(
+            "Fireflies sync complete: synced=%d skipped=%d errors=%d",
+            result["synced"], result["skipped"], len(result["errors"]),
+        )
+        return result
 
-    async def sync_all(self, since: datetime | None = None) -> dict:
+    async def sync_all(self, since: datetime | None = None, full: bool = False) -> dict:
         """Run both Read.AI and Fireflies syncs and merge results.
 
+        Without ``since``, each source resumes from its stored watermark
+        (less the lookback window).  Watermarks advance only for sources
+        that synced without errors, so failed meetings are retried.
+
         Args:
-            since: Only sync records after this datetime.
+            since: Only sync records after this datetime (overrides watermarks).
+            full: Ignore watermarks and re-list everything the providers return.
 
         Returns:
-            ``{"readai": {...}, "fireflies": {...}, "total_synced": int, "total_errors": int}``
+            ``{"readai": {...}, "fireflies": {...}, "total_synced": int,
+            "total_skipped": int, "total_errors": int}``
         """
-        readai_result = await self.sync_readai(since=since)
-        fireflies_result = await self.sync_fireflies(since=since)
+        watermarks = await self._load_watermarks()
+        readai_since = since if since or full else self._since(watermarks.get("readai"))
+        fireflies_since = since if since or full else self._since(watermarks.get("fireflies"))
+
+        # The sources are independent, so sync them concurrently
+        readai_result, fireflies_result = await asyncio.gather(
+            self.sync_readai(since=readai_since),
+            self.sync_fireflies(since=fireflies_since),
+        )
+
+        if readai_result["synced"] or fireflies_result["synced"]:
+            # Synced meetings can belong to any client
+            get_client_context_cache().invalidate()
+
+        advanced = {}
+        for source, result in (("readai", readai_result), ("fireflies", fireflies_result)):
+            if not result["errors"] and result["watermark"]:
+                advanced[source] = _later(watermarks.get(source), parse_meeting_date(result["watermark"]))
+        if advanced:
+            await self._save_watermarks(advanced)
 
         return {
             "readai": readai_result,
             "fireflies": fireflies_result,
             "total_synced": readai_result["synced"] + fireflies_result["synced"],
+            "total_skipped": readai_result["skipped"] + fireflies_result["skipped"],
             "total_errors": len(readai_result["errors"]) + len(fireflies_result["errors"]),
         }
 
+    # ------------------------------------------------------------------
+    # Per-meeting sync
+    # ------------------------------------------------------------------
+
+    async def _sync_each(
+        self, raws: list[dict], sync_one, error_label: str, concurrency: int
+    ) -> dict:
+        """Sync each raw record with ``sync_one`` and tally the outcomes.
+
+        Records are synced concurrently, at most ``concurrency`` at a time,
+        so one source never exceeds its provider's rate limit.  The returned
+        ``watermark`` is the latest meeting date among the records that were
+        synced or skipped.
+        """
+        semaphore = asyncio.Semaphore(max(1, concurrency))
+
+        async def _run(raw: dict) -> str | Exception:
+            async with semaphore:
+                try:
+                    return await sync_one(raw)
+                except Exception as exc:
+                    logger.exception("%s '%s'", error_label, raw.get("title", "unknown"))
+                    return exc
+
+        outcomes = await asyncio.gather(*(_run(raw) for raw in raws))
+
+        synced = 0
+        skipped = 0
+        errors: list[str] = []
+        watermark: str | None = None
+
+        for raw, outcome in zip(raws, outcomes):
+            if isinstance(outcome, Exception):
+                errors.append(f"{error_label} '{raw.get('title', 'unknown')}': {outcome}")
+                continue
+
+            if outcome == SKIPPED:
+                skipped += 1
+            else:
+                synced += 1
+            watermark = _later(watermark, parse_meeting_date(raw.get("start_time_ms") or raw.get("date")))
+
+        return {"synced": synced, "skipped": skipped, "errors": errors, "watermark": watermark}
+
+    async def _sync_readai_meeting(self, raw: dict) -> str:
+        """Sync one Read.AI listing record; return ``SYNCED`` or ``SKIPPED``."""
+        source_id = raw.get("id", "")
+        digest = _content_hash(raw)
+        existing = await self._get_existing(f"readai_{source_id}") if source_id else None
+        if self._unchanged(existing, digest):
+            return SKIPPED
+
+        # Fetch rich detail (summary, action items, topics) via MCP
+        if source_id:
+            try:
+                detail = await self.readai.get_meeting_detail(
+                    source_id,
+                    expand=["summary", "action_items", "topics"],
+                )
+                if detail:
+                    raw = {**raw, "_detail": detail}
+            except Exception:
+                logger.debug("Could not fetch Read.AI detail for %s", source_id)
+
+        meeting = self._map_readai_meeting(raw)
+        await self._upsert_meeting(meeting, existing, digest)
+
+        # Attempt to pull transcript
+        if source_id:
+            await self._sync_readai_transcript(
+                meeting.id, source_id, (existing or {}).get("source_transcript_hash")
+            )
+        return SYNCED
+
+    async def _sync_fireflies_meeting(
+        self, raw: dict, pending_transcripts: list[tuple[str, str, str | None]]
+    ) -> str:
+        """Sync one Fireflies listing record; return ``SYNCED`` or ``SKIPPED``.
+
+        The transcript is not fetched here; ``(meeting_id, source_id,
+        previous_hash)`` is appended to ``pending_transcripts`` for the
+        batched fetch.
+        """
+        source_id = raw.get("id", "")
+        digest = _content_hash(raw)
+        existing = await self._get_existing(f"fireflies_{source_id}") if source_id else None
+        if self._unchanged(existing, digest):
+            return SKIPPED
+
+        meeting = self._map_fireflies_meeting(raw)
+        await self._upsert_meeting(meeting, existing, digest)
+
+        # Queue the detailed transcript for the batched fetch
+        if source_id:
+            pending_transcripts.append(
+                (meeting.id, source_id, (existing or {}).get("source_transcript_hash"))
+            )
+        return SYNCED
+
+    @staticmethod
+    def _unchanged(existing: dict | None, digest: str) -> bool:
+        """Whether a stored meeting matches the listing and already has its transcript."""
+        return bool(
+            existing
+            and existing.get("source_hash") == digest
+            and existing.get("source_transcript_hash")
+        )
+
+    # ------------------------------------------------------------------
+    # Watermarks
+    # ------------------------------------------------------------------
+
+    @staticmethod
+    def _since(watermark: str | None) -> datetime | None:
+        """Return the provider ``since`` for a stored watermark, less the lookback."""
+        parsed = parse_meeting_date(watermark)
+        if parsed is None:
+            return None
+        return parsed - timedelta(hours=get_settings().MEETING_SYNC_LOOKBACK_HOURS)
+
+    @staticmethod
+    async def _load_watermarks() -> dict:
+        """Read per-source watermarks from the sync metadata document."""
+        try:
+            db = get_firestore_client()
+            doc = await asyncio.to_thread(
+                db.collection(SYNC_META_COLLECTION).document(SYNC_META_DOC).get
+            )
+            if doc.exists:
+                return dict(doc.to_dict().get("watermarks") or {})
+        except Exception:
+            logger.warning("Could not read meeting sync watermarks", exc_info=True)
+        return {}
+
+    @staticmethod
+    async def _save_watermarks(watermarks: dict) -> None:
+        """Merge advanced per-source watermarks into the sync metadata document."""
+        try:
+            db = get_firestore_client()
+            await asyncio.to_thread(
+                db.collection(SYNC_META_COLLECTION).document(SYNC_META_DOC).set,
+                {"watermarks": watermarks},
+                merge=True,
+            )
+        except Exception:
+            logger.warning("Could not write meeting sync watermarks", exc_info=True)
+
     # ------------------------------------------------------------------
     # Client matching
     # ------------------------------------------------------------------
@@ -170,7 +403,9 @@ class MeetingSyncService:
         try:
             db = get_firestore_client()
             clients_ref = db.collection("clients")
-            clients = list(clients_ref.where("is_active", "==", True).stream())
+            clients = await asyncio.to_thread(
+                lambda: list(clients_ref.where("is_active", "==", True).stream())
+            )
 
             title_lower = title.lower()
 
@@ -329,27 +564,44 @@ class MeetingSyncService:
     # Firestore persistence
     # ------------------------------------------------------------------
 
-    async def _upsert_meeting(self, meeting: MeetingResponse) -> None:
+    @staticmethod
+    async def _get_existing(doc_id: str) -> dict | None:
+        """Return the stored meeting document data, or ``None`` if absent."""
+        db = get_firestore_client()
+        doc = await asyncio.to_thread(db.collection(COLLECTION_NAME).document(doc_id).get)
+        return doc.to_dict() if doc.exists else None
+
+    async def _upsert_meeting(
+        self,
+        meeting: MeetingResponse,
+        existing: dict | None = None,
+        source_hash: str | None = None,
+    ) -> None:
         """Write or update a meeting document in Firestore.
 
         The document ID is derived from ``source`` + ``source_id`` so
         repeated syncs are idempotent.  Client matching is attempted
         when ``client_id`` is not already set.
+
+        Args:
+            meeting: The mapped meeting.
+            existing: Stored document data, already read by the caller.
+            source_hash: Hash of the provider listing record.
         """
         db = get_firestore_client()
         doc_ref = db.collection(COLLECTION_NAME).document(meeting.id)
-        existing = doc_ref.get()
 
         data = meeting.model_dump(mode="json")
+        if source_hash:
+            data["source_hash"] = source_hash
 
-        if existing.exists:
+        if existing is not None:
             # Preserve manually set fields
-            existing_data = existing.to_dict()
-            for keep in ("client_id", "client_name", "task_ids", "notes"):
-                if existing_data.get(keep):
-                    data[keep] = existing_data[keep]
+            for keep in ("client_id", "client_name", "task_ids", "notes", "created_at"):
+                if existing.get(keep):
+                    data[keep] = existing[keep]
             data["updated_at"] = datetime.utcnow().isoformat()
-            doc_ref.update(data)
+            await asyncio.to_thread(doc_ref.update, data)
         else:
             # Attempt client matching for new records
             if not data.get("client_id"):
@@ -361,120 +613,165 @@ class MeetingSyncService:
                     data["client_id"] = client_id
                     # Also try to fetch client name
                     try:
-                        client_doc = db.collection("clients").document(client_id).get()
+                        client_doc = await asyncio.to_thread(
+                            db.collection("clients").document(client_id).get
+                        )
                         if client_doc.exists:
                             data["client_name"] = client_doc.to_dict().get("name")
                     except Exception:
                         pass
 
-            doc_ref.set(data)
+            await asyncio.to_thread(doc_ref.set, data)
+
+    @staticmethod
+    async def _store_transcript(
+        transcript: MeetingTranscript, previous_hash: str | None
+    ) -> bool:
+        """Store a transcript unless its text is unchanged; return whether it was written.
+
+        Transcripts are written as a header plus compressed blocks (see
+        ``transcript_store``) so long meetings fit Firestore's document limit.
+        """
+        digest = transcript_hash(transcript.full_text)
+        if digest == previous_hash:
+            return False
+
+        db = get_firestore_client()
+        await asyncio.to_thread(write_transcript, db, transcript)
+
+        # Mark meeting as having a transcript; speaker analytics are computed
+        # once here so aggregate endpoints never read transcripts
+        await asyncio.to_thread(
+            db.collection(COLLECTION_NAME).document(transcript.meeting_id).update,
+            {
+                "has_transcript": True,
+                "source_transcript_hash": digest,
+                "speaker_stats": compute_speaker_stats(transcript.segments),
+                "speaker_stats_version": SPEAKER_STATS_VERSION,
+            },
+        )
+        return True
 
     # ------------------------------------------------------------------
     # Transcript sync helpers
     # ------------------------------------------------------------------
 
-    async def _sync_readai_transcript(self, meeting_doc_id: str, source_id: str) -> None:
+    async def _sync_readai_transcript(
+        self, meeting_doc_id: str, source_id: str, previous_hash: str | None = None
+    ) -> None:
         """Pull transcript from Read.AI (via MCP) and store in Firestore.
 
         The Read.AI MCP ``get_meeting_by_id`` tool returns transcript data
         with the shape ``{"speakers": [...], "turns": [...], "text": "..."}``.
         ``turns`` is a list of ``{"start_time_ms", "end_time_ms", "speaker": {"name"}, "text"}``.
         ``text`` is the full pre-formatted transcript string.
-        """
-        try:
-            raw = await self.readai.get_transcript(source_id)
-            if not raw:
-                return
-
-            # Parse turns into TranscriptSegment objects
-            turns = raw.get("turns", [])
-            segments = []
-            for turn in turns:
-                if isinstance(turn, dict):
-                    speaker_obj = turn.get("speaker", {})
-                    speaker = speaker_obj.get("name", "Unknown") if isinstance(speaker_obj, dict) else str(speaker_obj)
-                    text = turn.get("text", "")
-                    # Convert ms timestamps to seconds for consistency
-                    start_ms = turn.get("start_time_ms")
-                    end_ms = turn.get("end_time_ms")
-                    segments.append(TranscriptSegment(
-                        speaker=speaker,
-                        text=text,
-                        start_time=start_ms / 1000 if start_ms else None,
-                        end_time=end_ms / 1000 if end_ms else None,
-                    ))
-
-            # Use the pre-formatted full text, or build from turns
-            full_text = raw.get("text", "")
-            if not full_text and segments:
-                full_text = "\n".join(
-                    f"[{seg.speaker}]: {seg.text}" for seg in segments
-                )
 
-            transcript = MeetingTranscript(
-                id=f"transcript_{meeting_doc_id}",
-                meeting_id=meeting_doc_id,
-                segments=segments,
-                full_text=full_text,
-                word_count=len(full_text.split()),
-                created_at=datetime.utcnow().isoformat(),
+        Failures propagate, so the meeting is reported as an error and the
+        Read.AI watermark does not advance past it.
+        """
+        raw = await self.readai.get_transcript(source_id)
+        if not raw:
+            return
+
+        # Parse turns into TranscriptSegment objects
+        turns = raw.get("turns", [])
+        segments = []
+        for turn in turns:
+            if isinstance(turn, dict):
+                speaker_obj = turn.get("speaker", {})
+                speaker = speaker_obj.get("name", "Unknown") if isinstance(speaker_obj, dict) else str(speaker_obj)
+                text = turn.get("text", "")
+                # Convert ms timestamps to seconds for consistency
+                start_ms = turn.get("start_time_ms")
+                end_ms = turn.get("end_time_ms")
+                segments.append(TranscriptSegment(
+                    speaker=speaker,
+                    text=text,
+                    start_time=start_ms / 1000 if start_ms else None,
+                    end_time=end_ms / 1000 if end_ms else None,
+                ))
+
+        # Use the pre-formatted full text, or build from turns
+        full_text = raw.get("text", "")
+        if not full_text and segments:
+            full_text = "\n".join(
+                f"[{seg.speaker}]: {seg.text}" for seg in segments
             )
 
-            db = get_firestore_client()
-            db.collection(TRANSCRIPT_COLLECTION).document(transcript.id).set(
-                transcript.model_dump(mode="json")
-            )
+        transcript = MeetingTranscript(
+            id=f"transcript_{meeting_doc_id}",
+            meeting_id=meeting_doc_id,
+            segments=segments,
+            full_text=full_text,
+            word_count=len(full_text.split()),
+            created_at=datetime.utcnow().isoformat(),
+        )
 
-            # Mark meeting as having a transcript
-            db.collection(COLLECTION_NAME).document(meeting_doc_id).update(
-                {"has_transcript": True}
-            )
-        except Exception:
-            logger.exception("Failed to sync Read.AI transcript for %s", meeting_doc_id)
+        await self._store_transcript(transcript, previous_hash)
+
+    async def _sync_fireflies_transcripts(
+        self, pending: list[tuple[str, str, str | None]]
+    ) -> list[str]:
+        """Fetch queued Fireflies transcripts in batches and store them.
+
+        A transcript that cannot be fetched or stored leaves
+        ``source_transcript_hash`` unset, so the meeting is retried on the
+        next sync.
 
-    async def _sync_fireflies_transcript(self, meeting_doc_id: str, source_id: str) -> None:
-        """Pull transcript from Fireflies and store in Firestore."""
+        Returns:
+            One error message per meeting whose transcript was not stored.
+        """
+        if not pending:
+            return []
         try:
-            raw = await self.fireflies.get_transcript(source_id)
+            raws = await self.fireflies.get_transcripts_batch([source_id for _, source_id, _ in pending])
+        except Exception as exc:
+            logger.exception("Failed to fetch %d Fireflies transcripts", len(pending))
+            return [f"Failed to fetch Fireflies transcript for {meeting_doc_id}: {exc}" for meeting_doc_id, _, _ in pending]
+
+        errors: list[str] = []
+        for meeting_doc_id, source_id, previous_hash in pending:
+            raw = raws.get(source_id)
             if not raw:
-                return
-
-            sentences = raw.get("sentences", [])
-            segments = []
-            full_parts: list[str] = []
-
-            for s in sentences or []:
-                if isinstance(s, dict):
-                    text = s.get("text", "")
-                    segments.append(TranscriptSegment(
-                        speaker=s.get("speaker_name", "Unknown"),
-                        text=text,
-                        start_time=s.get("start_time"),
-                        end_time=s.get("end_time"),
-                    ))
-                    full_parts.append(text)
-
-            full_text = "\n".join(full_parts)
-            transcript = MeetingTranscript(
-                id=f"transcript_{meeting_doc_id}",
-                meeting_id=meeting_doc_id,
-                segments=segments,
-                full_text=full_text,
-                word_count=len(full_text.split()),
-                created_at=datetime.utcnow().isoformat(),
-            )
+                errors.append(f"Failed to fetch Fireflies transcript for {meeting_doc_id}")
+                continue
+            try:
+                await self._store_fireflies_transcript(meeting_doc_id, raw, previous_hash)
+            except Exception as exc:
+                logger.exception("Failed to sync Fireflies transcript for %s", meeting_doc_id)
+                errors.append(f"Failed to store Fireflies transcript for {meeting_doc_id}: {exc}")
+        return errors
 
-            db = get_firestore_client()
-            db.collection(TRANSCRIPT_COLLECTION).document(transcript.id).set(
-                transcript.model_dump(mode="json")
-            )
+    async def _store_fireflies_transcript(
+        self, meeting_doc_id: str, raw: dict, previous_hash: str | None = None
+    ) -> None:
+        """Map a Fireflies transcript and store it in Firestore."""
+        sentences = raw.get("sentences", [])
+        segments = []
+        full_parts: list[str] = []
+
+        for s in sentences or []:
+            if isinstance(s, dict):
+                text = s.get("text", "")
+                segments.append(TranscriptSegment(
+                    speaker=s.get("speaker_name", "Unknown"),
+                    text=text,
+                    start_time=s.get("start_time"),
+                    end_time=s.get("end_time"),
+                ))
+                full_parts.append(text)
+
+        full_text = "\n".join(full_parts)
+        transcript = MeetingTranscript(
+            id=f"transcript_{meeting_doc_id}",
+            meeting_id=meeting_doc_id,
+            segments=segments,
+            full_text=full_text,
+            word_count=len(full_text.split()),
+            created_at=datetime.utcnow().isoformat(),
+        )
 
-            # Mark meeting as having a transcript
-            db.collection(COLLECTION_NAME).document(meeting_doc_id).update(
-                {"has_transcript": True}
-            )
-        except Exception:
-            logger.exception("Failed to sync Fireflies transcript for %s", meeting_doc_id)
+        await self._store_transcript(transcript, previous_hash)
 
 
 def get_meeting_sync_service() -> MeetingSyncService:
@@ -5,17 +5,18 @@ import uuid
 from datetime import datetime, timedelta, timezone
 
 import google.generativeai as genai
+from google.cloud.firestore import Increment
 
-from app.config import get_settings
 from app.models.agent import COLLECTION_NAME as AGENTS_COLLECTION
 from app.models.chat import (
     COLLECTION_NAME as CONVERSATIONS_COLLECTION,
-    MESSAGES_COLLECTION,
     MessageRole,
+    messages_collection_path,
 )
 from app.models.meeting import COLLECTION_NAME as MEETINGS_COLLECTION
 from app.models.task import COLLECTION_NAME as TASKS_COLLECTION
 from app.utils.firebase_client import get_firestore_client
+from app.utils.llm_gateway import get_llm_gateway
 
 logger = logging.getLogger(__name__)
 
@@ -36,15 +37,9 @@ class OpsTrafficAgent:
     """
 
     def __init__(self) -> None:
-        settings = get_settings()
         self.db = get_firestore_client()
-        self._gemini_configured = False
-
-        api_key = settings.GEMINI_API_KEY or settings.GOOGLE_AI_API_KEY
-        if api_key:
-            genai.configure(api_key=api_key)
-            self._gemini_configured = True
-        else:
+        self._gemini_configured = get_llm_gateway().is_configured()
+        if not self._gemini_configured:
             logger.warning("Gemini API key not configured — OpsTrafficAgent AI features disabled")
 
     def _require_gemini(self) -> None:
@@ -76,19 +71,16 @@ class OpsTrafficAgent:
             "Highlight risks, blockers, and recommended next steps."
         )
 
-        model = genai.GenerativeModel(
-            "gemini-2.5-flash",
-            system_instruction=system_instruction,
-        )
-
         prompt = (
             f"Topic: {topic}\n\n"
             f"Context:\n{context_text}\n\n"
             "Compile this into an executive operations brief."
         )
 
-        response = await model.generate_content_async(
+        response = await get_llm_gateway().generate(
+            "ops_agent",
             prompt,
+            system_instruction=system_instruction,
             generation_config=genai.GenerationConfig(
                 temperature=0.4,
                 max_output_tokens=2000,
@@ -153,20 +145,17 @@ class OpsTrafficAgent:
             "sources": [],
             "created_at": now,
         }
-        self.db.collection(MESSAGES_COLLECTION).document(user_msg_id).set(user_msg_dict)
+        self.db.collection(messages_collection_path(conv_id)).document(user_msg_id).set(user_msg_dict)
 
         # --- Generate AI response ---
         assistant_content = ""
         try:
             self._require_gemini()
 
-            model = genai.GenerativeModel(
-                "gemini-2.5-flash",
-                system_instruction=system_prompt,
-            )
-
-            response = await model.generate_content_async(
+            response = await get_llm_gateway().generate(
+                "ops_agent",
                 user_content,
+                system_instruction=system_prompt,
                 generation_config=genai.GenerationConfig(
                     temperature=0.7,
                     max_output_tokens=4000,
@@ -187,7 +176,7 @@ class OpsTrafficAgent:
             "sources": [],
             "created_at": asst_now,
         }
-        self.db.collection(MESSAGES_COLLECTION).document(asst_msg_id).set(asst_msg_dict)
+        self.db.collection(messages_collection_path(conv_id)).document(asst_msg_id).set(asst_msg_dict)
 
         # --- Update conversation metadata ---
         self.db.collection(CONVERSATIONS_COLLECTION).document(conv_id).update({
@@ -197,10 +186,8 @@ class OpsTrafficAgent:
 
         # --- Increment agent conversation_count ---
         try:
-            agent_ref = self.db.collection(AGENTS_COLLECTION).document(agent_id)
-            existing = agent_ref.get().to_dict() or {}
-            agent_ref.update({
-                "conversation_count": (existing.get("conversation_count", 0) + 1),
+            self.db.collection(AGENTS_COLLECTION).document(agent_id).update({
+                "conversation_count": Increment(1),
             })
         except Exception:
             logger.warning("Failed to increment conversation_count on agent %s", agent_id)
@@ -392,18 +379,15 @@ class OpsTrafficAgent:
         # --- Format via Gemini if available ---
         if self._gemini_configured:
             try:
-                model = genai.GenerativeModel(
-                    "gemini-2.5-flash",
+                response = await get_llm_gateway().generate(
+                    "ops_agent",
+                    f"Generate the CEO morning briefing from this data:\n\n{summary_data}",
                     system_instruction=(
                         "You are the Ops/Traffic Agent for FableDash. "
                         "Format the following raw data into a concise CEO morning briefing. "
                         "Use clear sections, bullet points, and highlight anything urgent. "
                         "Keep it professional and actionable."
                     ),
-                )
-
-                response = await model.generate_content_async(
-                    f"Generate the CEO morning briefing from this data:\n\n{summary_data}",
                     generation_config=genai.GenerationConfig(
                         temperature=0.3,
                         max_output_tokens=2000,
@@ -11,7 +11,6 @@ from datetime import date, datetime, timedelta, timezone
 
 import google.generativeai as genai
 
-from app.config import get_settings
 from app.models.agent import COLLECTION_NAME as AGENTS_COLLECTION
 from app.models.client import COLLECTION_NAME as CLIENTS_COLLECTION
 from app.models.document import COLLECTION_NAME as DOCUMENTS_COLLECTION
@@ -25,6 +24,7 @@ from app.models.meeting import COLLECTION_NAME as MEETINGS_COLLECTION
 from app.models.task import COLLECTION_NAME as TASKS_COLLECTION
 from app.models.time_log import COLLECTION_NAME as TIME_LOGS_COLLECTION
 from app.utils.firebase_client import get_firestore_client
+from app.utils.llm_gateway import get_llm_gateway
 
 logger = logging.getLogger(__name__)
 
@@ -312,15 +312,9 @@ class OpsAIEngine:
     """
 
     def __init__(self) -> None:
-        settings = get_settings()
         self.db = get_firestore_client()
-        self._gemini_configured = False
-        self._api_key = settings.GEMINI_API_KEY or settings.GOOGLE_AI_API_KEY
-
-        if self._api_key:
-            genai.configure(api_key=self._api_key)
-            self._gemini_configured = True
-        else:
+        self._gemini_configured = get_llm_gateway().is_configured()
+        if not self._gemini_configured:
             logger.warning("Gemini API key not configured — OpsAI engine AI features disabled")
 
     @property
@@ -1064,14 +1058,11 @@ class OpsAIEngine:
             "When uncertain which tool to use, call all plausibly relevant ones."
         )
 
-        model = genai.GenerativeModel(
-            "gemini-2.5-flash",
+        response = await get_llm_gateway().generate(
+            "opsai_plan",
+            question,
             system_instruction=system_instruction,
             tools=OPSAI_TOOLS,
-        )
-
-        response = await model.generate_content_async(
-            question,
             generation_config=genai.GenerationConfig(temperature=0.1),
         )
 
@@ -1140,18 +1131,15 @@ class OpsAIEngine:
             "If data is missing or unavailable, say so clearly."
         )
 
-        model = genai.GenerativeModel(
-            "gemini-2.5-flash",
-            system_instruction=system_instruction,
-        )
-
         prompt = (
             f"Question: {question}\n\n"
             f"Data from FableDash:\n{data_text}"
         )
 
-        response = await model.generate_content_async(
+        response = await get_llm_gateway().generate(
+            "opsai_answer",
             prompt,
+            system_instruction=system_instruction,
             generation_config=genai.GenerationConfig(
                 temperature=0.3,
                 max_output_tokens=2000,
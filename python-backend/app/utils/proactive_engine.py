@@ -13,6 +13,8 @@ from datetime import datetime, timedelta, timezone
 
 import google.generativeai as genai
 
+from app.utils.llm_gateway import get_llm_gateway
+
 logger = logging.getLogger(__name__)
 
 # Firestore collection names (mirrored from models)
@@ -503,11 +505,12 @@ class ProactiveEngine:
     # AI insight summary
     # ------------------------------------------------------------------
 
-    async def generate_insight_summary(self, alerts: list[dict]) -> str:
+    async def generate_insight_summary(self, alerts: list[dict], refresh: bool = False) -> str:
         """Use Gemini to generate a human-readable CEO briefing from alerts.
 
         Args:
             alerts: List of alert dicts from run_all_checks.
+            refresh: Regenerate even if this alert set was summarised recently.
 
         Returns:
             Natural-language summary string, or fallback text if Gemini unavailable.
@@ -531,20 +534,19 @@ class ProactiveEngine:
                 "Use South African Rand (ZAR / R) for currency. Be direct and actionable."
             )
 
-            model = genai.GenerativeModel(
-                "gemini-2.5-flash",
-                system_instruction=system_instruction,
-            )
-
-            response = await model.generate_content_async(
+            text = await get_llm_gateway().generate_text(
+                "proactive_summary",
                 f"Current operational alerts:\n{alert_text}",
+                system_instruction=system_instruction,
                 generation_config=genai.GenerationConfig(
                     temperature=0.3,
                     max_output_tokens=300,
                 ),
+                cache=True,
+                bypass_cache=refresh,
             )
 
-            return response.text or self._fallback_summary(alerts)
+            return text or self._fallback_summary(alerts)
 
         except Exception:
             logger.exception("Gemini summary generation failed, using fallback")
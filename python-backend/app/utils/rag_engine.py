@@ -1,10 +1,12 @@
 """RAG (Retrieval-Augmented Generation) engine combining vector search with LLM generation."""
 
 import logging
-
-import google.generativeai as genai
+from collections.abc import AsyncIterator
 
 from app.config import get_settings
+from app.utils.context_assembler import assemble_context
+from app.utils.lexical_index import reciprocal_rank_fusion
+from app.utils.llm_gateway import get_llm_gateway
 from app.utils.vector_store import get_vector_store, VectorStore
 
 logger = logging.getLogger(__name__)
@@ -17,7 +19,8 @@ class RAGEngine:
 
     Workflow:
         1. Accept a user query.
-        2. Retrieve relevant document chunks from the VectorStore.
+        2. Retrieve relevant document chunks from the VectorStore, fusing
+           BM25 keyword hits with vector hits (reciprocal rank fusion).
         3. Build a prompt with the retrieved context.
         4. Generate a response via Google Gemini.
     """
@@ -28,19 +31,76 @@ class RAGEngine:
     ) -> None:
         self._vector_store = vector_store or get_vector_store()
         settings = get_settings()
+        self._hybrid = settings.RAG_HYBRID_SEARCH
+        self._candidate_pool = settings.RAG_CANDIDATE_POOL
+        self._prefilter_min_chunks = settings.RAG_LEXICAL_PREFILTER_MIN_CHUNKS
+        self._token_budget = settings.RAG_CONTEXT_TOKEN_BUDGET
 
-        api_key = settings.GEMINI_API_KEY or settings.GOOGLE_AI_API_KEY
-        if api_key:
-            genai.configure(api_key=api_key)
-            self._configured = True
-        else:
-            self._configured = False
+        self._configured = get_llm_gateway().is_configured()
+        if not self._configured:
             logger.warning("Gemini API key not set — RAGEngine will be non-functional")
 
     # ------------------------------------------------------------------
     # Context retrieval
     # ------------------------------------------------------------------
 
+    async def retrieve(
+        self,
+        query: str,
+        agent_id: str | None = None,
+        client_id: str | None = None,
+        top_k: int = 5,
+        lexical_prefilter: bool | None = None,
+    ) -> list[dict]:
+        """Retrieve the most relevant chunks using hybrid BM25 + vector search.
+
+        Args:
+            query: The natural-language query.
+            agent_id: Optional scope filter.
+            client_id: Optional scope filter.
+            top_k: Number of chunks to return.
+            lexical_prefilter: Restrict vector scoring to the BM25 candidate
+                set.  ``None`` enables it automatically for scopes with at
+                least ``RAG_LEXICAL_PREFILTER_MIN_CHUNKS`` chunks.
+
+        Returns:
+            Result dicts (``content``, ``score``, ``chunk_id``,
+            ``document_id``, ``metadata``) best first.  With hybrid search
+            enabled ``score`` is the fused RRF score.
+        """
+        if not self._hybrid:
+            return await self._vector_store.search(
+                query=query, agent_id=agent_id, client_id=client_id, top_k=top_k,
+            )
+
+        pool = max(top_k, self._candidate_pool)
+        lexical = await self._vector_store.lexical_search(
+            query=query, agent_id=agent_id, client_id=client_id, top_k=pool,
+        )
+
+        if lexical_prefilter is None and lexical:
+            size = await self._vector_store.scope_size(agent_id, client_id)
+            lexical_prefilter = size is not None and size >= self._prefilter_min_chunks
+        candidate_ids = {r["chunk_id"] for r in lexical} if lexical_prefilter and lexical else None
+
+        try:
+            vector = await self._vector_store.search(
+                query=query,
+                agent_id=agent_id,
+                client_id=client_id,
+                top_k=pool,
+                candidate_ids=candidate_ids,
+            )
+        except Exception:
+            if not lexical:
+                raise
+            logger.warning("Vector search failed — using keyword results only", exc_info=True)
+            vector = []
+
+        if not lexical:
+            return vector[:top_k]
+        return reciprocal_rank_fusion([vector, lexical])[:top_k]
+
     async def retrieve_context(
         self,
         query: str,
@@ -57,22 +117,29 @@ class RAGEngine:
             top_k: Number of chunks to retrieve.
 
         Returns:
-            A single string with the most relevant chunks, separated by
-            double newlines. Returns an empty string when no results are found.
+            The assembled context (see ``assemble``). Returns an empty
+            string when no results are found.
         """
-        results = await self._vector_store.search(
+        results = await self.retrieve(
             query=query,
             agent_id=agent_id,
             client_id=client_id,
             top_k=top_k,
         )
-        if not results:
-            return ""
+        return self.assemble(results)["context"]
 
-        context_parts: list[str] = []
-        for result in results:
-            context_parts.append(result["content"])
-        return "\n\n".join(context_parts)
+    def assemble(self, results: list[dict], token_budget: int | None = None) -> dict:
+        """Merge, de-duplicate and budget retrieved chunks into prompt context.
+
+        Args:
+            results: Retrieval results, best first.
+            token_budget: Overrides ``RAG_CONTEXT_TOKEN_BUDGET``.
+
+        Returns:
+            Dict with ``context`` (str), ``sources`` (results that made the
+            cut) and ``tokens`` (estimated prompt tokens used).
+        """
+        return assemble_context(results, token_budget=token_budget or self._token_budget)
 
     # ------------------------------------------------------------------
     # Response generation
@@ -99,6 +166,42 @@ class RAGEngine:
         Raises:
             RuntimeError: If the Gemini client is not available.
         """
+        system_instruction, user_content = self._prepare_generation(query, context, system_prompt)
+        response = await get_llm_gateway().generate(
+            "rag", user_content, system_instruction=system_instruction
+        )
+        return response.text or ""
+
+    async def generate_response_stream(
+        self,
+        query: str,
+        context: str,
+        system_prompt: str | None = None,
+        model: str = "gemini-2.5-flash",
+    ) -> AsyncIterator[str]:
+        """Stream an LLM response using the provided context.
+
+        Same arguments as ``generate_response``.
+
+        Yields:
+            Text fragments of the answer as Gemini produces them.
+
+        Raises:
+            RuntimeError: If the Gemini client is not available.
+        """
+        system_instruction, user_content = self._prepare_generation(query, context, system_prompt)
+        async for text in get_llm_gateway().stream(
+            "rag_stream", user_content, system_instruction=system_instruction
+        ):
+            yield text
+
+    def _prepare_generation(
+        self,
+        query: str,
+        context: str,
+        system_prompt: str | None,
+    ) -> tuple[str, str]:
+        """Build the system instruction and grounded prompt for a response."""
         if not self._configured:
             raise RuntimeError("RAGEngine: Gemini client unavailable (missing API key)")
 
@@ -108,19 +211,12 @@ class RAGEngine:
             "enough information, say so honestly."
         )
 
-        gemini_model = genai.GenerativeModel(
-            "gemini-2.5-flash",
-            system_instruction=system_prompt or default_system,
-        )
-
         user_content = (
             f"Context:\n{context}\n\n---\n\nQuestion: {query}"
             if context
             else query
         )
-
-        response = await gemini_model.generate_content_async(user_content)
-        return response.text or ""
+        return system_prompt or default_system, user_content
 
     # ------------------------------------------------------------------
     # Orchestrator
@@ -145,19 +241,19 @@ class RAGEngine:
 
         Returns:
             A dict with ``answer`` (str) and ``sources`` (list of source
-            dicts from the vector search).
+            dicts for the chunks that made it into the context).
         """
-        results = await self._vector_store.search(
+        results = await self.retrieve(
             query=query,
             agent_id=agent_id,
             client_id=client_id,
         )
 
-        context = "\n\n".join(r["content"] for r in results) if results else ""
+        assembled = self.assemble(results)
 
         answer = await self.generate_response(
             query=query,
-            context=context,
+            context=assembled["context"],
             system_prompt=system_prompt,
             model=model,
         )
@@ -169,7 +265,7 @@ class RAGEngine:
                 "content": r["content"],
                 "score": r["score"],
             }
-            for r in results
+            for r in assembled["sources"]
         ]
 
         return {"answer": answer, "sources": sources}
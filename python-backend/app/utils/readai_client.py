@@ -8,10 +8,9 @@ so it survives process restarts.
 Meeting listings come from the REST API (``/v1/meetings``).
 Rich data (transcripts, summaries, action items, topics) comes from the
 MCP protocol endpoint (``/mcp``) which exposes a ``get_meeting_by_id`` tool
-with an ``expand`` parameter.
+with an ``expand`` parameter; calls go through the shared ``MCPTransport``.
 """
 
-import json
 import logging
 import time
 from datetime import datetime
@@ -19,6 +18,7 @@ from datetime import datetime
 import httpx
 
 from app.config import get_settings
+from app.utils.mcp_transport import MCPTransport
 
 logger = logging.getLogger(__name__)
 
@@ -41,6 +41,7 @@ class ReadAIClient:
         self.client_id = self.settings.READAI_CLIENT_ID
         self.client_secret = self.settings.READAI_CLIENT_SECRET
         self.http = httpx.AsyncClient(timeout=30.0)
+        self._mcp = MCPTransport(_MCP_URL, self.http, auth_headers=self._headers)
 
         # In-memory token cache
         self._access_token: str = ""
@@ -140,44 +141,11 @@ class ReadAIClient:
     async def _mcp_call(self, tool_name: str, arguments: dict) -> dict:
         """Call a Read.AI MCP tool and return the parsed result.
 
-        The MCP endpoint uses Streamable HTTP transport with SSE responses.
+        The shared transport keeps one MCP session open across calls
+        instead of re-initializing before every tool call.
         """
-        headers = await self._headers()
-        headers["Accept"] = "application/json, text/event-stream"
-
-        # Initialize MCP session
-        init_msg = {
-            "jsonrpc": "2.0",
-            "method": "initialize",
-            "id": 1,
-            "params": {
-                "protocolVersion": "2024-11-05",
-                "capabilities": {},
-                "clientInfo": {"name": "fable-dashboard", "version": "1.0"},
-            },
-        }
-        await self.http.post(_MCP_URL, headers=headers, json=init_msg)
-
-        # Call the tool
-        tool_msg = {
-            "jsonrpc": "2.0",
-            "method": "tools/call",
-            "id": 2,
-            "params": {"name": tool_name, "arguments": arguments},
-        }
-        resp = await self.http.post(_MCP_URL, headers=headers, json=tool_msg)
-        resp.raise_for_status()
-
-        # Parse SSE response
-        for line in resp.text.split("\n"):
-            if line.startswith("data: "):
-                data = json.loads(line[6:])
-                if "result" in data:
-                    for content in data["result"].get("content", []):
-                        if content.get("type") == "text":
-                            return json.loads(content["text"])
-
-        return {}
+        result = await self._mcp.call_tool(tool_name, arguments)
+        return result if isinstance(result, dict) else {}
 
     # ------------------------------------------------------------------
     # REST API — meeting listings
@@ -4,7 +4,7 @@ import logging
 
 import google.generativeai as genai
 
-from app.utils.openai_client import get_ai_client
+from app.utils.llm_gateway import get_llm_gateway
 
 logger = logging.getLogger(__name__)
 
@@ -100,11 +100,15 @@ class ReportExporter:
 
         return "\n".join(lines)
 
-    async def generate_ai_summary(self, report_data: dict) -> str:
-        """Use Gemini to generate an executive summary of the report (2-3 paragraphs)."""
+    async def generate_ai_summary(self, report_data: dict, refresh: bool = False) -> str:
+        """Use Gemini to generate an executive summary of the report (2-3 paragraphs).
+
+        Summaries are cached by prompt, so re-exporting an unchanged report is
+        instant.  Pass ``refresh=True`` to regenerate.
+        """
         try:
-            model = get_ai_client()
-            if model is None:
+            gateway = get_llm_gateway()
+            if not gateway.is_configured():
                 return "AI summary generation unavailable — Gemini API key not configured."
 
             # Build a condensed data snapshot for the prompt
@@ -117,19 +121,18 @@ class ReportExporter:
                 "Use specific numbers from the data. Currency is South African Rand (ZAR)."
             )
 
-            summary_model = genai.GenerativeModel(
-                "gemini-2.5-flash",
-                system_instruction=system_instruction,
-            )
-
-            response = await summary_model.generate_content_async(
+            text = await gateway.generate_text(
+                "report_summary",
                 f"Please summarise this report:\n\n{text_report}",
+                system_instruction=system_instruction,
                 generation_config=genai.GenerationConfig(
                     temperature=0.4,
                     max_output_tokens=500,
                 ),
+                cache=True,
+                bypass_cache=refresh,
             )
-            return response.text or "Unable to generate summary."
+            return text or "Unable to generate summary."
         except Exception:
             logger.exception("Failed to generate AI summary")
             return "AI summary generation failed. Please try again later."
@@ -1,10 +1,31 @@
-"""Sage Business Cloud Accounting API client with OAuth2 token management."""
-
+"""Sage Business Cloud Accounting API client with OAuth2 token management.
+
+Credentials are cached in memory until ``SAGE_TOKEN_REFRESH_MARGIN_SECONDS``
+before the access token expires, so API calls do not read Firestore.
+Refreshes are single-flight: an ``asyncio.Lock`` makes concurrent callers in
+this process wait for one refresh, and a short Firestore lease
+(``sage_credentials/refresh_lease``) stops other instances refreshing at the
+same time.  This matters because Sage rotates refresh tokens.
+
+Requests share one keep-alive HTTP/2 connection pool.  ``get_paginated``
+asks for ``SAGE_ITEMS_PER_PAGE`` items per page.  Once the first page
+reports ``$total``, it fetches the remaining pages concurrently, at most
+``SAGE_MAX_CONCURRENT_REQUESTS`` at a time.  Rate-limit and server errors
+(429/5xx) are retried with backoff that honours ``Retry-After``.
+"""
+
+import asyncio
 import logging
+import math
+import random
+import time
+import uuid
 from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
 from urllib.parse import urlencode
 
 import httpx
+from google.cloud import firestore
 
 from app.config import get_settings
 from app.models.financial import SAGE_CREDENTIALS_COLLECTION, SageCredentials
@@ -16,6 +37,16 @@ logger = logging.getLogger(__name__)
 SAGE_AUTH_URL = "https://www.sageone.com/oauth2/auth/central"
 SAGE_TOKEN_URL = "https://oauth.accounting.sage.com/token"
 
+# Document in SAGE_CREDENTIALS_COLLECTION coordinating refreshes across instances
+REFRESH_LEASE_DOC = "refresh_lease"
+
+RETRYABLE_STATUS_CODES = frozenset({429, 500, 502, 503, 504})
+
+_BACKOFF_BASE_SECONDS = 1.0
+_BACKOFF_MAX_SECONDS = 30.0
+# Longest Retry-After honoured before giving up on a request
+_RETRY_AFTER_MAX_SECONDS = 120.0
+
 _sage_client: "SageClient | None" = None
 
 
@@ -29,7 +60,20 @@ class SageClient:
     def __init__(self) -> None:
         self.settings = get_settings()
         self.base_url = self.settings.SAGE_API_BASE_URL
-        self.http = httpx.AsyncClient(timeout=30.0)
+        self.http = httpx.AsyncClient(
+            timeout=30.0,
+            http2=True,
+            limits=httpx.Limits(
+                max_connections=self.settings.SAGE_MAX_CONCURRENT_REQUESTS * 2,
+                max_keepalive_connections=self.settings.SAGE_MAX_CONCURRENT_REQUESTS,
+            ),
+        )
+        self._request_semaphore = asyncio.Semaphore(self.settings.SAGE_MAX_CONCURRENT_REQUESTS)
+
+        # In-memory credential cache and single-flight refresh
+        self._creds: SageCredentials | None = None
+        self._refresh_lock = asyncio.Lock()
+        self._instance_id = uuid.uuid4().hex
 
     # --- Credential management ---
 
@@ -56,24 +100,123 @@ class SageClient:
             db.collection(SAGE_CREDENTIALS_COLLECTION).document("current").set(
                 creds.model_dump()
             )
+            self._creds = creds
             logger.info("Sage credentials saved to Firestore")
         except Exception:
             logger.exception("Failed to save Sage credentials to Firestore")
             raise
 
+    def clear_cached_credentials(self) -> None:
+        """Drop the in-memory credentials (e.g. after disconnecting Sage)."""
+        self._creds = None
+
+    def _is_fresh(self, creds: SageCredentials) -> bool:
+        """Whether the access token is valid beyond the refresh margin."""
+        try:
+            expires_at = datetime.fromisoformat(creds.expires_at)
+        except (ValueError, TypeError):
+            logger.warning("Could not parse expires_at, refreshing token as precaution")
+            return False
+        if expires_at.tzinfo is None:
+            expires_at = expires_at.replace(tzinfo=timezone.utc)
+        margin = self.settings.SAGE_TOKEN_REFRESH_MARGIN_SECONDS
+        return datetime.now(timezone.utc).timestamp() < expires_at.timestamp() - margin
+
     async def refresh_token(self) -> SageCredentials:
         """Refresh the Sage access token using the stored refresh token.
 
+        Concurrent callers share a single refresh.
+
         Returns:
             Updated SageCredentials with new access/refresh tokens.
 
         Raises:
             RuntimeError: If no credentials exist or the refresh request fails.
         """
+        async with self._refresh_lock:
+            return await self._refresh_locked()
+
+    async def _refresh_locked(self) -> SageCredentials:
+        """Refresh under the Firestore lease; caller holds ``_refresh_lock``.
+
+        If another instance holds the lease, wait for the credentials it
+        saves rather than spending the (rotating) refresh token twice.  A
+        lease whose holder died expires and is taken over by a later
+        acquisition attempt; the refresh never proceeds without the lease.
+
+        Raises:
+            RuntimeError: No credentials exist, or the lease could not be
+                taken within two lease periods.
+        """
         creds = await self.get_credentials()
         if not creds:
             raise RuntimeError("No Sage credentials to refresh")
 
+        lease_seconds = self.settings.SAGE_REFRESH_LEASE_SECONDS
+        # The current holder's lease lapses within one period; allow a second
+        # in case another instance takes the lease over first
+        deadline = time.monotonic() + 2 * lease_seconds
+        while not await asyncio.to_thread(self._acquire_refresh_lease, lease_seconds):
+            if time.monotonic() >= deadline:
+                raise RuntimeError("Timed out waiting for the Sage token refresh lease")
+            await asyncio.sleep(self.settings.SAGE_REFRESH_LEASE_POLL_SECONDS)
+            latest = await self.get_credentials()
+            if latest and latest.access_token != creds.access_token and self._is_fresh(latest):
+                logger.info("Sage token refreshed by another instance")
+                self._creds = latest
+                return latest
+
+        try:
+            # Re-read under the lease: another instance may have refreshed
+            # (and rotated the refresh token) between our last poll and now
+            latest = await self.get_credentials() or creds
+            if latest.access_token != creds.access_token and self._is_fresh(latest):
+                logger.info("Sage token refreshed by another instance")
+                self._creds = latest
+                return latest
+            return await self._request_refresh(latest)
+        finally:
+            await asyncio.to_thread(self._release_refresh_lease)
+
+    def _acquire_refresh_lease(self, lease_seconds: float) -> bool:
+        """Take the cross-instance refresh lease; ``True`` if this instance holds it.
+
+        Fails open: if Firestore is unavailable the refresh proceeds
+        (guarded only by the in-process lock).
+        """
+        try:
+            db = get_firestore_client()
+            ref = db.collection(SAGE_CREDENTIALS_COLLECTION).document(REFRESH_LEASE_DOC)
+
+            @firestore.transactional
+            def _take(transaction) -> bool:
+                snapshot = ref.get(transaction=transaction)
+                now = time.time()
+                if snapshot.exists:
+                    lease = snapshot.to_dict()
+                    if lease.get("holder") != self._instance_id and lease.get("expires_at", 0) > now:
+                        return False
+                transaction.set(ref, {"holder": self._instance_id, "expires_at": now + lease_seconds})
+                return True
+
+            return _take(db.transaction())
+        except Exception:
+            logger.warning("Could not take Sage refresh lease; refreshing without it", exc_info=True)
+            return True
+
+    def _release_refresh_lease(self) -> None:
+        """Release the refresh lease if this instance holds it."""
+        try:
+            db = get_firestore_client()
+            ref = db.collection(SAGE_CREDENTIALS_COLLECTION).document(REFRESH_LEASE_DOC)
+            snapshot = ref.get()
+            if snapshot.exists and snapshot.to_dict().get("holder") == self._instance_id:
+                ref.delete()
+        except Exception:
+            logger.debug("Could not release Sage refresh lease", exc_info=True)
+
+    async def _request_refresh(self, creds: SageCredentials) -> SageCredentials:
+        """Exchange ``creds.refresh_token`` for new tokens and save them."""
         response = await self.http.post(
             SAGE_TOKEN_URL,
             data={
@@ -111,7 +254,10 @@ class SageClient:
         return updated_creds
 
     async def _ensure_valid_token(self) -> str:
-        """Return a valid access token, refreshing if expired.
+        """Return a valid access token, refreshing if it is about to expire.
+
+        Served from memory while the cached token is fresh; Firestore is
+        only read when the cache is empty or near expiry.
 
         Returns:
             A valid access token string.
@@ -119,31 +265,44 @@ class SageClient:
         Raises:
             RuntimeError: If no credentials exist.
         """
-        creds = await self.get_credentials()
-        if not creds:
-            raise RuntimeError("Sage not connected — no credentials found")
-
-        # Check if the token has expired (with 60-second buffer)
-        try:
-            expires_at = datetime.fromisoformat(creds.expires_at)
-            if expires_at.tzinfo is None:
-                expires_at = expires_at.replace(tzinfo=timezone.utc)
-            now = datetime.now(timezone.utc)
-            if now >= expires_at:
+        creds = self._creds
+        if creds and self._is_fresh(creds):
+            return creds.access_token
+
+        async with self._refresh_lock:
+            # Another caller may have refreshed while we waited for the lock
+            creds = self._creds
+            if creds and self._is_fresh(creds):
+                return creds.access_token
+
+            creds = await self.get_credentials()
+            if not creds:
+                raise RuntimeError("Sage not connected — no credentials found")
+            if not self._is_fresh(creds):
                 logger.info("Sage token expired, refreshing...")
-                creds = await self.refresh_token()
-        except (ValueError, TypeError):
-            logger.warning("Could not parse expires_at, refreshing token as precaution")
-            creds = await self.refresh_token()
+                creds = await self._refresh_locked()
 
-        return creds.access_token
+            self._creds = creds
+            return creds.access_token
+
+    async def _refresh_after_unauthorized(self, rejected_token: str) -> str:
+        """Return a new access token after ``rejected_token`` got a 401.
+
+        Concurrent 401s for the same token trigger a single refresh.
+        """
+        async with self._refresh_lock:
+            creds = self._creds
+            if creds and creds.access_token != rejected_token and self._is_fresh(creds):
+                return creds.access_token
+            return (await self._refresh_locked()).access_token
 
     # --- API requests ---
 
     async def get(self, endpoint: str, params: dict | None = None) -> dict:
         """Make an authenticated GET request to the Sage API.
 
-        Automatically retries once with a refreshed token on 401.
+        Automatically retries once with a refreshed token on 401, and with
+        backoff on 429/5xx responses.
 
         Args:
             endpoint: API path relative to base URL (e.g. "/contacts").
@@ -152,25 +311,14 @@ class SageClient:
         Returns:
             Parsed JSON response as a dict.
         """
-        token = await self._ensure_valid_token()
-        url = f"{self.base_url}{endpoint}"
-        headers = {"Authorization": f"Bearer {token}"}
-
-        response = await self.http.get(url, headers=headers, params=params)
-
-        if response.status_code == 401:
-            logger.info("Sage 401 — refreshing token and retrying")
-            creds = await self.refresh_token()
-            headers["Authorization"] = f"Bearer {creds.access_token}"
-            response = await self.http.get(url, headers=headers, params=params)
-
-        response.raise_for_status()
-        return response.json()
+        return await self._get_json(f"{self.base_url}{endpoint}", params)
 
     async def get_paginated(self, endpoint: str, params: dict | None = None) -> list[dict]:
         """Fetch all pages from a paginated Sage API endpoint.
 
-        Sage uses a ``$next`` link in the response for pagination.
+        The first page reports ``$total``, so the remaining pages are
+        fetched concurrently by page number.  Responses without a total
+        fall back to following ``$next`` links one at a time.
 
         Args:
             endpoint: API path relative to base URL.
@@ -179,32 +327,121 @@ class SageClient:
         Returns:
             Combined list of items from all pages.
         """
+        per_page = self.settings.SAGE_ITEMS_PER_PAGE
+        url = f"{self.base_url}{endpoint}"
+        base_params = {**(params or {}), "items_per_page": per_page}
+
+        first = await self._get_json(url, {**base_params, "page": 1})
+        pages = [self._page_items(first)]
+
+        total = first.get("$total")
+        if isinstance(total, int) and first.get("$next"):
+            page_count = math.ceil(total / per_page)
+            rest = await asyncio.gather(*(
+                self._get_json(url, {**base_params, "page": page})
+                for page in range(2, page_count + 1)
+            ))
+            pages.extend(self._page_items(data) for data in rest)
+        else:
+            next_url = first.get("$next")
+            while next_url:
+                # $next is a complete URL (or API-relative path) including the query
+                if not next_url.startswith("http"):
+                    next_url = f"{self.base_url}{next_url}"
+                data = await self._get_json(next_url)
+                pages.append(self._page_items(data))
+                next_url = data.get("$next")
+
+        # Records created or deleted mid-fetch can shift items across pages
         all_items: list[dict] = []
-        url: str | None = f"{self.base_url}{endpoint}"
-        token = await self._ensure_valid_token()
-        headers = {"Authorization": f"Bearer {token}"}
+        seen: set[str] = set()
+        for items in pages:
+            for item in items:
+                item_id = item.get("id")
+                if item_id is not None:
+                    if item_id in seen:
+                        continue
+                    seen.add(item_id)
+                all_items.append(item)
+        return all_items
 
-        while url:
-            response = await self.http.get(url, headers=headers, params=params)
+    @staticmethod
+    def _page_items(data: dict) -> list[dict]:
+        # Sage wraps items in a $items key
+        return data.get("$items", data.get("items", []))
 
-            if response.status_code == 401:
-                creds = await self.refresh_token()
-                headers["Authorization"] = f"Bearer {creds.access_token}"
-                response = await self.http.get(url, headers=headers, params=params)
+    async def _get_json(self, url: str, params: dict | None = None) -> dict:
+        """GET ``url`` with auth, 401 refresh and 429/5xx retries; return the JSON body.
+
+        Raises:
+            httpx.HTTPStatusError: For non-retryable errors, or once retries are exhausted.
+        """
+        max_retries = self.settings.SAGE_MAX_RETRIES
+        token = await self._ensure_valid_token()
+        refreshed = False
+        attempt = 0
+
+        while True:
+            try:
+                async with self._request_semaphore:
+                    response = await self.http.get(
+                        url, headers={"Authorization": f"Bearer {token}"}, params=params
+                    )
+            except httpx.TransportError as exc:
+                if attempt >= max_retries:
+                    raise
+                delay = self._backoff(attempt)
+                logger.warning(
+                    "Sage request failed (%s) — retry %d/%d in %.2fs", exc, attempt + 1, max_retries, delay
+                )
+                attempt += 1
+                await asyncio.sleep(delay)
+                continue
+
+            if response.status_code == 401 and not refreshed:
+                logger.info("Sage 401 — refreshing token and retrying")
+                token = await self._refresh_after_unauthorized(token)
+                refreshed = True
+                continue
+
+            if response.status_code in RETRYABLE_STATUS_CODES and attempt < max_retries:
+                delay = self._retry_delay(response, attempt)
+                if delay is not None:
+                    logger.warning(
+                        "Sage %s from %s — retry %d/%d in %.2fs",
+                        response.status_code, url, attempt + 1, max_retries, delay,
+                    )
+                    attempt += 1
+                    await asyncio.sleep(delay)
+                    continue
 
             response.raise_for_status()
-            data = response.json()
+            return response.json()
 
-            # Sage wraps items in a $items key
-            items = data.get("$items", data.get("items", []))
-            all_items.extend(items)
+    @staticmethod
+    def _backoff(attempt: int) -> float:
+        """Full-jitter exponential backoff for ``attempt`` (0-based)."""
+        return random.uniform(0, min(_BACKOFF_MAX_SECONDS, _BACKOFF_BASE_SECONDS * 2 ** attempt))
 
-            # Follow pagination link
-            url = data.get("$next")
-            # Clear params after first request since $next is a full URL
-            params = None
+    def _retry_delay(self, response: httpx.Response, attempt: int) -> float | None:
+        """Seconds to wait before retrying ``response``, or ``None`` to give up.
 
-        return all_items
+        ``Retry-After`` (seconds or an HTTP date) takes precedence over the
+        exponential backoff.  A wait longer than ``_RETRY_AFTER_MAX_SECONDS``
+        is not retried.
+        """
+        header = response.headers.get("Retry-After")
+        if not header:
+            return self._backoff(attempt)
+        try:
+            delay = float(header)
+        except ValueError:
+            try:
+                delay = (parsedate_to_datetime(header) - datetime.now(timezone.utc)).total_seconds()
+            except (TypeError, ValueError):
+                return self._backoff(attempt)
+        delay = max(delay, 0.0)
+        return delay if delay <= _RETRY_AFTER_MAX_SECONDS else None
 
     # --- OAuth2 flow ---
 
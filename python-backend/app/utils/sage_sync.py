@@ -2,12 +2,24 @@
 
 Pulls invoices, payments, and account balances from Sage,
 stores them in Firestore, and creates financial snapshots.
+
+Invoice and payment syncs are incremental.  When an entity syncs without
+errors, the time the run started is stored as that entity's watermark in
+``_meta/sage_sync``.  The next run asks Sage only for records
+``updated_or_created_since`` the watermark, less
+``SAGE_SYNC_LOOKBACK_HOURS`` to allow for clock skew.  Each stored document
+carries a hash of its mapped content (``source_hash``), and records whose
+hash is unchanged are not rewritten.
 """
 
+import asyncio
+import hashlib
+import json
 import logging
 import uuid
 from datetime import date, datetime, timedelta, timezone
 
+from app.config import get_settings
 from app.models.client import COLLECTION_NAME as CLIENTS_COLLECTION
 from app.models.financial import (
     COLLECTION_NAME as SNAPSHOTS_COLLECTION,
@@ -17,11 +29,26 @@ from app.models.financial import (
     InvoiceResponse,
     PaymentResponse,
 )
+from app.utils.client_context_cache import get_client_context_cache
 from app.utils.firebase_client import get_firestore_client
 from app.utils.sage_client import SageClient
 
 logger = logging.getLogger(__name__)
 
+SYNC_META_COLLECTION = "_meta"
+SYNC_META_DOC = "sage_sync"
+
+# Firestore allows at most 500 writes per batch
+_WRITES_PER_BATCH = 500
+# References per get_all call when comparing content hashes
+_READS_PER_CALL = 100
+
+
+def _content_hash(data: dict) -> str:
+    """Return a stable hash of a mapped Sage record."""
+    payload = json.dumps(data, sort_keys=True, default=str)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
 
 class SageSyncService:
     """Orchestrates data synchronization from Sage into Firestore.
@@ -99,23 +126,62 @@ class SageSyncService:
 
         return "sent"
 
+    @staticmethod
+    def _write_changed(collection: str, docs: dict[str, dict]) -> tuple[int, int]:
+        """Upsert documents whose content hash differs from the stored one.
+
+        Synchronous; callers wrap it in ``asyncio.to_thread``.
+
+        Args:
+            collection: Firestore collection name.
+            docs: Mapped documents keyed by Sage ID.
+
+        Returns:
+            ``(written, skipped)`` counts.
+        """
+        if not docs:
+            return 0, 0
+
+        db = get_firestore_client()
+        col = db.collection(collection)
+        hashes = {doc_id: _content_hash(data) for doc_id, data in docs.items()}
+
+        doc_ids = list(docs)
+        stored: dict[str, str | None] = {}
+        for start in range(0, len(doc_ids), _READS_PER_CALL):
+            refs = [col.document(doc_id) for doc_id in doc_ids[start:start + _READS_PER_CALL]]
+            for snapshot in db.get_all(refs):
+                if snapshot.exists:
+                    stored[snapshot.id] = (snapshot.to_dict() or {}).get("source_hash")
+
+        changed = [doc_id for doc_id in doc_ids if stored.get(doc_id) != hashes[doc_id]]
+        for start in range(0, len(changed), _WRITES_PER_BATCH):
+            batch = db.batch()
+            for doc_id in changed[start:start + _WRITES_PER_BATCH]:
+                batch.set(col.document(doc_id), {**docs[doc_id], "source_hash": hashes[doc_id]}, merge=True)
+            batch.commit()
+
+        return len(changed), len(doc_ids) - len(changed)
+
     # ------------------------------------------------------------------
     # Invoice sync
     # ------------------------------------------------------------------
 
-    async def sync_invoices(self, since: date | None = None) -> dict:
-        """Pull sales invoices from Sage and upsert into Firestore.
+    async def sync_invoices(self, since: date | datetime | None = None) -> dict:
+        """Pull sales invoices from Sage and upsert changed ones into Firestore.
 
         Args:
             since: If provided, only fetch invoices updated on or after this date.
 
         Returns:
-            Dict with ``synced`` count and ``errors`` list.
+            Dict with ``synced`` (written) and ``skipped`` (unchanged) counts
+            and an ``errors`` list.
         """
         if not await self.sage.is_connected():
-            return {"synced": 0, "errors": ["Sage not connected"]}
+            return {"synced": 0, "skipped": 0, "errors": ["Sage not connected"]}
 
         synced = 0
+        skipped = 0
         errors: list[str] = []
 
         try:
@@ -127,8 +193,8 @@ class SageSyncService:
             logger.info("Fetched %d invoices from Sage", len(raw_invoices))
 
             client_map = await self._load_client_name_map()
-            db = get_firestore_client()
             now = self._now_iso()
+            docs: dict[str, dict] = {}
 
             for inv in raw_invoices:
                 try:
@@ -165,40 +231,47 @@ class SageSyncService:
                         updated_at=inv.get("updated_at", now),
                     )
 
-                    db.collection(INVOICES_COLLECTION).document(sage_id).set(
-                        invoice.model_dump(), merge=True
-                    )
-                    synced += 1
+                    docs[sage_id] = invoice.model_dump()
 
                 except Exception as exc:
                     invoice_ref = inv.get("displayed_as", inv.get("id", "unknown"))
                     errors.append(f"Invoice {invoice_ref}: {exc}")
                     logger.exception("Failed to sync invoice %s", invoice_ref)
 
+            synced, skipped = await asyncio.to_thread(self._write_changed, INVOICES_COLLECTION, docs)
+
         except Exception as exc:
             errors.append(f"Sage API error: {exc}")
             logger.exception("Failed to fetch invoices from Sage")
 
-        logger.info("Invoice sync complete: %d synced, %d errors", synced, len(errors))
-        return {"synced": synced, "errors": errors}
+        if synced:
+            # Synced invoices can belong to any client
+            get_client_context_cache().invalidate()
+
+        logger.info(
+            "Invoice sync complete: %d synced, %d unchanged, %d errors", synced, skipped, len(errors)
+        )
+        return {"synced": synced, "skipped": skipped, "errors": errors}
 
     # ------------------------------------------------------------------
     # Payment sync
     # ------------------------------------------------------------------
 
-    async def sync_payments(self, since: date | None = None) -> dict:
-        """Pull contact payments from Sage and upsert into Firestore.
+    async def sync_payments(self, since: date | datetime | None = None) -> dict:
+        """Pull contact payments from Sage and upsert changed ones into Firestore.
 
         Args:
             since: If provided, only fetch payments updated on or after this date.
 
         Returns:
-            Dict with ``synced`` count and ``errors`` list.
+            Dict with ``synced`` (written) and ``skipped`` (unchanged) counts
+            and an ``errors`` list.
         """
         if not await self.sage.is_connected():
-            return {"synced": 0, "errors": ["Sage not connected"]}
+            return {"synced": 0, "skipped": 0, "errors": ["Sage not connected"]}
 
         synced = 0
+        skipped = 0
         errors: list[str] = []
 
         try:
@@ -209,8 +282,8 @@ class SageSyncService:
             raw_payments = await self.sage.get_paginated("/contact_payments", params=params)
             logger.info("Fetched %d payments from Sage", len(raw_payments))
 
-            db = get_firestore_client()
             now = self._now_iso()
+            docs: dict[str, dict] = {}
 
             for pmt in raw_payments:
                 try:
@@ -252,22 +325,23 @@ class SageSyncService:
                         updated_at=pmt.get("updated_at", now),
                     )
 
-                    db.collection(PAYMENTS_COLLECTION).document(sage_id).set(
-                        payment.model_dump(), merge=True
-                    )
-                    synced += 1
+                    docs[sage_id] = payment.model_dump()
 
                 except Exception as exc:
                     pmt_ref = pmt.get("displayed_as", pmt.get("id", "unknown"))
                     errors.append(f"Payment {pmt_ref}: {exc}")
                     logger.exception("Failed to sync payment %s", pmt_ref)
 
+            synced, skipped = await asyncio.to_thread(self._write_changed, PAYMENTS_COLLECTION, docs)
+
         except Exception as exc:
             errors.append(f"Sage API error: {exc}")
             logger.exception("Failed to fetch payments from Sage")
 
-        logger.info("Payment sync complete: %d synced, %d errors", synced, len(errors))
-        return {"synced": synced, "errors": errors}
+        logger.info(
+            "Payment sync complete: %d synced, %d unchanged, %d errors", synced, skipped, len(errors)
+        )
+        return {"synced": synced, "skipped": skipped, "errors": errors}
 
     # ------------------------------------------------------------------
     # Balance sync
@@ -410,23 +484,104 @@ class SageSyncService:
         )
         return snapshot
 
+    # ------------------------------------------------------------------
+    # Watermarks
+    # ------------------------------------------------------------------
+
+    @staticmethod
+    def _since(watermark: str | None) -> datetime | None:
+        """Return the Sage ``updated_or_created_since`` for a watermark, less the lookback."""
+        if not watermark:
+            return None
+        try:
+            parsed = datetime.fromisoformat(watermark)
+        except (ValueError, TypeError):
+            logger.warning("Ignoring unparseable Sage sync watermark %r", watermark)
+            return None
+        if parsed.tzinfo is None:
+            parsed = parsed.replace(tzinfo=timezone.utc)
+        return parsed - timedelta(hours=get_settings().SAGE_SYNC_LOOKBACK_HOURS)
+
+    @staticmethod
+    async def _load_watermarks() -> dict:
+        """Read per-entity watermarks from the sync metadata document."""
+        try:
+            db = get_firestore_client()
+            doc = await asyncio.to_thread(
+                db.collection(SYNC_META_COLLECTION).document(SYNC_META_DOC).get
+            )
+            if doc.exists:
+                return dict(doc.to_dict().get("watermarks") or {})
+        except Exception:
+            logger.warning("Could not read Sage sync watermarks", exc_info=True)
+        return {}
+
+    @staticmethod
+    async def _save_watermarks(watermarks: dict) -> None:
+        """Merge advanced per-entity watermarks into the sync metadata document."""
+        try:
+            db = get_firestore_client()
+            await asyncio.to_thread(
+                db.collection(SYNC_META_COLLECTION).document(SYNC_META_DOC).set,
+                {"watermarks": watermarks},
+                merge=True,
+            )
+        except Exception:
+            logger.warning("Could not write Sage sync watermarks", exc_info=True)
+
     # ------------------------------------------------------------------
     # Full sync orchestration
     # ------------------------------------------------------------------
 
-    async def full_sync(self) -> dict:
+    async def sync_changes(self, full: bool = False) -> dict:
+        """Sync invoices and payments changed since their watermarks.
+
+        Both entities sync concurrently.  Watermarks advance only for
+        entities that synced without errors.
+
+        Args:
+            full: Ignore the watermarks and fetch every record.
+
+        Returns:
+            Dict with ``invoices`` and ``payments`` sync results.
+        """
+        # Taken before fetching so records changed mid-sync are picked up next time
+        started = self._now_iso()
+        watermarks = {} if full else await self._load_watermarks()
+
+        invoice_result, payment_result = await asyncio.gather(
+            self.sync_invoices(since=self._since(watermarks.get("invoices"))),
+            self.sync_payments(since=self._since(watermarks.get("payments"))),
+        )
+
+        advanced = {
+            entity: started
+            for entity, result in (("invoices", invoice_result), ("payments", payment_result))
+            if not result["errors"]
+        }
+        if advanced:
+            await self._save_watermarks(advanced)
+
+        return {"invoices": invoice_result, "payments": payment_result}
+
+    async def full_sync(self, full: bool = False) -> dict:
         """Run a complete sync: invoices, payments, and a monthly snapshot.
 
+        Invoices and payments are fetched incrementally from their
+        watermarks unless ``full`` is set.
+
+        Args:
+            full: Ignore the watermarks and re-fetch every invoice and payment.
+
         Returns:
             Combined results dict with invoice/payment sync stats and snapshot data.
         """
         if not await self.sage.is_connected():
             return {"error": "Sage not connected"}
 
-        logger.info("Starting full Sage sync")
+        logger.info("Starting %s Sage sync", "full" if full else "incremental")
 
-        invoice_result = await self.sync_invoices()
-        payment_result = await self.sync_payments()
+        changes = await self.sync_changes(full=full)
 
         # Create a snapshot for the current month
         today = date.today()
@@ -436,8 +591,7 @@ class SageSyncService:
         snapshot = await self.create_snapshot(period_start, period_end)
 
         result = {
-            "invoices": invoice_result,
-            "payments": payment_result,
+            **changes,
             "snapshot": snapshot.model_dump(),
         }
         logger.info("Full Sage sync complete")
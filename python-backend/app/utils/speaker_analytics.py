@@ -0,0 +1,163 @@
+"""Per-speaker talk-time analytics for meeting transcripts.
+
+``compute_speaker_stats`` runs once per transcript at sync time, using numpy
+over the segment start/end arrays.  The result is stored on the meeting
+document as ``speaker_stats`` (a list, because speaker names are not safe
+Firestore field paths).  ``aggregate_talk_time`` then builds team trends over
+a date range from those stored fields alone, without reading any transcript.
+
+Definitions:
+    talk_seconds: Sum of the speaker's segment durations.
+    turns: Runs of consecutive segments by the same speaker.
+    interruptions: Turns that start before the previous speaker's segment
+        has ended.
+    interruption_rate: ``interruptions / turns``.
+"""
+
+import logging
+from collections import defaultdict
+from datetime import datetime
+
+import numpy as np
+
+from app.models.meeting import TranscriptSegment
+
+logger = logging.getLogger(__name__)
+
+SPEAKER_STATS_VERSION = 1
+
+INTERVALS = ("day", "week", "month")
+
+
+def _field(segment: TranscriptSegment | dict, name: str):
+    return segment.get(name) if isinstance(segment, dict) else getattr(segment, name)
+
+
+def compute_speaker_stats(segments: list[TranscriptSegment | dict]) -> list[dict]:
+    """Compute talk time, turns and interruptions per speaker.
+
+    Args:
+        segments: Transcript segments in spoken order.
+
+    Returns:
+        One dict per speaker, sorted by talk time (descending), with
+        ``speaker``, ``talk_seconds``, ``talk_share``, ``turns``,
+        ``segments``, ``words``, ``interruptions`` and
+        ``interruption_rate``.
+    """
+    if not segments:
+        return []
+
+    names, codes = np.unique(
+        np.array([_field(s, "speaker") or "Unknown" for s in segments], dtype=object).astype(str),
+        return_inverse=True,
+    )
+    starts = np.array([_field(s, "start_time") for s in segments], dtype=float)
+    ends = np.array([_field(s, "end_time") for s in segments], dtype=float)
+    words = np.array([len((_field(s, "text") or "").split()) for s in segments], dtype=float)
+    n_speakers = len(names)
+
+    # Missing timestamps (NaN) contribute no talk time and never count as overlap
+    durations = np.nan_to_num(np.clip(ends - starts, 0, None), nan=0.0)
+    talk = np.bincount(codes, weights=durations, minlength=n_speakers)
+
+    new_turn = np.empty(len(codes), dtype=bool)
+    new_turn[0] = True
+    new_turn[1:] = codes[1:] != codes[:-1]
+    turns = np.bincount(codes[new_turn], minlength=n_speakers)
+
+    overlap = np.zeros(len(codes), dtype=bool)
+    with np.errstate(invalid="ignore"):
+        overlap[1:] = new_turn[1:] & (starts[1:] < ends[:-1])
+    interruptions = np.bincount(codes[overlap], minlength=n_speakers)
+
+    segment_counts = np.bincount(codes, minlength=n_speakers)
+    word_counts = np.bincount(codes, weights=words, minlength=n_speakers)
+    total_talk = float(talk.sum())
+
+    stats = [
+        {
+            "speaker": str(names[i]),
+            "talk_seconds": round(float(talk[i]), 2),
+            "talk_share": round(float(talk[i]) / total_talk, 4) if total_talk else 0.0,
+            "turns": int(turns[i]),
+            "segments": int(segment_counts[i]),
+            "words": int(word_counts[i]),
+            "interruptions": int(interruptions[i]),
+            "interruption_rate": round(int(interruptions[i]) / int(turns[i]), 4) if turns[i] else 0.0,
+        }
+        for i in range(n_speakers)
+    ]
+    stats.sort(key=lambda s: s["talk_seconds"], reverse=True)
+    return stats
+
+
+def _period(moment: datetime, interval: str) -> str:
+    """Return the bucket label for ``moment`` (``2026-03-02``, ``2026-W10`` or ``2026-03``)."""
+    if interval == "day":
+        return moment.strftime("%Y-%m-%d")
+    if interval == "week":
+        year, week, _ = moment.isocalendar()
+        return f"{year}-W{week:02d}"
+    return moment.strftime("%Y-%m")
+
+
+def aggregate_talk_time(
+    meetings: list[tuple[datetime, list[dict]]],
+    interval: str = "week",
+) -> dict:
+    """Aggregate stored ``speaker_stats`` into team totals and a per-period trend.
+
+    Args:
+        meetings: ``(meeting_date, speaker_stats)`` pairs already filtered to
+            the requested date range.
+        interval: Trend bucket size: ``day``, ``week`` or ``month``.
+
+    Returns:
+        ``{"speakers": [...], "trend": [...], "total_talk_seconds": float}``.
+    """
+    totals: dict[str, dict] = defaultdict(lambda: {
+        "talk_seconds": 0.0, "turns": 0, "interruptions": 0, "words": 0, "meetings": 0,
+    })
+    trend: dict[str, dict[str, float]] = defaultdict(lambda: defaultdict(float))
+
+    for moment, stats in meetings:
+        period = _period(moment, interval)
+        for entry in stats:
+            speaker = entry.get("speaker") or "Unknown"
+            row = totals[speaker]
+            row["talk_seconds"] += entry.get("talk_seconds", 0.0)
+            row["turns"] += entry.get("turns", 0)
+            row["interruptions"] += entry.get("interruptions", 0)
+            row["words"] += entry.get("words", 0)
+            row["meetings"] += 1
+            trend[period][speaker] += entry.get("talk_seconds", 0.0)
+
+    total_talk = sum(row["talk_seconds"] for row in totals.values())
+    speakers = [
+        {
+            "speaker": speaker,
+            "talk_seconds": round(row["talk_seconds"], 2),
+            "talk_share": round(row["talk_seconds"] / total_talk, 4) if total_talk else 0.0,
+            "turns": row["turns"],
+            "interruptions": row["interruptions"],
+            "interruption_rate": round(row["interruptions"] / row["turns"], 4) if row["turns"] else 0.0,
+            "words": row["words"],
+            "meetings": row["meetings"],
+        }
+        for speaker, row in totals.items()
+    ]
+    speakers.sort(key=lambda s: s["talk_seconds"], reverse=True)
+
+    return {
+        "speakers": speakers,
+        "trend": [
+            {
+                "period": period,
+                "talk_seconds": round(sum(by_speaker.values()), 2),
+                "speakers": {name: round(seconds, 2) for name, seconds in by_speaker.items()},
+            }
+            for period, by_speaker in sorted(trend.items())
+        ],
+        "total_talk_seconds": round(total_talk, 2),
+    }
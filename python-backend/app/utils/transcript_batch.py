@@ -0,0 +1,234 @@
+"""Background batch processing of meeting transcripts.
+
+After a large sync many meetings have ``has_transcript: true`` but no summary
+or action items.  ``TranscriptBatchWorker`` records a job in
+``transcript_processing_jobs``, then in the background finds those meetings
+and runs ``TranscriptProcessor`` over each one with bounded concurrency
+(``TRANSCRIPT_BATCH_CONCURRENCY``; the LLM gateway applies the global rate
+limit on top).  Transcripts are decompressed one at a time as they are
+processed, and a job that crashes is marked ``failed`` rather than left
+``running``.
+
+Processing is idempotent per transcript: ``process_transcript`` stores
+``processed_transcript_hash`` on the meeting, and meetings whose current
+transcript hashes to that value are skipped unless ``force`` is set.  Job
+progress (``processed``/``skipped``/``failed`` out of ``total``) is updated
+after every meeting so the UI can poll it.
+"""
+
+import asyncio
+import logging
+from datetime import datetime, timezone
+
+from google.cloud.firestore import ArrayUnion, Increment
+
+from app.config import get_settings
+from app.models.meeting import (
+    COLLECTION_NAME,
+    PROCESSING_JOB_COLLECTION,
+    TRANSCRIPT_COLLECTION,
+    ProcessingJobStatus,
+)
+from app.utils.firebase_client import get_firestore_client
+from app.utils.transcript_processor import get_transcript_processor, transcript_hash
+from app.utils.transcript_store import header_text_hash, read_text
+
+logger = logging.getLogger(__name__)
+
+_batch_worker = None
+
+
+def _now_iso() -> str:
+    """Return the current UTC time as an ISO-8601 string."""
+    return datetime.now(timezone.utc).isoformat()
+
+
+class TranscriptBatchWorker:
+    """Finds unprocessed meetings and processes their transcripts in the background."""
+
+    def __init__(self, concurrency: int | None = None) -> None:
+        settings = get_settings()
+        self._semaphore = asyncio.Semaphore(concurrency or settings.TRANSCRIPT_BATCH_CONCURRENCY)
+        # Meetings being processed by any job in this process
+        self._in_flight: set[str] = set()
+
+    # ------------------------------------------------------------------
+    # Selection
+    # ------------------------------------------------------------------
+
+    @staticmethod
+    def _load_candidates() -> tuple[list[tuple[str, dict]], dict[str, dict]]:
+        """Return meetings with transcripts and the transcript header per meeting."""
+        db = get_firestore_client()
+        meetings = [
+            (doc.id, doc.to_dict())
+            for doc in db.collection(COLLECTION_NAME).where("has_transcript", "==", True).stream()
+        ]
+        headers: dict[str, dict] = {}
+        for doc in db.collection(TRANSCRIPT_COLLECTION).stream():
+            data = doc.to_dict()
+            meeting_id = data.get("meeting_id")
+            if meeting_id and header_text_hash(data) and meeting_id not in headers:
+                headers[meeting_id] = {**data, "id": doc.id}
+        return meetings, headers
+
+    async def find_pending(self, force: bool = False, limit: int | None = None) -> list[dict]:
+        """List meetings whose transcript has not been processed in its current form.
+
+        Transcript hashes come from the stored headers, so nothing is
+        decompressed here; ``_process_one`` reads each transcript when its
+        turn comes.
+
+        Args:
+            force: Include meetings already processed from the same transcript.
+            limit: Maximum number of meetings to return (oldest first).
+
+        Returns:
+            ``{"meeting_id", "text", "hash", "header"}`` dicts; ``text`` is None
+            for transcripts still to be read from ``header``.
+        """
+        meetings, headers = await asyncio.to_thread(self._load_candidates)
+
+        pending: list[dict] = []
+        for meeting_id, data in meetings:
+            # Re-check in Python in case the query returned every meeting
+            if not data.get("has_transcript"):
+                continue
+            header = headers.get(meeting_id)
+            if header:
+                digest, text = header_text_hash(header), None
+            else:
+                text = data.get("notes") or ""
+                if not text.strip():
+                    continue
+                digest = transcript_hash(text)
+            if not force and data.get("processed_transcript_hash") == digest:
+                continue
+            pending.append({
+                "meeting_id": meeting_id,
+                "text": text,
+                "hash": digest,
+                "date": data.get("date") or "",
+                "header": header,
+            })
+
+        # Sort in Python to avoid Firestore composite index requirements
+        pending.sort(key=lambda p: p.pop("date"))
+        return pending[:limit] if limit else pending
+
+    # ------------------------------------------------------------------
+    # Jobs
+    # ------------------------------------------------------------------
+
+    async def create_job(self, user_id: str, force: bool = False, limit: int | None = None) -> dict:
+        """Record a queued job; ``run_job`` selects its meetings.
+
+        Returns:
+            The job record including its ``id``.
+        """
+        db = get_firestore_client()
+        now = _now_iso()
+        job = {
+            "status": ProcessingJobStatus.QUEUED.value,
+            "meeting_ids": [],
+            "total": 0,
+            "processed": 0,
+            "skipped": 0,
+            "failed": 0,
+            "errors": [],
+            "force": force,
+            "limit": limit,
+            "created_by": user_id,
+            "created_at": now,
+            "updated_at": now,
+            "completed_at": None,
+        }
+        _, job_ref = await asyncio.to_thread(db.collection(PROCESSING_JOB_COLLECTION).add, job)
+        return {"id": job_ref.id, **job}
+
+    async def run_job(self, job_id: str, force: bool = False, limit: int | None = None) -> None:
+        """Select pending meetings, process them and keep the job record current.
+
+        Any unexpected error marks the job ``failed`` so it never stays ``running``.
+        """
+        db = get_firestore_client()
+        job_ref = db.collection(PROCESSING_JOB_COLLECTION).document(job_id)
+        try:
+            await asyncio.to_thread(job_ref.update, {
+                "status": ProcessingJobStatus.RUNNING.value,
+                "updated_at": _now_iso(),
+            })
+            pending = await self.find_pending(force=force, limit=limit)
+            await asyncio.to_thread(job_ref.update, {
+                "meeting_ids": [p["meeting_id"] for p in pending],
+                "total": len(pending),
+                "updated_at": _now_iso(),
+            })
+
+            await asyncio.gather(*(self._process_one(job_ref, item, force) for item in pending))
+
+            await asyncio.to_thread(job_ref.update, {
+                "status": ProcessingJobStatus.COMPLETED.value,
+                "updated_at": _now_iso(),
+                "completed_at": _now_iso(),
+            })
+            logger.info("Transcript processing job %s finished (%d meetings)", job_id, len(pending))
+        except Exception as e:
+            logger.exception("Transcript processing job %s failed", job_id)
+            try:
+                await asyncio.to_thread(job_ref.update, {
+                    "status": ProcessingJobStatus.FAILED.value,
+                    "errors": ArrayUnion([f"job: {str(e)[:200]}"]),
+                    "updated_at": _now_iso(),
+                    "completed_at": _now_iso(),
+                })
+            except Exception:
+                logger.warning("Failed to mark job %s as failed", job_id, exc_info=True)
+
+    async def _process_one(self, job_ref, item: dict, force: bool) -> None:
+        meeting_id = item["meeting_id"]
+        async with self._semaphore:
+            outcome: dict = {}
+            if meeting_id in self._in_flight or (not force and await self._already_processed(item)):
+                outcome["skipped"] = Increment(1)
+            else:
+                self._in_flight.add(meeting_id)
+                try:
+                    text = item["text"]
+                    if text is None:
+                        db = get_firestore_client()
+                        text = await asyncio.to_thread(read_text, db, item["header"])
+                    await get_transcript_processor().process_transcript(meeting_id, text)
+                    outcome["processed"] = Increment(1)
+                except Exception as e:
+                    logger.warning("Batch processing failed for meeting %s", meeting_id, exc_info=True)
+                    outcome["failed"] = Increment(1)
+                    outcome["errors"] = ArrayUnion([f"{meeting_id}: {str(e)[:200]}"])
+                finally:
+                    self._in_flight.discard(meeting_id)
+
+            outcome["updated_at"] = _now_iso()
+            try:
+                await asyncio.to_thread(job_ref.update, outcome)
+            except Exception:
+                logger.warning("Failed to record progress for meeting %s", meeting_id, exc_info=True)
+
+    @staticmethod
+    async def _already_processed(item: dict) -> bool:
+        """Whether another request processed this transcript since the job was queued."""
+        db = get_firestore_client()
+        doc = await asyncio.to_thread(db.collection(COLLECTION_NAME).document(item["meeting_id"]).get)
+        return doc.exists and doc.to_dict().get("processed_transcript_hash") == item["hash"]
+
+
+# ------------------------------------------------------------------
+# Singleton accessor
+# ------------------------------------------------------------------
+
+
+def get_batch_worker() -> TranscriptBatchWorker:
+    """Return the module-level TranscriptBatchWorker singleton."""
+    global _batch_worker
+    if _batch_worker is None:
+        _batch_worker = TranscriptBatchWorker()
+    return _batch_worker
@@ -2,10 +2,19 @@
 
 Uses Google Gemini to extract entities, generate summaries,
 and identify action items from meeting transcripts.
+
+``analyze`` gets all three from a single structured-output call (JSON
+schema via ``response_schema``).  Transcripts longer than
+``TRANSCRIPT_MAP_REDUCE_THRESHOLD_TOKENS`` are split into chunks that are
+analysed concurrently (map) and then merged: entity lists locally, summary
+bullets and action items with one consolidating call (reduce).
 """
 
+import asyncio
+import hashlib
 import json
 import logging
+import time
 from datetime import datetime
 
 import google.generativeai as genai
@@ -14,26 +23,117 @@ from app.config import get_settings
 from app.models.client import COLLECTION_NAME as CLIENTS_COLLECTION
 from app.models.meeting import COLLECTION_NAME as MEETINGS_COLLECTION
 from app.models.task import COLLECTION_NAME as TASKS_COLLECTION
+from app.utils.client_context_cache import invalidate_client_context
+from app.utils.context_assembler import estimate_tokens
 from app.utils.firebase_client import get_firestore_client
+from app.utils.llm_gateway import get_llm_gateway
 
 logger = logging.getLogger(__name__)
 
+ENTITY_FIELDS = ("client_names", "task_refs", "people", "dates")
+
+_STRING_LIST = {"type": "array", "items": {"type": "string"}}
+
+# Structured output returned by the single analysis call (and by each map step)
+ANALYSIS_SCHEMA = {
+    "type": "object",
+    "properties": {
+        "summary": _STRING_LIST,
+        "action_items": _STRING_LIST,
+        **{field: _STRING_LIST for field in ENTITY_FIELDS},
+    },
+    "required": ["summary", "action_items", *ENTITY_FIELDS],
+}
+
+# Structured output of the reduce step that consolidates per-chunk results
+REDUCE_SCHEMA = {
+    "type": "object",
+    "properties": {
+        "summary": _STRING_LIST,
+        "action_items": _STRING_LIST,
+    },
+    "required": ["summary", "action_items"],
+}
+
+
+def _parse_json(raw: str):
+    """Parse a JSON reply, tolerating markdown code fences."""
+    cleaned = raw.strip()
+    if cleaned.startswith("```"):
+        cleaned = cleaned.split("\n", 1)[-1]
+    if cleaned.endswith("```"):
+        cleaned = cleaned.rsplit("```", 1)[0]
+    return json.loads(cleaned.strip())
+
+
+def _is_json_object(raw: str) -> bool:
+    """Whether ``raw`` parses as a JSON object; gates what the LLM cache keeps."""
+    try:
+        return isinstance(_parse_json(raw), dict)
+    except ValueError:
+        return False
+
+
+def _string_list(value) -> list[str]:
+    if not isinstance(value, list):
+        return []
+    return [str(v).strip() for v in value if str(v).strip()]
+
+
+def _merge_unique(lists) -> list[str]:
+    """Concatenate string lists, dropping case-insensitive duplicates."""
+    seen: set[str] = set()
+    merged: list[str] = []
+    for values in lists:
+        for value in values:
+            key = value.lower()
+            if key not in seen:
+                seen.add(key)
+                merged.append(value)
+    return merged
+
+
+def _format_bullets(bullets: list[str]) -> str:
+    return "\n".join(b if b.startswith("- ") else f"- {b}" for b in bullets)
+
+
+def transcript_hash(text: str) -> str:
+    """Return the content hash recorded on meetings processed from ``text``."""
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+def split_transcript(text: str, max_tokens: int) -> list[str]:
+    """Split a transcript into chunks of at most ~``max_tokens``, on line boundaries.
+
+    A single line longer than the budget becomes its own chunk.
+    """
+    chunks: list[str] = []
+    current: list[str] = []
+    current_tokens = 0
+    for line in text.splitlines():
+        line_tokens = estimate_tokens(line) + 1
+        if current and current_tokens + line_tokens > max_tokens:
+            chunks.append("\n".join(current))
+            current, current_tokens = [], 0
+        current.append(line)
+        current_tokens += line_tokens
+    if current:
+        chunks.append("\n".join(current))
+    return [c for c in chunks if c.strip()]
+
 
 class TranscriptProcessor:
     """Orchestrates AI extraction, entity matching, and summarisation of meeting transcripts."""
 
     def __init__(self) -> None:
         settings = get_settings()
-        api_key = settings.GEMINI_API_KEY or settings.GOOGLE_AI_API_KEY
-        self._configured = False
+        self._map_reduce_threshold = settings.TRANSCRIPT_MAP_REDUCE_THRESHOLD_TOKENS
+        self._chunk_tokens = settings.TRANSCRIPT_CHUNK_TOKENS
+        self._name_index_ttl = settings.TRANSCRIPT_NAME_INDEX_TTL_SECONDS
+        self._name_indexes: dict[str, tuple[float, list[tuple[str, str, str]]]] = {}
 
-        if api_key:
-            try:
-                genai.configure(api_key=api_key)
-                self._configured = True
-            except Exception:
-                logger.exception("Failed to initialise Gemini client")
-        else:
+        self._configured = get_llm_gateway().is_configured()
+        if not self._configured:
             logger.warning("Gemini API key not set — transcript processing will be unavailable")
 
     # ------------------------------------------------------------------
@@ -47,20 +147,165 @@ class TranscriptProcessor:
                 "Gemini client is not configured. Set the GEMINI_API_KEY environment variable."
             )
 
-    async def _chat(self, system: str, user: str) -> str:
-        """Send a chat request to Gemini and return the response text."""
+    async def _chat(
+        self,
+        system: str,
+        user: str,
+        cache: bool = False,
+        refresh: bool = False,
+        generation_config=None,
+        validate=None,
+    ) -> str:
+        """Send a chat request to Gemini and return the response text.
+
+        With ``cache=True`` identical requests are answered from the LLM
+        response cache unless ``refresh`` is set; ``validate`` decides which
+        responses are worth caching.
+        """
         self._ensure_client()
 
-        model = genai.GenerativeModel(
-            "gemini-2.5-flash",
+        return await get_llm_gateway().generate_text(
+            "transcript",
+            user,
             system_instruction=system,
+            generation_config=generation_config or genai.GenerationConfig(temperature=0.3),
+            cache=cache,
+            bypass_cache=refresh,
+            validate=validate,
         )
 
-        response = await model.generate_content_async(
+    async def _structured(
+        self,
+        system: str,
+        user: str,
+        schema: dict,
+        cache: bool = False,
+        refresh: bool = False,
+    ) -> dict:
+        """Run a structured-output request and return the parsed JSON object.
+
+        Truncated or malformed replies are never cached, so a bad generation
+        is retried on the next call instead of sticking for the cache TTL.
+
+        Raises:
+            ValueError: The reply is not a JSON object.  Callers must not
+                record it as an (empty) analysis.
+        """
+        raw = await self._chat(
+            system,
             user,
-            generation_config=genai.GenerationConfig(temperature=0.3),
+            cache=cache,
+            refresh=refresh,
+            generation_config=genai.GenerationConfig(
+                temperature=0.2,
+                response_mime_type="application/json",
+                response_schema=schema,
+            ),
+            validate=_is_json_object,
+        )
+        try:
+            parsed = _parse_json(raw)
+        except json.JSONDecodeError as exc:
+            logger.warning("Failed to parse structured transcript output: %s", raw[:200])
+            raise ValueError("Gemini returned malformed structured output") from exc
+        if not isinstance(parsed, dict):
+            raise ValueError("Gemini returned structured output that is not a JSON object")
+        return parsed
+
+    # ------------------------------------------------------------------
+    # Structured analysis (single pass / map-reduce)
+    # ------------------------------------------------------------------
+
+    @staticmethod
+    def _analysis_system(title: str, partial: bool = False) -> str:
+        context = f" titled '{title}'" if title else ""
+        scope = "this excerpt of the meeting transcript" if partial else "the meeting transcript"
+        return (
+            f"You are an expert meeting analyst. Analyse {scope}{context} and return JSON with: "
+            "summary (3-5 bullet points, each a key discussion point, decision or outcome), "
+            "action_items (concise action items, follow-ups and commitments), "
+            "client_names (company/client names mentioned), "
+            "task_refs (project or task references), "
+            "people (person names) and "
+            "dates (dates or deadlines mentioned). "
+            "Use empty lists where nothing applies."
+        )
+
+    async def analyze(self, text: str, title: str = "", refresh: bool = False) -> dict:
+        """Extract summary, action items and entities from a transcript.
+
+        Short transcripts take one structured call.  Longer ones are analysed
+        chunk by chunk concurrently, then merged.  Results are cached by
+        transcript and title; ``refresh`` regenerates.
+
+        Returns:
+            Dict with ``summary`` (bullet-point string), ``action_items`` and
+            the entity lists ``client_names``, ``task_refs``, ``people`` and
+            ``dates``.
+
+        Raises:
+            ValueError: A structured reply (any chunk, or the merge) could not
+                be parsed.
+        """
+        self._ensure_client()
+
+        if estimate_tokens(text) <= self._map_reduce_threshold:
+            parsed = await self._structured(
+                self._analysis_system(title), text, ANALYSIS_SCHEMA, cache=True, refresh=refresh
+            )
+            return self._normalise_analysis(parsed)
+
+        chunks = split_transcript(text, self._chunk_tokens)
+        logger.info("Map-reducing transcript over %d chunks", len(chunks))
+        partials = await asyncio.gather(*(
+            self._structured(
+                self._analysis_system(title, partial=True),
+                chunk,
+                ANALYSIS_SCHEMA,
+                cache=True,
+                refresh=refresh,
+            )
+            for chunk in chunks
+        ))
+        partials = [self._normalise_analysis(p, bullets=True) for p in partials]
+        return await self._reduce(partials, title, refresh)
+
+    async def _reduce(self, partials: list[dict], title: str, refresh: bool) -> dict:
+        """Merge per-chunk analyses into one result."""
+        merged = {
+            field: _merge_unique(p[field] for p in partials) for field in ENTITY_FIELDS
+        }
+        bullets = [b for p in partials for b in p["summary"]]
+        actions = _merge_unique(p["action_items"] for p in partials)
+
+        context = f" titled '{title}'" if title else ""
+        system = (
+            f"You consolidate notes taken on consecutive parts of one meeting{context}. "
+            "Return JSON with summary (3-5 bullet points covering the whole meeting) and "
+            "action_items (the action items with duplicates merged)."
+        )
+        reduced = await self._structured(
+            system,
+            json.dumps({"summary_notes": bullets, "action_items": actions}),
+            REDUCE_SCHEMA,
+            cache=True,
+            refresh=refresh,
+        )
+        merged["summary"] = _format_bullets(_string_list(reduced.get("summary")) or bullets)
+        merged["action_items"] = _string_list(reduced.get("action_items")) or actions
+        return merged
+
+    @staticmethod
+    def _normalise_analysis(parsed: dict, bullets: bool = False) -> dict:
+        """Coerce a parsed analysis into lists of strings (summary as text unless ``bullets``)."""
+        result = {field: _string_list(parsed.get(field)) for field in ENTITY_FIELDS}
+        result["action_items"] = _string_list(parsed.get("action_items"))
+        summary = parsed.get("summary")
+        summary_bullets = _string_list(summary) if isinstance(summary, list) else (
+            [str(summary).strip()] if summary else []
         )
-        return response.text or ""
+        result["summary"] = summary_bullets if bullets else _format_bullets(summary_bullets)
+        return result
 
     # ------------------------------------------------------------------
     # Public extraction methods
@@ -76,38 +321,53 @@ class TranscriptProcessor:
             dates         -- list[str]
             action_items  -- list[str]
         """
-        system = (
-            "You are an expert meeting analyst. Extract structured entities from "
-            "the meeting transcript provided. Return ONLY valid JSON with the keys: "
-            "client_names (list of company/client names mentioned), "
-            "task_refs (list of project or task references), "
-            "people (list of person names), "
-            "dates (list of dates or deadlines mentioned), "
-            "action_items (list of action items or follow-ups). "
-            "If a category has no matches, return an empty list."
-        )
-        raw = await self._chat(system, text)
+        analysis = await self.analyze(text)
+        return {field: analysis[field] for field in (*ENTITY_FIELDS, "action_items")}
 
-        # Strip markdown fencing if present
-        cleaned = raw.strip()
-        if cleaned.startswith("```"):
-            cleaned = cleaned.split("\n", 1)[-1]
-        if cleaned.endswith("```"):
-            cleaned = cleaned.rsplit("```", 1)[0]
-        cleaned = cleaned.strip()
+    # ------------------------------------------------------------------
+    # Entity matching
+    # ------------------------------------------------------------------
 
-        try:
-            parsed = json.loads(cleaned)
-        except json.JSONDecodeError:
-            logger.warning("Failed to parse entity extraction JSON: %s", raw[:200])
-            parsed = {
-                "client_names": [],
-                "task_refs": [],
-                "people": [],
-                "dates": [],
-                "action_items": [],
-            }
-        return parsed
+    async def _name_index(self, collection: str) -> list[tuple[str, str, str]]:
+        """Return ``(doc_id, name, lowercase name)`` for matchable records.
+
+        Active clients are indexed by ``name`` and tasks by ``title``.  The
+        index is cached for ``TRANSCRIPT_NAME_INDEX_TTL_SECONDS`` so batches
+        of transcripts do not rescan both collections each time.
+        """
+        cached = self._name_indexes.get(collection)
+        if cached is not None and time.monotonic() < cached[0]:
+            return cached[1]
+
+        def _load() -> list[tuple[str, str, str]]:
+            db = get_firestore_client()
+            if collection == CLIENTS_COLLECTION:
+                docs = db.collection(collection).where("is_active", "==", True).stream()
+                field = "name"
+            else:
+                docs = db.collection(collection).stream()
+                field = "title"
+            index = []
+            for doc in docs:
+                data = doc.to_dict()
+                # Re-check in Python in case the query returned inactive clients
+                if collection == CLIENTS_COLLECTION and data.get("is_active") is False:
+                    continue
+                name = data.get(field) or ""
+                if name:
+                    index.append((doc.id, name, name.lower()))
+            return index
+
+        index = await asyncio.to_thread(_load)
+        self._name_indexes[collection] = (time.monotonic() + self._name_index_ttl, index)
+        return index
+
+    def invalidate_name_indexes(self, collection: str | None = None) -> None:
+        """Drop the cached name index for ``collection`` (or both)."""
+        if collection is None:
+            self._name_indexes.clear()
+        else:
+            self._name_indexes.pop(collection, None)
 
     async def match_entities_to_records(self, entities: dict) -> dict:
         """Fuzzy-match extracted entity names to Firestore client and task records.
@@ -118,48 +378,28 @@ class TranscriptProcessor:
                 "matched_tasks": [{"id": ..., "title": ...}, ...]
             }
         """
-        db = get_firestore_client()
         matched_client = None
         matched_tasks: list[dict] = []
 
         # --- Match clients ---
-        client_names: list[str] = entities.get("client_names", [])
+        client_names = [c.lower() for c in entities.get("client_names", []) if c]
         if client_names:
             try:
-                clients_ref = db.collection(CLIENTS_COLLECTION)
-                for doc in clients_ref.where("is_active", "==", True).stream():
-                    doc_dict = doc.to_dict()
-                    stored_name = (doc_dict.get("name") or "").lower()
-                    for candidate in client_names:
-                        # Simple substring / case-insensitive match
-                        if (
-                            candidate.lower() in stored_name
-                            or stored_name in candidate.lower()
-                        ):
-                            matched_client = {"id": doc.id, "name": doc_dict.get("name", "")}
-                            break
-                    if matched_client:
+                for doc_id, name, stored_name in await self._name_index(CLIENTS_COLLECTION):
+                    # Simple substring / case-insensitive match
+                    if any(c in stored_name or stored_name in c for c in client_names):
+                        matched_client = {"id": doc_id, "name": name}
                         break
             except Exception:
                 logger.exception("Error matching client entities")
 
         # --- Match tasks ---
-        task_refs: list[str] = entities.get("task_refs", [])
+        task_refs = [t.lower() for t in entities.get("task_refs", []) if t]
         if task_refs:
             try:
-                tasks_ref = db.collection(TASKS_COLLECTION)
-                for doc in tasks_ref.stream():
-                    doc_dict = doc.to_dict()
-                    stored_title = (doc_dict.get("title") or "").lower()
-                    for candidate in task_refs:
-                        if (
-                            candidate.lower() in stored_title
-                            or stored_title in candidate.lower()
-                        ):
-                            matched_tasks.append(
-                                {"id": doc.id, "title": doc_dict.get("title", "")}
-                            )
-                            break
+                for doc_id, title, stored_title in await self._name_index(TASKS_COLLECTION):
+                    if any(t in stored_title or stored_title in t for t in task_refs):
+                        matched_tasks.append({"id": doc_id, "title": title})
             except Exception:
                 logger.exception("Error matching task entities")
 
@@ -168,58 +408,39 @@ class TranscriptProcessor:
             "matched_tasks": matched_tasks,
         }
 
-    async def generate_summary(self, text: str, title: str = "") -> str:
-        """Generate a concise 3-5 bullet point summary of the transcript."""
-        context = f" titled '{title}'" if title else ""
-        system = (
-            f"You are a concise meeting summariser. Summarise the meeting transcript{context} "
-            "into 3-5 bullet points. Each bullet should capture a key discussion point, "
-            "decision, or outcome. Return only the bullet points, one per line, "
-            "prefixed with '- '."
-        )
-        return await self._chat(system, text)
+    async def generate_summary(self, text: str, title: str = "", refresh: bool = False) -> str:
+        """Generate a concise 3-5 bullet point summary of the transcript.
+
+        Summaries are cached by transcript and title; ``refresh`` regenerates.
+        """
+        analysis = await self.analyze(text, title, refresh=refresh)
+        return analysis["summary"]
 
     async def extract_action_items(self, text: str) -> list[str]:
         """Extract action items / follow-ups from the transcript.
 
         Returns a list of action item strings.
         """
-        system = (
-            "You are a meeting analyst. Extract all action items, follow-ups, and "
-            "commitments from the meeting transcript. Return ONLY a JSON array of "
-            "strings. Each string should be a single, concise action item. "
-            "If there are no action items, return an empty array []."
-        )
-        raw = await self._chat(system, text)
-
-        cleaned = raw.strip()
-        if cleaned.startswith("```"):
-            cleaned = cleaned.split("\n", 1)[-1]
-        if cleaned.endswith("```"):
-            cleaned = cleaned.rsplit("```", 1)[0]
-        cleaned = cleaned.strip()
-
-        try:
-            items = json.loads(cleaned)
-            if isinstance(items, list):
-                return [str(i) for i in items]
-        except json.JSONDecodeError:
-            logger.warning("Failed to parse action items JSON: %s", raw[:200])
-        return []
+        analysis = await self.analyze(text)
+        return analysis["action_items"]
 
     # ------------------------------------------------------------------
     # Orchestration
     # ------------------------------------------------------------------
 
-    async def process_transcript(self, meeting_id: str, text: str) -> dict:
+    async def process_transcript(self, meeting_id: str, text: str, refresh: bool = False) -> dict:
         """Run the full processing pipeline on a meeting transcript.
 
         Steps:
-            1. Extract entities via Gemini
+            1. Analyse the transcript (summary, action items and entities)
+               in one structured Gemini pass, map-reduced if it is long
             2. Fuzzy-match entities to Firestore clients/tasks
-            3. Generate a bullet-point summary
-            4. Extract action items
-            5. Update the meeting document in Firestore
+            3. Update the meeting document in Firestore
+
+        ``refresh`` regenerates the analysis instead of using a cached one.
+        If the analysis fails (e.g. malformed model output) the meeting is
+        left untouched, without ``processed_transcript_hash``, so it is
+        processed again later.
 
         Returns the combined results dict.
         """
@@ -228,24 +449,25 @@ class TranscriptProcessor:
 
         # Fetch the meeting to get title for summary context
         meeting_ref = db.collection(MEETINGS_COLLECTION).document(meeting_id)
-        meeting_doc = meeting_ref.get()
+        meeting_doc = await asyncio.to_thread(meeting_ref.get)
         if not meeting_doc.exists:
             raise ValueError(f"Meeting {meeting_id} not found")
 
         meeting_data = meeting_doc.to_dict()
         title = meeting_data.get("title", "")
 
-        # Run extraction steps (sequential to stay within rate limits)
-        entities = await self.extract_entities(text)
+        analysis = await self.analyze(text, title, refresh=refresh)
+        entities = {field: analysis[field] for field in (*ENTITY_FIELDS, "action_items")}
         matches = await self.match_entities_to_records(entities)
-        summary = await self.generate_summary(text, title)
-        action_items = await self.extract_action_items(text)
+        summary = analysis["summary"]
+        action_items = analysis["action_items"]
 
         # Build the update payload
         update_payload: dict = {
             "summary": summary,
             "action_items": action_items,
             "key_topics": entities.get("people", []) + entities.get("dates", []),
+            "processed_transcript_hash": transcript_hash(text),
             "updated_at": datetime.utcnow().isoformat(),
         }
 
@@ -257,7 +479,8 @@ class TranscriptProcessor:
             update_payload["task_ids"] = [t["id"] for t in matches["matched_tasks"]]
 
         # Persist to Firestore
-        meeting_ref.update(update_payload)
+        await asyncio.to_thread(meeting_ref.update, update_payload)
+        invalidate_client_context(meeting_data.get("client_id"), update_payload.get("client_id"))
         logger.info("Meeting %s processed successfully", meeting_id)
 
         return {
@@ -283,3 +506,13 @@ def get_transcript_processor() -> TranscriptProcessor:
     if _processor is None:
         _processor = TranscriptProcessor()
     return _processor
+
+
+def invalidate_name_indexes(collection: str | None = None) -> None:
+    """Drop cached client/task name indexes after a client or task write.
+
+    Only affects this process; other workers refresh within
+    ``TRANSCRIPT_NAME_INDEX_TTL_SECONDS``.
+    """
+    if _processor is not None:
+        _processor.invalidate_name_indexes(collection)
@@ -0,0 +1,292 @@
+"""Compressed, block-based transcript storage.
+
+A transcript is stored as a small header document in ``transcripts`` plus
+zlib-compressed blocks in its ``blocks`` subcollection, so long meetings
+never approach Firestore's 1 MiB document limit:
+
+* Segment blocks (``<hash>_s0000``...): consecutive runs of segments, at
+  most ``TRANSCRIPT_SEGMENTS_PER_BLOCK`` segments or
+  ``TRANSCRIPT_BLOCK_BYTES`` of JSON each, compressed independently.  The
+  header's ``segment_blocks`` index (segment and time range per block) lets
+  ranged reads fetch only the blocks they overlap.
+* Text blocks (``<hash>_t0000``...): the full text compressed once, with
+  the compressed bytes split into ``TRANSCRIPT_BLOCK_BYTES`` pieces.
+
+Block IDs are prefixed with the transcript's content hash.  A rewrite
+therefore writes the new blocks first, then switches the header, then
+deletes the old blocks.  A reader never sees a header pointing at blocks
+from another version.
+
+Legacy single-document transcripts (``full_text`` and ``segments`` inline)
+are still read transparently.
+
+All functions here are synchronous; async callers wrap them in
+``asyncio.to_thread``.
+"""
+
+import json
+import logging
+import zlib
+
+from app.config import get_settings
+from app.models.meeting import (
+    TRANSCRIPT_COLLECTION,
+    MeetingTranscript,
+    transcript_blocks_collection_path,
+    transcript_id_for,
+)
+from app.utils.transcript_processor import transcript_hash
+
+logger = logging.getLogger(__name__)
+
+TRANSCRIPT_FORMAT = "zlib_blocks_v1"
+
+# Writes per Firestore batch (blocks are up to TRANSCRIPT_BLOCK_BYTES each)
+_WRITES_PER_BATCH = 16
+
+
+# ---------------------------------------------------------------------------
+# Encoding
+# ---------------------------------------------------------------------------
+
+
+def _segment_groups(segments: list[dict], max_segments: int, max_bytes: int) -> list[list[dict]]:
+    """Split segments into consecutive groups bounded by count and JSON size."""
+    groups: list[list[dict]] = []
+    current: list[dict] = []
+    size = 0
+    for segment in segments:
+        segment_size = len(json.dumps(segment, separators=(",", ":")))
+        if current and (len(current) >= max_segments or size + segment_size > max_bytes):
+            groups.append(current)
+            current, size = [], 0
+        current.append(segment)
+        size += segment_size
+    if current:
+        groups.append(current)
+    return groups
+
+
+def encode_transcript(transcript: MeetingTranscript) -> tuple[dict, dict[str, dict]]:
+    """Build the header document and compressed block documents for a transcript.
+
+    Returns:
+        ``(header, blocks)`` where ``blocks`` maps block ID to document data.
+    """
+    settings = get_settings()
+    block_bytes = settings.TRANSCRIPT_BLOCK_BYTES
+    digest = transcript_hash(transcript.full_text)
+    prefix = digest[:12]
+
+    segments = [s.model_dump(mode="json") for s in transcript.segments]
+    blocks: dict[str, dict] = {}
+    index: list[dict] = []
+
+    start = 0
+    groups = _segment_groups(segments, settings.TRANSCRIPT_SEGMENTS_PER_BLOCK, block_bytes)
+    for n, group in enumerate(groups):
+        block_id = f"{prefix}_s{n:04d}"
+        payload = json.dumps(group, separators=(",", ":")).encode("utf-8")
+        blocks[block_id] = {"kind": "segments", "data": zlib.compress(payload)}
+        index.append({
+            "id": block_id,
+            "start": start,
+            "end": start + len(group),
+            "start_time": group[0].get("start_time"),
+            "end_time": group[-1].get("end_time"),
+        })
+        start += len(group)
+
+    compressed_text = zlib.compress(transcript.full_text.encode("utf-8"))
+    text_blocks: list[str] = []
+    for n, offset in enumerate(range(0, len(compressed_text), block_bytes)):
+        block_id = f"{prefix}_t{n:04d}"
+        blocks[block_id] = {"kind": "text", "data": compressed_text[offset:offset + block_bytes]}
+        text_blocks.append(block_id)
+
+    end_times = [s["end_time"] for s in segments if s.get("end_time") is not None]
+    header = {
+        "id": transcript.id,
+        "meeting_id": transcript.meeting_id,
+        "format": TRANSCRIPT_FORMAT,
+        "text_hash": digest,
+        "word_count": transcript.word_count,
+        "segment_count": len(segments),
+        "speakers": list(dict.fromkeys(s["speaker"] for s in segments)),
+        "duration_seconds": max(end_times) if end_times else None,
+        "segment_blocks": index,
+        "text_blocks": text_blocks,
+        "created_at": transcript.created_at,
+    }
+    return header, blocks
+
+
+def _block_ids(header: dict) -> list[str]:
+    return [b["id"] for b in header.get("segment_blocks", [])] + list(header.get("text_blocks", []))
+
+
+# ---------------------------------------------------------------------------
+# Writing
+# ---------------------------------------------------------------------------
+
+
+def write_transcript(db, transcript: MeetingTranscript) -> dict:
+    """Store a transcript as header + compressed blocks, replacing any previous version.
+
+    Returns:
+        The header document that was written.
+    """
+    header, blocks = encode_transcript(transcript)
+    header_ref = db.collection(TRANSCRIPT_COLLECTION).document(transcript.id)
+    blocks_ref = db.collection(transcript_blocks_collection_path(transcript.id))
+
+    previous = header_ref.get()
+    stale = set(_block_ids(previous.to_dict())) if previous.exists else set()
+    stale -= set(blocks)
+
+    # New blocks first, header last: readers only ever follow a complete index
+    writes = [(blocks_ref.document(block_id), data) for block_id, data in blocks.items()]
+    writes.append((header_ref, header))
+    for start in range(0, len(writes), _WRITES_PER_BATCH):
+        batch = db.batch()
+        for ref, data in writes[start:start + _WRITES_PER_BATCH]:
+            batch.set(ref, data)
+        batch.commit()
+
+    stale_ids = sorted(stale)
+    for start in range(0, len(stale_ids), _WRITES_PER_BATCH):
+        batch = db.batch()
+        for block_id in stale_ids[start:start + _WRITES_PER_BATCH]:
+            batch.delete(blocks_ref.document(block_id))
+        batch.commit()
+
+    return header
+
+
+# ---------------------------------------------------------------------------
+# Reading
+# ---------------------------------------------------------------------------
+
+
+def read_header(db, meeting_id: str) -> dict | None:
+    """Return the transcript header (or legacy transcript document) for a meeting.
+
+    Looks up the deterministic ``transcript_<meeting_id>`` document first and
+    falls back to querying by ``meeting_id`` for manually created transcripts.
+    """
+    doc = db.collection(TRANSCRIPT_COLLECTION).document(transcript_id_for(meeting_id)).get()
+    if doc.exists:
+        return {**doc.to_dict(), "id": doc.id}
+
+    query = db.collection(TRANSCRIPT_COLLECTION).where("meeting_id", "==", meeting_id).limit(1)
+    for doc in query.stream():
+        data = doc.to_dict()
+        if data.get("meeting_id") == meeting_id:
+            return {**data, "id": doc.id}
+    return None
+
+
+def header_text_hash(header: dict) -> str | None:
+    """Return the content hash of a transcript without reading its blocks.
+
+    Returns ``None`` for transcripts with no text.
+    """
+    if header.get("format") == TRANSCRIPT_FORMAT:
+        return header.get("text_hash") if header.get("word_count") else None
+    text = header.get("full_text") or ""
+    return transcript_hash(text) if text.strip() else None
+
+
+def _read_block(db, header: dict, block_id: str) -> bytes:
+    doc = db.collection(transcript_blocks_collection_path(header["id"])).document(block_id).get()
+    if not doc.exists:
+        raise LookupError(f"Transcript block {block_id} missing for {header['id']}")
+    return doc.to_dict()["data"]
+
+
+def read_text(db, header: dict) -> str:
+    """Return the full transcript text described by ``header``."""
+    if header.get("format") != TRANSCRIPT_FORMAT:
+        return header.get("full_text") or ""
+    compressed = b"".join(_read_block(db, header, block_id) for block_id in header.get("text_blocks", []))
+    return zlib.decompress(compressed).decode("utf-8") if compressed else ""
+
+
+def _overlaps(
+    seg_start: float | None,
+    seg_end: float | None,
+    start_time: float | None,
+    end_time: float | None,
+) -> bool:
+    """Whether a segment (or block) time span overlaps the requested window.
+
+    Spans without timestamps are always included.
+    """
+    seg_start = seg_start if seg_start is not None else seg_end
+    seg_end = seg_end if seg_end is not None else seg_start
+    if seg_start is None:
+        return True
+    if start_time is not None and seg_end < start_time:
+        return False
+    if end_time is not None and seg_start > end_time:
+        return False
+    return True
+
+
+def read_segments(
+    db,
+    header: dict,
+    start: int | None = None,
+    end: int | None = None,
+    start_time: float | None = None,
+    end_time: float | None = None,
+) -> tuple[list[dict], int, int]:
+    """Return segments in a segment-index and/or time range.
+
+    Only the blocks overlapping the range are fetched and decompressed.
+
+    Args:
+        db: Firestore client.
+        header: Transcript header from ``read_header``.
+        start: First segment index (inclusive).
+        end: Last segment index (exclusive).
+        start_time: Drop segments ending before this many seconds.
+        end_time: Drop segments starting after this many seconds.
+
+    Returns:
+        ``(segments, first_index, end_index)`` for the selected range.
+    """
+    if header.get("format") != TRANSCRIPT_FORMAT:
+        indexed = list(enumerate(header.get("segments") or []))
+        blocks = None
+    else:
+        blocks = header.get("segment_blocks", [])
+        total = header.get("segment_count", 0)
+        lo = max(start or 0, 0)
+        hi = min(end if end is not None else total, total)
+        indexed = []
+        for block in blocks:
+            if block["end"] <= lo or block["start"] >= hi:
+                continue
+            if not _overlaps(block.get("start_time"), block.get("end_time"), start_time, end_time):
+                continue
+            segments = json.loads(zlib.decompress(_read_block(db, header, block["id"])))
+            indexed.extend(enumerate(segments, start=block["start"]))
+
+    selected = [
+        (i, s) for i, s in indexed
+        if (start is None or i >= start)
+        and (end is None or i < end)
+        and _overlaps(s.get("start_time"), s.get("end_time"), start_time, end_time)
+    ]
+    if not selected:
+        first = start or 0
+        return [], first, first
+    return [s for _, s in selected], selected[0][0], selected[-1][0] + 1
+
+
+def delete_transcript(db, meeting_id: str) -> None:
+    """Delete a meeting's transcript header and all of its blocks."""
+    header_ref = db.collection(TRANSCRIPT_COLLECTION).document(transcript_id_for(meeting_id))
+    if header_ref.get().exists:
+        db.recursive_delete(header_ref)
@@ -0,0 +1,553 @@
+"""Memory-mapped on-disk vector index snapshots for fast worker cold start.
+
+Each agent/client search scope is persisted as:
+
+- ``<scope>.<generation>.npy`` — float32 matrix of L2-normalised embeddings,
+  loaded with ``np.load(mmap_mode="r")`` so every gunicorn worker on the
+  instance shares the same pages through the OS cache.
+- ``<scope>.<generation>.txt`` — the chunks' text back to back, also
+  memory-mapped, so content is shared the same way instead of being held in
+  every worker's heap.
+- ``<scope>.json`` — manifest with the chunk rows (id, document, metadata and
+  the row's offset into the text file), the generation's filenames and two
+  high-water marks: the newest ``indexed_at`` in the ``embeddings``
+  collection and the newest ``deleted_at`` in ``embedding_tombstones``.
+
+Both timestamps are Firestore server timestamps.  A worker loads the
+snapshot, then re-reads everything written since the high-water marks minus
+``VECTOR_INDEX_LOOKBACK_SECONDS``, so a write that commits late or out of
+order is still picked up; rows already applied are skipped by chunk id.
+Deltas live in an in-memory overlay until they grow past
+``VECTOR_INDEX_COMPACT_THRESHOLD``, at which point the snapshot is rewritten.
+
+Snapshot files are shared by every worker on the instance: writers hold an
+exclusive ``flock`` on ``<scope>.lock`` (readers a shared one), write the
+manifest through a unique temp file, and only garbage-collect generations
+that the current manifest no longer references.
+"""
+
+import asyncio
+import contextlib
+import fcntl
+import hashlib
+import json
+import logging
+import mmap
+import os
+import tempfile
+import time
+import uuid
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+from typing import Any
+
+import numpy as np
+
+from app.utils.firebase_client import get_firestore_client
+from app.utils.lexical_index import BM25Index
+
+logger = logging.getLogger(__name__)
+
+INDEX_FORMAT_VERSION = 2
+TOMBSTONES_COLLECTION = "embedding_tombstones"
+
+# Entry fields that hold or locate chunk text rather than describe the row
+_CONTENT_FIELDS = ("content", "content_offset", "content_length")
+
+
+def scope_key(agent_id: str | None, client_id: str | None) -> str:
+    """Return a filesystem-safe key for an agent/client search scope."""
+    raw = f"agent={agent_id or '*'}|client={client_id or '*'}"
+    return hashlib.sha1(raw.encode("utf-8")).hexdigest()[:16]
+
+
+def _in_scope(data: dict, agent_id: str | None, client_id: str | None) -> bool:
+    metadata = data.get("metadata") or {}
+    if agent_id and metadata.get("agent_id") != agent_id:
+        return False
+    if client_id and metadata.get("client_id") != client_id:
+        return False
+    return True
+
+
+def _stamp(value: Any) -> str:
+    """Return a Firestore timestamp (or legacy ISO string) as a comparable ISO string."""
+    if isinstance(value, datetime):
+        if value.tzinfo is None:
+            value = value.replace(tzinfo=timezone.utc)
+        return value.astimezone(timezone.utc).isoformat(timespec="microseconds")
+    return str(value or "")
+
+
+def _lookback(mark: str, seconds: float) -> datetime | None:
+    """Return the query bound ``seconds`` before ``mark``, or None to read everything."""
+    if not mark:
+        return None
+    try:
+        bound = datetime.fromisoformat(mark)
+    except ValueError:
+        return None
+    if bound.tzinfo is None:
+        bound = bound.replace(tzinfo=timezone.utc)
+    return bound - timedelta(seconds=seconds)
+
+
+def _map_file(path: Path) -> bytes | mmap.mmap:
+    """Memory-map ``path`` read-only; the mapping outlives the file being unlinked."""
+    with open(path, "rb") as fh:
+        if os.fstat(fh.fileno()).st_size == 0:
+            return b""
+        return mmap.mmap(fh.fileno(), 0, access=mmap.ACCESS_READ)
+
+
+def _normalise(vec: np.ndarray) -> np.ndarray:
+    norm = np.linalg.norm(vec)
+    return vec / norm if norm > 0 else vec
+
+
+class ScopeIndex:
+    """One scope's vectors: a (possibly mmapped) base matrix plus a delta overlay."""
+
+    def __init__(
+        self,
+        matrix: np.ndarray,
+        entries: list[dict],
+        high_water_mark: str = "",
+        tombstone_mark: str = "",
+        content: bytes | mmap.mmap = b"",
+    ) -> None:
+        self.matrix = matrix
+        self.entries = entries
+        self.content = content
+        self.high_water_mark = high_water_mark
+        self.tombstone_mark = tombstone_mark
+        self.dead = np.zeros(len(entries), dtype=bool)
+        self.delta: dict[str, tuple[np.ndarray, dict]] = {}
+        self.refreshed_at = 0.0
+        self._row_of = {e["chunk_id"]: i for i, e in enumerate(entries)}
+        # BM25 index and the live rows it was built over, rebuilt together lazily
+        self._lexical: BM25Index | None = None
+        self._lexical_rows: dict[str, dict] = {}
+
+    @property
+    def dim(self) -> int | None:
+        if self.matrix.ndim == 2 and self.matrix.shape[0]:
+            return int(self.matrix.shape[1])
+        for vec, _ in self.delta.values():
+            return int(vec.size)
+        return None
+
+    @property
+    def size(self) -> int:
+        """Number of live rows."""
+        return len(self.entries) - int(self.dead.sum()) + len(self.delta)
+
+    @property
+    def pending_changes(self) -> int:
+        """Rows that differ from the on-disk snapshot."""
+        return len(self.delta) + int(self.dead.sum())
+
+    def content_of(self, entry: dict) -> str:
+        """Return a row's text, from the entry itself or the mapped text file."""
+        if "content" in entry:
+            return entry["content"]
+        start = entry.get("content_offset")
+        if start is None:
+            return ""
+        end = start + entry.get("content_length", 0)
+        return bytes(self.content[start:end]).decode("utf-8", errors="replace")
+
+    def _indexed_at(self, chunk_id: str) -> str:
+        if chunk_id in self.delta:
+            return self.delta[chunk_id][1].get("indexed_at", "")
+        row = self._row_of.get(chunk_id)
+        if row is not None and not self.dead[row]:
+            return self.entries[row].get("indexed_at", "")
+        return ""
+
+    def has_version(self, chunk_id: str, indexed_at: str) -> bool:
+        """True if the live row for ``chunk_id`` was indexed at ``indexed_at``."""
+        return bool(indexed_at) and self._indexed_at(chunk_id) == indexed_at
+
+    def upsert(self, entry: dict, vector: np.ndarray) -> None:
+        """Add or replace a chunk's vector; re-upserting the live version is a no-op."""
+        dim = self.dim
+        if dim is not None and vector.size != dim:
+            return
+        chunk_id = entry["chunk_id"]
+        if self.has_version(chunk_id, entry.get("indexed_at", "")):
+            return
+        row = self._row_of.get(chunk_id)
+        if row is not None:
+            self.dead[row] = True
+        self.delta[chunk_id] = (_normalise(vector.astype(np.float32)), entry)
+        self._lexical = None
+
+    def remove(self, chunk_id: str, deleted_at: str = "") -> None:
+        """Drop a chunk unless it was re-indexed after ``deleted_at``."""
+        if deleted_at and self._indexed_at(chunk_id) > deleted_at:
+            return
+        row = self._row_of.get(chunk_id)
+        live_row = row is not None and not self.dead[row]
+        if not live_row and chunk_id not in self.delta:
+            return
+        if live_row:
+            self.dead[row] = True
+        self.delta.pop(chunk_id, None)
+        self._lexical = None
+
+    def _live_entries(self) -> list[dict]:
+        live = [e for e, dead in zip(self.entries, self.dead) if not dead]
+        live.extend(entry for _, entry in self.delta.values())
+        return live
+
+    def lexical_search(self, query: str, top_k: int) -> list[dict]:
+        """BM25 search over the scope's chunk text; the index is built lazily."""
+        if self._lexical is None:
+            self._lexical_rows = {e["chunk_id"]: e for e in self._live_entries()}
+            self._lexical = BM25Index(
+                [(cid, self.content_of(e)) for cid, e in self._lexical_rows.items()]
+            )
+        by_id = self._lexical_rows
+        return [
+            {
+                "content": self.content_of(by_id[chunk_id]),
+                "score": score,
+                "chunk_id": chunk_id,
+                "document_id": by_id[chunk_id].get("document_id", ""),
+                "metadata": by_id[chunk_id].get("metadata", {}),
+            }
+            for chunk_id, score in self._lexical.search(query, top_k)
+            if chunk_id in by_id
+        ]
+
+    def search(
+        self,
+        query: np.ndarray,
+        top_k: int,
+        candidates: set[str] | None = None,
+    ) -> list[dict]:
+        """Return the top_k rows by cosine similarity to ``query``.
+
+        Args:
+            query: Query embedding.
+            top_k: Number of results.
+            candidates: Optional chunk IDs to restrict scoring to (e.g. the
+                lexical candidate set), so large scopes score only a few rows.
+        """
+        dim = self.dim
+        if top_k <= 0 or dim is None or query.size != dim:
+            return []
+        q = _normalise(query.astype(np.float32))
+
+        scored: list[tuple[float, dict]] = []
+        if candidates is not None:
+            rows = np.array(
+                sorted(
+                    row for c in candidates
+                    if (row := self._row_of.get(c)) is not None and not self.dead[row]
+                ),
+                dtype=np.intp,
+            )
+            if rows.size:
+                row_scores = np.asarray(self.matrix[rows] @ q, dtype=np.float32)
+                scored.extend((float(sc), self.entries[row]) for row, sc in zip(rows, row_scores))
+        elif len(self.entries):
+            base_scores = np.asarray(self.matrix @ q, dtype=np.float32)
+            base_scores[self.dead] = -np.inf
+            take = min(top_k, len(base_scores))
+            for row in np.argpartition(-base_scores, take - 1)[:take]:
+                if np.isfinite(base_scores[row]):
+                    scored.append((float(base_scores[row]), self.entries[row]))
+        for chunk_id, (vec, entry) in self.delta.items():
+            if candidates is None or chunk_id in candidates:
+                scored.append((float(vec @ q), entry))
+
+        scored.sort(key=lambda s: s[0], reverse=True)
+        return [
+            {
+                "content": self.content_of(entry),
+                "score": score,
+                "chunk_id": entry["chunk_id"],
+                "document_id": entry.get("document_id", ""),
+                "metadata": entry.get("metadata", {}),
+            }
+            for score, entry in scored[:top_k]
+        ]
+
+    def compacted(self) -> tuple[np.ndarray, list[dict]]:
+        """Merge live base rows and the delta overlay into a fresh matrix."""
+        alive = ~self.dead
+        entries = [e for e, keep in zip(self.entries, alive) if keep]
+        blocks = [np.asarray(self.matrix[alive], dtype=np.float32)] if len(self.entries) else []
+        if self.delta:
+            entries.extend(entry for _, entry in self.delta.values())
+            blocks.append(np.vstack([vec for vec, _ in self.delta.values()]))
+        if not blocks:
+            return np.zeros((0, 0), dtype=np.float32), []
+        return np.vstack(blocks).astype(np.float32), entries
+
+
+class VectorIndex:
+    """Per-scope vector indexes backed by on-disk snapshots and Firestore deltas."""
+
+    def __init__(
+        self,
+        directory: str,
+        embeddings_collection: str,
+        decode,
+        refresh_seconds: float = 30.0,
+        compact_threshold: int = 500,
+        lookback_seconds: float = 300.0,
+    ) -> None:
+        self._dir = Path(directory)
+        self._collection = embeddings_collection
+        self._decode = decode
+        self._refresh_seconds = refresh_seconds
+        self._compact_threshold = compact_threshold
+        self._lookback_seconds = lookback_seconds
+        self._scopes: dict[str, ScopeIndex] = {}
+        self._locks: dict[str, asyncio.Lock] = {}
+
+    # ------------------------------------------------------------------
+    # Public API
+    # ------------------------------------------------------------------
+
+    async def search(
+        self,
+        query: list[float],
+        agent_id: str | None = None,
+        client_id: str | None = None,
+        top_k: int = 5,
+        candidates: set[str] | None = None,
+    ) -> list[dict]:
+        """Search one scope, loading or refreshing its index as needed."""
+        index = await self.get_scope(agent_id, client_id)
+        return index.search(np.asarray(query, dtype=np.float32), top_k, candidates)
+
+    async def lexical_search(
+        self,
+        query: str,
+        agent_id: str | None = None,
+        client_id: str | None = None,
+        top_k: int = 5,
+    ) -> list[dict]:
+        """BM25 search over one scope's chunk text."""
+        index = await self.get_scope(agent_id, client_id)
+        return index.lexical_search(query, top_k)
+
+    async def get_scope(self, agent_id: str | None, client_id: str | None) -> ScopeIndex:
+        """Return an up-to-date index for the scope."""
+        key = scope_key(agent_id, client_id)
+        lock = self._locks.setdefault(key, asyncio.Lock())
+        async with lock:
+            index = self._scopes.get(key)
+            if index is None:
+                index = await asyncio.to_thread(self._load_snapshot, key)
+                if index is None:
+                    index = await asyncio.to_thread(self._full_build, agent_id, client_id)
+                    await asyncio.to_thread(self._write_snapshot, key, index)
+                    index = await asyncio.to_thread(self._load_snapshot, key) or index
+                self._scopes[key] = index
+
+            if time.monotonic() - index.refreshed_at >= self._refresh_seconds:
+                await asyncio.to_thread(self._apply_delta, index, agent_id, client_id)
+                index.refreshed_at = time.monotonic()
+                if index.pending_changes >= self._compact_threshold:
+                    await asyncio.to_thread(self._write_snapshot, key, index)
+                    index = await asyncio.to_thread(self._load_snapshot, key) or index
+                    index.refreshed_at = time.monotonic()
+                    self._scopes[key] = index
+            return index
+
+    def invalidate(self) -> None:
+        """Force every scope to refresh its delta on the next search."""
+        for index in self._scopes.values():
+            index.refreshed_at = 0.0
+
+    # ------------------------------------------------------------------
+    # Snapshot I/O
+    # ------------------------------------------------------------------
+
+    def _manifest_path(self, key: str) -> Path:
+        return self._dir / f"{key}.json"
+
+    @contextlib.contextmanager
+    def _locked(self, key: str, exclusive: bool):
+        """Hold the scope's snapshot lock across processes on this instance."""
+        self._dir.mkdir(parents=True, exist_ok=True)
+        with open(self._dir / f"{key}.lock", "a+b") as fh:
+            fcntl.flock(fh, fcntl.LOCK_EX if exclusive else fcntl.LOCK_SH)
+            try:
+                yield
+            finally:
+                fcntl.flock(fh, fcntl.LOCK_UN)
+
+    def _load_snapshot(self, key: str) -> ScopeIndex | None:
+        manifest_path = self._manifest_path(key)
+        if not manifest_path.is_file():
+            return None
+        try:
+            # Map the files while no writer can collect them; the mappings stay valid afterwards
+            with self._locked(key, exclusive=False):
+                manifest = json.loads(manifest_path.read_text())
+                if manifest.get("format") != INDEX_FORMAT_VERSION:
+                    return None
+                matrix = np.load(self._dir / manifest["matrix"], mmap_mode="r")
+                content = _map_file(self._dir / manifest["content"])
+            entries = manifest.get("entries", [])
+            if matrix.shape[0] != len(entries):
+                return None
+            return ScopeIndex(
+                matrix,
+                entries,
+                manifest.get("high_water_mark", ""),
+                manifest.get("tombstone_mark", ""),
+                content,
+            )
+        except Exception:
+            logger.warning("Vector index snapshot %s unreadable — rebuilding", key, exc_info=True)
+            return None
+
+    def _write_snapshot(self, key: str, index: ScopeIndex) -> None:
+        """Atomically persist ``index``; the manifest is replaced last."""
+        try:
+            matrix, entries = index.compacted()
+            text = bytearray()
+            rows = []
+            for entry in entries:
+                encoded = index.content_of(entry).encode("utf-8")
+                row = {k: v for k, v in entry.items() if k not in _CONTENT_FIELDS}
+                row["content_offset"] = len(text)
+                row["content_length"] = len(encoded)
+                text += encoded
+                rows.append(row)
+
+            generation = uuid.uuid4().hex[:8]
+            matrix_name = f"{key}.{generation}.npy"
+            content_name = f"{key}.{generation}.txt"
+            manifest = {
+                "format": INDEX_FORMAT_VERSION,
+                "matrix": matrix_name,
+                "content": content_name,
+                "high_water_mark": index.high_water_mark,
+                "tombstone_mark": index.tombstone_mark,
+                "entries": rows,
+            }
+
+            with self._locked(key, exclusive=True):
+                np.save(self._dir / matrix_name, matrix)
+                (self._dir / content_name).write_bytes(bytes(text))
+                fd, tmp = tempfile.mkstemp(dir=self._dir, prefix=f"{key}.", suffix=".json.tmp")
+                try:
+                    with os.fdopen(fd, "w") as fh:
+                        fh.write(json.dumps(manifest, default=str))
+                    os.replace(tmp, self._manifest_path(key))
+                except BaseException:
+                    Path(tmp).unlink(missing_ok=True)
+                    raise
+                self._collect_garbage(key, {matrix_name, content_name})
+            logger.info("Wrote vector index snapshot %s (%d rows)", key, len(rows))
+        except Exception:
+            logger.warning("Failed to write vector index snapshot %s", key, exc_info=True)
+
+    def _collect_garbage(self, key: str, keep: set[str]) -> None:
+        """Remove generations the current manifest does not reference.
+
+        Called with the exclusive lock held.  Loaders map files under the
+        shared lock, so nothing can be between reading the manifest and
+        mapping its files; workers that already mapped an old generation
+        keep their pages after the unlink.
+        """
+        for pattern in (f"{key}.*.npy", f"{key}.*.txt", f"{key}.*.json.tmp"):
+            for old in self._dir.glob(pattern):
+                if old.name not in keep:
+                    old.unlink(missing_ok=True)
+
+    # ------------------------------------------------------------------
+    # Firestore loading
+    # ------------------------------------------------------------------
+
+    def _entry(self, doc_id: str, data: dict) -> dict:
+        return {
+            "chunk_id": data.get("chunk_id", doc_id),
+            "document_id": data.get("document_id", ""),
+            "content": data.get("content", ""),
+            "metadata": data.get("metadata", {}),
+            "indexed_at": _stamp(data.get("indexed_at")),
+        }
+
+    def _full_build(self, agent_id: str | None, client_id: str | None) -> ScopeIndex:
+        db = get_firestore_client()
+        query: Any = db.collection(self._collection)
+        if agent_id:
+            query = query.where("metadata.agent_id", "==", agent_id)
+        if client_id:
+            query = query.where("metadata.client_id", "==", client_id)
+
+        index = ScopeIndex(np.zeros((0, 0), dtype=np.float32), [])
+        for doc in query.stream():
+            data = doc.to_dict()
+            index.high_water_mark = max(index.high_water_mark, _stamp(data.get("indexed_at")))
+            if not _in_scope(data, agent_id, client_id):
+                continue
+            vec = self._decode(data)
+            if vec is not None:
+                index.upsert(self._entry(doc.id, data), vec)
+
+        index.tombstone_mark = self._latest_tombstone(db)
+        index.refreshed_at = time.monotonic()
+        return index
+
+    def _latest_tombstone(self, db) -> str:
+        try:
+            docs = list(
+                db.collection(TOMBSTONES_COLLECTION)
+                .order_by("deleted_at", direction="DESCENDING")
+                .limit(1)
+                .stream()
+            )
+            return _stamp(docs[0].to_dict().get("deleted_at")) if docs else ""
+        except Exception:
+            logger.warning("Could not read embedding tombstones", exc_info=True)
+            return ""
+
+    def _apply_delta(self, index: ScopeIndex, agent_id: str | None, client_id: str | None) -> None:
+        """Apply embeddings indexed and deleted since the snapshot's high-water marks.
+
+        Each query reaches back ``lookback_seconds`` before the mark, so a
+        write that committed after a newer one was already seen is not lost.
+        Rows re-read inside the window are skipped when already applied.
+        """
+        db = get_firestore_client()
+
+        embeddings: Any = db.collection(self._collection)
+        bound = _lookback(index.high_water_mark, self._lookback_seconds)
+        if bound is not None:
+            embeddings = embeddings.where("indexed_at", ">=", bound)
+        for doc in embeddings.stream():
+            data = doc.to_dict()
+            indexed_at = _stamp(data.get("indexed_at"))
+            if bound is not None and indexed_at < _stamp(bound):
+                continue
+            index.high_water_mark = max(index.high_water_mark, indexed_at)
+            if not _in_scope(data, agent_id, client_id):
+                continue
+            entry = self._entry(doc.id, data)
+            if index.has_version(entry["chunk_id"], indexed_at):
+                continue
+            vec = self._decode(data)
+            if vec is not None:
+                index.upsert(entry, vec)
+
+        tombstones: Any = db.collection(TOMBSTONES_COLLECTION)
+        bound = _lookback(index.tombstone_mark, self._lookback_seconds)
+        if bound is not None:
+            tombstones = tombstones.where("deleted_at", ">=", bound)
+        for doc in tombstones.stream():
+            data = doc.to_dict()
+            deleted_at = _stamp(data.get("deleted_at"))
+            if bound is not None and deleted_at < _stamp(bound):
+                continue
+            index.tombstone_mark = max(index.tombstone_mark, deleted_at)
+            index.remove(data.get("chunk_id", doc.id), deleted_at)
@@ -6,24 +6,100 @@ from typing import Any
 
 import numpy as np
 import google.generativeai as genai
+from google.cloud.firestore import SERVER_TIMESTAMP
 
 from app.config import get_settings
+from app.utils.embedding_cache import EMBEDDING_CACHE_COLLECTION, get_embedding_cache
 from app.utils.firebase_client import get_firestore_client
+from app.utils.vector_index import TOMBSTONES_COLLECTION, VectorIndex
 
 logger = logging.getLogger(__name__)
 
 EMBEDDINGS_COLLECTION = "embeddings"
 EMBEDDING_MODEL = "models/text-embedding-004"
 
+# Storage format versions for the ``embeddings`` collection:
+#   1 — ``embedding`` stored as a Firestore array of doubles (legacy)
+#   2 — ``embedding_blob`` stored as packed float16 / int8 bytes
+EMBEDDING_FORMAT_VERSION = 2
+EMBEDDING_ENCODINGS = ("float16", "int8")
+
+# Firestore rejects batches with more than 500 writes
+_WRITES_PER_BATCH = 500
+
 _vector_store = None
 
 
+def encode_embedding(embedding: list[float], encoding: str = "int8") -> dict[str, Any]:
+    """Pack an embedding into compact bytes for Firestore storage.
+
+    ``int8`` uses symmetric per-vector quantisation (``value ≈ q * scale``);
+    ``float16`` stores half-precision floats with a scale of 1.
+
+    Args:
+        embedding: The embedding vector.
+        encoding: ``"int8"`` or ``"float16"``.
+
+    Returns:
+        Dict of Firestore fields: ``embedding_blob``, ``embedding_dtype``,
+        ``embedding_scale``, ``embedding_dim`` and ``embedding_format``.
+
+    Raises:
+        ValueError: If ``encoding`` is not supported.
+    """
+    vec = np.asarray(embedding, dtype=np.float32)
+    if encoding == "int8":
+        max_abs = float(np.max(np.abs(vec))) if vec.size else 0.0
+        scale = max_abs / 127.0 if max_abs > 0 else 1.0
+        packed = np.clip(np.rint(vec / scale), -127, 127).astype(np.int8)
+    elif encoding == "float16":
+        scale = 1.0
+        packed = vec.astype(np.float16)
+    else:
+        raise ValueError(f"Unsupported embedding encoding: {encoding}")
+
+    return {
+        "embedding_blob": packed.tobytes(),
+        "embedding_dtype": encoding,
+        "embedding_scale": scale,
+        "embedding_dim": int(vec.size),
+        "embedding_format": EMBEDDING_FORMAT_VERSION,
+    }
+
+
+def decode_embedding(data: dict[str, Any]) -> np.ndarray | None:
+    """Decode a stored embedding document into a float32 vector.
+
+    Understands both the packed format and legacy arrays of doubles.  Packed
+    blobs are viewed with ``np.frombuffer`` without copying the raw bytes;
+    the only allocation is the float32 result.
+
+    Returns:
+        The embedding as a 1-D float32 array, or None if the doc has none.
+    """
+    blob = data.get("embedding_blob")
+    if blob:
+        dtype = np.int8 if data.get("embedding_dtype") == "int8" else np.float16
+        vec = np.frombuffer(blob, dtype=dtype).astype(np.float32)
+        vec *= np.float32(data.get("embedding_scale", 1.0))
+        return vec
+
+    legacy = data.get("embedding")
+    if legacy:
+        return np.asarray(legacy, dtype=np.float32)
+    return None
+
+
 class VectorStore:
     """Manages vector embeddings via Google Gemini and stores them in Firestore.
 
     Uses brute-force cosine similarity for search. Suitable for small-to-medium
     document sets per agent/client scope. For production scale, swap in a
     dedicated vector database.
+
+    When ``VECTOR_INDEX_DIR`` is set, each scope is served from a memory-mapped
+    snapshot (see ``app.utils.vector_index``) plus the Firestore delta since it
+    was written, instead of streaming the whole scope on every search.
     """
 
     def __init__(self) -> None:
@@ -38,15 +114,36 @@ class VectorStore:
             self._configured = True
             logger.info("VectorStore initialised with Google Gemini embeddings")
 
+        self._encoding = settings.EMBEDDING_STORAGE_ENCODING
+        if self._encoding not in EMBEDDING_ENCODINGS:
+            logger.warning("Unknown EMBEDDING_STORAGE_ENCODING %r — using int8", self._encoding)
+            self._encoding = "int8"
+        self._cache = get_embedding_cache()
+
+        self._index: VectorIndex | None = None
+        if settings.VECTOR_INDEX_DIR:
+            self._index = VectorIndex(
+                settings.VECTOR_INDEX_DIR,
+                EMBEDDINGS_COLLECTION,
+                decode_embedding,
+                refresh_seconds=settings.VECTOR_INDEX_REFRESH_SECONDS,
+                compact_threshold=settings.VECTOR_INDEX_COMPACT_THRESHOLD,
+                lookback_seconds=settings.VECTOR_INDEX_LOOKBACK_SECONDS,
+            )
+
     # ------------------------------------------------------------------
     # Embedding generation
     # ------------------------------------------------------------------
 
-    async def generate_embedding(self, text: str) -> list[float]:
+    async def generate_embedding(self, text: str, persist: bool = False) -> list[float]:
         """Generate an embedding vector for the given text.
 
+        Consults the embedding cache first; only cache misses call Gemini.
+
         Args:
             text: The text to embed.
+            persist: Also read/write the persistent (Firestore) cache tier.
+                Used for document chunks; queries stay in the LRU tier.
 
         Returns:
             A list of floats representing the embedding vector.
@@ -57,13 +154,19 @@ class VectorStore:
         if not self._configured:
             raise RuntimeError("VectorStore: Gemini client unavailable (missing API key)")
 
+        cached = await self._cache.get(EMBEDDING_MODEL, text, persistent=persist)
+        if cached is not None:
+            return cached
+
         # genai.embed_content is synchronous, run in thread to avoid blocking
         result = await asyncio.to_thread(
             genai.embed_content,
             model=EMBEDDING_MODEL,
             content=text,
         )
-        return result['embedding']
+        embedding = result['embedding']
+        await self._cache.put(EMBEDDING_MODEL, text, embedding, persistent=persist)
+        return embedding
 
     # ------------------------------------------------------------------
     # Storage
@@ -79,6 +182,9 @@ class VectorStore:
     ) -> None:
         """Persist an embedding and its associated content in Firestore.
 
+        The vector is stored packed (see ``encode_embedding``) rather than as
+        an array of doubles.
+
         Args:
             chunk_id: Unique identifier for the chunk.
             document_id: Parent document identifier.
@@ -92,13 +198,49 @@ class VectorStore:
             {
                 "chunk_id": chunk_id,
                 "document_id": document_id,
-                "embedding": embedding,
+                **encode_embedding(embedding, self._encoding),
                 "content": content,
                 "metadata": metadata or {},
+                # Commit-time server clock, so index deltas order writes consistently
+                "indexed_at": SERVER_TIMESTAMP,
             }
         )
         logger.debug("Stored embedding for chunk %s (document %s)", chunk_id, document_id)
 
+    async def delete_document_embeddings(self, document_id: str) -> int:
+        """Delete a document's embeddings and leave tombstones for index snapshots.
+
+        Tombstones let every worker's snapshot drop the rows on its next delta
+        refresh without a full rebuild.
+
+        Returns:
+            Number of embeddings deleted.
+        """
+        db = get_firestore_client()
+
+        docs = await asyncio.to_thread(
+            lambda: list(
+                db.collection(EMBEDDINGS_COLLECTION)
+                .where("document_id", "==", document_id)
+                .stream()
+            )
+        )
+        # Each embedding costs two writes: the delete and its tombstone
+        per_batch = _WRITES_PER_BATCH // 2
+        for start in range(0, len(docs), per_batch):
+            batch = db.batch()
+            for doc in docs[start:start + per_batch]:
+                batch.delete(doc.reference)
+                batch.set(
+                    db.collection(TOMBSTONES_COLLECTION).document(doc.id),
+                    {"chunk_id": doc.id, "document_id": document_id, "deleted_at": SERVER_TIMESTAMP},
+                )
+            await asyncio.to_thread(batch.commit)
+
+        if self._index is not None:
+            self._index.invalidate()
+        return len(docs)
+
     # ------------------------------------------------------------------
     # Search
     # ------------------------------------------------------------------
@@ -109,18 +251,22 @@ class VectorStore:
         agent_id: str | None = None,
         client_id: str | None = None,
         top_k: int = 5,
+        candidate_ids: set[str] | None = None,
     ) -> list[dict]:
         """Perform a similarity search against stored embeddings.
 
-        Generates a query embedding, fetches all embeddings within the
-        agent/client scope from Firestore, computes cosine similarity in
-        memory, and returns the top_k results.
+        Generates a query embedding and scores it against every embedding in
+        the agent/client scope, returning the top_k results.  Scopes are
+        served from the snapshot index when enabled, falling back to
+        streaming the scope from Firestore.
 
         Args:
             query: Natural-language search query.
             agent_id: Optional scope filter.
             client_id: Optional scope filter.
             top_k: Number of results to return.
+            candidate_ids: Optional chunk IDs to restrict scoring to (lexical
+                prefiltering).  Only honoured by the snapshot index.
 
         Returns:
             A list of dicts with ``content``, ``score``, ``chunk_id``,
@@ -129,6 +275,14 @@ class VectorStore:
         """
         query_embedding = await self.generate_embedding(query)
 
+        if self._index is not None:
+            try:
+                return await self._index.search(
+                    query_embedding, agent_id, client_id, top_k, candidate_ids
+                )
+            except Exception:
+                logger.warning("Vector index search failed — scanning Firestore", exc_info=True)
+
         db = get_firestore_client()
         collection_ref = db.collection(EMBEDDINGS_COLLECTION)
 
@@ -142,25 +296,63 @@ class VectorStore:
         docs = query_ref.stream()
 
         results: list[dict] = []
+        vectors: list[np.ndarray] = []
         for doc in docs:
             data = doc.to_dict()
-            stored_embedding = data.get("embedding")
-            if not stored_embedding:
+            stored_embedding = decode_embedding(data)
+            if stored_embedding is None or stored_embedding.size != len(query_embedding):
                 continue
-            score = self._cosine_similarity(query_embedding, stored_embedding)
+            vectors.append(stored_embedding)
             results.append(
                 {
                     "content": data.get("content", ""),
-                    "score": score,
+                    "score": 0.0,
                     "chunk_id": data.get("chunk_id", doc.id),
                     "document_id": data.get("document_id", ""),
                     "metadata": data.get("metadata", {}),
                 }
             )
 
+        if not results:
+            return []
+
+        scores = self._cosine_similarities(np.asarray(query_embedding, dtype=np.float32), np.vstack(vectors))
+        for result, score in zip(results, scores):
+            result["score"] = float(score)
+
         results.sort(key=lambda r: r["score"], reverse=True)
         return results[:top_k]
 
+    async def lexical_search(
+        self,
+        query: str,
+        agent_id: str | None = None,
+        client_id: str | None = None,
+        top_k: int = 5,
+    ) -> list[dict]:
+        """BM25 keyword search over the scope's indexed chunks.
+
+        Needs no query embedding.  Returns an empty list when the snapshot
+        index is disabled.
+
+        Returns:
+            Result dicts in the same shape as ``search``, scored by BM25.
+        """
+        if self._index is None:
+            return []
+        try:
+            return await self._index.lexical_search(query, agent_id, client_id, top_k)
+        except Exception:
+            logger.warning("Lexical search failed", exc_info=True)
+            return []
+
+    async def scope_size(self, agent_id: str | None = None, client_id: str | None = None) -> int | None:
+        """Number of indexed chunks in a scope, or None if the index is disabled."""
+        if self._index is None:
+            return None
+        index = await self._index.get_scope(agent_id, client_id)
+        return index.size
+
     # ------------------------------------------------------------------
     # Similarity
     # ------------------------------------------------------------------
@@ -185,29 +377,44 @@ class VectorStore:
             return 0.0
         return float(dot / (norm_a * norm_b))
 
+    @staticmethod
+    def _cosine_similarities(query: np.ndarray, matrix: np.ndarray) -> np.ndarray:
+        """Cosine similarity of ``query`` against every row of ``matrix``.
+
+        Rows (or a query) with zero norm score 0.
+        """
+        norms = np.linalg.norm(matrix, axis=1) * np.linalg.norm(query)
+        dots = matrix @ query
+        return np.divide(dots, norms, out=np.zeros_like(dots), where=norms > 0)
+
     # ------------------------------------------------------------------
     # Batch indexing
     # ------------------------------------------------------------------
 
     async def index_document_chunks(
         self, document_id: str, chunks: list[dict]
-    ) -> None:
+    ) -> int:
         """Generate embeddings for a list of document chunks and store them.
 
         Each chunk dict must contain at least ``id`` and ``content`` keys,
-        and may include a ``metadata`` dict.
+        and may include a ``metadata`` dict.  Embeddings go through the
+        persistent cache tier, so re-indexing only pays for changed text.
 
         Args:
             document_id: Parent document identifier.
             chunks: List of chunk dicts with ``id``, ``content``, and
                 optional ``metadata``.
+
+        Returns:
+            Number of chunks successfully indexed.
         """
+        indexed = 0
         for chunk in chunks:
             chunk_id = chunk["id"]
             content = chunk["content"]
             metadata = chunk.get("metadata", {})
             try:
-                embedding = await self.generate_embedding(content)
+                embedding = await self.generate_embedding(content, persist=True)
                 await self.store_embedding(
                     chunk_id=chunk_id,
                     document_id=document_id,
@@ -215,14 +422,70 @@ class VectorStore:
                     content=content,
                     metadata=metadata,
                 )
+                indexed += 1
             except Exception:
                 logger.exception(
                     "Failed to index chunk %s of document %s", chunk_id, document_id
                 )
 
         logger.info(
-            "Indexed %d chunks for document %s", len(chunks), document_id
+            "Indexed %d/%d chunks for document %s", indexed, len(chunks), document_id
         )
+        return indexed
+
+    # ------------------------------------------------------------------
+    # Migration
+    # ------------------------------------------------------------------
+
+    async def migrate_embeddings(self, batch_size: int = 200) -> dict:
+        """Convert legacy array-of-doubles embeddings to the packed format.
+
+        Covers the ``embeddings`` collection and the persistent embedding
+        cache.  Idempotent: documents already at ``EMBEDDING_FORMAT_VERSION``
+        are skipped, so the migration can be re-run after a partial failure.
+
+        Args:
+            batch_size: Number of documents rewritten per Firestore batch.
+
+        Returns:
+            Dict with ``migrated``, ``skipped`` and ``errors`` counts across
+            both collections.
+        """
+        stats = {"migrated": 0, "skipped": 0, "errors": 0}
+        for collection in (EMBEDDINGS_COLLECTION, EMBEDDING_CACHE_COLLECTION):
+            await self._migrate_collection(collection, batch_size, stats)
+
+        logger.info("Embedding migration complete: %s", stats)
+        return stats
+
+    async def _migrate_collection(self, collection: str, batch_size: int, stats: dict) -> None:
+        """Pack the legacy embeddings in one collection, adding to ``stats``."""
+        from google.cloud.firestore import DELETE_FIELD
+
+        db = get_firestore_client()
+        docs = await asyncio.to_thread(lambda: list(db.collection(collection).stream()))
+        batch = db.batch()
+        pending = 0
+        for doc in docs:
+            data = doc.to_dict()
+            if data.get("embedding_format") == EMBEDDING_FORMAT_VERSION or not data.get("embedding"):
+                stats["skipped"] += 1
+                continue
+            try:
+                update = encode_embedding(data["embedding"], self._encoding)
+                update["embedding"] = DELETE_FIELD
+                batch.update(doc.reference, update)
+                pending += 1
+                stats["migrated"] += 1
+            except Exception:
+                logger.exception("Failed to migrate embedding %s/%s", collection, doc.id)
+                stats["errors"] += 1
+            if pending >= batch_size:
+                await asyncio.to_thread(batch.commit)
+                batch = db.batch()
+                pending = 0
+        if pending:
+            await asyncio.to_thread(batch.commit)
 
 
 # ------------------------------------------------------------------
@@ -153,9 +153,20 @@ class MockFirestoreClient:
     def batch(self):
         return MockBatch()
 
+    def get_all(self, references):
+        return [ref.get() for ref in references]
+
     def set_collection(self, name: str, docs: list[MockDocumentSnapshot]):
         self._collections[name] = MockCollectionReference(docs)
 
+    def recursive_delete(self, reference, **kwargs):
+        """Drop subcollections (slash-delimited paths) nested under ``reference``."""
+        nested = [name for name in self._collections if f"/{reference.id}/" in name]
+        for name in nested:
+            del self._collections[name]
+        reference.delete()
+        return len(nested)
+
 
 class MockBatch:
     """Simulates a Firestore WriteBatch."""
@@ -163,7 +174,7 @@ class MockBatch:
     def __init__(self):
         self._operations = []
 
-    def set(self, ref, data):
+    def set(self, ref, data, merge=False):
         self._operations.append(("set", ref, data))
 
     def delete(self, ref):
@@ -345,6 +356,14 @@ def make_snapshot_doc(doc_id="snap_1", total_revenue=100000, total_expenses=6000
 # ---------------------------------------------------------------------------
 
 
+@pytest.fixture(autouse=True)
+def fresh_llm_gateway():
+    """Give each test its own LLM gateway and response cache."""
+    with patch("app.utils.llm_gateway._llm_gateway", None), \
+         patch("app.utils.llm_cache._llm_cache", None):
+        yield
+
+
 @pytest.fixture
 def mock_firestore():
     """Return a fresh MockFirestoreClient."""
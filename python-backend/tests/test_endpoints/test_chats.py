@@ -64,3 +64,316 @@ class TestListMessages:
     def test_list_messages_not_found(self, client):
         response = client.get("/chats/nonexistent/messages")
         assert response.status_code == 404
+
+
+class TestSendMessage:
+    def _mock_model(self, text="Hi there"):
+        model = MagicMock()
+        model.generate_content_async = AsyncMock(return_value=MagicMock(text=text))
+        return model
+
+    def test_send_message_direct_gemini(self, client):
+        model = self._mock_model()
+        with patch("app.utils.llm_gateway.genai.GenerativeModel", return_value=model):
+            response = client.post("/chats/conv_1/messages", json={"content": "Hello"})
+
+        assert response.status_code == 200
+        data = response.json()["data"]
+        assert data["user_message"]["content"] == "Hello"
+        assert data["assistant_message"]["content"] == "Hi there"
+        prompt = model.generate_content_async.await_args.args[0]
+        assert "Hello" in prompt
+
+    def test_send_message_not_found(self, client):
+        response = client.post("/chats/nonexistent/messages", json={"content": "Hello"})
+        assert response.status_code == 404
+
+    def test_slow_integration_keeps_firestore_context(self, client, mock_firestore_with_data):
+        import asyncio
+        from tests.conftest import MockDocumentSnapshot, make_agent_doc
+
+        agent = make_agent_doc(client_id="client_1").to_dict() | {"data_sources": ["firestore", "gmail"]}
+        mock_firestore_with_data.set_collection("agents", [MockDocumentSnapshot("agent_1", agent)])
+        gmail = MagicMock()
+        gmail.is_configured.return_value = True
+
+        async def _slow(*args, **kwargs):
+            await asyncio.sleep(5)
+
+        gmail.get_client_emails = _slow
+        settings = MagicMock(CONTEXT_SOURCE_TIMEOUT_SECONDS=0.05)
+        model = self._mock_model()
+        with patch("app.utils.context_sources.get_settings", return_value=settings), \
+             patch("app.utils.client_agent.get_firestore_client", return_value=mock_firestore_with_data), \
+             patch("app.utils.gmail_client.get_gmail_client", return_value=gmail), \
+             patch("app.utils.llm_gateway.genai.GenerativeModel", return_value=model) as get_model:
+            response = client.post("/chats/conv_1/messages", json={"content": "Hello"})
+
+        assert response.status_code == 200
+        # Gmail was dropped, but the client record loaded from Firestore still made it in
+        assert "Test Client" in get_model.call_args.kwargs["system_instruction"]
+
+    def test_rag_results_ground_the_answer(self, client, mock_firestore_with_data):
+        from tests.conftest import MockDocumentSnapshot, make_agent_doc
+
+        agent = make_agent_doc().to_dict() | {"document_ids": ["doc_1"]}
+        mock_firestore_with_data.set_collection("agents", [MockDocumentSnapshot("agent_1", agent)])
+        rag = MagicMock()
+        rag.retrieve = AsyncMock(return_value=[
+            {"chunk_id": "c1", "document_id": "doc_1", "content": "Fee is R10k", "score": 0.9},
+        ])
+        rag.assemble = MagicMock(return_value={
+            "context": "Fee is R10k",
+            "sources": rag.retrieve.return_value,
+            "tokens": 3,
+        })
+        rag.generate_response = AsyncMock(return_value="The fee is R10k.")
+
+        with patch("app.api.chats._get_rag_engine", return_value=rag):
+            response = client.post("/chats/conv_1/messages", json={"content": "What is the fee?"})
+
+        assert response.status_code == 200
+        data = response.json()["data"]["assistant_message"]
+        assert data["content"] == "The fee is R10k."
+        assert data["sources"][0]["chunk_id"] == "c1"
+
+
+def _sse_events(text: str) -> list[tuple[str, dict]]:
+    import json
+    events = []
+    for frame in text.strip().split("\n\n"):
+        lines = dict(line.split(": ", 1) for line in frame.splitlines())
+        events.append((lines["event"], json.loads(lines["data"])))
+    return events
+
+
+class TestStreamMessage:
+    def _streaming_model(self, fragments):
+        async def _stream():
+            for fragment in fragments:
+                yield MagicMock(text=fragment)
+
+        model = MagicMock()
+        model.generate_content_async = AsyncMock(return_value=_stream())
+        return model
+
+    def test_streams_tokens_then_done(self, client, mock_firestore_with_data):
+        model = self._streaming_model(["Hel", "lo!"])
+        with patch("app.utils.llm_gateway.genai.GenerativeModel", return_value=model):
+            response = client.post("/chats/conv_1/messages/stream", json={"content": "Hi"})
+
+        assert response.status_code == 200
+        assert response.headers["content-type"].startswith("text/event-stream")
+        events = _sse_events(response.text)
+        names = [name for name, _ in events]
+        assert names == ["user_message", "token", "token", "sources", "done"]
+        assert events[0][1]["content"] == "Hi"
+        assert events[-1][1]["assistant_message"]["content"] == "Hello!"
+        assert model.generate_content_async.await_args.kwargs["stream"] is True
+
+        conv = mock_firestore_with_data.collection("conversations").document("conv_1").get().to_dict()
+        assert conv["message_count"].value == 2
+
+    def test_generation_error_emits_error_event(self, client):
+        model = MagicMock()
+        model.generate_content_async = AsyncMock(side_effect=RuntimeError("quota"))
+        with patch("app.utils.llm_gateway.genai.GenerativeModel", return_value=model):
+            response = client.post("/chats/conv_1/messages/stream", json={"content": "Hi"})
+
+        events = _sse_events(response.text)
+        assert events[0][0] == "user_message"
+        assert events[-1][0] == "error"
+        assert "quota" in events[-1][1]["detail"]
+
+    def test_stream_not_found(self, client):
+        response = client.post("/chats/nonexistent/messages/stream", json={"content": "Hi"})
+        assert response.status_code == 404
+
+
+class TestStreamDisconnect:
+    @pytest.mark.asyncio
+    async def test_disconnect_saves_partial_reply(self):
+        from app.api.chats import _stream_turn
+
+        async def _stream():
+            for fragment in ["one ", "two ", "three"]:
+                yield MagicMock(text=fragment)
+
+        model = MagicMock()
+        model.generate_content_async = AsyncMock(return_value=_stream())
+        request = MagicMock()
+        request.is_disconnected = AsyncMock(side_effect=[False, True])
+        turn = {
+            "agent_id": "agent_1",
+            "agent_data": {"system_prompt": "sys"},
+            "history_messages": [{"role": "user", "content": "Hi"}],
+            "user_message": {"id": "u1", "content": "Hi"},
+            "conv_data": {"message_count": 0},
+            "conv_ref": MagicMock(),
+        }
+
+        with patch("app.utils.llm_gateway.genai.GenerativeModel", return_value=model), \
+             patch("app.api.chats._finish_turn", new=AsyncMock()) as finish:
+            events = [e async for e in _stream_turn(request, MagicMock(), "conv_1", turn, "Hi")]
+
+        assert sum(e.startswith("event: token") for e in events) == 2
+        assert not any(e.startswith("event: done") for e in events)
+        assert finish.await_args.args[3] == "one two "
+
+
+class TestConversationMemory:
+    def test_prompt_uses_summary_and_window(self, client, mock_firestore_with_data):
+        from tests.conftest import make_conversation_doc, MockDocumentSnapshot
+
+        conv = make_conversation_doc().to_dict() | {
+            "memory_summary": "User is planning the Q3 launch.",
+            "memory_window": [
+                {"role": "user", "content": "What's next?", "created_at": "2026-01-01T00:00:00"},
+            ],
+        }
+        mock_firestore_with_data.set_collection("conversations", [MockDocumentSnapshot("conv_1", conv)])
+        mock_firestore_with_data.set_collection("messages", [
+            MockDocumentSnapshot("old", {"conversation_id": "conv_1", "role": "user",
+                                         "content": "ancient history", "created_at": "2025-01-01"}),
+        ])
+        model = TestSendMessage()._mock_model()
+
+        with patch("app.utils.llm_gateway.genai.GenerativeModel", return_value=model), \
+             patch("app.api.chats._load_history") as load_history:
+            response = client.post("/chats/conv_1/messages", json={"content": "And after that?"})
+
+        assert response.status_code == 200
+        load_history.assert_not_called()
+        prompt = model.generate_content_async.await_args.args[0]
+        assert "Q3 launch" in prompt
+        assert "What's next?" in prompt and "And after that?" in prompt
+        assert "ancient history" not in prompt
+
+        # Only this turn's messages are appended; the stored window is not rewritten
+        stored = mock_firestore_with_data.collection("conversations").document("conv_1").get().to_dict()
+        assert [m["content"] for m in stored["memory_window"].values] == ["And after that?", "Hi there"]
+
+
+class TestMessageSubcollections:
+    def test_list_messages_reads_subcollection(self, client, mock_firestore_with_data):
+        from tests.conftest import MockDocumentSnapshot
+
+        mock_firestore_with_data.set_collection("conversations/conv_1/messages", [
+            MockDocumentSnapshot("m2", {"conversation_id": "conv_1", "role": "assistant",
+                                        "content": "second", "created_at": "2026-01-01T00:00:02"}),
+            MockDocumentSnapshot("m1", {"conversation_id": "conv_1", "role": "user",
+                                        "content": "first", "created_at": "2026-01-01T00:00:01"}),
+        ])
+        response = client.get("/chats/conv_1/messages")
+
+        assert [m["content"] for m in response.json()["data"]] == ["first", "second"]
+
+    def test_list_messages_falls_back_to_legacy_collection(self, client, mock_firestore_with_data):
+        from tests.conftest import MockDocumentSnapshot
+
+        mock_firestore_with_data.set_collection("messages", [
+            MockDocumentSnapshot("m1", {"conversation_id": "conv_1", "role": "user",
+                                        "content": "legacy", "created_at": "2026-01-01T00:00:01"}),
+            MockDocumentSnapshot("m2", {"conversation_id": "other", "role": "user",
+                                        "content": "elsewhere", "created_at": "2026-01-01T00:00:02"}),
+        ])
+        response = client.get("/chats/conv_1/messages")
+
+        assert [m["content"] for m in response.json()["data"]] == ["legacy"]
+
+    def test_unmigrated_conversation_merges_both_sources(self, client, mock_firestore_with_data):
+        from tests.conftest import MockDocumentSnapshot
+
+        mock_firestore_with_data.set_collection("messages", [
+            MockDocumentSnapshot("m1", {"conversation_id": "conv_1", "role": "user",
+                                        "content": "legacy", "created_at": "2026-01-01T00:00:01"}),
+            MockDocumentSnapshot("m2", {"conversation_id": "conv_1", "role": "assistant",
+                                        "content": "copied", "created_at": "2026-01-01T00:00:02"}),
+        ])
+        mock_firestore_with_data.set_collection("conversations/conv_1/messages", [
+            MockDocumentSnapshot("m3", {"conversation_id": "conv_1", "role": "user",
+                                        "content": "new", "created_at": "2026-01-01T00:00:03"}),
+            MockDocumentSnapshot("m2", {"conversation_id": "conv_1", "role": "assistant",
+                                        "content": "copied", "created_at": "2026-01-01T00:00:02"}),
+        ])
+        response = client.get("/chats/conv_1/messages")
+
+        assert [m["content"] for m in response.json()["data"]] == ["legacy", "copied", "new"]
+
+    def test_migrated_conversation_skips_legacy_collection(self, client, mock_firestore_with_data):
+        from tests.conftest import MockDocumentSnapshot, make_conversation_doc
+
+        conv = make_conversation_doc().to_dict() | {"messages_migrated": True}
+        mock_firestore_with_data.set_collection("conversations", [MockDocumentSnapshot("conv_1", conv)])
+        mock_firestore_with_data.set_collection("messages", [
+            MockDocumentSnapshot("m1", {"conversation_id": "conv_1", "role": "user",
+                                        "content": "stale", "created_at": "2026-01-01T00:00:01"}),
+        ])
+        response = client.get("/chats/conv_1/messages")
+
+        assert response.json()["data"] == []
+
+    def test_delete_removes_subcollection(self, client, mock_firestore_with_data):
+        from tests.conftest import MockDocumentSnapshot
+
+        mock_firestore_with_data.set_collection("conversations/conv_1/messages", [
+            MockDocumentSnapshot("m1", {"conversation_id": "conv_1", "role": "user",
+                                        "content": "hi", "created_at": "2026-01-01"}),
+        ])
+        response = client.delete("/chats/conv_1")
+
+        assert response.status_code == 200
+        assert "conversations/conv_1/messages" not in mock_firestore_with_data._collections
+
+    def test_send_message_increments_counter(self, client, mock_firestore_with_data):
+        from google.cloud.firestore import Increment
+
+        with patch("app.utils.llm_gateway.genai.GenerativeModel", return_value=TestSendMessage()._mock_model()):
+            client.post("/chats/conv_1/messages", json={"content": "Hello"})
+
+        conv = mock_firestore_with_data.collection("conversations").document("conv_1").get().to_dict()
+        assert isinstance(conv["message_count"], Increment)
+
+
+class TestMigrateMessages:
+    def test_moves_flat_messages_into_subcollections(self):
+        from app.api.chats import migrate_flat_messages
+        from tests.conftest import MockBatch, MockDocumentSnapshot, MockFirestoreClient
+
+        db = MockFirestoreClient()
+        db.set_collection("messages", [
+            MockDocumentSnapshot("m1", {"conversation_id": "conv_1", "content": "a"}),
+            MockDocumentSnapshot("m2", {"conversation_id": "conv_2", "content": "b"}),
+            MockDocumentSnapshot("m3", {"content": "orphan"}),
+        ])
+        batch = MockBatch()
+        db.batch = lambda: batch
+
+        stats = migrate_flat_messages(db)
+
+        assert stats == {"moved": 2, "skipped": 1}
+        sets = [(op[1].id, op[2]["content"]) for op in batch._operations if op[0] == "set" and "content" in op[2]]
+        assert sets == [("m1", "a"), ("m2", "b")]
+        assert sum(op[0] == "delete" for op in batch._operations) == 2
+
+    def test_marks_conversations_migrated(self):
+        from app.api.chats import migrate_flat_messages
+        from tests.conftest import MockBatch, MockDocumentSnapshot, MockFirestoreClient
+
+        db = MockFirestoreClient()
+        db.set_collection("conversations", [
+            MockDocumentSnapshot("conv_1", {"title": "old"}),
+            MockDocumentSnapshot("conv_2", {"title": "new", "messages_migrated": True}),
+        ])
+        batch = MockBatch()
+        db.batch = lambda: batch
+
+        migrate_flat_messages(db)
+
+        marked = [op[1].id for op in batch._operations if op[0] == "set" and op[2] == {"messages_migrated": True}]
+        assert marked == ["conv_1"]
+
+    def test_migrate_endpoint(self, client, mock_firestore_with_data):
+        response = client.post("/chats/messages/migrate")
+        assert response.status_code == 200
+        assert response.json()["data"] == {"moved": 0, "skipped": 0}
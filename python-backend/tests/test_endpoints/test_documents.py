@@ -1,6 +1,7 @@
 """Tests for document API endpoints."""
 
 import pytest
+from unittest.mock import patch, AsyncMock
 
 
 class TestListDocuments:
@@ -49,3 +50,24 @@ class TestDeleteDocument:
     def test_delete_document_not_found(self, client):
         response = client.delete("/documents/nonexistent")
         assert response.status_code == 404
+
+
+class TestUploadDocument:
+    def test_upload_returns_202_processing(self, client, tmp_path):
+        from app.utils.document_ingestion import DocumentIngestionWorker
+        worker = DocumentIngestionWorker(vector_store=object(), staging_dir=str(tmp_path))
+        with patch("app.api.documents.get_ingestion_worker", return_value=worker), \
+             patch.object(worker, "run", new=AsyncMock()) as mock_run:
+            response = client.post(
+                "/documents/?agent_id=agent_1",
+                files={"file": ("notes.txt", b"hello world", "text/plain")},
+            )
+        assert response.status_code == 202
+        data = response.json()["data"]
+        assert data["status"] == "processing"
+        assert data["ingestion_stage"] == "queued"
+        assert (tmp_path / data["id"]).read_bytes() == b"hello world"
+        # The run claims against the timestamp written with the upload
+        doc_id, observed_at = mock_run.await_args.args
+        assert doc_id == data["id"]
+        assert observed_at
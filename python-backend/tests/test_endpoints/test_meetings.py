@@ -111,3 +111,107 @@ class TestMeetingTranscript:
     def test_get_transcript_meeting_not_found(self, client):
         response = client.get("/meetings/nonexistent/transcript")
         assert response.status_code == 404
+
+    def test_ranged_read_returns_only_requested_segments(self, client, mock_firestore_with_data):
+        from tests.conftest import MockDocumentSnapshot
+        mock_firestore_with_data.set_collection("transcripts", [
+            MockDocumentSnapshot("transcript_meeting_1", {
+                "meeting_id": "meeting_1",
+                "full_text": "a b c",
+                "word_count": 3,
+                "segments": [
+                    {"speaker": "Alice", "text": "a", "start_time": 0, "end_time": 1},
+                    {"speaker": "Bob", "text": "b", "start_time": 1, "end_time": 2},
+                    {"speaker": "Alice", "text": "c", "start_time": 2, "end_time": 3},
+                ],
+            }),
+        ])
+
+        ranged = client.get("/meetings/meeting_1/transcript?start=1&end=2").json()["data"]
+        assert [s["text"] for s in ranged["segments"]] == ["b"]
+        assert ranged["segment_range"] == [1, 2]
+        assert ranged["segment_count"] == 3
+        assert ranged["full_text"] == ""
+
+        full = client.get("/meetings/meeting_1/transcript").json()["data"]
+        assert len(full["segments"]) == 3
+        assert full["full_text"] == "a b c"
+
+
+class TestBatchProcess:
+    def test_queues_job_and_selects_in_background(self, client):
+        worker = MagicMock()
+        worker.find_pending = AsyncMock()
+        worker.create_job = AsyncMock(return_value={"id": "job_1", "status": "queued", "total": 0})
+        worker.run_job = AsyncMock()
+        with patch("app.api.meetings.get_batch_worker", return_value=worker):
+            response = client.post("/meetings/process/batch", json={"force": True})
+
+        assert response.status_code == 202
+        assert response.json()["data"]["id"] == "job_1"
+        # Selection happens in the job, not in the request
+        worker.find_pending.assert_not_awaited()
+        worker.run_job.assert_awaited_once_with("job_1", True, None)
+
+    def test_get_job_not_found(self, client):
+        response = client.get("/meetings/process/batch/missing")
+        assert response.status_code == 404
+
+
+class TestTalkTimeAnalytics:
+    def test_aggregates_stored_speaker_stats_in_range(self, client, mock_firestore_with_data):
+        from tests.conftest import MockDocumentSnapshot
+        mock_firestore_with_data.set_collection("meetings", [
+            MockDocumentSnapshot("m1", {"date": "2026-03-02T09:00:00", "has_transcript": True, "speaker_stats": [
+                {"speaker": "Alice", "talk_seconds": 60, "turns": 2, "interruptions": 0, "words": 90},
+            ]}),
+            MockDocumentSnapshot("m2", {"date": "2026-03-20T09:00:00", "has_transcript": True, "speaker_stats": [
+                {"speaker": "Bob", "talk_seconds": 30, "turns": 1, "interruptions": 1, "words": 20},
+            ]}),
+            MockDocumentSnapshot("m3", {"date": "2026-03-03T09:00:00", "has_transcript": True}),
+            MockDocumentSnapshot("m4", {"date": "2026-05-01T09:00:00", "has_transcript": True, "speaker_stats": [
+                {"speaker": "Carol", "talk_seconds": 99, "turns": 1, "interruptions": 0, "words": 5},
+            ]}),
+        ])
+
+        response = client.get("/meetings/analytics/talk-time?date_from=2026-03-01&date_to=2026-03-31&interval=month")
+
+        assert response.status_code == 200
+        data = response.json()["data"]
+        assert data["meetings"] == 2
+        assert data["meetings_without_stats"] == 1
+        assert [s["speaker"] for s in data["speakers"]] == ["Alice", "Bob"]
+        assert data["trend"] == [{"period": "2026-03", "talk_seconds": 90, "speakers": {"Alice": 60, "Bob": 30}}]
+
+    def test_uses_one_server_side_filter(self, client):
+        db = MagicMock()
+        collection = db.collection.return_value
+        collection.where.return_value.stream.return_value = iter([])
+        with patch("app.api.meetings.get_firestore_client", return_value=db):
+            response = client.get("/meetings/analytics/talk-time?date_from=2026-03-01&date_to=2026-03-31")
+            assert response.status_code == 200
+            # No upper bound on the string date, which would drop meetings on date_to
+            collection.where.assert_called_once_with("date", ">=", "2026-02-28")
+            collection.where.return_value.where.assert_not_called()
+
+            collection.reset_mock()
+            collection.where.return_value.stream.return_value = iter([])
+            client.get("/meetings/analytics/talk-time?date_from=2026-03-01&client_id=c1")
+            collection.where.assert_called_once_with("client_id", "==", "c1")
+            collection.where.return_value.where.assert_not_called()
+
+    def test_bare_date_to_includes_the_whole_day(self, client, mock_firestore_with_data):
+        from tests.conftest import MockDocumentSnapshot
+        mock_firestore_with_data.set_collection("meetings", [
+            MockDocumentSnapshot("m1", {"date": "2026-03-31T18:30:00", "client_id": "c1", "speaker_stats": [
+                {"speaker": "Alice", "talk_seconds": 60, "turns": 2, "interruptions": 0, "words": 90},
+            ]}),
+        ])
+
+        response = client.get("/meetings/analytics/talk-time?date_to=2026-03-31&client_id=c1")
+
+        assert response.json()["data"]["meetings"] == 1
+
+    def test_rejects_unknown_interval(self, client):
+        response = client.get("/meetings/analytics/talk-time?interval=year")
+        assert response.status_code == 422
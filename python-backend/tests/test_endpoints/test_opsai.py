@@ -110,3 +110,12 @@ class TestConfigureAlerts:
     def test_configure_alerts_empty_body(self, client):
         response = client.post("/opsai/alerts/configure", json={})
         assert response.status_code == 422
+
+
+class TestLLMUsage:
+    def test_llm_usage(self, client):
+        response = client.get("/opsai/llm-usage")
+        assert response.status_code == 200
+        data = response.json()["data"]
+        assert "max_concurrency" in data
+        assert data["sites"] == {}
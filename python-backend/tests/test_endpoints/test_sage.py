@@ -93,12 +93,14 @@ class TestSageSync:
             mock_sage.return_value = mock_client
 
             mock_service = MagicMock()
-            mock_service.sync_invoices = AsyncMock(return_value={"synced": 5})
-            mock_service.sync_payments = AsyncMock(return_value={"synced": 3})
+            mock_service.sync_changes = AsyncMock(return_value={
+                "invoices": {"synced": 5}, "payments": {"synced": 3},
+            })
             mock_sync.return_value = mock_service
 
             response = client.post("/sage/sync")
             assert response.status_code == 200
+            mock_service.sync_changes.assert_awaited_once_with()
 
 
 class TestSageInvoices:
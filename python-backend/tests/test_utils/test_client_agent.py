@@ -0,0 +1,103 @@
+"""Tests for ClientAgent context loading."""
+
+import asyncio
+
+import pytest
+from unittest.mock import patch, MagicMock, AsyncMock
+
+from tests.conftest import MockFirestoreClient, make_client_doc, make_task_doc
+
+
+@pytest.fixture(autouse=True)
+def _fresh_context_cache():
+    with patch("app.utils.client_context_cache._client_context_cache", None):
+        yield
+
+
+def _make_agent(data_sources):
+    from app.utils.client_agent import ClientAgent
+    with patch("app.utils.client_agent.get_rag_engine", return_value=MagicMock()):
+        return ClientAgent({"client_id": "client_1", "id": "agent_1", "data_sources": data_sources})
+
+
+def _db():
+    db = MockFirestoreClient()
+    db.set_collection("clients", [make_client_doc()])
+    db.set_collection("tasks", [make_task_doc()])
+    return db
+
+
+class TestGetClientContext:
+    @pytest.mark.asyncio
+    async def test_loads_firestore_context(self):
+        agent = _make_agent(["firestore"])
+        with patch("app.utils.client_agent.get_firestore_client", return_value=_db()):
+            context = await agent.get_client_context()
+
+        assert context["client"]["id"] == "client_1"
+        assert context["tasks"][0]["id"] == "task_1"
+        assert context["invoices"] == []
+
+    @pytest.mark.asyncio
+    async def test_drive_reads_run_concurrently(self):
+        agent = _make_agent(["drive"])
+        drive = MagicMock()
+        drive.is_configured.return_value = True
+        drive.search_files = AsyncMock(return_value=[
+            {"id": f"f{i}", "name": f"File {i}", "mimeType": "text/plain"} for i in range(5)
+        ])
+        active = 0
+        peak = 0
+
+        async def _read(file_id, mime_type=""):
+            nonlocal active, peak
+            active += 1
+            peak = max(peak, active)
+            await asyncio.sleep(0.01)
+            active -= 1
+            return f"Contents of {file_id} " * 5
+
+        drive.get_file_content = _read
+        with patch("app.utils.client_agent.get_firestore_client", return_value=_db()), \
+             patch("app.utils.gdrive_client.get_gdrive_client", return_value=drive):
+            context = await agent.get_client_context()
+
+        assert len(context["drive_file_contents"]) == 5
+        assert peak == 5
+
+    @pytest.mark.asyncio
+    async def test_slow_source_is_dropped(self):
+        agent = _make_agent(["calendar"])
+        cal = MagicMock()
+        cal.is_configured.return_value = True
+
+        async def _slow(**kwargs):
+            await asyncio.sleep(5)
+
+        cal.get_meetings = _slow
+        settings = MagicMock(CONTEXT_SOURCE_TIMEOUT_SECONDS=0.05)
+        with patch("app.utils.client_agent.get_firestore_client", return_value=_db()), \
+             patch("app.utils.context_sources.get_settings", return_value=settings), \
+             patch("app.utils.calendar_client.get_calendar_client", return_value=cal):
+            context = await agent.get_client_context()
+
+        assert context["calendar_meetings"] == []
+        assert context["client"]["id"] == "client_1"
+
+    @pytest.mark.asyncio
+    async def test_firestore_context_is_cached_per_client(self):
+        agent = _make_agent(["firestore"])
+        db = _db()
+        with patch("app.utils.client_agent.get_firestore_client", return_value=db):
+            await agent.get_client_context()
+            db.set_collection("tasks", [])
+            context = await agent.get_client_context()
+
+        assert context["tasks"][0]["id"] == "task_1"
+
+        from app.utils.client_context_cache import invalidate_client_context
+        invalidate_client_context("client_1")
+        with patch("app.utils.client_agent.get_firestore_client", return_value=db):
+            context = await agent.get_client_context()
+
+        assert context["tasks"] == []
@@ -0,0 +1,98 @@
+"""Tests for the per-client context cache."""
+
+import asyncio
+
+import pytest
+from unittest.mock import patch, AsyncMock
+
+from app.utils.client_context_cache import ClientContextCache
+
+
+class TestClientContextCache:
+    @pytest.mark.asyncio
+    async def test_hit_within_ttl(self):
+        cache = ClientContextCache(ttl_seconds=60)
+        loader = AsyncMock(return_value={"tasks": []})
+
+        await cache.get_or_load("client_1", loader)
+        await cache.get_or_load("client_1", loader)
+
+        assert loader.await_count == 1
+
+    @pytest.mark.asyncio
+    async def test_expired_entry_reloads(self):
+        cache = ClientContextCache(ttl_seconds=60)
+        loader = AsyncMock(return_value={"tasks": []})
+
+        with patch("app.utils.client_context_cache.time.monotonic", return_value=0.0):
+            await cache.get_or_load("client_1", loader)
+        with patch("app.utils.client_context_cache.time.monotonic", return_value=61.0):
+            await cache.get_or_load("client_1", loader)
+
+        assert loader.await_count == 2
+
+    @pytest.mark.asyncio
+    async def test_concurrent_misses_load_once(self):
+        cache = ClientContextCache(ttl_seconds=60)
+        calls = 0
+
+        async def _load():
+            nonlocal calls
+            calls += 1
+            await asyncio.sleep(0.01)
+            return {"tasks": []}
+
+        await asyncio.gather(*(cache.get_or_load("client_1", _load) for _ in range(5)))
+        assert calls == 1
+
+    @pytest.mark.asyncio
+    async def test_invalidate_one_client(self):
+        cache = ClientContextCache(ttl_seconds=60)
+        loader = AsyncMock(return_value={"tasks": []})
+        await cache.get_or_load("client_1", loader)
+        await cache.get_or_load("client_2", loader)
+
+        cache.invalidate("client_1")
+        await cache.get_or_load("client_1", loader)
+        await cache.get_or_load("client_2", loader)
+
+        assert loader.await_count == 3
+
+    @pytest.mark.asyncio
+    async def test_invalidation_during_load_is_not_overwritten(self):
+        cache = ClientContextCache(ttl_seconds=60)
+
+        async def _stale_load():
+            cache.invalidate("client_1")  # a write lands mid-load
+            return {"tasks": ["stale"]}
+
+        await cache.get_or_load("client_1", _stale_load)
+        fresh = await cache.get_or_load("client_1", AsyncMock(return_value={"tasks": ["fresh"]}))
+        assert fresh["tasks"] == ["fresh"]
+
+    @pytest.mark.asyncio
+    async def test_callers_get_independent_copies(self):
+        cache = ClientContextCache(ttl_seconds=60)
+        loader = AsyncMock(return_value={"tasks": []})
+
+        first = await cache.get_or_load("client_1", loader)
+        first["client_emails"] = ["x"]
+        second = await cache.get_or_load("client_1", loader)
+
+        assert "client_emails" not in second
+
+
+class TestWriteInvalidation:
+    def test_creating_task_invalidates_client(self, client):
+        with patch("app.api.tasks.invalidate_client_context") as invalidate:
+            response = client.post("/tasks/", json={"title": "New task", "client_id": "client_1"})
+
+        assert response.status_code == 200
+        invalidate.assert_called_once_with("client_1")
+
+    def test_deleting_time_log_invalidates_client(self, client):
+        with patch("app.api.time_logs.invalidate_client_context") as invalidate:
+            response = client.delete("/time-logs/tl_1")
+
+        assert response.status_code == 200
+        invalidate.assert_called_once_with("client_1")
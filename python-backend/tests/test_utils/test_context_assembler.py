@@ -0,0 +1,57 @@
+"""Tests for token-budgeted RAG context assembly."""
+
+from app.utils.context_assembler import assemble_context, estimate_tokens, merge_overlap
+
+
+def _r(chunk_id, content, document_id="doc_1", chunk_index=None):
+    metadata = {} if chunk_index is None else {"chunk_index": chunk_index}
+    return {"chunk_id": chunk_id, "document_id": document_id, "content": content,
+            "score": 1.0, "metadata": metadata}
+
+
+class TestMergeOverlap:
+    def test_removes_shared_boundary_text(self):
+        shared = "the retainer renews every March on the first"
+        merged = merge_overlap(f"Intro sentence. {shared}", f"{shared} business day.")
+        assert merged.count(shared) == 1
+        assert merged.endswith("business day.")
+
+    def test_short_coincidental_overlap_is_kept(self):
+        assert merge_overlap("ends with a", "a begins") == "ends with a\na begins"
+
+
+class TestAssembleContext:
+    def test_empty_results(self):
+        assert assemble_context([]) == {"context": "", "sources": [], "tokens": 0}
+
+    def test_adjacent_chunks_merged_in_document_order(self):
+        shared = "overlapping sentence carried between both chunks"
+        results = [
+            _r("c2", f"{shared} and the second half.", chunk_index=2),
+            _r("c1", f"First half of the section, {shared}", chunk_index=1),
+        ]
+        assembled = assemble_context(results)
+        assert assembled["context"].startswith("First half")
+        assert assembled["context"].count(shared) == 1
+        assert len(assembled["sources"]) == 2
+
+    def test_near_duplicates_removed(self):
+        text = "Acme Holdings signed a twelve month retainer worth two hundred thousand rand"
+        results = [
+            _r("a", text, document_id="doc_1"),
+            _r("b", text + ".", document_id="doc_2"),
+            _r("c", "Unrelated meeting notes about hiring plans", document_id="doc_3"),
+        ]
+        assembled = assemble_context(results)
+        assert [s["chunk_id"] for s in assembled["sources"]] == ["a", "c"]
+
+    def test_token_budget_respected(self):
+        results = [_r(f"c{i}", f"passage {i} " + "word " * 100, document_id=f"d{i}") for i in range(10)]
+        assembled = assemble_context(results, token_budget=300)
+        assert sum(estimate_tokens(s["content"]) for s in assembled["sources"]) <= 300
+        assert 0 < len(assembled["sources"]) < 10
+        assert assembled["sources"][0]["chunk_id"] == "c0"
+
+    def test_non_adjacent_chunks_separated(self):
+        results = [_r("a", "alpha section text", chunk_index=1), _r("b", "gamma section text", chunk_index=5)]
+        assert "\n...\n" in assemble_context(results)["context"]
@@ -0,0 +1,151 @@
+"""Tests for rolling conversation memory."""
+
+import pytest
+from unittest.mock import patch, AsyncMock, MagicMock
+
+from google.cloud.firestore import ArrayRemove, ArrayUnion
+
+from tests.conftest import MockFirestoreClient, MockDocumentSnapshot
+
+
+def _msg(i, role="user"):
+    return {"role": role, "content": f"message {i}", "created_at": f"2026-01-01T00:00:{i:02d}"}
+
+
+def _memory(window_size=4):
+    from app.utils.conversation_memory import ConversationMemory
+    return ConversationMemory(window_size=window_size)
+
+
+class TestRecordTurn:
+    def test_appends_only_new_messages(self):
+        update, overflowed = _memory().record_turn([_msg(0)], [_msg(1), _msg(2, "assistant")])
+        assert not overflowed
+        assert isinstance(update["memory_window"], ArrayUnion)
+        assert [m["content"] for m in update["memory_window"].values] == ["message 1", "message 2"]
+
+    def test_overflow_is_reported(self):
+        window = [_msg(i) for i in range(4)]
+        _, overflowed = _memory().record_turn(window, [_msg(4), _msg(5, "assistant")])
+        assert overflowed
+
+    def test_seed_writes_the_history_window(self):
+        update, _ = _memory().record_turn([_msg(0)], [_msg(1)], seed=True)
+        assert [m["content"] for m in update["memory_window"].values] == ["message 0", "message 1"]
+
+    def test_strips_message_fields(self):
+        stored = {**_msg(0), "id": "m1", "conversation_id": "c", "sources": [{"x": 1}]}
+        update, _ = _memory().record_turn([], [stored])
+        assert update["memory_window"].values == [_msg(0)]
+
+    def test_recent_reads_window_only(self):
+        conv = {"memory_window": [_msg(i) for i in reversed(range(6))], "memory_summary": "earlier"}
+        memory = _memory()
+        assert [m["content"] for m in memory.recent(conv)] == [f"message {i}" for i in range(2, 6)]
+        assert memory.summary(conv) == "earlier"
+        assert memory.has_memory(conv)
+        assert not memory.has_memory({})
+
+
+class TestSummarizePending:
+    @pytest.mark.asyncio
+    async def test_folds_overflow_into_summary(self):
+        db = MockFirestoreClient()
+        db.set_collection("conversations", [MockDocumentSnapshot("conv_1", {
+            "memory_summary": "old",
+            "memory_window": [_msg(i) for i in range(6)],
+        })])
+        memory = _memory()
+
+        with patch("app.utils.conversation_memory.get_firestore_client", return_value=db), \
+             patch.object(memory, "_summarize", new=AsyncMock(return_value="new summary")) as summarize:
+            updated = await memory.summarize_pending("conv_1")
+
+        assert updated
+        assert summarize.await_args.args == ("old", [_msg(0), _msg(1)])
+        conv = db.collection("conversations").document("conv_1").get().to_dict()
+        assert conv["memory_summary"] == "new summary"
+        assert isinstance(conv["memory_window"], ArrayRemove)
+        assert conv["memory_window"].values == [_msg(0), _msg(1)]
+
+    @pytest.mark.asyncio
+    async def test_folds_legacy_pending(self):
+        db = MockFirestoreClient()
+        db.set_collection("conversations", [MockDocumentSnapshot("conv_1", {
+            "memory_summary": "old",
+            "memory_window": [_msg(2)],
+            "memory_pending": [_msg(0), _msg(1)],
+        })])
+        memory = _memory()
+
+        with patch("app.utils.conversation_memory.get_firestore_client", return_value=db), \
+             patch.object(memory, "_summarize", new=AsyncMock(return_value="new summary")) as summarize:
+            assert await memory.summarize_pending("conv_1")
+
+        assert summarize.await_args.args == ("old", [_msg(0), _msg(1)])
+        conv = db.collection("conversations").document("conv_1").get().to_dict()
+        assert isinstance(conv["memory_pending"], ArrayRemove)
+
+    @pytest.mark.asyncio
+    async def test_failing_summary_caps_overflow(self):
+        db = MockFirestoreClient()
+        db.set_collection("conversations", [MockDocumentSnapshot("conv_1", {
+            "memory_window": [_msg(i) for i in range(10)],
+        })])
+        memory = _memory()
+        memory._max_unsummarized = 2
+
+        with patch("app.utils.conversation_memory.get_firestore_client", return_value=db), \
+             patch.object(memory, "_summarize", new=AsyncMock(side_effect=RuntimeError("down"))):
+            assert not await memory.summarize_pending("conv_1")
+
+        # 6 messages overflow the window of 4; all but the newest 2 are dropped
+        conv = db.collection("conversations").document("conv_1").get().to_dict()
+        assert conv["memory_window"].values == [_msg(i) for i in range(4)]
+
+    @pytest.mark.asyncio
+    async def test_failing_summary_caps_window_bytes(self):
+        db = MockFirestoreClient()
+        big = [{**_msg(i), "content": "x" * 1000} for i in range(10)]
+        db.set_collection("conversations", [MockDocumentSnapshot("conv_1", {"memory_window": big})])
+        memory = _memory()
+        memory._max_window_bytes = 7000
+
+        with patch("app.utils.conversation_memory.get_firestore_client", return_value=db), \
+             patch.object(memory, "_summarize", new=AsyncMock(return_value=None)):
+            assert not await memory.summarize_pending("conv_1")
+
+        # ~1 KB each: the oldest 4 of the 6 overflowed go to get under 7000 bytes
+        conv = db.collection("conversations").document("conv_1").get().to_dict()
+        assert conv["memory_window"].values == big[:4]
+
+    @pytest.mark.asyncio
+    async def test_empty_summary_keeps_overflow(self):
+        db = MockFirestoreClient()
+        db.set_collection("conversations", [MockDocumentSnapshot("conv_1", {
+            "memory_summary": "old",
+            "memory_window": [_msg(i) for i in range(6)],
+        })])
+        memory = _memory()
+        response = MagicMock(text="  ")
+        gateway = MagicMock(is_configured=MagicMock(return_value=True), generate=AsyncMock(return_value=response))
+
+        with patch("app.utils.conversation_memory.get_firestore_client", return_value=db), \
+             patch("app.utils.conversation_memory.get_llm_gateway", return_value=gateway):
+            assert not await memory.summarize_pending("conv_1")
+
+        conv = db.collection("conversations").document("conv_1").get().to_dict()
+        assert conv["memory_summary"] == "old"
+        assert len(conv["memory_window"]) == 6
+
+    @pytest.mark.asyncio
+    async def test_nothing_pending_is_noop(self):
+        db = MockFirestoreClient()
+        db.set_collection("conversations", [MockDocumentSnapshot("conv_1", {"memory_summary": "old"})])
+        memory = _memory()
+
+        with patch("app.utils.conversation_memory.get_firestore_client", return_value=db), \
+             patch.object(memory, "_summarize", new=AsyncMock()) as summarize:
+            assert not await memory.summarize_pending("conv_1")
+
+        summarize.assert_not_awaited()
@@ -0,0 +1,252 @@
+"""Tests for the background document ingestion pipeline."""
+
+import asyncio
+
+import pytest
+from unittest.mock import patch, MagicMock, AsyncMock
+
+from tests.conftest import MockFirestoreClient, MockDocumentSnapshot
+
+
+def _make_db(doc_data: dict, chunks: list[str] | None = None) -> MockFirestoreClient:
+    db = MockFirestoreClient()
+    db.set_collection("documents", [MockDocumentSnapshot("doc_1", doc_data)])
+    if chunks is not None:
+        db.set_collection("document_chunks", [
+            MockDocumentSnapshot(f"doc_1_{i:05d}", {
+                "document_id": "doc_1", "content": c, "chunk_index": i, "metadata": {},
+            })
+            for i, c in enumerate(chunks)
+        ])
+    return db
+
+
+def _persist_chunks(db):
+    """Make write_chunks land in the mock collection so the embed stage can read them."""
+    def _write(doc_id, chunks, metadata=None):
+        chunks = list(chunks)
+        db.set_collection("document_chunks", [
+            MockDocumentSnapshot(f"{doc_id}_{i:05d}", {
+                "document_id": doc_id, "content": c["content"], "chunk_index": i,
+                "metadata": c["metadata"],
+            })
+            for i, c in enumerate(chunks)
+        ])
+        return len(chunks)
+    return _write
+
+
+def _make_worker(tmp_path, indexed=None):
+    from app.utils.document_ingestion import DocumentIngestionWorker
+    store = MagicMock()
+    store.index_document_chunks = AsyncMock(
+        side_effect=indexed or (lambda doc_id, batch: len(batch))
+    )
+    worker = DocumentIngestionWorker(vector_store=store, staging_dir=str(tmp_path))
+    # The mock client has no transactions; claims are exercised separately
+    worker._claim = MagicMock(return_value=True)
+    return worker, store
+
+
+class TestIngestionPipeline:
+    @pytest.mark.asyncio
+    async def test_full_pipeline_marks_ready(self, tmp_path):
+        db = _make_db({"filename": "a.txt", "status": "processing", "agent_id": "agent_1"})
+        worker, store = _make_worker(tmp_path)
+        worker.stage_upload("doc_1", b"Hello world. " * 200)
+
+        with patch("app.utils.document_ingestion.get_firestore_client", return_value=db), \
+             patch("app.utils.document_ingestion.DocumentProcessor.write_chunks",
+                   side_effect=_persist_chunks(db)):
+            await worker.run("doc_1")
+
+        doc = db.collection("documents").document("doc_1").get().to_dict()
+        assert doc["status"] == "ready"
+        assert doc["ingestion_stage"] == "done"
+        assert doc["chunks_total"] > 0
+        assert doc["chunks_done"] == doc["chunks_total"]
+        assert store.index_document_chunks.await_count >= 1
+        indexed_batch = store.index_document_chunks.await_args_list[0].args[1]
+        assert indexed_batch[0]["metadata"]["agent_id"] == "agent_1"
+        assert indexed_batch[0]["metadata"]["page_start"] == 1
+        assert doc["word_count"] == 400
+        assert not (tmp_path / "doc_1").exists()
+
+    @pytest.mark.asyncio
+    async def test_resumes_from_chunks_done(self, tmp_path):
+        db = _make_db(
+            {"filename": "a.txt", "status": "processing",
+             "ingestion_stage": "embedding", "chunks_done": 1, "chunks_total": 3},
+            chunks=["zero", "one", "two"],
+        )
+        worker, store = _make_worker(tmp_path)
+
+        with patch("app.utils.document_ingestion.get_firestore_client", return_value=db):
+            await worker.run("doc_1")
+
+        batch = store.index_document_chunks.await_args.args[1]
+        assert [c["content"] for c in batch] == ["one", "two"]
+        doc = db.collection("documents").document("doc_1").get().to_dict()
+        assert doc["status"] == "ready"
+        assert doc["chunks_done"] == 3
+
+    @pytest.mark.asyncio
+    async def test_missing_staged_upload_marks_error(self, tmp_path):
+        db = _make_db({"filename": "a.txt", "status": "processing", "ingestion_stage": "queued"})
+        worker, _ = _make_worker(tmp_path)
+
+        with patch("app.utils.document_ingestion.get_firestore_client", return_value=db):
+            await worker.run("doc_1")
+
+        doc = db.collection("documents").document("doc_1").get().to_dict()
+        assert doc["status"] == "error"
+        assert "re-upload" in doc["error_message"]
+
+    @pytest.mark.asyncio
+    async def test_embedding_failure_marks_error(self, tmp_path):
+        db = _make_db(
+            {"filename": "a.txt", "status": "processing", "ingestion_stage": "embedding"},
+            chunks=["zero"],
+        )
+        worker, _ = _make_worker(tmp_path, indexed=lambda doc_id, batch: 0)
+
+        with patch("app.utils.document_ingestion.get_firestore_client", return_value=db):
+            await worker.run("doc_1")
+
+        doc = db.collection("documents").document("doc_1").get().to_dict()
+        assert doc["status"] == "error"
+        assert doc.get("chunks_done", 0) == 0
+
+    @pytest.mark.asyncio
+    async def test_partial_embedding_failure_keeps_watermark(self, tmp_path):
+        db = _make_db(
+            {"filename": "a.txt", "status": "processing", "ingestion_stage": "embedding"},
+            chunks=["one", "two", "three"],
+        )
+        worker, _ = _make_worker(tmp_path, indexed=lambda doc_id, batch: len(batch) - 1)
+
+        with patch("app.utils.document_ingestion.get_firestore_client", return_value=db):
+            await worker.run("doc_1")
+
+        doc = db.collection("documents").document("doc_1").get().to_dict()
+        assert doc["status"] == "error"
+        assert doc.get("chunks_done", 0) == 0
+        assert doc["ingestion_stage"] == "embedding"
+
+    @pytest.mark.asyncio
+    async def test_long_chunking_heartbeats_the_claim(self, tmp_path):
+        import itertools
+        import time
+
+        db = _make_db({"filename": "a.txt", "status": "processing"})
+        worker, _ = _make_worker(tmp_path)
+        worker._heartbeat_interval = 0.01
+        worker.stage_upload("doc_1", b"Hello world.")
+        ticks = itertools.count(1)
+        seen = []
+
+        def slow_chunk(doc_id, content, filename):
+            time.sleep(0.1)
+            seen.append(db.collection("documents").document("doc_1").get().to_dict()["ingestion_updated_at"])
+            return {"chunk_count": 0, "word_count": 2}
+
+        with patch("app.utils.document_ingestion.get_firestore_client", return_value=db), \
+             patch("app.utils.document_ingestion.DocumentProcessor.chunk_document", side_effect=slow_chunk), \
+             patch("app.utils.document_ingestion._now_iso", side_effect=lambda: f"t{next(ticks)}"):
+            await worker.run("doc_1")
+
+        # "t1" is the stage-start write; heartbeats moved it on while chunking ran
+        assert seen[0] != "t1"
+
+
+class TestResumePending:
+    @pytest.mark.asyncio
+    async def test_only_stale_processing_documents_resume(self, tmp_path):
+        db = MockFirestoreClient()
+        db.set_collection("documents", [
+            MockDocumentSnapshot("stale", {"status": "processing", "ingestion_updated_at": "2020-01-01T00:00:00+00:00"}),
+            MockDocumentSnapshot("fresh", {"status": "processing", "ingestion_updated_at": "2999-01-01T00:00:00+00:00"}),
+            MockDocumentSnapshot("done", {"status": "ready"}),
+        ])
+        worker, _ = _make_worker(tmp_path)
+
+        with patch("app.utils.document_ingestion.get_firestore_client", return_value=db), \
+             patch.object(worker, "_claim", return_value=True) as claim, \
+             patch.object(worker, "_run", new=AsyncMock()) as mock_run:
+            resumed = await worker.resume_pending()
+
+        assert resumed == 1
+        claim.assert_called_once_with("stale", "2020-01-01T00:00:00+00:00")
+        mock_run.assert_awaited_once_with("stale")
+
+    @pytest.mark.asyncio
+    async def test_documents_claimed_elsewhere_are_skipped(self, tmp_path):
+        db = MockFirestoreClient()
+        db.set_collection("documents", [
+            MockDocumentSnapshot(f"stale_{i}", {"status": "processing", "ingestion_updated_at": "2020-01-01"})
+            for i in range(4)
+        ])
+        worker, _ = _make_worker(tmp_path)
+        in_flight = 0
+        peak = 0
+
+        async def fake_run(doc_id):
+            nonlocal in_flight, peak
+            in_flight += 1
+            peak = max(peak, in_flight)
+            await asyncio.sleep(0.01)
+            in_flight -= 1
+
+        with patch("app.utils.document_ingestion.get_firestore_client", return_value=db), \
+             patch.object(worker, "_claim", side_effect=lambda doc_id, observed: doc_id != "stale_0"), \
+             patch.object(worker, "_run", new=fake_run):
+            resumed = await worker.resume_pending()
+
+        assert resumed == 3
+        assert peak <= 2
+
+    def test_claim_fails_closed_without_transactions(self):
+        from app.utils.document_ingestion import DocumentIngestionWorker
+        db = _make_db({"status": "processing", "ingestion_updated_at": "2020-01-01"})
+        with patch("app.utils.document_ingestion.get_firestore_client", return_value=db):
+            assert DocumentIngestionWorker._claim("doc_1", "2020-01-01") is False
+
+    @pytest.mark.asyncio
+    async def test_resume_skips_upload_still_running(self, tmp_path):
+        from app.utils.document_ingestion import _now_iso
+        db = _make_db({"status": "processing", "ingestion_stage": "queued", "ingestion_updated_at": _now_iso()})
+        uploader, _ = _make_worker(tmp_path)
+        other, _ = _make_worker(tmp_path)
+        started = asyncio.Event()
+        release = asyncio.Event()
+
+        async def slow_run(doc_id):
+            started.set()
+            await release.wait()
+
+        with patch("app.utils.document_ingestion.get_firestore_client", return_value=db), \
+             patch.object(uploader, "_run", new=slow_run), \
+             patch.object(other, "_run", new=AsyncMock()) as other_run:
+            upload = asyncio.create_task(uploader.run("doc_1"))
+            await started.wait()
+            # Another worker starts up while the upload is being ingested
+            assert await other.resume_pending() == 0
+            release.set()
+            await upload
+
+        uploader._claim.assert_called_once()
+        other._claim.assert_not_called()
+        other_run.assert_not_awaited()
+
+    @pytest.mark.asyncio
+    async def test_run_skips_document_claimed_elsewhere(self, tmp_path):
+        db = _make_db({"status": "processing", "ingestion_updated_at": "2026-01-01T00:00:00+00:00"})
+        worker, _ = _make_worker(tmp_path)
+        worker._claim.return_value = False
+
+        with patch("app.utils.document_ingestion.get_firestore_client", return_value=db), \
+             patch.object(worker, "_run", new=AsyncMock()) as mock_run:
+            await worker.run("doc_1", "2026-01-01T00:00:00+00:00")
+
+        worker._claim.assert_called_once_with("doc_1", "2026-01-01T00:00:00+00:00")
+        mock_run.assert_not_awaited()
@@ -70,3 +70,79 @@ class TestChunkText:
         assert len(chunks) > 1
         for chunk in chunks:
             assert len(chunk) > 0
+
+
+class TestIterPages:
+    def test_txt_splits_on_form_feed(self):
+        pages = list(DocumentProcessor.iter_pages(b"first page\fsecond page", "a.txt"))
+        assert pages == [(1, "first page"), (2, "second page")]
+
+    def test_is_lazy(self):
+        pages = DocumentProcessor.iter_pages(b"text", "a.txt")
+        assert not isinstance(pages, list)
+        assert next(pages) == (1, "text")
+
+
+class TestIterChunks:
+    def test_does_not_cut_sentences(self):
+        sentence = "The quarterly review covered revenue and retention in detail."
+        text = " ".join([sentence] * 40)
+        chunks = list(DocumentProcessor.iter_chunks([(1, text)], max_tokens=100, overlap_tokens=0))
+        assert len(chunks) > 1
+        for chunk in chunks:
+            assert chunk["content"].startswith("The quarterly")
+            assert chunk["content"].endswith("detail.")
+
+    def test_respects_token_budget(self):
+        text = "\n\n".join(f"Paragraph {i} has a handful of words in it." for i in range(60))
+        chunks = list(DocumentProcessor.iter_chunks([(1, text)], max_tokens=50, overlap_tokens=10))
+        assert all(len(c["content"]) <= 50 * 4 for c in chunks)
+
+    def test_overlap_carries_trailing_paragraph(self):
+        paragraphs = [f"Paragraph number {i} says something useful." for i in range(12)]
+        chunks = list(DocumentProcessor.iter_chunks(
+            [(1, "\n\n".join(paragraphs))], max_tokens=40, overlap_tokens=15,
+        ))
+        last_of_first = chunks[0]["content"].split("\n\n")[-1]
+        assert chunks[1]["content"].startswith(last_of_first)
+
+    def test_heading_starts_new_chunk(self):
+        text = "Intro paragraph.\n\nPRICING\nThe retainer is R50,000 per month."
+        chunks = list(DocumentProcessor.iter_chunks([(1, text)], max_tokens=400, overlap_tokens=50))
+        assert len(chunks) == 2
+        assert chunks[0]["metadata"]["heading"] is None
+        assert chunks[1]["content"].startswith("PRICING")
+        assert chunks[1]["metadata"]["heading"] == "PRICING"
+
+    def test_page_numbers_in_metadata(self):
+        pages = [(1, "Short page one text."), (2, "Short page two text."), (3, "x " * 300)]
+        chunks = list(DocumentProcessor.iter_chunks(pages, max_tokens=60, overlap_tokens=0))
+        assert chunks[0]["metadata"]["page_start"] == 1
+        assert chunks[0]["metadata"]["page_end"] == 2
+        assert chunks[-1]["metadata"]["page_end"] == 3
+
+    def test_overlong_sentence_is_split(self):
+        chunks = list(DocumentProcessor.iter_chunks([(1, "word " * 500)], max_tokens=50, overlap_tokens=0))
+        assert len(chunks) > 1
+        assert all(len(c["content"]) <= 50 * 4 for c in chunks)
+
+    def test_empty_pages_yield_nothing(self):
+        assert list(DocumentProcessor.iter_chunks([(1, "  \n\n ")])) == []
+
+
+class TestWriteChunks:
+    def test_writes_generator_with_chunk_metadata(self):
+        from unittest.mock import patch
+        from tests.conftest import MockBatch, MockFirestoreClient
+
+        db = MockFirestoreClient()
+        batch = MockBatch()
+        db.batch = lambda: batch
+        chunks = ({"content": f"c{i}", "metadata": {"page_start": i}} for i in range(3))
+        with patch("app.utils.document_processor.get_firestore_client", return_value=db):
+            written = DocumentProcessor.write_chunks("doc_1", chunks, metadata={"source": "upload"})
+
+        assert written == 3
+        _, ref, data = batch._operations[-1]
+        assert ref.id == "doc_1_00002"
+        assert data["metadata"] == {"source": "upload", "page_start": 2}
@@ -0,0 +1,116 @@
+"""Tests for the content-hash embedding cache."""
+
+import pytest
+from unittest.mock import patch, MagicMock
+
+from tests.conftest import MockFirestoreClient, MockDocumentSnapshot
+
+
+class TestCacheKey:
+    def test_whitespace_is_normalised(self):
+        from app.utils.embedding_cache import embedding_cache_key
+        assert embedding_cache_key("m", "hello   world\n") == embedding_cache_key("m", " hello world")
+
+    def test_model_is_part_of_key(self):
+        from app.utils.embedding_cache import embedding_cache_key
+        assert embedding_cache_key("m1", "text") != embedding_cache_key("m2", "text")
+
+
+class TestLocalTier:
+    @pytest.mark.asyncio
+    async def test_put_then_get(self):
+        from app.utils.embedding_cache import EmbeddingCache
+        cache = EmbeddingCache(max_entries=4)
+        await cache.put("m", "query", [0.1, 0.2])
+        assert await cache.get("m", "query") == [0.1, 0.2]
+        assert cache.hits == 1
+
+    @pytest.mark.asyncio
+    async def test_miss_returns_none(self):
+        from app.utils.embedding_cache import EmbeddingCache
+        cache = EmbeddingCache(max_entries=4)
+        assert await cache.get("m", "unknown") is None
+        assert cache.misses == 1
+
+    @pytest.mark.asyncio
+    async def test_lru_eviction(self):
+        from app.utils.embedding_cache import EmbeddingCache
+        cache = EmbeddingCache(max_entries=2)
+        await cache.put("m", "a", [1.0])
+        await cache.put("m", "b", [2.0])
+        await cache.get("m", "a")  # "a" becomes most recently used
+        await cache.put("m", "c", [3.0])
+        assert len(cache) == 2
+        assert await cache.get("m", "b") is None
+        assert await cache.get("m", "a") == [1.0]
+
+
+class TestPersistentTier:
+    @pytest.mark.asyncio
+    async def test_reads_through_to_firestore(self):
+        from app.utils.embedding_cache import (
+            EMBEDDING_CACHE_COLLECTION,
+            EmbeddingCache,
+            embedding_cache_key,
+        )
+        db = MockFirestoreClient()
+        key = embedding_cache_key("m", "chunk text")
+        db.set_collection(EMBEDDING_CACHE_COLLECTION, [
+            MockDocumentSnapshot(key, {"model": "m", "embedding": [0.5, 0.5]}),
+        ])
+        cache = EmbeddingCache(max_entries=4)
+        with patch("app.utils.embedding_cache.get_firestore_client", return_value=db):
+            assert await cache.get("m", "chunk text") is None
+            assert await cache.get("m", "chunk text", persistent=True) == [0.5, 0.5]
+        # Promoted into the local tier
+        assert await cache.get("m", "chunk text") == [0.5, 0.5]
+
+    @pytest.mark.asyncio
+    async def test_writes_packed_embeddings(self):
+        from app.utils.embedding_cache import (
+            EMBEDDING_CACHE_COLLECTION,
+            EmbeddingCache,
+            embedding_cache_key,
+        )
+        db = MockFirestoreClient()
+        writer = EmbeddingCache(max_entries=4)
+        with patch("app.utils.embedding_cache.get_firestore_client", return_value=db):
+            await writer.put("m", "chunk text", [0.5, -0.25], persistent=True)
+            stored = db.collection(EMBEDDING_CACHE_COLLECTION).document(
+                embedding_cache_key("m", "chunk text")
+            ).get().to_dict()
+            # A second worker reads the packed entry back
+            embedding = await EmbeddingCache(max_entries=4).get("m", "chunk text", persistent=True)
+
+        assert "embedding" not in stored
+        assert isinstance(stored["embedding_blob"], bytes)
+        assert embedding == pytest.approx([0.5, -0.25], abs=0.01)
+
+    @pytest.mark.asyncio
+    async def test_firestore_failure_is_a_miss(self):
+        from app.utils.embedding_cache import EmbeddingCache
+        db = MagicMock()
+        db.collection.side_effect = RuntimeError("firestore down")
+        cache = EmbeddingCache(max_entries=4)
+        with patch("app.utils.embedding_cache.get_firestore_client", return_value=db):
+            assert await cache.get("m", "x", persistent=True) is None
+            await cache.put("m", "x", [1.0], persistent=True)
+        assert await cache.get("m", "x") == [1.0]
+
+
+class TestVectorStoreUsesCache:
+    @pytest.mark.asyncio
+    async def test_repeat_query_skips_gemini(self):
+        from app.utils.embedding_cache import EmbeddingCache
+        with patch("app.utils.vector_store.get_settings") as mock_settings, \
+             patch("app.utils.vector_store.genai") as mock_genai, \
+             patch("app.utils.vector_store.get_embedding_cache", return_value=EmbeddingCache(max_entries=4)):
+            mock_settings.return_value = MagicMock(GEMINI_API_KEY="test-key")
+            mock_genai.embed_content.return_value = {"embedding": [0.1, 0.2, 0.3]}
+            from app.utils.vector_store import VectorStore
+            store = VectorStore()
+            first = await store.generate_embedding("what is our cash position?")
+            second = await store.generate_embedding("what is our  cash position?")
+
+        assert first == second == [0.1, 0.2, 0.3]
+        assert mock_genai.embed_content.call_count == 1
@@ -0,0 +1,79 @@
+"""Tests for Fireflies pagination and batched transcript fetching."""
+
+import pytest
+from unittest.mock import AsyncMock
+
+
+def _client(page_size=2, max_pages=10, batch_size=2, concurrency=2):
+    from app.utils.fireflies_client import FirefliesClient
+    client = FirefliesClient()
+    client.settings = client.settings.model_copy(update={
+        "FIREFLIES_API_KEY": "key",
+        "FIREFLIES_PAGE_SIZE": page_size,
+        "FIREFLIES_MAX_PAGES": max_pages,
+        "FIREFLIES_TRANSCRIPT_BATCH_SIZE": batch_size,
+        "FIREFLIES_MAX_CONCURRENT_REQUESTS": concurrency,
+    })
+    return client
+
+
+class TestListingPagination:
+    @pytest.mark.asyncio
+    async def test_pages_until_short_page(self):
+        client = _client()
+        listing = [{"id": f"t{i}"} for i in range(5)]
+
+        async def page(query, variables, allow_partial=False):
+            skip, limit = variables["skip"], variables["limit"]
+            return {"transcripts": listing[skip:skip + limit]}
+
+        client._graphql_request = AsyncMock(side_effect=page)
+        transcripts = await client.get_transcripts()
+
+        assert [t["id"] for t in transcripts] == [f"t{i}" for i in range(5)]
+        skips = sorted(c.args[1]["skip"] for c in client._graphql_request.await_args_list)
+        assert skips == [0, 2, 4, 6]  # two concurrent waves of two pages
+
+    @pytest.mark.asyncio
+    async def test_stops_at_max_pages_and_dedupes(self):
+        from app.utils.fireflies_client import FirefliesListingTruncated
+        client = _client(max_pages=2)
+        client._graphql_request = AsyncMock(return_value={"transcripts": [{"id": "a"}, {"id": "b"}]})
+
+        with pytest.raises(FirefliesListingTruncated) as truncated:
+            await client.get_transcripts()
+
+        assert [t["id"] for t in truncated.value.transcripts] == ["a", "b"]
+        assert client._graphql_request.await_count == 2
+
+
+class TestBatchedTranscripts:
+    @pytest.mark.asyncio
+    async def test_aliases_several_transcripts_per_request(self):
+        client = _client(batch_size=2)
+
+        async def batch(query, variables, allow_partial=False):
+            assert allow_partial
+            # One alias per requested id; "missing" resolves to null
+            return {
+                alias.replace("id", "t"): (None if tid == "missing" else {"id": tid})
+                for alias, tid in variables.items()
+            }
+
+        client._graphql_request = AsyncMock(side_effect=batch)
+        result = await client.get_transcripts_batch(["a", "b", "c", "missing", "a"])
+
+        assert result == {"a": {"id": "a"}, "b": {"id": "b"}, "c": {"id": "c"}}
+        assert client._graphql_request.await_count == 2
+        first_query = client._graphql_request.await_args_list[0].args[0]
+        assert "t0: transcript(id: $id0)" in first_query
+        assert "t1: transcript(id: $id1)" in first_query
+
+    @pytest.mark.asyncio
+    async def test_failed_batch_is_omitted(self):
+        client = _client(batch_size=1)
+        client._graphql_request = AsyncMock(side_effect=[{"t0": {"id": "a"}}, RuntimeError("429")])
+
+        result = await client.get_transcripts_batch(["a", "b"])
+
+        assert result == {"a": {"id": "a"}}
@@ -0,0 +1,47 @@
+"""Tests for BM25 keyword retrieval and reciprocal rank fusion."""
+
+from app.utils.lexical_index import BM25Index, reciprocal_rank_fusion, tokenize
+
+
+class TestTokenize:
+    def test_compound_tokens_indexed_whole_and_split(self):
+        terms = tokenize("Invoice INV-0042 for Acme")
+        assert "inv-0042" in terms
+        assert "inv" in terms and "0042" in terms
+
+    def test_stopwords_dropped(self):
+        assert tokenize("the cost of the project") == ["cost", "project"]
+
+
+class TestBM25Index:
+    def test_exact_identifier_ranks_first(self):
+        index = BM25Index([
+            ("a", "Quarterly retainer invoice for consulting services"),
+            ("b", "Invoice INV-0042 was paid late by Acme Holdings"),
+            ("c", "Project kickoff notes and timeline"),
+        ])
+        results = index.search("INV-0042", top_k=3)
+        assert results[0][0] == "b"
+        assert all(pid != "c" for pid, _ in results)
+
+    def test_rare_terms_outweigh_common_terms(self):
+        index = BM25Index([
+            ("a", "client update client update client"),
+            ("b", "client update for Zephyr"),
+        ])
+        assert index.search("Zephyr client", top_k=1)[0][0] == "b"
+
+    def test_empty_index(self):
+        assert BM25Index([]).search("anything") == []
+
+    def test_no_matching_terms(self):
+        assert BM25Index([("a", "hello world")]).search("unrelated") == []
+
+
+class TestReciprocalRankFusion:
+    def test_results_in_both_lists_rank_highest(self):
+        vector = [{"chunk_id": "x"}, {"chunk_id": "y"}]
+        lexical = [{"chunk_id": "y"}, {"chunk_id": "z"}]
+        fused = reciprocal_rank_fusion([vector, lexical])
+        assert fused[0]["chunk_id"] == "y"
+        assert {r["chunk_id"] for r in fused} == {"x", "y", "z"}
@@ -0,0 +1,144 @@
+"""Tests for the exact-match LLM response cache."""
+
+from datetime import datetime, timedelta, timezone
+
+import google.generativeai as genai
+import pytest
+from unittest.mock import patch, AsyncMock, MagicMock
+
+from tests.conftest import MockFirestoreClient, MockDocumentSnapshot
+
+
+class TestCacheKey:
+    def test_every_input_is_part_of_key(self):
+        from app.utils.llm_cache import llm_cache_key
+        base = llm_cache_key("m", "sys", "prompt", genai.GenerationConfig(temperature=0.3))
+        assert base == llm_cache_key("m", "sys", "prompt", genai.GenerationConfig(temperature=0.3))
+        assert base != llm_cache_key("m2", "sys", "prompt", genai.GenerationConfig(temperature=0.3))
+        assert base != llm_cache_key("m", "sys2", "prompt", genai.GenerationConfig(temperature=0.3))
+        assert base != llm_cache_key("m", "sys", "prompt2", genai.GenerationConfig(temperature=0.3))
+        assert base != llm_cache_key("m", "sys", "prompt", genai.GenerationConfig(temperature=0.4))
+
+
+class TestLocalTier:
+    @pytest.mark.asyncio
+    async def test_put_then_get(self):
+        from app.utils.llm_cache import LLMResponseCache
+        cache = LLMResponseCache(max_entries=4)
+        with patch("app.utils.llm_cache.get_firestore_client", return_value=MockFirestoreClient()):
+            await cache.put("k", "briefing", "cached text")
+            assert await cache.get("k") == "cached text"
+        assert cache.hits == 1
+
+    @pytest.mark.asyncio
+    async def test_expired_entry_is_a_miss(self):
+        from app.utils.llm_cache import LLMResponseCache
+        cache = LLMResponseCache(max_entries=4)
+        with patch("app.utils.llm_cache.get_firestore_client", return_value=MockFirestoreClient()):
+            with patch("app.utils.llm_cache.time.monotonic", return_value=0.0):
+                await cache.put("k", "proactive_summary", "text")
+            with patch("app.utils.llm_cache.time.monotonic", return_value=3601.0):
+                assert await cache.get("k") is None
+
+
+class TestPersistentTier:
+    @pytest.mark.asyncio
+    async def test_reads_through_to_firestore(self):
+        from app.utils.llm_cache import LLM_CACHE_COLLECTION, LLMResponseCache
+        db = MockFirestoreClient()
+        expires = datetime.now(timezone.utc) + timedelta(hours=1)
+        db.set_collection(LLM_CACHE_COLLECTION, [
+            MockDocumentSnapshot("k", {"text": "from firestore", "expires_at": expires}),
+        ])
+        cache = LLMResponseCache(max_entries=4)
+        with patch("app.utils.llm_cache.get_firestore_client", return_value=db):
+            assert await cache.get("k") == "from firestore"
+        # Promoted into the local tier
+        with patch("app.utils.llm_cache.get_firestore_client", side_effect=RuntimeError("offline")):
+            assert await cache.get("k") == "from firestore"
+
+    @pytest.mark.asyncio
+    async def test_expired_firestore_entry_is_ignored(self):
+        from app.utils.llm_cache import LLM_CACHE_COLLECTION, LLMResponseCache
+        db = MockFirestoreClient()
+        expired = datetime.now(timezone.utc) - timedelta(seconds=1)
+        db.set_collection(LLM_CACHE_COLLECTION, [
+            MockDocumentSnapshot("k", {"text": "stale", "expires_at": expired}),
+        ])
+        cache = LLMResponseCache(max_entries=4)
+        with patch("app.utils.llm_cache.get_firestore_client", return_value=db):
+            assert await cache.get("k") is None
+
+    @pytest.mark.asyncio
+    async def test_firestore_failure_is_a_miss(self):
+        from app.utils.llm_cache import LLMResponseCache
+        db = MagicMock()
+        db.collection.side_effect = RuntimeError("firestore down")
+        cache = LLMResponseCache(max_entries=4)
+        with patch("app.utils.llm_cache.get_firestore_client", return_value=db):
+            assert await cache.get("k") is None
+            await cache.put("k", "briefing", "text")
+            assert await cache.get("k") == "text"
+
+
+class TestGatewayGenerateText:
+    def _model(self, text="generated"):
+        model = MagicMock()
+        model.generate_content_async = AsyncMock(return_value=MagicMock(text=text, usage_metadata=None))
+        return model
+
+    @pytest.mark.asyncio
+    async def test_repeat_request_is_served_from_cache(self):
+        from app.utils.llm_gateway import get_llm_gateway
+        gateway = get_llm_gateway()
+        model = self._model()
+        with patch("app.utils.llm_gateway.genai.GenerativeModel", return_value=model), \
+             patch("app.utils.llm_cache.get_firestore_client", return_value=MockFirestoreClient()):
+            first = await gateway.generate_text("briefing", "meeting", system_instruction="sys", cache=True)
+            second = await gateway.generate_text("briefing", "meeting", system_instruction="sys", cache=True)
+
+        assert first == second == "generated"
+        assert model.generate_content_async.await_count == 1
+        assert gateway.stats()["sites"]["briefing"]["cache_hits"] == 1
+
+    @pytest.mark.asyncio
+    async def test_bypass_regenerates_and_replaces_entry(self):
+        from app.utils.llm_gateway import get_llm_gateway
+        gateway = get_llm_gateway()
+        model = self._model()
+        with patch("app.utils.llm_gateway.genai.GenerativeModel", return_value=model), \
+             patch("app.utils.llm_cache.get_firestore_client", return_value=MockFirestoreClient()):
+            await gateway.generate_text("briefing", "meeting", cache=True)
+            model.generate_content_async.return_value = MagicMock(text="fresh", usage_metadata=None)
+            refreshed = await gateway.generate_text("briefing", "meeting", cache=True, bypass_cache=True)
+            again = await gateway.generate_text("briefing", "meeting", cache=True)
+
+        assert refreshed == again == "fresh"
+        assert model.generate_content_async.await_count == 2
+
+    @pytest.mark.asyncio
+    async def test_uncached_calls_always_generate(self):
+        from app.utils.llm_gateway import get_llm_gateway
+        gateway = get_llm_gateway()
+        model = self._model()
+        with patch("app.utils.llm_gateway.genai.GenerativeModel", return_value=model):
+            await gateway.generate_text("chat", "hi")
+            await gateway.generate_text("chat", "hi")
+
+        assert model.generate_content_async.await_count == 2
+
+    @pytest.mark.asyncio
+    async def test_invalid_text_is_not_cached(self):
+        from app.utils.llm_gateway import get_llm_gateway
+        gateway = get_llm_gateway()
+        model = self._model(text='{"summary": [')
+        is_closed = lambda text: text.endswith("}")  # noqa: E731
+        with patch("app.utils.llm_gateway.genai.GenerativeModel", return_value=model), \
+             patch("app.utils.llm_cache.get_firestore_client", return_value=MockFirestoreClient()):
+            await gateway.generate_text("transcript", "t", cache=True, validate=is_closed)
+            model.generate_content_async.return_value = MagicMock(text='{"summary": []}', usage_metadata=None)
+            second = await gateway.generate_text("transcript", "t", cache=True, validate=is_closed)
+            third = await gateway.generate_text("transcript", "t", cache=True, validate=is_closed)
+
+        assert second == third == '{"summary": []}'
+        assert model.generate_content_async.await_count == 2
@@ -0,0 +1,162 @@
+"""Tests for the central Gemini gateway."""
+
+import asyncio
+
+import pytest
+from google.api_core.exceptions import InvalidArgument, ResourceExhausted
+from unittest.mock import patch, AsyncMock, MagicMock
+
+from app.utils.llm_gateway import LLMGateway
+
+
+def _response(text="ok", prompt_tokens=10, output_tokens=5):
+    usage = MagicMock(prompt_token_count=prompt_tokens, candidates_token_count=output_tokens)
+    return MagicMock(text=text, usage_metadata=usage)
+
+
+def _model(**kwargs):
+    model = MagicMock()
+    model.generate_content_async = AsyncMock(**kwargs)
+    return model
+
+
+class TestModelPool:
+    def test_reuses_model_for_same_instruction(self):
+        gateway = LLMGateway()
+        with patch("app.utils.llm_gateway.genai.GenerativeModel", side_effect=lambda *a, **k: MagicMock()) as ctor:
+            first = gateway.model("be brief")
+            second = gateway.model("be brief")
+            other = gateway.model("be thorough")
+
+        assert first is second
+        assert other is not first
+        assert ctor.call_count == 2
+
+    def test_evicts_least_recently_used(self):
+        gateway = LLMGateway()
+        gateway._model_cache_size = 2
+        with patch("app.utils.llm_gateway.genai.GenerativeModel", side_effect=lambda *a, **k: MagicMock()) as ctor:
+            gateway.model("a")
+            gateway.model("b")
+            gateway.model("a")
+            gateway.model("c")  # evicts "b"
+            gateway.model("a")
+            gateway.model("b")
+
+        assert ctor.call_count == 4
+
+
+class TestGenerate:
+    @pytest.mark.asyncio
+    async def test_records_latency_and_tokens(self):
+        gateway = LLMGateway()
+        model = _model(return_value=_response())
+        with patch("app.utils.llm_gateway.genai.GenerativeModel", return_value=model):
+            response = await gateway.generate("chat", "hello", system_instruction="sys")
+
+        assert response.text == "ok"
+        stats = gateway.stats()["sites"]["chat"]
+        assert stats["calls"] == 1
+        assert stats["prompt_tokens"] == 10
+        assert stats["output_tokens"] == 5
+        assert gateway.stats()["in_flight"] == 0
+
+    @pytest.mark.asyncio
+    async def test_retries_rate_limit_errors(self):
+        gateway = LLMGateway(max_retries=3)
+        model = _model(side_effect=[ResourceExhausted("quota"), ResourceExhausted("quota"), _response()])
+        with patch("app.utils.llm_gateway.genai.GenerativeModel", return_value=model), \
+             patch("app.utils.llm_gateway.asyncio.sleep", new=AsyncMock()) as sleep:
+            response = await gateway.generate("chat", "hello")
+
+        assert response.text == "ok"
+        assert model.generate_content_async.await_count == 3
+        assert sleep.await_count == 2
+        assert gateway.stats()["sites"]["chat"]["retries"] == 2
+
+    @pytest.mark.asyncio
+    async def test_gives_up_after_max_retries(self):
+        gateway = LLMGateway(max_retries=1)
+        model = _model(side_effect=ResourceExhausted("quota"))
+        with patch("app.utils.llm_gateway.genai.GenerativeModel", return_value=model), \
+             patch("app.utils.llm_gateway.asyncio.sleep", new=AsyncMock()):
+            with pytest.raises(ResourceExhausted):
+                await gateway.generate("chat", "hello")
+
+        assert model.generate_content_async.await_count == 2
+        assert gateway.stats()["sites"]["chat"]["errors"] == 1
+
+    @pytest.mark.asyncio
+    async def test_client_errors_are_not_retried(self):
+        gateway = LLMGateway(max_retries=3)
+        model = _model(side_effect=InvalidArgument("bad prompt"))
+        with patch("app.utils.llm_gateway.genai.GenerativeModel", return_value=model):
+            with pytest.raises(InvalidArgument):
+                await gateway.generate("chat", "hello")
+
+        assert model.generate_content_async.await_count == 1
+
+    @pytest.mark.asyncio
+    async def test_timeout_is_not_retried(self):
+        gateway = LLMGateway(max_retries=3)
+
+        async def _slow(*args, **kwargs):
+            await asyncio.sleep(5)
+
+        model = MagicMock()
+        model.generate_content_async = MagicMock(side_effect=_slow)
+        with patch("app.utils.llm_gateway.genai.GenerativeModel", return_value=model):
+            with pytest.raises(TimeoutError):
+                await gateway.generate("chat", "hello", timeout=0.05)
+
+        assert model.generate_content_async.call_count == 1
+        assert gateway.stats()["sites"]["chat"]["timeouts"] == 1
+        assert gateway.stats()["in_flight"] == 0
+
+    @pytest.mark.asyncio
+    async def test_concurrency_is_capped(self):
+        gateway = LLMGateway(max_concurrency=2)
+        active = peak = 0
+
+        async def _call(*args, **kwargs):
+            nonlocal active, peak
+            active += 1
+            peak = max(peak, active)
+            await asyncio.sleep(0.01)
+            active -= 1
+            return _response()
+
+        model = MagicMock()
+        model.generate_content_async = MagicMock(side_effect=_call)
+        with patch("app.utils.llm_gateway.genai.GenerativeModel", return_value=model):
+            await asyncio.gather(*(gateway.generate("chat", f"q{i}") for i in range(6)))
+
+        assert peak == 2
+        assert gateway.stats()["sites"]["chat"]["calls"] == 6
+
+
+class TestStream:
+    @pytest.mark.asyncio
+    async def test_yields_text_and_records_usage(self):
+        gateway = LLMGateway()
+
+        class _Blocked:
+            usage_metadata = None
+
+            @property
+            def text(self):
+                raise ValueError("no parts")
+
+        async def _stream():
+            for chunk in [_response("Hello ", 0, 0), _Blocked(), _response("world", 12, 2)]:
+                yield chunk
+
+        model = _model(return_value=_stream())
+        with patch("app.utils.llm_gateway.genai.GenerativeModel", return_value=model):
+            fragments = [t async for t in gateway.stream("chat_stream", "hi")]
+
+        assert fragments == ["Hello ", "world"]
+        stats = gateway.stats()
+        assert stats["sites"]["chat_stream"]["prompt_tokens"] == 12
+        assert stats["sites"]["chat_stream"]["output_tokens"] == 2
+        assert stats["in_flight"] == 0
@@ -0,0 +1,175 @@
+"""Tests for the shared MCP transport."""
+
+import json
+
+import httpx
+import pytest
+from unittest.mock import patch
+
+
+def _sse(*messages) -> bytes:
+    return "".join(f"event: message\ndata: {json.dumps(m)}\n\n" for m in messages).encode()
+
+
+class FakeMCPServer:
+    """Minimal Streamable HTTP MCP server recording the requests it receives."""
+
+    def __init__(self, tool_text='{"ok": true}'):
+        self.requests: list[dict] = []
+        self.session_headers: list[str | None] = []
+        self.sessions = 0
+        self.expired: set[str] = set()
+        self.tool_text = tool_text
+
+    def handler(self, request: httpx.Request) -> httpx.Response:
+        message = json.loads(request.content)
+        self.requests.append(message)
+        session = request.headers.get("mcp-session-id")
+        self.session_headers.append(session)
+
+        if message["method"] == "initialize":
+            self.sessions += 1
+            return httpx.Response(
+                200,
+                headers={"content-type": "application/json", "mcp-session-id": f"s{self.sessions}"},
+                json={"jsonrpc": "2.0", "id": message["id"], "result": {"protocolVersion": "2024-11-05"}},
+            )
+        if message["method"] == "notifications/initialized":
+            return httpx.Response(202)
+        if session in self.expired:
+            return httpx.Response(404)
+        return httpx.Response(
+            200,
+            headers={"content-type": "text/event-stream"},
+            content=_sse(
+                {"jsonrpc": "2.0", "method": "notifications/progress", "params": {"progress": 1}},
+                {"jsonrpc": "2.0", "id": message["id"],
+                 "result": {"content": [{"type": "text", "text": self.tool_text}]}},
+            ),
+        )
+
+    def transport(self, **kwargs):
+        from app.utils.mcp_transport import MCPTransport
+        http = httpx.AsyncClient(transport=httpx.MockTransport(self.handler))
+        return MCPTransport("https://mcp.test/mcp", http, **kwargs)
+
+    def tool_calls(self):
+        return [r for r in self.requests if r["method"] == "tools/call"]
+
+
+class TestSession:
+    @pytest.mark.asyncio
+    async def test_initializes_once_and_reuses_session(self):
+        server = FakeMCPServer()
+        transport = server.transport(headers={"x-api-key": "k"})
+
+        assert await transport.call_tool("A", {"x": 1}) == {"ok": True}
+        assert await transport.call_tool("B") == {"ok": True}
+
+        assert server.sessions == 1
+        calls = server.tool_calls()
+        assert [c["params"]["name"] for c in calls] == ["A", "B"]
+        ids = [r["id"] for r in server.requests if "id" in r]
+        assert len(ids) == len(set(ids))
+        assert server.session_headers[-1] == "s1"
+
+    @pytest.mark.asyncio
+    async def test_expired_session_is_renegotiated(self):
+        server = FakeMCPServer()
+        transport = server.transport()
+        await transport.call_tool("A")
+        server.expired.add("s1")
+
+        assert await transport.call_tool("B") == {"ok": True}
+        assert server.sessions == 2
+        assert server.session_headers[-1] == "s2"
+
+
+class TestResponses:
+    @pytest.mark.asyncio
+    async def test_non_json_text_is_returned_raw(self):
+        server = FakeMCPServer(tool_text="plain text")
+        assert await server.transport().call_tool("A") == "plain text"
+
+    @pytest.mark.asyncio
+    async def test_jsonrpc_error_raises(self):
+        from app.utils.mcp_transport import MCPError
+
+        def handler(request):
+            message = json.loads(request.content)
+            if message["method"] == "tools/call":
+                return httpx.Response(200, headers={"content-type": "text/event-stream"}, content=_sse(
+                    {"jsonrpc": "2.0", "id": message["id"], "error": {"code": -32602, "message": "bad args"}},
+                ))
+            return httpx.Response(200, json={"jsonrpc": "2.0", "id": message.get("id"), "result": {}})
+
+        from app.utils.mcp_transport import MCPTransport
+        http = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+        with pytest.raises(MCPError, match="bad args"):
+            await MCPTransport("https://mcp.test/mcp", http).call_tool("A")
+
+    @pytest.mark.asyncio
+    async def test_oversized_payload_is_rejected(self):
+        from app.utils.mcp_transport import MCPError
+        server = FakeMCPServer(tool_text="x" * 5000)
+        with pytest.raises(MCPError, match="exceeds"):
+            await server.transport(max_payload_bytes=1000).call_tool("A")
+
+    @pytest.mark.asyncio
+    async def test_unterminated_line_is_rejected_while_streaming(self):
+        from app.utils.mcp_transport import MCPError, MCPTransport
+        sent = []
+
+        async def endless_line():
+            yield b"data: "
+            for _ in range(100):
+                sent.append(1)
+                yield b"x" * 100
+
+        def handler(request):
+            message = json.loads(request.content)
+            if message["method"] == "tools/call":
+                return httpx.Response(200, headers={"content-type": "text/event-stream"}, content=endless_line())
+            return httpx.Response(200, json={"jsonrpc": "2.0", "id": message.get("id"), "result": {}})
+
+        http = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+        with pytest.raises(MCPError, match="exceeds"):
+            await MCPTransport("https://mcp.test/mcp", http, max_payload_bytes=1000).call_tool("A")
+        assert len(sent) < 100
+
+    @pytest.mark.asyncio
+    async def test_crlf_split_across_chunks(self):
+        from app.utils.mcp_transport import MCPTransport
+
+        def handler(request):
+            message = json.loads(request.content)
+            if message["method"] == "tools/call":
+                body = _sse({"jsonrpc": "2.0", "id": message["id"],
+                             "result": {"content": [{"type": "text", "text": "done"}]}})
+                body = body.replace(b"\n", b"\r\n")
+                cut = body.index(b"\r\n") + 1
+
+                async def chunks():
+                    yield body[:cut]
+                    yield body[cut:]
+
+                return httpx.Response(200, headers={"content-type": "text/event-stream"}, content=chunks())
+            return httpx.Response(200, json={"jsonrpc": "2.0", "id": message.get("id"), "result": {}})
+
+        http = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+        assert await MCPTransport("https://mcp.test/mcp", http).call_tool("A") == "done"
+
+
+class TestComposioClient:
+    @pytest.mark.asyncio
+    async def test_tool_errors_keep_composio_prefix(self):
+        from app.utils.composio_client import ComposioClient
+        from app.utils.mcp_transport import MCPError
+        with patch("app.utils.composio_client.get_settings") as settings:
+            settings.return_value.COMPOSIO_MCP_URL = "https://mcp.test/mcp"
+            settings.return_value.COMPOSIO_API_KEY = "k"
+            client = ComposioClient()
+
+        with patch.object(client._mcp, "call_tool", side_effect=MCPError("quota")):
+            with pytest.raises(RuntimeError, match="Composio tool error: quota"):
+                await client.call_tool("GMAIL_FETCH_EMAILS")
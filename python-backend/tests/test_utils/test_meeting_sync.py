@@ -0,0 +1,234 @@
+"""Tests for incremental meeting sync."""
+
+import asyncio
+from datetime import datetime, timedelta, timezone
+
+import pytest
+from unittest.mock import patch, AsyncMock, MagicMock
+
+from tests.conftest import MockFirestoreClient, MockDocumentSnapshot
+
+
+def _raw(source_id="ff1", date="2026-03-02T09:00:00Z", title="Weekly sync"):
+    return {
+        "id": source_id,
+        "title": title,
+        "date": date,
+        "duration": 1800,
+        "participants": ["alice@example.com"],
+        "summary": {"overview": "Discussed launch", "action_items": "", "keywords": []},
+    }
+
+
+def _service(raws, transcript=None):
+    from app.utils.meeting_sync import MeetingSyncService
+    readai = MagicMock()
+    readai.is_configured.return_value = False
+    fireflies = MagicMock()
+    fireflies.is_configured.return_value = True
+    fireflies.get_transcripts = AsyncMock(return_value=raws)
+    fireflies.get_transcripts_batch = AsyncMock(side_effect=lambda ids: {
+        i: transcript or {"sentences": [{"speaker_name": "Alice", "text": "hello"}]} for i in ids
+    })
+    return MeetingSyncService(readai=readai, fireflies=fireflies)
+
+
+def _db(meetings=(), watermarks=None):
+    db = MockFirestoreClient()
+    db.set_collection("meetings", list(meetings))
+    db.set_collection("_meta", [MockDocumentSnapshot("meeting_sync", {"watermarks": watermarks or {}})])
+    return db
+
+
+class TestWatermarks:
+    @pytest.mark.asyncio
+    async def test_resumes_from_watermark_and_advances_it(self):
+        service = _service([_raw(date="2026-03-02T09:00:00Z"), _raw("ff2", date="2026-03-03T09:00:00Z")])
+        db = _db(watermarks={"fireflies": "2026-03-01T10:00:00+00:00"})
+
+        with patch("app.utils.meeting_sync.get_firestore_client", return_value=db), \
+             patch.object(service, "_save_watermarks", new=AsyncMock()) as save:
+            result = await service.sync_all()
+
+        since = service.fireflies.get_transcripts.await_args.kwargs["since"]
+        assert since == datetime(2026, 3, 1, 10, tzinfo=timezone.utc) - timedelta(hours=24)
+        assert result["total_synced"] == 2
+        # Both transcripts come from one batched fetch
+        service.fireflies.get_transcripts_batch.assert_awaited_once()
+        assert sorted(service.fireflies.get_transcripts_batch.await_args.args[0]) == ["ff1", "ff2"]
+        # Read.AI is unconfigured (an error), so only Fireflies advances
+        save.assert_awaited_once_with({"fireflies": "2026-03-03T09:00:00+00:00"})
+
+    @pytest.mark.asyncio
+    async def test_full_sync_ignores_watermark(self):
+        service = _service([])
+        db = _db(watermarks={"fireflies": "2026-03-01T10:00:00+00:00"})
+
+        with patch("app.utils.meeting_sync.get_firestore_client", return_value=db), \
+             patch.object(service, "_save_watermarks", new=AsyncMock()):
+            await service.sync_all(full=True)
+
+        assert service.fireflies.get_transcripts.await_args.kwargs["since"] is None
+
+    @pytest.mark.asyncio
+    async def test_errors_keep_watermark(self):
+        service = _service([_raw()])
+        service.fireflies.get_transcripts = AsyncMock(side_effect=RuntimeError("down"))
+
+        with patch("app.utils.meeting_sync.get_firestore_client", return_value=_db()), \
+             patch.object(service, "_save_watermarks", new=AsyncMock()) as save:
+            result = await service.sync_all()
+
+        assert result["total_errors"] == 2
+        save.assert_not_awaited()
+
+    @pytest.mark.asyncio
+    async def test_truncated_listing_syncs_partial_and_keeps_watermark(self):
+        from app.utils.fireflies_client import FirefliesListingTruncated
+        service = _service([])
+        service.fireflies.get_transcripts = AsyncMock(side_effect=FirefliesListingTruncated([_raw()], 40))
+
+        with patch("app.utils.meeting_sync.get_firestore_client", return_value=_db()), \
+             patch.object(service, "_save_watermarks", new=AsyncMock()) as save:
+            result = await service.sync_all(full=True)
+
+        assert result["fireflies"]["synced"] == 1
+        assert "40 pages" in result["fireflies"]["errors"][0]
+        save.assert_not_awaited()
+
+    @pytest.mark.asyncio
+    async def test_missing_transcript_keeps_watermark(self):
+        service = _service([_raw()])
+        # The batch fetch drops transcripts it could not load
+        service.fireflies.get_transcripts_batch = AsyncMock(return_value={})
+        db = _db()
+
+        with patch("app.utils.meeting_sync.get_firestore_client", return_value=db), \
+             patch.object(service, "_save_watermarks", new=AsyncMock()) as save:
+            result = await service.sync_all()
+
+        assert result["fireflies"]["synced"] == 1
+        assert len(result["fireflies"]["errors"]) == 1
+        save.assert_not_awaited()
+        stored = db.collection("meetings").document("fireflies_ff1").get().to_dict()
+        assert not stored.get("source_transcript_hash")
+
+    @pytest.mark.asyncio
+    async def test_readai_transcript_failure_is_an_error(self):
+        from app.utils.meeting_sync import MeetingSyncService
+        readai = MagicMock()
+        readai.is_configured.return_value = True
+        readai.get_meetings = AsyncMock(return_value=[{"id": "r1", "title": "Kickoff", "start_time_ms": 1772442000000}])
+        readai.get_meeting_detail = AsyncMock(return_value={})
+        readai.get_transcript = AsyncMock(side_effect=RuntimeError("mcp down"))
+        service = MeetingSyncService(readai=readai, fireflies=MagicMock())
+
+        with patch("app.utils.meeting_sync.get_firestore_client", return_value=_db()):
+            result = await service.sync_readai()
+
+        assert result["synced"] == 0
+        assert "mcp down" in result["errors"][0]
+
+
+class TestContentHashes:
+    @pytest.mark.asyncio
+    async def test_unchanged_meeting_is_skipped(self):
+        from app.utils.meeting_sync import _content_hash
+        raw = _raw()
+        db = _db([MockDocumentSnapshot("fireflies_ff1", {
+            "title": "Weekly sync",
+            "source_hash": _content_hash(raw),
+            "source_transcript_hash": "abc",
+        })])
+        service = _service([raw])
+
+        with patch("app.utils.meeting_sync.get_firestore_client", return_value=db):
+            result = await service.sync_fireflies()
+
+        assert result["synced"] == 0
+        assert result["skipped"] == 1
+        service.fireflies.get_transcripts_batch.assert_not_awaited()
+
+    @pytest.mark.asyncio
+    async def test_changed_meeting_is_updated_with_new_hashes(self):
+        from app.utils.meeting_sync import _content_hash
+        from app.utils.transcript_processor import transcript_hash
+        raw = _raw(title="Weekly sync (renamed)")
+        db = _db([MockDocumentSnapshot("fireflies_ff1", {
+            "title": "Weekly sync",
+            "client_id": "client_1",
+            "source_hash": "stale",
+            "source_transcript_hash": transcript_hash("old"),
+        })])
+        service = _service([raw])
+
+        with patch("app.utils.meeting_sync.get_firestore_client", return_value=db):
+            result = await service.sync_fireflies()
+
+        assert result["synced"] == 1
+        stored = db.collection("meetings").document("fireflies_ff1").get().to_dict()
+        assert stored["title"] == "Weekly sync (renamed)"
+        assert stored["client_id"] == "client_1"
+        assert stored["source_hash"] == _content_hash(raw)
+        assert stored["source_transcript_hash"] == transcript_hash("hello")
+        assert stored["speaker_stats"][0]["speaker"] == "Alice"
+
+    @pytest.mark.asyncio
+    async def test_unchanged_transcript_is_not_rewritten(self):
+        from app.utils.meeting_sync import MeetingSyncService
+        from app.models.meeting import MeetingTranscript
+        from app.utils.transcript_processor import transcript_hash
+        transcript = MeetingTranscript(id="t", meeting_id="m", full_text="hello")
+
+        with patch("app.utils.meeting_sync.get_firestore_client") as get_db:
+            written = await MeetingSyncService._store_transcript(transcript, transcript_hash("hello"))
+
+        assert written is False
+        get_db.assert_not_called()
+
+
+class TestConcurrency:
+    @pytest.mark.asyncio
+    async def test_fan_out_is_bounded_and_results_aggregated(self):
+        from app.utils.meeting_sync import SKIPPED, SYNCED
+        service = _service([])
+        in_flight = 0
+        peak = 0
+
+        async def sync_one(raw):
+            nonlocal in_flight, peak
+            in_flight += 1
+            peak = max(peak, in_flight)
+            await asyncio.sleep(0.01)
+            in_flight -= 1
+            if raw["id"] == "bad":
+                raise RuntimeError("boom")
+            return SKIPPED if raw["id"] == "same" else SYNCED
+
+        raws = [_raw(f"m{i}") for i in range(6)] + [_raw("same"), _raw("bad", title="Broken")]
+        result = await service._sync_each(raws, sync_one, "Error syncing", concurrency=2)
+
+        assert peak == 2
+        assert result["synced"] == 6
+        assert result["skipped"] == 1
+        assert result["errors"] == ["Error syncing 'Broken': boom"]
+
+    @pytest.mark.asyncio
+    async def test_sources_sync_concurrently(self):
+        service = _service([])
+        started = []
+
+        async def fake_sync(name):
+            started.append(name)
+            await asyncio.sleep(0.01)
+            # Both sources must have started before either finishes
+            assert len(started) == 2
+            return {"synced": 1, "skipped": 0, "errors": [], "watermark": None}
+
+        with patch("app.utils.meeting_sync.get_firestore_client", return_value=_db()), \
+             patch.object(service, "sync_readai", new=lambda since=None: fake_sync("readai")), \
+             patch.object(service, "sync_fireflies", new=lambda since=None: fake_sync("fireflies")):
+            result = await service.sync_all()
+
+        assert result["total_synced"] == 2
+        assert result["total_errors"] == 0
@@ -0,0 +1,104 @@
+"""Tests for RAGEngine hybrid retrieval."""
+
+import pytest
+from unittest.mock import AsyncMock, MagicMock, patch
+
+
+def _result(chunk_id, content=None):
+    return {
+        "chunk_id": chunk_id,
+        "document_id": "doc_1",
+        "content": content or f"content {chunk_id}",
+        "score": 0.5,
+        "metadata": {},
+    }
+
+
+def _make_engine(vector=None, lexical=None, scope_size=10, vector_error=None):
+    from app.utils.rag_engine import RAGEngine
+    store = MagicMock()
+    store.search = AsyncMock(return_value=vector or [], side_effect=vector_error)
+    store.lexical_search = AsyncMock(return_value=lexical or [])
+    store.scope_size = AsyncMock(return_value=scope_size)
+    return RAGEngine(vector_store=store), store
+
+
+class TestRetrieve:
+    @pytest.mark.asyncio
+    async def test_fuses_vector_and_lexical(self):
+        engine, _ = _make_engine(
+            vector=[_result("a"), _result("b")],
+            lexical=[_result("b"), _result("c")],
+        )
+        results = await engine.retrieve("INV-0042", top_k=3)
+        assert results[0]["chunk_id"] == "b"
+        assert {r["chunk_id"] for r in results} == {"a", "b", "c"}
+
+    @pytest.mark.asyncio
+    async def test_vector_only_when_no_lexical_hits(self):
+        engine, _ = _make_engine(vector=[_result("a"), _result("b")])
+        results = await engine.retrieve("question", top_k=1)
+        assert [r["chunk_id"] for r in results] == ["a"]
+
+    @pytest.mark.asyncio
+    async def test_prefilter_for_large_scopes(self):
+        engine, store = _make_engine(lexical=[_result("c")], scope_size=100_000)
+        await engine.retrieve("INV-0042")
+        assert store.search.await_args.kwargs["candidate_ids"] == {"c"}
+
+    @pytest.mark.asyncio
+    async def test_no_prefilter_for_small_scopes(self):
+        engine, store = _make_engine(lexical=[_result("c")], scope_size=10)
+        await engine.retrieve("INV-0042")
+        assert store.search.await_args.kwargs["candidate_ids"] is None
+
+    @pytest.mark.asyncio
+    async def test_lexical_results_survive_embedding_failure(self):
+        engine, _ = _make_engine(lexical=[_result("c")], vector_error=RuntimeError("no key"))
+        results = await engine.retrieve("INV-0042")
+        assert [r["chunk_id"] for r in results] == ["c"]
+
+    @pytest.mark.asyncio
+    async def test_embedding_failure_raises_without_lexical_hits(self):
+        engine, _ = _make_engine(vector_error=RuntimeError("no key"))
+        with pytest.raises(RuntimeError):
+            await engine.retrieve("question")
+
+    @pytest.mark.asyncio
+    async def test_retrieve_context_includes_each_passage(self):
+        engine, _ = _make_engine(vector=[_result("a", "first passage"), _result("b", "second passage")])
+        context = await engine.retrieve_context("q")
+        assert "first passage" in context and "second passage" in context
+
+
+class TestGenerateResponseStream:
+    @pytest.mark.asyncio
+    async def test_yields_text_fragments_and_skips_empty_chunks(self):
+        engine, _ = _make_engine()
+        engine._configured = True
+
+        class _Blocked:
+            @property
+            def text(self):
+                raise ValueError("no parts")
+
+        async def _stream():
+            for chunk in [MagicMock(text="Hello "), _Blocked(), MagicMock(text="world")]:
+                yield chunk
+
+        model = MagicMock()
+        model.generate_content_async = AsyncMock(return_value=_stream())
+        with patch("app.utils.llm_gateway.genai.GenerativeModel", return_value=model):
+            fragments = [t async for t in engine.generate_response_stream("q", "ctx")]
+
+        assert fragments == ["Hello ", "world"]
+        prompt = model.generate_content_async.await_args.args[0]
+        assert "ctx" in prompt and "q" in prompt
+
+    @pytest.mark.asyncio
+    async def test_unconfigured_raises(self):
+        engine, _ = _make_engine()
+        engine._configured = False
+        with pytest.raises(RuntimeError):
+            async for _ in engine.generate_response_stream("q", "ctx"):
+                pass
@@ -0,0 +1,256 @@
+"""Tests for Sage token caching and single-flight refresh."""
+
+import asyncio
+import time
+from datetime import datetime, timedelta, timezone
+
+import httpx
+import pytest
+from unittest.mock import patch, AsyncMock
+
+
+def _creds(token="tok1", refresh="r1", expires_in=3600):
+    from app.models.financial import SageCredentials
+    expires = datetime.now(timezone.utc) + timedelta(seconds=expires_in)
+    return SageCredentials(
+        access_token=token,
+        refresh_token=refresh,
+        expires_at=expires.isoformat(),
+        updated_at=datetime.now(timezone.utc).isoformat(),
+    )
+
+
+def _client(stored, handler=None):
+    """SageClient whose credential store is an in-memory list (newest last)."""
+    from app.utils.sage_client import SageClient
+    client = SageClient()
+    client.base_url = "https://sage.test"
+    if handler is not None:
+        client.http = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+
+    async def save(creds):
+        stored.append(creds)
+        client._creds = creds
+
+    client.get_credentials = AsyncMock(side_effect=lambda: stored[-1] if stored else None)
+    client.save_credentials = AsyncMock(side_effect=save)
+    client._acquire_refresh_lease = lambda lease_seconds: True
+    client._release_refresh_lease = lambda: None
+    return client
+
+
+def _token_response(request, refreshes, new_token="tok2"):
+    refreshes.append(request)
+    return httpx.Response(200, json={"access_token": new_token, "refresh_token": "r2", "expires_in": 3600})
+
+
+class TestTokenCache:
+    @pytest.mark.asyncio
+    async def test_fresh_token_is_served_from_memory(self):
+        client = _client([_creds()])
+
+        assert await client._ensure_valid_token() == "tok1"
+        assert await client._ensure_valid_token() == "tok1"
+
+        client.get_credentials.assert_awaited_once()
+
+    @pytest.mark.asyncio
+    async def test_concurrent_callers_share_one_refresh(self):
+        refreshes = []
+
+        async def handler(request):
+            await asyncio.sleep(0.01)
+            return _token_response(request, refreshes)
+
+        client = _client([_creds(expires_in=10)], handler)
+        tokens = await asyncio.gather(*(client._ensure_valid_token() for _ in range(5)))
+
+        assert tokens == ["tok2"] * 5
+        assert len(refreshes) == 1
+        assert client.save_credentials.await_count == 1
+
+    @pytest.mark.asyncio
+    async def test_clear_cached_credentials_forces_reread(self):
+        client = _client([_creds()])
+        await client._ensure_valid_token()
+        client.clear_cached_credentials()
+        await client._ensure_valid_token()
+
+        assert client.get_credentials.await_count == 2
+
+
+class TestUnauthorized:
+    @pytest.mark.asyncio
+    async def test_concurrent_401s_refresh_once(self):
+        refreshes = []
+
+        def handler(request):
+            if request.url.path == "/token":
+                return _token_response(request, refreshes)
+            if request.headers["Authorization"] == "Bearer tok1":
+                return httpx.Response(401)
+            return httpx.Response(200, json={"ok": True})
+
+        client = _client([_creds()], handler)
+        with patch("app.utils.sage_client.SAGE_TOKEN_URL", "https://sage.test/token"):
+            results = await asyncio.gather(*(client.get("/contacts") for _ in range(3)))
+
+        assert results == [{"ok": True}] * 3
+        assert len(refreshes) == 1
+
+
+class TestRefreshLease:
+    @pytest.mark.asyncio
+    async def test_waits_for_other_instance_refresh(self):
+        stored = [_creds(expires_in=10)]
+        client = _client(stored, handler=lambda request: pytest.fail("should not refresh"))
+        client.settings = client.settings.model_copy(update={"SAGE_REFRESH_LEASE_POLL_SECONDS": 0.001})
+        client._acquire_refresh_lease = lambda lease_seconds: False
+
+        async def other_instance():
+            await asyncio.sleep(0.005)
+            stored.append(_creds(token="tok_other", refresh="r_other"))
+
+        token, _ = await asyncio.gather(client._ensure_valid_token(), other_instance())
+
+        assert token == "tok_other"
+        assert await client._ensure_valid_token() == "tok_other"
+
+    @pytest.mark.asyncio
+    async def test_refresh_saved_before_lease_is_taken_is_reused(self):
+        old, new = _creds(expires_in=10), _creds(token="tok_other", refresh="r_other")
+        client = _client([], handler=lambda request: pytest.fail("should not refresh"))
+        # Another instance saves new tokens just before this one takes the lease
+        client.get_credentials = AsyncMock(side_effect=[old, new])
+
+        assert (await client.refresh_token()).access_token == "tok_other"
+
+    @pytest.mark.asyncio
+    async def test_expired_lease_is_taken_over_before_refreshing(self):
+        refreshes = []
+        stored = [_creds(expires_in=10)]
+        client = _client(stored, handler=lambda request: _token_response(request, refreshes))
+        client.settings = client.settings.model_copy(update={
+            "SAGE_REFRESH_LEASE_SECONDS": 0.01,
+            "SAGE_REFRESH_LEASE_POLL_SECONDS": 0.001,
+        })
+        attempts = []
+
+        def acquire(lease_seconds):
+            # Held by a dead instance until its lease lapses
+            attempts.append(time.monotonic())
+            return attempts[-1] - attempts[0] >= lease_seconds
+
+        client._acquire_refresh_lease = acquire
+
+        assert (await client.refresh_token()).access_token == "tok2"
+        assert len(refreshes) == 1
+        assert len(attempts) > 1
+
+    @pytest.mark.asyncio
+    async def test_refresh_never_proceeds_without_the_lease(self):
+        stored = [_creds(expires_in=10)]
+        client = _client(stored, handler=lambda request: pytest.fail("should not refresh"))
+        client.settings = client.settings.model_copy(update={
+            "SAGE_REFRESH_LEASE_SECONDS": 0.005,
+            "SAGE_REFRESH_LEASE_POLL_SECONDS": 0.001,
+        })
+        client._acquire_refresh_lease = lambda lease_seconds: False
+
+        with pytest.raises(RuntimeError, match="lease"):
+            await client.refresh_token()
+
+    def test_lease_fails_open_without_firestore(self):
+        from app.utils.sage_client import SageClient
+        client = SageClient()
+        with patch("app.utils.sage_client.get_firestore_client", side_effect=RuntimeError("down")):
+            assert client._acquire_refresh_lease(30) is True
+
+
+def _paged_client(handler, per_page=2, concurrency=2, retries=2):
+    client = _client([_creds()], handler)
+    client.settings = client.settings.model_copy(update={
+        "SAGE_ITEMS_PER_PAGE": per_page,
+        "SAGE_MAX_RETRIES": retries,
+    })
+    client._request_semaphore = asyncio.Semaphore(concurrency)
+    return client
+
+
+class TestPagination:
+    @pytest.mark.asyncio
+    async def test_known_total_fetches_pages_concurrently(self):
+        items = [{"id": f"i{n}"} for n in range(5)]
+        in_flight = 0
+        peak = 0
+        requested = []
+
+        async def handler(request):
+            nonlocal in_flight, peak
+            in_flight += 1
+            peak = max(peak, in_flight)
+            await asyncio.sleep(0.01)
+            in_flight -= 1
+            page = int(request.url.params["page"])
+            per_page = int(request.url.params["items_per_page"])
+            requested.append(page)
+            body = {"$total": 5, "$items": items[(page - 1) * per_page:page * per_page]}
+            if page * per_page < 5:
+                body["$next"] = f"/sales_invoices?page={page + 1}"
+            return httpx.Response(200, json=body)
+
+        client = _paged_client(handler, concurrency=2)
+        result = await client.get_paginated("/sales_invoices", params={"updated_or_created_since": "x"})
+
+        assert [i["id"] for i in result] == [f"i{n}" for n in range(5)]
+        assert sorted(requested) == [1, 2, 3]
+        assert peak == 2
+
+    @pytest.mark.asyncio
+    async def test_without_total_follows_next_links(self):
+        def handler(request):
+            if "page" in request.url.params and request.url.params["page"] == "1":
+                return httpx.Response(200, json={"$items": [{"id": "a"}], "$next": "/contacts?cursor=2"})
+            return httpx.Response(200, json={"$items": [{"id": "b"}, {"id": "a"}]})
+
+        client = _paged_client(handler)
+        result = await client.get_paginated("/contacts")
+
+        assert [i["id"] for i in result] == ["a", "b"]
+
+
+class TestRetries:
+    @pytest.mark.asyncio
+    async def test_429_honours_retry_after(self):
+        responses = [httpx.Response(429, headers={"Retry-After": "3"}), httpx.Response(200, json={"ok": True})]
+        client = _paged_client(lambda request: responses.pop(0))
+
+        with patch("app.utils.sage_client.asyncio.sleep", new=AsyncMock()) as sleep:
+            assert await client.get("/contacts") == {"ok": True}
+
+        sleep.assert_awaited_once_with(3.0)
+
+    @pytest.mark.asyncio
+    async def test_server_errors_retry_then_raise(self):
+        calls = []
+
+        def handler(request):
+            calls.append(request)
+            return httpx.Response(503)
+
+        client = _paged_client(handler, retries=2)
+        with patch("app.utils.sage_client.asyncio.sleep", new=AsyncMock()):
+            with pytest.raises(httpx.HTTPStatusError):
+                await client.get("/contacts")
+
+        assert len(calls) == 3
+
+    @pytest.mark.asyncio
+    async def test_excessive_retry_after_is_not_waited(self):
+        client = _paged_client(lambda request: httpx.Response(429, headers={"Retry-After": "3600"}))
+
+        with patch("app.utils.sage_client.asyncio.sleep", new=AsyncMock()) as sleep:
+            with pytest.raises(httpx.HTTPStatusError):
+                await client.get("/contacts")
+
+        sleep.assert_not_awaited()
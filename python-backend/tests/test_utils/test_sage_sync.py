@@ -0,0 +1,156 @@
+"""Tests for incremental Sage sync."""
+
+import asyncio
+from datetime import datetime, timedelta, timezone
+
+import pytest
+from unittest.mock import patch, AsyncMock, MagicMock
+
+from tests.conftest import MockBatch, MockFirestoreClient, MockDocumentSnapshot
+
+
+def _invoice(sage_id="inv1", total="100.00", updated_at="2026-03-02T09:00:00Z"):
+    return {
+        "id": sage_id,
+        "displayed_as": f"SI-{sage_id}",
+        "status": {"id": "PAID"},
+        "total_amount": total,
+        "currency": {"id": "ZAR"},
+        "date": "2026-03-01",
+        "due_date": "2026-03-31",
+        "contact": {"displayed_as": "Acme"},
+        "created_at": "2026-03-01T09:00:00Z",
+        "updated_at": updated_at,
+    }
+
+
+def _payment(sage_id="pay1"):
+    return {
+        "id": sage_id,
+        "total_amount": "100.00",
+        "date": "2026-03-02",
+        "contact": {"id": "contact_1"},
+        "created_at": "2026-03-02T09:00:00Z",
+        "updated_at": "2026-03-02T09:00:00Z",
+    }
+
+
+def _service(invoices=(), payments=()):
+    from app.utils.sage_sync import SageSyncService
+    sage = MagicMock()
+    sage.is_connected = AsyncMock(return_value=True)
+    records = {"/sales_invoices": list(invoices), "/contact_payments": list(payments)}
+    sage.get_paginated = AsyncMock(side_effect=lambda endpoint, params=None: records[endpoint])
+    return SageSyncService(sage)
+
+
+def _db(watermarks=None):
+    db = MockFirestoreClient()
+    db.set_collection("_meta", [MockDocumentSnapshot("sage_sync", {"watermarks": watermarks or {}})])
+    return db
+
+
+class RecordingFirestore(MockFirestoreClient):
+    """Mock client whose batches all record into one list."""
+
+    def __init__(self):
+        super().__init__()
+        self.writes = MockBatch()
+
+    def batch(self):
+        return self.writes
+
+
+class TestWatermarks:
+    @pytest.mark.asyncio
+    async def test_resumes_from_watermarks_and_advances_them(self):
+        service = _service([_invoice()], [_payment()])
+        db = _db({"invoices": "2026-03-01T10:00:00+00:00", "payments": "2026-03-01T12:00:00+00:00"})
+
+        with patch("app.utils.sage_sync.get_firestore_client", return_value=db), \
+             patch.object(service, "_save_watermarks", new=AsyncMock()) as save:
+            result = await service.sync_changes()
+
+        params = {c.args[0]: c.kwargs["params"] for c in service.sage.get_paginated.await_args_list}
+        since = datetime.fromisoformat(params["/sales_invoices"]["updated_or_created_since"])
+        assert since == datetime(2026, 3, 1, 10, tzinfo=timezone.utc) - timedelta(hours=1)
+        assert params["/contact_payments"]["updated_or_created_since"].startswith("2026-03-01T11:00")
+        assert result["invoices"]["synced"] == 1
+        assert result["payments"]["synced"] == 1
+        advanced = save.await_args.args[0]
+        assert set(advanced) == {"invoices", "payments"}
+
+    @pytest.mark.asyncio
+    async def test_full_ignores_watermarks(self):
+        service = _service()
+        db = _db({"invoices": "2026-03-01T10:00:00+00:00"})
+
+        with patch("app.utils.sage_sync.get_firestore_client", return_value=db), \
+             patch.object(service, "_save_watermarks", new=AsyncMock()):
+            await service.sync_changes(full=True)
+
+        for call in service.sage.get_paginated.await_args_list:
+            assert call.kwargs["params"] == {}
+
+    @pytest.mark.asyncio
+    async def test_errors_keep_that_entity_watermark(self):
+        service = _service(payments=[_payment()])
+
+        async def fetch(endpoint, params=None):
+            if endpoint == "/sales_invoices":
+                raise RuntimeError("throttled")
+            return [_payment()]
+
+        service.sage.get_paginated = AsyncMock(side_effect=fetch)
+        with patch("app.utils.sage_sync.get_firestore_client", return_value=_db()), \
+             patch.object(service, "_save_watermarks", new=AsyncMock()) as save:
+            result = await service.sync_changes()
+
+        assert result["invoices"]["errors"]
+        assert set(save.await_args.args[0]) == {"payments"}
+
+
+class TestContentHashes:
+    @pytest.mark.asyncio
+    async def test_unchanged_records_are_not_rewritten(self):
+        service = _service([_invoice("inv1"), _invoice("inv2")])
+        db = RecordingFirestore()
+
+        with patch("app.utils.sage_sync.get_firestore_client", return_value=db):
+            first = await service.sync_invoices()
+            stored = [MockDocumentSnapshot(ref.id, data) for _, ref, data in db.writes._operations]
+            assert all(data["source_hash"] for _, _, data in db.writes._operations)
+
+            db.set_collection("invoices", stored)
+            db.writes = MockBatch()
+            service.sage.get_paginated = AsyncMock(
+                return_value=[_invoice("inv1"), _invoice("inv2", total="250.00")]
+            )
+            second = await service.sync_invoices()
+
+        assert first == {"synced": 2, "skipped": 0, "errors": []}
+        assert second == {"synced": 1, "skipped": 1, "errors": []}
+        assert [ref.id for _, ref, _ in db.writes._operations] == ["inv2"]
+
+
+class TestConcurrency:
+    @pytest.mark.asyncio
+    async def test_invoices_and_payments_sync_concurrently(self):
+        service = _service()
+        started = []
+
+        async def fake_sync(name):
+            started.append(name)
+            await asyncio.sleep(0.01)
+            # Both entities must have started before either finishes
+            assert len(started) == 2
+            return {"synced": 0, "skipped": 0, "errors": []}
+
+        with patch("app.utils.sage_sync.get_firestore_client", return_value=_db()), \
+             patch.object(service, "_save_watermarks", new=AsyncMock()), \
+             patch.object(service, "sync_invoices", new=lambda since=None: fake_sync("invoices")), \
+             patch.object(service, "sync_payments", new=lambda since=None: fake_sync("payments")):
+            result = await service.sync_changes()
+
+        assert result["invoices"]["errors"] == []
+        assert result["payments"]["errors"] == []
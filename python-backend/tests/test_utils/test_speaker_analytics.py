@@ -0,0 +1,63 @@
+"""Tests for per-speaker talk-time analytics."""
+
+from datetime import datetime, timezone
+
+
+def _segments():
+    return [
+        {"speaker": "Alice", "text": "hello everyone", "start_time": 0.0, "end_time": 10.0},
+        {"speaker": "Alice", "text": "agenda first", "start_time": 10.0, "end_time": 20.0},
+        # Bob starts before Alice has finished: an interruption
+        {"speaker": "Bob", "text": "sorry quick question", "start_time": 18.0, "end_time": 24.0},
+        {"speaker": "Alice", "text": "sure", "start_time": 25.0, "end_time": 29.0},
+        {"speaker": "Bob", "text": "untimed", "start_time": None, "end_time": None},
+    ]
+
+
+class TestComputeSpeakerStats:
+    def test_talk_time_turns_and_interruptions(self):
+        from app.utils.speaker_analytics import compute_speaker_stats
+        stats = {s["speaker"]: s for s in compute_speaker_stats(_segments())}
+
+        assert stats["Alice"]["talk_seconds"] == 24.0
+        assert stats["Bob"]["talk_seconds"] == 6.0
+        assert stats["Alice"]["talk_share"] == 0.8
+        assert stats["Alice"]["turns"] == 2
+        assert stats["Bob"]["turns"] == 2
+        assert stats["Bob"]["interruptions"] == 1
+        assert stats["Bob"]["interruption_rate"] == 0.5
+        assert stats["Alice"]["interruptions"] == 0
+        assert stats["Alice"]["words"] == 5
+        assert stats["Bob"]["segments"] == 2
+
+    def test_sorted_by_talk_time_and_empty_input(self):
+        from app.utils.speaker_analytics import compute_speaker_stats
+        assert [s["speaker"] for s in compute_speaker_stats(_segments())] == ["Alice", "Bob"]
+        assert compute_speaker_stats([]) == []
+
+
+class TestAggregateTalkTime:
+    def test_totals_and_weekly_trend(self):
+        from app.utils.speaker_analytics import aggregate_talk_time
+        meetings = [
+            (datetime(2026, 3, 2, tzinfo=timezone.utc), [
+                {"speaker": "Alice", "talk_seconds": 60, "turns": 3, "interruptions": 1, "words": 100},
+            ]),
+            (datetime(2026, 3, 4, tzinfo=timezone.utc), [
+                {"speaker": "Alice", "talk_seconds": 30, "turns": 1, "interruptions": 0, "words": 50},
+                {"speaker": "Bob", "talk_seconds": 30, "turns": 2, "interruptions": 2, "words": 40},
+            ]),
+            (datetime(2026, 3, 10, tzinfo=timezone.utc), [
+                {"speaker": "Bob", "talk_seconds": 20, "turns": 1, "interruptions": 0, "words": 10},
+            ]),
+        ]
+
+        result = aggregate_talk_time(meetings, interval="week")
+
+        alice, bob = result["speakers"]
+        assert alice["speaker"] == "Alice" and alice["talk_seconds"] == 90
+        assert alice["meetings"] == 2 and alice["interruption_rate"] == 0.25
+        assert bob["interruption_rate"] == round(2 / 3, 4)
+        assert result["total_talk_seconds"] == 140
+        assert [p["period"] for p in result["trend"]] == ["2026-W10", "2026-W11"]
+        assert result["trend"][0]["speakers"] == {"Alice": 90, "Bob": 30}
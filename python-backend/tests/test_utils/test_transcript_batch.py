@@ -0,0 +1,123 @@
+"""Tests for batch transcript processing."""
+
+import pytest
+from unittest.mock import patch, AsyncMock, MagicMock
+
+from tests.conftest import MockFirestoreClient, MockDocumentSnapshot
+
+
+def _db():
+    from app.utils.transcript_processor import transcript_hash
+    db = MockFirestoreClient()
+    db.set_collection("meetings", [
+        MockDocumentSnapshot("m_new", {"title": "New", "date": "2026-02-01", "has_transcript": True}),
+        MockDocumentSnapshot("m_done", {
+            "title": "Done", "date": "2026-01-01", "has_transcript": True,
+            "processed_transcript_hash": transcript_hash("done text"),
+        }),
+        MockDocumentSnapshot("m_changed", {
+            "title": "Changed", "date": "2026-01-15", "has_transcript": True,
+            "processed_transcript_hash": transcript_hash("old text"),
+        }),
+        MockDocumentSnapshot("m_none", {"title": "No transcript", "has_transcript": False}),
+    ])
+    db.set_collection("transcripts", [
+        MockDocumentSnapshot("t1", {"meeting_id": "m_new", "full_text": "new text"}),
+        MockDocumentSnapshot("t2", {"meeting_id": "m_done", "full_text": "done text"}),
+        MockDocumentSnapshot("t3", {"meeting_id": "m_changed", "full_text": "changed text"}),
+    ])
+    return db
+
+
+class TestFindPending:
+    @pytest.mark.asyncio
+    async def test_skips_meetings_processed_from_same_transcript(self):
+        from app.utils.transcript_batch import TranscriptBatchWorker
+        with patch("app.utils.transcript_batch.get_firestore_client", return_value=_db()):
+            pending = await TranscriptBatchWorker(concurrency=2).find_pending()
+
+        # Oldest first; unchanged transcript skipped; no-transcript meeting ignored
+        assert [p["meeting_id"] for p in pending] == ["m_changed", "m_new"]
+
+    @pytest.mark.asyncio
+    async def test_force_includes_unchanged_and_limit_applies(self):
+        from app.utils.transcript_batch import TranscriptBatchWorker
+        with patch("app.utils.transcript_batch.get_firestore_client", return_value=_db()):
+            pending = await TranscriptBatchWorker(concurrency=2).find_pending(force=True, limit=2)
+
+        assert [p["meeting_id"] for p in pending] == ["m_done", "m_changed"]
+
+
+class TestRunJob:
+    @pytest.mark.asyncio
+    async def test_processes_pending_and_records_progress(self):
+        from app.utils.transcript_batch import TranscriptBatchWorker
+        db = _db()
+        processor = MagicMock()
+        processor.process_transcript = AsyncMock(side_effect=[{}, RuntimeError("quota")])
+        worker = TranscriptBatchWorker(concurrency=1)
+
+        with patch("app.utils.transcript_batch.get_firestore_client", return_value=db), \
+             patch("app.utils.transcript_batch.get_transcript_processor", return_value=processor):
+            job = await worker.create_job("ceo_uid")
+            assert job["status"] == "queued"
+            await worker.run_job(job["id"])
+
+        record = db.collection("transcript_processing_jobs").document(job["id"]).get().to_dict()
+        assert record["status"] == "completed"
+        assert record["total"] == 2
+        assert record["meeting_ids"] == ["m_changed", "m_new"]
+        assert record["processed"].value == 1
+        assert record["failed"].value == 1
+        assert processor.process_transcript.await_count == 2
+
+    @pytest.mark.asyncio
+    async def test_meeting_processed_meanwhile_is_skipped(self):
+        from app.utils.transcript_batch import TranscriptBatchWorker
+        from app.utils.transcript_processor import transcript_hash
+        db = _db()
+        processor = MagicMock()
+        processor.process_transcript = AsyncMock(return_value={})
+        worker = TranscriptBatchWorker(concurrency=1)
+
+        with patch("app.utils.transcript_batch.get_firestore_client", return_value=db), \
+             patch("app.utils.transcript_batch.get_transcript_processor", return_value=processor):
+            pending = await worker.find_pending()
+            job = await worker.create_job("ceo_uid")
+            # Processed by a single-meeting request after the job selected it
+            db.collection("meetings").document("m_new").update(
+                {"processed_transcript_hash": transcript_hash("new text")}
+            )
+            with patch.object(worker, "find_pending", new=AsyncMock(return_value=pending)):
+                await worker.run_job(job["id"])
+
+        record = db.collection("transcript_processing_jobs").document(job["id"]).get().to_dict()
+        assert record["skipped"].value == 1
+        processor.process_transcript.assert_awaited_once_with("m_changed", "changed text")
+
+    @pytest.mark.asyncio
+    async def test_empty_job_completes(self):
+        from app.utils.transcript_batch import TranscriptBatchWorker
+        db = MockFirestoreClient()
+        worker = TranscriptBatchWorker(concurrency=1)
+        with patch("app.utils.transcript_batch.get_firestore_client", return_value=db):
+            job = await worker.create_job("ceo_uid")
+            await worker.run_job(job["id"])
+
+        record = db.collection("transcript_processing_jobs").document(job["id"]).get().to_dict()
+        assert record["status"] == "completed"
+        assert record["total"] == 0
+
+    @pytest.mark.asyncio
+    async def test_crash_marks_job_failed(self):
+        from app.utils.transcript_batch import TranscriptBatchWorker
+        db = MockFirestoreClient()
+        worker = TranscriptBatchWorker(concurrency=1)
+        with patch("app.utils.transcript_batch.get_firestore_client", return_value=db):
+            job = await worker.create_job("ceo_uid")
+            with patch.object(worker, "find_pending", new=AsyncMock(side_effect=RuntimeError("firestore down"))):
+                await worker.run_job(job["id"])
+
+        record = db.collection("transcript_processing_jobs").document(job["id"]).get().to_dict()
+        assert record["status"] == "failed"
+        assert record["completed_at"]
@@ -0,0 +1,190 @@
+"""Tests for structured transcript analysis and entity matching."""
+
+import json
+
+import pytest
+from unittest.mock import patch, AsyncMock, MagicMock
+
+from tests.conftest import MockFirestoreClient, MockDocumentSnapshot, make_meeting_doc
+
+
+def _processor(threshold=30000, chunk_tokens=12000):
+    from app.utils.transcript_processor import TranscriptProcessor
+    processor = TranscriptProcessor()
+    processor._configured = True
+    processor._map_reduce_threshold = threshold
+    processor._chunk_tokens = chunk_tokens
+    return processor
+
+
+def _analysis(**overrides):
+    data = {
+        "summary": ["Agreed on the Q3 campaign"],
+        "action_items": ["Send proposal"],
+        "client_names": ["Test Client"],
+        "task_refs": [],
+        "people": ["Thandi"],
+        "dates": ["Friday"],
+    }
+    data.update(overrides)
+    return json.dumps(data)
+
+
+class TestSplitTranscript:
+    def test_chunks_respect_budget_on_line_boundaries(self):
+        from app.utils.transcript_processor import split_transcript
+        text = "\n".join(f"Speaker {i}: " + "word " * 20 for i in range(20))
+        chunks = split_transcript(text, max_tokens=100)
+        assert len(chunks) > 1
+        assert "\n".join(chunks) == text
+
+
+class TestAnalyze:
+    @pytest.mark.asyncio
+    async def test_short_transcript_takes_one_structured_call(self):
+        processor = _processor()
+        with patch.object(processor, "_chat", new=AsyncMock(return_value=_analysis())) as chat:
+            result = await processor.analyze("short transcript", "Kickoff")
+
+        assert chat.await_count == 1
+        config = chat.await_args.kwargs["generation_config"]
+        assert config.response_mime_type == "application/json"
+        assert result["summary"] == "- Agreed on the Q3 campaign"
+        assert result["action_items"] == ["Send proposal"]
+        assert result["client_names"] == ["Test Client"]
+
+    @pytest.mark.asyncio
+    async def test_unparseable_reply_raises(self):
+        processor = _processor()
+        with patch.object(processor, "_chat", new=AsyncMock(return_value="not json")):
+            with pytest.raises(ValueError, match="malformed"):
+                await processor.analyze("short transcript")
+
+    @pytest.mark.asyncio
+    async def test_unparseable_chunk_fails_map_reduce(self):
+        processor = _processor(threshold=50, chunk_tokens=50)
+        text = "\n".join("A: " + "talk " * 30 for _ in range(3))
+        replies = [_analysis(), "[]", _analysis()]
+        with patch.object(processor, "_chat", new=AsyncMock(side_effect=replies)):
+            with pytest.raises(ValueError):
+                await processor.analyze(text)
+
+    @pytest.mark.asyncio
+    async def test_malformed_reply_leaves_meeting_unprocessed(self):
+        db = MockFirestoreClient()
+        db.set_collection("meetings", [MockDocumentSnapshot("m1", {"title": "Kickoff", "summary": "Earlier summary"})])
+        processor = _processor()
+        with patch("app.utils.transcript_processor.get_firestore_client", return_value=db), \
+             patch.object(processor, "_chat", new=AsyncMock(return_value='{"summary": ["trunc')):
+            with pytest.raises(ValueError):
+                await processor.process_transcript("m1", "short transcript")
+
+        meeting = db.collection("meetings").document("m1").get().to_dict()
+        assert "processed_transcript_hash" not in meeting
+        assert meeting["summary"] == "Earlier summary"
+
+    @pytest.mark.asyncio
+    async def test_structured_calls_only_cache_valid_json(self):
+        from app.utils.transcript_processor import _is_json_object
+        processor = _processor()
+        with patch.object(processor, "_chat", new=AsyncMock(return_value=_analysis())) as chat:
+            await processor.analyze("short transcript")
+
+        assert chat.await_args.kwargs["validate"] is _is_json_object
+        assert _is_json_object(_analysis())
+        assert not _is_json_object('{"summary": ["truncated')
+        assert not _is_json_object("[]")
+
+    @pytest.mark.asyncio
+    async def test_long_transcript_is_map_reduced(self):
+        processor = _processor(threshold=50, chunk_tokens=50)
+        text = "\n".join("A: " + "talk " * 30 for _ in range(3))
+        replies = [
+            _analysis(summary=["Part one"], action_items=["Send proposal"], people=["Thandi"]),
+            _analysis(summary=["Part two"], action_items=["send proposal"], people=["Sipho"]),
+            _analysis(summary=["Part three"], action_items=["Book venue"], people=["thandi"]),
+            json.dumps({"summary": ["Whole meeting"], "action_items": ["Send proposal", "Book venue"]}),
+        ]
+        with patch.object(processor, "_chat", new=AsyncMock(side_effect=replies)) as chat:
+            result = await processor.analyze(text)
+
+        assert chat.await_count == 4  # three concurrent map calls + one reduce
+        reduce_input = json.loads(chat.await_args_list[-1].args[1])
+        assert reduce_input["summary_notes"] == ["Part one", "Part two", "Part three"]
+        assert reduce_input["action_items"] == ["Send proposal", "Book venue"]
+        assert result["summary"] == "- Whole meeting"
+        assert result["people"] == ["Thandi", "Sipho"]
+
+
+class TestMatchEntities:
+    @pytest.mark.asyncio
+    async def test_matches_use_cached_name_index(self):
+        from tests.conftest import make_client_doc, make_task_doc
+        db = MockFirestoreClient()
+        db.set_collection("clients", [make_client_doc()])
+        db.set_collection("tasks", [make_task_doc()])
+        processor = _processor()
+
+        with patch("app.utils.transcript_processor.get_firestore_client", return_value=db) as get_db:
+            first = await processor.match_entities_to_records(
+                {"client_names": ["test client"], "task_refs": ["Test Task"]}
+            )
+            second = await processor.match_entities_to_records(
+                {"client_names": ["Test Client"], "task_refs": ["test task"]}
+            )
+
+        assert first["matched_client"] == {"id": "client_1", "name": "Test Client"}
+        assert first["matched_tasks"] == [{"id": "task_1", "title": "Test Task"}]
+        assert second == first
+        assert get_db.call_count == 2  # one load per index, then cached
+
+    @pytest.mark.asyncio
+    async def test_inactive_clients_are_not_matched(self):
+        db = MockFirestoreClient()
+        db.set_collection("clients", [
+            MockDocumentSnapshot("c_old", {"name": "Test Client", "is_active": False}),
+        ])
+        processor = _processor()
+        with patch("app.utils.transcript_processor.get_firestore_client", return_value=db):
+            result = await processor.match_entities_to_records({"client_names": ["Test Client"]})
+
+        assert result["matched_client"] is None
+
+    @pytest.mark.asyncio
+    async def test_client_write_invalidates_name_index(self):
+        from app.utils import transcript_processor
+        db = MockFirestoreClient()
+        db.set_collection("clients", [MockDocumentSnapshot("c_1", {"name": "Old Name", "is_active": True})])
+        processor = _processor()
+
+        with patch("app.utils.transcript_processor.get_firestore_client", return_value=db), \
+             patch("app.utils.transcript_processor._processor", processor):
+            await processor.match_entities_to_records({"client_names": ["Old Name"]})
+            db.set_collection("clients", [MockDocumentSnapshot("c_1", {"name": "New Name", "is_active": True})])
+            transcript_processor.invalidate_name_indexes("clients")
+            result = await processor.match_entities_to_records({"client_names": ["New Name"]})
+
+        assert result["matched_client"] == {"id": "c_1", "name": "New Name"}
+
+
+class TestProcessTranscript:
+    @pytest.mark.asyncio
+    async def test_updates_meeting_from_single_analysis(self):
+        from app.utils.transcript_processor import transcript_hash
+        from tests.conftest import make_client_doc
+        db = MockFirestoreClient()
+        db.set_collection("meetings", [make_meeting_doc()])
+        db.set_collection("clients", [make_client_doc()])
+        processor = _processor()
+
+        with patch("app.utils.transcript_processor.get_firestore_client", return_value=db), \
+             patch.object(processor, "_chat", new=AsyncMock(return_value=_analysis())) as chat:
+            result = await processor.process_transcript("meeting_1", "transcript text")
+
+        assert chat.await_count == 1
+        assert result["matched_client"]["id"] == "client_1"
+        meeting = db.collection("meetings").document("meeting_1").get().to_dict()
+        assert meeting["summary"] == "- Agreed on the Q3 campaign"
+        assert meeting["action_items"] == ["Send proposal"]
+        assert meeting["client_id"] == "client_1"
+        assert meeting["processed_transcript_hash"] == transcript_hash("transcript text")
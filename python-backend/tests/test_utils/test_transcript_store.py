@@ -0,0 +1,180 @@
+"""Tests for compressed, block-based transcript storage."""
+
+import pytest
+
+from tests.conftest import MockDocumentSnapshot
+
+
+class _Ref:
+    def __init__(self, store, path, doc_id):
+        self._store, self._path, self.id = store, path, doc_id
+
+    def get(self):
+        data = self._store.docs.get(self._path, {}).get(self.id)
+        return MockDocumentSnapshot(self.id, data, data is not None)
+
+    def set(self, data):
+        self._store.docs.setdefault(self._path, {})[self.id] = data
+
+    def delete(self):
+        self._store.docs.get(self._path, {}).pop(self.id, None)
+
+
+class _Collection:
+    def __init__(self, store, path):
+        self._store, self._path = store, path
+
+    def document(self, doc_id):
+        return _Ref(self._store, self._path, doc_id)
+
+    def where(self, *args, **kwargs):
+        return self
+
+    def limit(self, *args):
+        return self
+
+    def stream(self):
+        return [MockDocumentSnapshot(i, d) for i, d in self._store.docs.get(self._path, {}).items()]
+
+
+class _Batch:
+    def __init__(self):
+        self.ops = []
+
+    def set(self, ref, data):
+        self.ops.append(lambda: ref.set(data))
+
+    def delete(self, ref):
+        self.ops.append(ref.delete)
+
+    def commit(self):
+        for op in self.ops:
+            op()
+
+
+class PersistingFirestore:
+    """In-memory Firestore whose batched writes persist, keyed by collection path."""
+
+    def __init__(self):
+        self.docs: dict[str, dict[str, dict]] = {}
+        self.reads = 0
+
+    def collection(self, path):
+        return _Collection(self, path)
+
+    def batch(self):
+        return _Batch()
+
+    def recursive_delete(self, ref):
+        for path in [p for p in self.docs if p.startswith(f"{ref._path}/{ref.id}/")]:
+            del self.docs[path]
+        ref.delete()
+
+
+def _transcript(n=10, text=None):
+    from app.models.meeting import MeetingTranscript, TranscriptSegment
+    segments = [
+        TranscriptSegment(speaker="Alice" if i % 2 else "Bob", text=f"line {i}",
+                          start_time=i * 10.0, end_time=i * 10.0 + 9)
+        for i in range(n)
+    ]
+    full_text = text if text is not None else "\n".join(s.text for s in segments)
+    return MeetingTranscript(id="transcript_m1", meeting_id="m1", segments=segments,
+                             full_text=full_text, word_count=len(full_text.split()))
+
+
+@pytest.fixture
+def small_blocks():
+    from unittest.mock import patch
+    from app.config import get_settings
+    settings = get_settings().model_copy(update={
+        "TRANSCRIPT_SEGMENTS_PER_BLOCK": 3, "TRANSCRIPT_BLOCK_BYTES": 1000,
+    })
+    with patch("app.utils.transcript_store.get_settings", return_value=settings):
+        yield
+
+
+class TestRoundTrip:
+    def test_header_is_small_and_blocks_are_compressed(self, small_blocks):
+        from app.utils.transcript_store import read_header, read_text, write_transcript
+        db = PersistingFirestore()
+        transcript = _transcript(10)
+
+        header = write_transcript(db, transcript)
+
+        assert header["segment_count"] == 10
+        assert [b["start"] for b in header["segment_blocks"]] == [0, 3, 6, 9]
+        assert header["speakers"] == ["Bob", "Alice"]
+        assert "full_text" not in header and "segments" not in header
+        blocks = db.docs["transcripts/transcript_m1/blocks"]
+        assert all(isinstance(b["data"], bytes) for b in blocks.values())
+        assert read_text(db, read_header(db, "m1")) == transcript.full_text
+
+    def test_rewrite_replaces_blocks(self, small_blocks):
+        from app.utils.transcript_store import read_header, read_text, write_transcript
+        db = PersistingFirestore()
+        write_transcript(db, _transcript(10))
+        header = write_transcript(db, _transcript(4, text="new text"))
+
+        block_ids = set(db.docs["transcripts/transcript_m1/blocks"])
+        expected = {b["id"] for b in header["segment_blocks"]} | set(header["text_blocks"])
+        assert block_ids == expected
+        assert read_text(db, read_header(db, "m1")) == "new text"
+
+
+class TestRangedReads:
+    def test_segment_range_reads_only_overlapping_blocks(self, small_blocks):
+        from app.utils import transcript_store
+        db = PersistingFirestore()
+        transcript_store.write_transcript(db, _transcript(10))
+        header = transcript_store.read_header(db, "m1")
+
+        read = []
+        original = transcript_store._read_block
+        def tracking(db_, header_, block_id):
+            read.append(block_id)
+            return original(db_, header_, block_id)
+
+        from unittest.mock import patch
+        with patch.object(transcript_store, "_read_block", side_effect=tracking):
+            segments, first, end = transcript_store.read_segments(db, header, start=4, end=6)
+
+        assert [s["text"] for s in segments] == ["line 4", "line 5"]
+        assert (first, end) == (4, 6)
+        assert len(read) == 1
+
+    def test_time_range(self, small_blocks):
+        from app.utils.transcript_store import read_header, read_segments, write_transcript
+        db = PersistingFirestore()
+        write_transcript(db, _transcript(10))
+
+        segments, first, end = read_segments(db, read_header(db, "m1"), start_time=25, end_time=41)
+
+        assert [s["text"] for s in segments] == ["line 2", "line 3", "line 4"]
+        assert (first, end) == (2, 5)
+
+    def test_legacy_documents_are_read_inline(self):
+        from app.utils.transcript_store import header_text_hash, read_header, read_segments, read_text
+        from app.utils.transcript_processor import transcript_hash
+        db = PersistingFirestore()
+        db.docs["transcripts"] = {"legacy_doc": {
+            "meeting_id": "m1", "full_text": "old text",
+            "segments": [{"speaker": "A", "text": "old text", "start_time": 0, "end_time": 5}],
+        }}
+
+        header = read_header(db, "m1")
+        assert read_text(db, header) == "old text"
+        assert read_segments(db, header, start=0, end=1)[0][0]["speaker"] == "A"
+        assert header_text_hash(header) == transcript_hash("old text")
+
+
+class TestDelete:
+    def test_removes_header_and_blocks(self, small_blocks):
+        from app.utils.transcript_store import delete_transcript, write_transcript
+        db = PersistingFirestore()
+        write_transcript(db, _transcript(5))
+
+        delete_transcript(db, "m1")
+
+        assert db.docs.get("transcripts") == {}
+        assert "transcripts/transcript_m1/blocks" not in db.docs
@@ -0,0 +1,166 @@
+"""Tests for memory-mapped vector index snapshots."""
+
+import json
+
+import numpy as np
+import pytest
+from unittest.mock import patch
+
+from tests.conftest import MockFirestoreClient, MockDocumentSnapshot
+
+
+def _emb_doc(chunk_id, vec, indexed_at, agent_id="agent_1"):
+    return MockDocumentSnapshot(chunk_id, {
+        "chunk_id": chunk_id,
+        "document_id": "doc_1",
+        "content": f"content {chunk_id}",
+        "embedding": vec,
+        "metadata": {"agent_id": agent_id},
+        "indexed_at": indexed_at,
+    })
+
+
+def _make_index(tmp_path, refresh_seconds=0.0):
+    from app.utils.vector_index import VectorIndex
+    from app.utils.vector_store import decode_embedding
+    return VectorIndex(str(tmp_path), "embeddings", decode_embedding, refresh_seconds=refresh_seconds)
+
+
+class TestScopeIndex:
+    def test_upsert_replaces_base_row(self):
+        from app.utils.vector_index import ScopeIndex
+        index = ScopeIndex(
+            np.array([[1.0, 0.0]], dtype=np.float32),
+            [{"chunk_id": "a", "content": "old"}],
+        )
+        index.upsert({"chunk_id": "a", "content": "new"}, np.array([0.0, 1.0]))
+        results = index.search(np.array([0.0, 1.0]), top_k=5)
+        assert [r["content"] for r in results] == ["new"]
+
+    def test_remove_respects_reindex_after_delete(self):
+        from app.utils.vector_index import ScopeIndex
+        index = ScopeIndex(np.zeros((0, 0), dtype=np.float32), [])
+        index.upsert({"chunk_id": "a", "indexed_at": "2026-02-01"}, np.array([1.0, 0.0]))
+        index.remove("a", deleted_at="2026-01-01")
+        assert len(index.search(np.array([1.0, 0.0]), top_k=5)) == 1
+        index.remove("a", deleted_at="2026-03-01")
+        assert index.search(np.array([1.0, 0.0]), top_k=5) == []
+
+    def test_dimension_mismatch_returns_empty(self):
+        from app.utils.vector_index import ScopeIndex
+        index = ScopeIndex(np.array([[1.0, 0.0]], dtype=np.float32), [{"chunk_id": "a"}])
+        assert index.search(np.array([1.0, 0.0, 0.0]), top_k=5) == []
+
+
+    def test_candidates_restrict_scoring(self):
+        from app.utils.vector_index import ScopeIndex
+        index = ScopeIndex(
+            np.array([[1.0, 0.0], [0.0, 1.0]], dtype=np.float32),
+            [{"chunk_id": "a"}, {"chunk_id": "b"}],
+        )
+        results = index.search(np.array([1.0, 0.0]), top_k=5, candidates={"b"})
+        assert [r["chunk_id"] for r in results] == ["b"]
+
+    def test_lexical_search_tracks_updates(self):
+        from app.utils.vector_index import ScopeIndex
+        index = ScopeIndex(
+            np.array([[1.0, 0.0]], dtype=np.float32),
+            [{"chunk_id": "a", "content": "invoice INV-7 overdue"}],
+        )
+        assert [r["chunk_id"] for r in index.lexical_search("INV-7", 5)] == ["a"]
+        index.upsert({"chunk_id": "b", "content": "INV-7 paid"}, np.array([0.0, 1.0]))
+        index.remove("a")
+        assert [r["chunk_id"] for r in index.lexical_search("INV-7", 5)] == ["b"]
+
+    def test_unchanged_rows_keep_lexical_index(self):
+        from app.utils.vector_index import ScopeIndex
+        index = ScopeIndex(
+            np.array([[1.0, 0.0]], dtype=np.float32),
+            [{"chunk_id": "a", "content": "INV-7", "indexed_at": "2026-01-01"}],
+        )
+        index.lexical_search("INV-7", 5)
+        built = index._lexical
+        index.upsert({"chunk_id": "a", "content": "INV-7", "indexed_at": "2026-01-01"}, np.array([1.0, 0.0]))
+        index.remove("gone", deleted_at="2026-01-02")
+        index.lexical_search("INV-7", 5)
+        assert index._lexical is built
+        assert index.pending_changes == 0
+
+
+class TestVectorIndex:
+    @pytest.mark.asyncio
+    async def test_cold_start_writes_mmapped_snapshot(self, tmp_path):
+        db = MockFirestoreClient()
+        db.set_collection("embeddings", [
+            _emb_doc("a", [1.0, 0.0], "2026-01-01T00:00:00"),
+            _emb_doc("b", [0.0, 1.0], "2026-01-02T00:00:00"),
+            _emb_doc("other", [1.0, 0.0], "2026-01-03T00:00:00", agent_id="agent_2"),
+        ])
+        with patch("app.utils.vector_index.get_firestore_client", return_value=db):
+            results = await _make_index(tmp_path).search([1.0, 0.1], agent_id="agent_1", top_k=5)
+
+        assert [r["chunk_id"] for r in results] == ["a", "b"]
+        manifest = json.loads(next(tmp_path.glob("*.json")).read_text())
+        assert manifest["high_water_mark"] >= "2026-01-02T00:00:00"
+        assert len(manifest["entries"]) == 2
+        assert all("content" not in row for row in manifest["entries"])
+
+        # A second worker loads the snapshot memory-mapped and applies only the delta
+        db.set_collection("embeddings", [_emb_doc("c", [0.6, 0.8], "2026-01-05T00:00:00")])
+        with patch("app.utils.vector_index.get_firestore_client", return_value=db):
+            second = _make_index(tmp_path)
+            scope = await second.get_scope("agent_1", None)
+            results = await second.search([0.6, 0.8], agent_id="agent_1", top_k=5)
+
+        assert isinstance(scope.matrix, np.memmap)
+        assert results[0]["chunk_id"] == "c"
+        assert {r["chunk_id"]: r["content"] for r in results} == {
+            "a": "content a", "b": "content b", "c": "content c",
+        }
+
+    @pytest.mark.asyncio
+    async def test_late_commit_below_watermark_is_applied(self, tmp_path):
+        db = MockFirestoreClient()
+        db.set_collection("embeddings", [_emb_doc("a", [1.0, 0.0], "2026-01-01T00:10:00+00:00")])
+        index = _make_index(tmp_path)
+        with patch("app.utils.vector_index.get_firestore_client", return_value=db):
+            await index.search([1.0, 0.0], agent_id="agent_1")
+            # Committed by a slower batch, stamped before the current high-water mark
+            db.set_collection("embeddings", [
+                _emb_doc("a", [1.0, 0.0], "2026-01-01T00:10:00+00:00"),
+                _emb_doc("late", [0.0, 1.0], "2026-01-01T00:09:00+00:00"),
+            ])
+            results = await index.search([0.0, 1.0], agent_id="agent_1")
+
+        assert results[0]["chunk_id"] == "late"
+
+    @pytest.mark.asyncio
+    async def test_compaction_keeps_only_current_generation(self, tmp_path):
+        db = MockFirestoreClient()
+        db.set_collection("embeddings", [_emb_doc("a", [1.0, 0.0], "2026-01-01T00:00:00")])
+        with patch("app.utils.vector_index.get_firestore_client", return_value=db):
+            index = _make_index(tmp_path)
+            scope = await index.get_scope("agent_1", None)
+            index._write_snapshot(next(tmp_path.glob("*.json")).stem, scope)
+
+        manifest = json.loads(next(tmp_path.glob("*.json")).read_text())
+        assert {p.name for p in tmp_path.glob("*.npy")} == {manifest["matrix"]}
+        assert {p.name for p in tmp_path.glob("*.txt")} == {manifest["content"]}
+        assert not list(tmp_path.glob("*.tmp"))
+
+    @pytest.mark.asyncio
+    async def test_tombstones_remove_rows(self, tmp_path):
+        db = MockFirestoreClient()
+        db.set_collection("embeddings", [
+            _emb_doc("a", [1.0, 0.0], "2026-01-01T00:00:00"),
+            _emb_doc("b", [0.0, 1.0], "2026-01-01T00:00:00"),
+        ])
+        index = _make_index(tmp_path)
+        with patch("app.utils.vector_index.get_firestore_client", return_value=db):
+            await index.search([1.0, 0.0], agent_id="agent_1")
+            db.set_collection("embedding_tombstones", [
+                MockDocumentSnapshot("a", {"chunk_id": "a", "deleted_at": "2026-02-01T00:00:00"}),
+            ])
+            results = await index.search([1.0, 0.0], agent_id="agent_1")
+
+        assert [r["chunk_id"] for r in results] == ["b"]